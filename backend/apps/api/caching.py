@@ -0,0 +1,66 @@
+"""
+Cache de respuestas GET con ETag.
+
+La clave combina la ruta, los query params, el formato negociado (JSON,
+MessagePack...) y la versión de datos de planificación: cualquier cambio
+confirmado genera claves nuevas, así que
+no hace falta borrar entradas. Un If-None-Match igual al ETag actual se
+responde con 304 sin calcular ni leer la cache.
+"""
+import hashlib
+from typing import Callable, Iterable
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from apps.planning.services.data_version import get_data_version
+
+
+RESPONSE_CACHE_KEY = 'api_response:{digest}'
+
+
+def cached_response(request, compute: Callable[[], Response], extra_key: Iterable[str] = ()) -> Response:
+    """
+    Devuelve la respuesta de compute() cacheada por versión de datos.
+
+    Args:
+        request: Request GET de DRF
+        compute: Calcula la respuesta (solo se cachean las 200)
+        extra_key: Partes adicionales de la clave (ej: fecha de hoy si la
+            respuesta depende de ella)
+    """
+    if not getattr(settings, 'API_RESPONSE_CACHE', True):
+        return compute()
+
+    params = sorted(request.query_params.lists())
+    # Cada formato (según Accept) tiene su ETag: un 304 no debe reutilizar
+    # el cuerpo JSON como MessagePack
+    media_type = request.accepted_renderer.media_type
+    parts = [request.path, repr(params), media_type, get_data_version(), *extra_key]
+    digest = hashlib.sha1('|'.join(parts).encode()).hexdigest()
+    etag = quote_etag(digest)
+
+    # Comparación débil: las respuestas comprimidas llevan W/ (compression.py)
+    client_etags = {tag.removeprefix('W/') for tag in parse_etags(request.headers.get('If-None-Match', ''))}
+    if etag in client_etags:
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        key = RESPONSE_CACHE_KEY.format(digest=digest)
+        data = cache.get(key)
+        if data is not None:
+            response = Response(data)
+        else:
+            response = compute()
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            cache.set(key, response.data, getattr(settings, 'API_RESPONSE_CACHE_TIMEOUT', 86400))
+
+    response['ETag'] = etag
+    # El cliente debe revalidar siempre (barato: 304)
+    response['Cache-Control'] = 'no-cache'
+    patch_vary_headers(response, ['Accept'])
+    return response
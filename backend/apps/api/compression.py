@@ -0,0 +1,73 @@
+"""
+Compresión de respuestas según Accept-Encoding: brotli si está instalado
+(pip install brotli) y el cliente lo acepta, si no gzip.
+
+Solo para los endpoints de lectura con cuerpos grandes (rejilla semanal);
+el resto de la API no la necesita.
+"""
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_string
+from rest_framework import status
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dependencia opcional
+    brotli = None
+
+
+# Por debajo de esto la compresión no compensa
+MIN_COMPRESS_SIZE = 1024
+
+BROTLI_QUALITY = 5
+
+
+def accepted_encoding(header: str):
+    """'br', 'gzip' o None según el Accept-Encoding (se ignoran los q=0)."""
+    accepted = set()
+    for part in header.split(','):
+        coding, _, params = part.partition(';')
+        name, _, quality = params.strip().partition('=')
+        try:
+            if name.strip().lower() == 'q' and float(quality) == 0:
+                continue
+        except ValueError:
+            continue
+        accepted.add(coding.strip().lower())
+
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted:
+        return 'gzip'
+    return None
+
+
+def compress_response(request, response):
+    """
+    Comprime el cuerpo de una respuesta de DRF ya finalizada.
+    El ETag pasa a débil: el mismo contenido con otra codificación.
+    """
+    patch_vary_headers(response, ('Accept-Encoding',))
+    if response.status_code != status.HTTP_200_OK or response.has_header('Content-Encoding'):
+        return response
+
+    encoding = accepted_encoding(request.headers.get('Accept-Encoding', ''))
+    if encoding is None:
+        return response
+
+    response.render()
+    if len(response.content) < MIN_COMPRESS_SIZE:
+        return response
+    if encoding == 'br':
+        content = brotli.compress(response.content, quality=BROTLI_QUALITY)
+    else:
+        content = compress_string(response.content)
+    if len(content) >= len(response.content):
+        return response
+
+    response.content = content
+    response['Content-Length'] = str(len(content))
+    response['Content-Encoding'] = encoding
+    etag = response.get('ETag')
+    if etag and not etag.startswith('W/'):
+        response['ETag'] = f'W/{etag}'
+    return response
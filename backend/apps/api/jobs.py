@@ -0,0 +1,177 @@
+"""
+Handlers de trabajos en segundo plano para los endpoints pesados.
+Cada handler recibe el BackgroundJob y devuelve el mismo payload que
+devolvería el endpoint síncrono.
+"""
+import os
+import tempfile
+from datetime import date
+
+from django.conf import settings
+
+from apps.jobs.queue import register
+from apps.rooms.importers import ProtelCSVImporter
+from apps.rooms.models import ProtelImportLog
+from apps.planning.models import WeekPlan, DailyPlan
+from apps.planning.services import WeekPlanGenerator, DailyPlanGenerator
+
+from . import serializers
+
+
+def _progress_lines(job, file, total_bytes, every=1000):
+    """Itera las líneas del archivo reportando progreso por bytes leídos."""
+    read = 0
+    for line_number, line in enumerate(file, start=1):
+        read += len(line)
+        if total_bytes and line_number % every == 0:
+            job.report_progress(read * 100 // total_bytes, f'{line_number} líneas leídas')
+        yield line
+
+
+@register('PROTEL_IMPORT')
+def run_protel_import(job):
+    params = job.params
+
+    # El log se crea antes de importar para que un reintento reanude
+    resume_log_id = params.get('resume_log_id')
+    if resume_log_id:
+        import_log = ProtelImportLog.objects.get(pk=resume_log_id)
+    else:
+        import_log = ProtelImportLog.objects.create(
+            filename=params.get('filename', 'import.csv'),
+            imported_by=params.get('imported_by', ''),
+        )
+        job.params = {**params, 'resume_log_id': import_log.id}
+        job.save(update_fields=['params'])
+
+    importer = ProtelCSVImporter()
+    with job.input_file.open('rb') as file:
+        success, import_log = importer.import_stream(
+            _progress_lines(job, file, job.input_file.size),
+            resume_log=import_log,
+        )
+
+    return {
+        'success': success,
+        'import_log': serializers.ProtelImportLogSerializer(import_log).data,
+        'summary': importer.get_summary(),
+    }
+
+
+@register('FORECAST_UPLOAD')
+def run_forecast_upload(job):
+    from .views import ForecastUploadView
+
+    job.report_progress(10, 'Leyendo PDF')
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp:
+        with job.input_file.open('rb') as file:
+            for chunk in file.chunks():
+                tmp.write(chunk)
+        tmp_path = tmp.name
+
+    try:
+        result, status_code = ForecastUploadView().process_pdf(tmp_path)
+    finally:
+        os.unlink(tmp_path)
+
+    if status_code >= 400:
+        raise ValueError(result['error'])
+    return result
+
+
+@register('WEEKPLAN_GENERATE')
+def run_weekplan_generate(job):
+    week_start = date.fromisoformat(job.params['week_start_date'])
+
+    job.report_progress(10, 'Generando plan semanal')
+    week_plan = WeekPlanGenerator().generate_week_plan(week_start, created_by=job.created_by)
+    week_plan = serializers.WeekPlanSerializer.setup_eager_loading(WeekPlan.objects.all()).get(pk=week_plan.pk)
+    return serializers.WeekPlanSerializer(week_plan).data
+
+
+@register('WEEKPLAN_OPTIMIZE')
+def run_weekplan_optimize(job):
+    from apps.planning.services.assignment_optimizer import AssignmentOptimizer
+
+    week_plan = WeekPlan.objects.get(pk=job.params['week_plan_id'])
+    if week_plan.status == 'PUBLISHED':
+        raise ValueError('No se puede optimizar un plan publicado')
+
+    job.report_progress(10, 'Optimizando asignaciones')
+    result = AssignmentOptimizer().optimize_assignments(
+        week_plan,
+        engine=job.params.get('engine', 'greedy'),
+        time_budget=job.params.get('time_budget'),
+    )
+    return {
+        'success': True,
+        'message': f'Se removieron {len(result["removed"])} asignaciones excedentes',
+        'changes': result,
+    }
+
+
+@register('DAILYPLAN_GENERATE')
+def run_dailyplan_generate(job):
+    target_date = date.fromisoformat(job.params['date'])
+    week_plan = None
+    if job.params.get('week_plan_id'):
+        week_plan = WeekPlan.objects.get(pk=job.params['week_plan_id'])
+
+    job.report_progress(10, 'Generando plan diario')
+    daily_plan = DailyPlanGenerator().generate_daily_plan(
+        target_date, week_plan, time_budget=job.params.get('time_budget')
+    )
+    daily_plan = serializers.DailyPlanSerializer.setup_eager_loading(DailyPlan.objects.all()).get(pk=daily_plan.pk)
+    return serializers.DailyPlanSerializer(daily_plan).data
+
+
+@register('DAILYPLAN_GENERATE_RANGE')
+def run_dailyplan_generate_range(job):
+    from apps.planning.services.daily_plan_batch import DailyPlanBatchGenerator
+
+    params = job.params
+    week_plan = None
+    if params.get('week_plan_id'):
+        week_plan = WeekPlan.objects.get(pk=params['week_plan_id'])
+
+    job.report_progress(10, 'Generando planes diarios')
+    return DailyPlanBatchGenerator().generate(
+        date_from=date.fromisoformat(params['date_from']) if params.get('date_from') else None,
+        date_to=date.fromisoformat(params['date_to']) if params.get('date_to') else None,
+        week_plan=week_plan,
+        only_missing=params.get('only_missing', False),
+        time_budget=params.get('time_budget'),
+        workers=getattr(settings, 'DAILY_PLAN_BATCH_WORKERS', None),
+    )
+
+
+@register('WEEKPLAN_HORIZON')
+def run_weekplan_horizon(job):
+    from apps.planning.services.horizon_planner import HorizonPlanner
+
+    params = job.params
+    job.report_progress(10, 'Generando planes semanales')
+    return HorizonPlanner().plan(
+        date.fromisoformat(params['week_start']),
+        params['forecast'],
+        weeks=params.get('weeks'),
+        created_by=job.created_by,
+        max_consecutive_days=params.get('max_consecutive_days'),
+    )
+
+
+@register('WEEKPLAN_REPAIR')
+def run_weekplan_repair(job):
+    from apps.planning.services.schedule_repair import ScheduleRepairer
+
+    params = job.params
+    week_plan = WeekPlan.objects.get(pk=params['week_plan_id'])
+    job.report_progress(10, 'Reparando plan semanal')
+    return ScheduleRepairer().repair(
+        week_plan,
+        dates=[date.fromisoformat(day) for day in params.get('dates') or []],
+        employee_id=params.get('employee_id'),
+        forecast=params.get('forecast'),
+        time_budget=params.get('time_budget'),
+        dry_run=params.get('dry_run', False),
+    )
@@ -0,0 +1,45 @@
+"""
+Renderers adicionales de la API.
+
+MessagePack es opcional (pip install msgpack): si no está instalado el
+renderer no se ofrece y las peticiones que lo piden reciben 406.
+"""
+from datetime import date, datetime, time
+from decimal import Decimal
+
+from rest_framework.renderers import BaseRenderer
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - dependencia opcional
+    msgpack = None
+
+
+def _encode(value):
+    """Tipos que msgpack no conoce, como los serializa DjangoJSONEncoder."""
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f'Tipo no serializable: {type(value).__name__}')
+
+
+class MessagePackRenderer(BaseRenderer):
+    """Respuestas en MessagePack (Accept: application/msgpack o ?format=msgpack)."""
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=_encode, use_bin_type=True)
+
+
+def with_msgpack(renderer_classes):
+    """renderer_classes más MessagePack si está instalado."""
+    renderer_classes = list(renderer_classes)
+    if msgpack is not None:
+        renderer_classes.append(MessagePackRenderer)
+    return renderer_classes
@@ -1,11 +1,13 @@
 """
 API Serializers.
 """
+from django.db.models import Count, Prefetch, Q, Sum
 from rest_framework import serializers
 from apps.core.models import TimeBlock, TaskType, Zone, Room, RoomType, Building, DayOfWeek
 from apps.staff.models import Role, Employee, Team, EmployeeUnavailability
 from apps.shifts.models import ShiftTemplate, ShiftSubBlock
 from apps.rooms.models import RoomDailyState, RoomDailyTask, ProtelImportLog
+from apps.jobs.models import BackgroundJob
 from apps.rules.models import TaskTimeRule, ZoneAssignmentRule, ElasticityRule, PlanningParameter
 from apps.planning.models import (
     WeekPlan, ShiftAssignment, DailyPlan, TaskAssignment,
@@ -184,7 +186,10 @@ class ProtelImportLogSerializer(serializers.ModelSerializer):
     class Meta:
         model = ProtelImportLog
         fields = '__all__'
-        read_only_fields = ['imported_at', 'rows_processed', 'rows_success', 'rows_error', 'status']
+        read_only_fields = [
+            'imported_at', 'rows_processed', 'rows_success', 'rows_error',
+            'rows_committed', 'batches_committed', 'status'
+        ]
 
 
 # === RULES ===
@@ -221,6 +226,10 @@ class PlanningParameterSerializer(serializers.ModelSerializer):
 
 
 # === PLANNING ===
+# setup_eager_loading(queryset) añade lo que lee cada serializer (joins,
+# prefetch y recuentos anotados): el número de queries de un listado no
+# depende del número de filas. Con agregados Django ignora Meta.ordering,
+# así que se repite explícitamente.
 
 class ShiftAssignmentSerializer(serializers.ModelSerializer):
     employee_name = serializers.CharField(source='employee.full_name', read_only=True)
@@ -232,6 +241,13 @@ class ShiftAssignmentSerializer(serializers.ModelSerializer):
         model = ShiftAssignment
         fields = '__all__'
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        # Team.__str__ lee los miembros
+        return queryset.select_related(
+            'employee', 'team', 'shift_template', 'shift_template__time_block', 'week_plan'
+        ).prefetch_related('team__members')
+
     def get_team_name(self, obj):
         return str(obj.team) if obj.team else None
 
@@ -243,9 +259,21 @@ class WeekPlanSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = WeekPlan
-        fields = '__all__'
+        # distribution_bundle: caché interna, se expone vía by_employee/load_explanation
+        exclude = ['distribution_bundle']
+
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return queryset.annotate(
+            assigned_hours_sum=Sum('shift_assignments__assigned_hours')
+        ).order_by(*WeekPlan._meta.ordering).prefetch_related(Prefetch(
+            'shift_assignments',
+            queryset=ShiftAssignmentSerializer.setup_eager_loading(ShiftAssignment.objects.all())
+        ))
 
     def get_total_assigned_hours(self, obj):
+        if hasattr(obj, 'assigned_hours_sum'):
+            return float(obj.assigned_hours_sum or 0)
         return float(obj.get_total_assigned_hours())
 
 
@@ -259,7 +287,15 @@ class WeekPlanListSerializer(serializers.ModelSerializer):
         fields = ['id', 'week_start_date', 'week_end_date', 'name', 'status',
                   'created_at', 'published_at', 'assignment_count']
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return queryset.annotate(
+            annotated_assignment_count=Count('shift_assignments')
+        ).order_by(*WeekPlan._meta.ordering)
+
     def get_assignment_count(self, obj):
+        if hasattr(obj, 'annotated_assignment_count'):
+            return obj.annotated_assignment_count
         return obj.shift_assignments.count()
 
 
@@ -276,10 +312,25 @@ class TaskAssignmentSerializer(serializers.ModelSerializer):
         model = TaskAssignment
         fields = '__all__'
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return queryset.select_related(
+            'room_task', 'room_task__room_daily_state__room', 'room_task__task_type',
+            'employee', 'team', 'zone', 'daily_plan'
+        ).prefetch_related('team__members')
+
     def get_team_name(self, obj):
         return str(obj.team) if obj.team else None
 
 
+def annotate_task_counts(queryset):
+    """Total y completadas por DailyPlan (get_total_tasks / get_completed_tasks)."""
+    return queryset.annotate(
+        task_count=Count('task_assignments'),
+        completed_task_count=Count('task_assignments', filter=Q(task_assignments__status='COMPLETED')),
+    ).order_by(*DailyPlan._meta.ordering)
+
+
 class DailyPlanSerializer(serializers.ModelSerializer):
     task_assignments = TaskAssignmentSerializer(many=True, read_only=True)
     total_tasks = serializers.SerializerMethodField()
@@ -289,10 +340,21 @@ class DailyPlanSerializer(serializers.ModelSerializer):
         model = DailyPlan
         fields = '__all__'
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return annotate_task_counts(queryset).prefetch_related(Prefetch(
+            'task_assignments',
+            queryset=TaskAssignmentSerializer.setup_eager_loading(TaskAssignment.objects.all())
+        ))
+
     def get_total_tasks(self, obj):
+        if hasattr(obj, 'task_count'):
+            return obj.task_count
         return obj.get_total_tasks()
 
     def get_completed_tasks(self, obj):
+        if hasattr(obj, 'completed_task_count'):
+            return obj.completed_task_count
         return obj.get_completed_tasks()
 
 
@@ -305,10 +367,18 @@ class DailyPlanListSerializer(serializers.ModelSerializer):
         model = DailyPlan
         fields = ['id', 'date', 'status', 'total_tasks', 'completed_tasks', 'created_at']
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return annotate_task_counts(queryset)
+
     def get_total_tasks(self, obj):
+        if hasattr(obj, 'task_count'):
+            return obj.task_count
         return obj.get_total_tasks()
 
     def get_completed_tasks(self, obj):
+        if hasattr(obj, 'completed_task_count'):
+            return obj.completed_task_count
         return obj.get_completed_tasks()
 
 
@@ -331,12 +401,26 @@ class PlanningAlertSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
+# === JOBS ===
+
+class BackgroundJobSerializer(serializers.ModelSerializer):
+    """Estado de un trabajo en segundo plano (para polling)."""
+
+    class Meta:
+        model = BackgroundJob
+        exclude = ['input_file']
+
+
 # === SPECIAL SERIALIZERS ===
 
 class CSVImportSerializer(serializers.Serializer):
     """Serializer para importación de CSV."""
     file = serializers.FileField()
     filename = serializers.CharField(required=False)
+    resume_log_id = serializers.IntegerField(
+        required=False,
+        help_text="ID de un ProtelImportLog interrumpido para reanudarlo"
+    )
 
 
 class GenerateWeekPlanSerializer(serializers.Serializer):
@@ -348,6 +432,53 @@ class GenerateDailyPlanSerializer(serializers.Serializer):
     """Serializer para generar plan diario."""
     date = serializers.DateField()
     week_plan_id = serializers.IntegerField(required=False)
+    # Segundos de búsqueda del router de zonas por bloque
+    time_budget = serializers.FloatField(required=False)
+
+
+class GenerateDailyPlanRangeSerializer(serializers.Serializer):
+    """Serializer para generar los planes diarios de una semana o un rango."""
+    week_plan_id = serializers.IntegerField(required=False)
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    # Saltar también los días que ya tienen plan en borrador
+    only_missing = serializers.BooleanField(default=False)
+    time_budget = serializers.FloatField(required=False)
+
+    def validate(self, data):
+        if not data.get('week_plan_id') and not (data.get('date_from') and data.get('date_to')):
+            raise serializers.ValidationError('Indicar week_plan_id o date_from y date_to')
+        return data
+
+
+class PlanHorizonSerializer(serializers.Serializer):
+    """Serializer para generar los planes semanales de varias semanas."""
+    week_start = serializers.DateField()
+    # Un día por elemento desde week_start: {departures, arrivals, occupied}
+    forecast = serializers.ListField(child=serializers.DictField(), allow_empty=False)
+    weeks = serializers.IntegerField(required=False, min_value=1)
+    max_consecutive_days = serializers.IntegerField(required=False, min_value=1)
+
+    def validate_week_start(self, value):
+        if value.weekday() != 0:
+            raise serializers.ValidationError('week_start debe ser un lunes')
+        return value
+
+
+class WeekPlanRepairSerializer(serializers.Serializer):
+    """Serializer para reparar los días afectados de un plan semanal."""
+    dates = serializers.ListField(child=serializers.DateField(), required=False)
+    # Empleado con una indisponibilidad nueva
+    employee_id = serializers.IntegerField(required=False)
+    # Días con forecast nuevo: {date, departures, arrivals, occupied}
+    forecast = serializers.ListField(child=serializers.DictField(), required=False)
+    time_budget = serializers.FloatField(required=False)
+    dry_run = serializers.BooleanField(default=False)
+
+    def validate(self, data):
+        if not data.get('dates') and data.get('employee_id') is None and not data.get('forecast'):
+            raise serializers.ValidationError('Indicar dates, employee_id o forecast')
+        return data
 
 
 class LoadSummarySerializer(serializers.Serializer):
@@ -45,6 +45,9 @@ router.register(r'task-assignments', views.TaskAssignmentViewSet)
 router.register(r'load-summaries', views.DailyLoadSummaryViewSet)
 router.register(r'alerts', views.PlanningAlertViewSet)
 
+# Jobs
+router.register(r'jobs', views.BackgroundJobViewSet)
+
 urlpatterns = [
     # Router URLs
     path('', include(router.urls)),
@@ -58,4 +61,6 @@ urlpatterns = [
     # Forecast & WeekPlan generation
     path('forecast/generate-weekplan/', views.ForecastWeekPlanView.as_view(), name='forecast-generate-weekplan'),
     path('forecast/upload/', views.ForecastUploadView.as_view(), name='forecast-upload'),
+    path('forecast/simulate/', views.ForecastScenarioView.as_view(), name='forecast-simulate'),
+    path('forecast/horizon/', views.ForecastHorizonView.as_view(), name='forecast-horizon'),
 ]
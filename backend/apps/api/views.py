@@ -6,6 +6,8 @@ from datetime import datetime, date
 from rest_framework import viewsets, status, views
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from django.conf import settings
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 
@@ -25,9 +27,56 @@ from apps.planning.services import (
 )
 from apps.planning.services.forecast_loader import ForecastLoader
 from apps.planning.services.forecast_pdf_parser import ForecastPDFParser
-from apps.planning.services.daily_distribution import DailyDistributionCalculator
+from apps.planning.services.config_snapshot import get_planning_config
+from apps.planning.services.load_summary import DASHBOARD_LOAD_SOURCES, get_load_summaries
+from apps.planning.services.distribution_bundle import get_distribution_bundle, week_assignments
+from apps.planning.services.week_grid import build_week_grid
+from apps.jobs.models import BackgroundJob
+from apps.jobs import queue as job_queue
 
 from . import serializers
+from .caching import cached_response
+from .compression import compress_response
+from .renderers import with_msgpack
+
+
+def _wants_async(request):
+    """El cliente pide ejecución en segundo plano (?async=1 o async=true en el body)."""
+    value = request.query_params.get('async', request.data.get('async', ''))
+    return str(value).lower() in ('1', 'true', 'yes')
+
+
+def _enqueue_job(request, job_type, params, input_file=None):
+    """
+    Encola un trabajo y responde con su estado para hacer polling
+    en /api/jobs/<id>/. 202 si es nuevo, 200 si la clave de
+    idempotencia ya existía.
+    """
+    idempotency_key = (
+        request.headers.get('Idempotency-Key') or request.data.get('idempotency_key')
+    )
+    try:
+        job, created = job_queue.enqueue(
+            job_type,
+            params,
+            idempotency_key=idempotency_key,
+            input_file=input_file,
+            created_by=str(request.user) if request.user.is_authenticated else '',
+        )
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
+
+    serializer = serializers.BackgroundJobSerializer(job)
+    return Response(
+        serializer.data,
+        status=status.HTTP_202_ACCEPTED if created else status.HTTP_200_OK
+    )
+
+
+def _reload_for_response(serializer_class, instance):
+    """Vuelve a leer instance con el eager loading del serializer (respuesta de una acción)."""
+    queryset = serializer_class.setup_eager_loading(type(instance).objects.all())
+    return queryset.get(pk=instance.pk)
 
 
 # === CORE VIEWSETS ===
@@ -189,24 +238,26 @@ class ProtelImportView(views.APIView):
         uploaded_file = serializer.validated_data['file']
         filename = serializer.validated_data.get('filename', uploaded_file.name)
 
-        try:
-            content = uploaded_file.read().decode('utf-8')
-        except UnicodeDecodeError:
-            try:
-                uploaded_file.seek(0)
-                content = uploaded_file.read().decode('latin-1')
-            except Exception as e:
-                return Response(
-                    {'error': f'Error al leer el archivo: {str(e)}'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
+        resume_log = None
+        resume_log_id = serializer.validated_data.get('resume_log_id')
+        if resume_log_id:
+            resume_log = get_object_or_404(ProtelImportLog, pk=resume_log_id)
+
+        if _wants_async(request):
+            return _enqueue_job(request, 'PROTEL_IMPORT', {
+                'filename': filename,
+                'imported_by': str(request.user) if request.user.is_authenticated else '',
+                'resume_log_id': resume_log.id if resume_log else None,
+            }, input_file=uploaded_file)
 
         importer = ProtelCSVImporter()
         try:
-            success, import_log = importer.import_csv(
-                content,
+            # Se lee el archivo por líneas: no se carga entero en memoria
+            success, import_log = importer.import_stream(
+                uploaded_file,
                 filename=filename,
-                imported_by=str(request.user) if request.user.is_authenticated else ''
+                imported_by=str(request.user) if request.user.is_authenticated else '',
+                resume_log=resume_log
             )
 
             summary = importer.get_summary()
@@ -218,6 +269,8 @@ class ProtelImportView(views.APIView):
                 'summary': summary
             })
 
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response(
                 {'error': str(e)},
@@ -265,6 +318,19 @@ class WeekPlanViewSet(viewsets.ModelViewSet):
             return serializers.WeekPlanListSerializer
         return serializers.WeekPlanSerializer
 
+    def get_queryset(self):
+        if self.action in ('list', 'retrieve'):
+            return self.get_serializer_class().setup_eager_loading(WeekPlan.objects.all())
+        if self.action in ('grid', 'repair'):
+            return WeekPlan.objects.all()
+        return super().get_queryset()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if self.action == 'grid':
+            response = compress_response(request, response)
+        return response
+
     @action(detail=False, methods=['post'])
     def generate(self, request):
         """Genera un nuevo plan semanal."""
@@ -274,13 +340,20 @@ class WeekPlanViewSet(viewsets.ModelViewSet):
 
         week_start = serializer.validated_data['week_start_date']
 
+        if _wants_async(request):
+            return _enqueue_job(request, 'WEEKPLAN_GENERATE', {
+                'week_start_date': week_start.isoformat(),
+            })
+
         generator = WeekPlanGenerator()
         try:
             week_plan = generator.generate_week_plan(
                 week_start,
                 created_by=str(request.user) if request.user.is_authenticated else ''
             )
-            result_serializer = serializers.WeekPlanSerializer(week_plan)
+            result_serializer = serializers.WeekPlanSerializer(
+                _reload_for_response(serializers.WeekPlanSerializer, week_plan)
+            )
             return Response(result_serializer.data, status=status.HTTP_201_CREATED)
 
         except ValueError as e:
@@ -299,7 +372,9 @@ class WeekPlanViewSet(viewsets.ModelViewSet):
         generator = WeekPlanGenerator()
         try:
             new_plan = generator.regenerate_week_plan(week_plan)
-            serializer = serializers.WeekPlanSerializer(new_plan)
+            serializer = serializers.WeekPlanSerializer(
+                _reload_for_response(serializers.WeekPlanSerializer, new_plan)
+            )
             return Response(serializer.data)
         except ValueError as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
@@ -319,117 +394,32 @@ class WeekPlanViewSet(viewsets.ModelViewSet):
         week_plan.published_at = timezone.now()
         week_plan.save()
 
-        serializer = serializers.WeekPlanSerializer(week_plan)
+        serializer = serializers.WeekPlanSerializer(
+            _reload_for_response(serializers.WeekPlanSerializer, week_plan)
+        )
         return Response(serializer.data)
 
     @action(detail=True, methods=['get'])
     def by_employee(self, request, pk=None):
-        """Obtiene el plan organizado por empleado."""
-        from datetime import timedelta
+        """Obtiene el plan organizado por empleado (cacheado, con ETag)."""
+        return cached_response(request, lambda: self._by_employee(request, pk))
+
+    def _by_employee(self, request, pk):
         from collections import OrderedDict
 
         week_plan = self.get_object()
-
-        assignments = week_plan.shift_assignments.select_related(
-            'employee', 'employee__role', 'team', 'shift_template'
-        ).order_by('date')
-
-        # Calcular distribución real por día usando daily_distribution
-        # Esto calcula el spare (tiempo libre) real por empleado
-        daily_employee_spare = {}  # date -> {employee_id -> spare_min}
-
-        # Primero recopilar empleados reales por día y turno
-        employees_by_day_shift = {}  # date -> {'morning': [emp_data...], 'evening': [emp_data...]}
-        for assignment in assignments:
-            if assignment.is_day_off or not assignment.employee:
-                continue
-            date_str = assignment.date.isoformat()
-            if date_str not in employees_by_day_shift:
-                employees_by_day_shift[date_str] = {'morning': [], 'evening': []}
-
-            is_morning = 'MANANA' in (assignment.shift_template.code if assignment.shift_template else '')
-            shift_key = 'morning' if is_morning else 'evening'
-            employees_by_day_shift[date_str][shift_key].append({
-                'id': assignment.employee.id,
-                'employee_id': assignment.employee.id,
-                'employee_short': assignment.employee.first_name,
-            })
-
-        # Calcular distribución real para cada día
-        if week_plan.forecast_data:
-            from apps.planning.services.daily_distribution import DailyDistributionCalculator
-            calc = DailyDistributionCalculator()
-
-            for fc in week_plan.forecast_data:
-                fc_date = fc.get('date')
-                if not fc_date:
-                    continue
-
-                employees = employees_by_day_shift.get(fc_date, {'morning': [], 'evening': []})
-                assigned_day = employees.get('morning', [])
-                assigned_evening = employees.get('evening', [])
-
-                try:
-                    result = calc.calculate_day_distribution(fc, assigned_day, assigned_evening)
-                    periods = result.get('periods', {})
-
-                    # Obtener spare por período (usar per_person_min si existe, sino value/workers)
-                    def get_spare_per_person(period_data):
-                        spare = period_data.get('spare', {})
-                        if 'per_person_min' in spare:
-                            return spare.get('per_person_min', 0)
-                        # Fallback: total / workers
-                        total = spare.get('total_min', spare.get('value', 0))
-                        workers = spare.get('num_workers', 1)
-                        return total / workers if workers > 0 else 0
-
-                    # P1: Solo mañana - spare por persona de mañana
-                    p1_spare_pp = get_spare_per_person(periods.get('p1', {}))
-
-                    # P2: Spare por empleado específico
-                    p2_data = periods.get('p2', {})
-                    p2_employee_spare = p2_data.get('employee_spare', {})
-                    p2_morning_spare_pp = p2_data.get('morning_spare_pp', 0)  # fallback
-                    p2_evening_spare_pp = p2_data.get('evening_spare_pp', 0)  # fallback
-
-                    # P3: Solo tarde - spare por persona de tarde
-                    p3_spare_pp = get_spare_per_person(periods.get('p3', {}))
-
-                    # Couvertures: Solo tarde
-                    couv_spare_pp = get_spare_per_person(periods.get('couvertures', {}))
-
-                    # Construir spare por empleado
-                    employee_spare = {}
-
-                    # Morning workers: P1 spare + su spare específico de P2
-                    for emp in assigned_day:
-                        emp_id = emp.get('id')
-                        if emp_id:
-                            emp_p2_spare = p2_employee_spare.get(emp_id, p2_morning_spare_pp)
-                            employee_spare[emp_id] = p1_spare_pp + emp_p2_spare
-
-                    # Evening workers: su spare específico de P2 + P3 + couvertures
-                    for emp in assigned_evening:
-                        emp_id = emp.get('id')
-                        if emp_id:
-                            emp_p2_spare = p2_employee_spare.get(emp_id, p2_evening_spare_pp)
-                            employee_spare[emp_id] = emp_p2_spare + p3_spare_pp + couv_spare_pp
-
-                    daily_employee_spare[fc_date] = employee_spare
-
-                except Exception as e:
-                    # Si falla el cálculo, usar dict vacío
-                    daily_employee_spare[fc_date] = {}
-
-        # Obtener parejas/equipos para ordenar
-        teams = Team.objects.filter(is_active=True).prefetch_related('members')
-        employee_team_order = {}  # employee_id -> (team_order, member_order)
-        team_counter = 0
-        for team in teams:
-            members = list(team.members.all())
-            for idx, member in enumerate(members):
-                employee_team_order[member.id] = (team_counter, idx)
-            team_counter += 1
+        assignments = week_assignments(week_plan)
+
+        # Spare real por empleado y orden de parejas, compartidos con load_explanation
+        bundle = get_distribution_bundle(week_plan, assignments)
+        daily_employee_spare = {
+            day_key: day['employee_spare']
+            for day_key, day in bundle['days'].items()
+            if day['has_forecast']
+        }
+        employee_team_order = {
+            int(emp_id): tuple(order) for emp_id, order in bundle['team_order'].items()
+        }
 
         # Agrupar por empleado/equipo
         by_assignee = {}
@@ -475,7 +465,7 @@ class WeekPlanViewSet(viewsets.ModelViewSet):
 
                 # Obtener spare específico del empleado
                 emp_id = assignment.employee.id
-                spare_min = employee_spare.get(emp_id, 0)
+                spare_min = employee_spare.get(str(emp_id), 0)
 
                 # Convertir minutos a horas y redondear a 0.5h
                 free_hours = max(0, spare_min / 60)
@@ -504,22 +494,39 @@ class WeekPlanViewSet(viewsets.ModelViewSet):
 
         return Response(sorted_assignees)
 
+    @action(
+        detail=True,
+        methods=['get'],
+        renderer_classes=with_msgpack(api_settings.DEFAULT_RENDERER_CLASSES)
+    )
+    def grid(self, request, pk=None):
+        """
+        Rejilla empleado × día en columnas (ver week_grid). Cacheada, con
+        ETag; gzip/brotli según Accept-Encoding y MessagePack con
+        Accept: application/msgpack si están instalados.
+        """
+        return cached_response(request, lambda: Response(build_week_grid(self.get_object())))
+
     @action(detail=True, methods=['get'])
     def load_explanation(self, request, pk=None):
         """
         Devuelve la explicación de por qué se eligió cada horario.
         Incluye datos del forecast, cálculo de carga, y distribución de tareas.
+        Cacheada por versión de datos, con ETag.
         """
+        return cached_response(request, lambda: self._load_explanation(request, pk))
+
+    def _load_explanation(self, request, pk):
         from datetime import timedelta
 
         week_plan = self.get_object()
 
-        forecast_data = week_plan.forecast_data or []
         load_calculation = week_plan.load_calculation or {}
 
-        # Obtener configuración de turnos desde BD
-        day_block = TimeBlock.objects.filter(code='DAY').first()
-        evening_block = TimeBlock.objects.filter(code='EVENING').first()
+        # Obtener configuración de turnos
+        config = get_planning_config()
+        day_block = config.get_time_block('DAY')
+        evening_block = config.get_time_block('EVENING')
 
         day_start = day_block.start_time.strftime('%H:%M') if day_block and day_block.start_time else '09:00'
         day_end = day_block.end_time.strftime('%H:%M') if day_block and day_block.end_time else '17:00'
@@ -527,10 +534,10 @@ class WeekPlanViewSet(viewsets.ModelViewSet):
         evening_end = evening_block.end_time.strftime('%H:%M') if evening_block and evening_block.end_time else '22:30'
         evening_helps_hours = float(evening_block.helps_other_shift_hours) if evening_block else 4.5
 
-        # Obtener tiempos de tareas desde BD
+        # Obtener tiempos de tareas
         task_times = {}
         task_persons = {}
-        for task in TaskType.objects.all():
+        for task in config.task_types.values():
             task_times[task.code] = task.base_minutes
             task_persons[task.code] = task.persons_required
 
@@ -560,57 +567,23 @@ class WeekPlanViewSet(viewsets.ModelViewSet):
         week_days = [week_plan.week_start_date + timedelta(days=i) for i in range(7)]
         day_names_es = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo']
 
-        # Calculador de distribución diaria
-        distribution_calculator = DailyDistributionCalculator()
-
-        # Obtener asignaciones por día con horarios
-        assignments = week_plan.shift_assignments.select_related(
-            'employee', 'shift_template', 'shift_template__time_block'
-        ).order_by('date')
-
-        assignments_by_day = {}
-        for assignment in assignments:
-            day_key = assignment.date.isoformat()
-            if day_key not in assignments_by_day:
-                assignments_by_day[day_key] = {'DAY': [], 'EVENING': []}
-
-            if assignment.shift_template and assignment.shift_template.time_block:
-                block_code = assignment.shift_template.time_block.code
-                start_time = assignment.shift_template.start_time
-                if block_code in assignments_by_day[day_key]:
-                    # Usar hora de salida del ShiftTemplate directamente
-                    end_time = None
-                    if assignment.shift_template and assignment.shift_template.end_time:
-                        end_time = assignment.shift_template.end_time.strftime('%H:%M')
-
-                    assignments_by_day[day_key][block_code].append({
-                        'employee_id': assignment.employee.id if assignment.employee else None,
-                        'employee': assignment.employee.full_name if assignment.employee else None,
-                        'employee_short': assignment.employee.first_name if assignment.employee else None,
-                        'hours': float(assignment.assigned_hours),
-                        'start_time': start_time.strftime('%H:%M') if start_time else None,
-                        'end_time': end_time,
-                    })
+        # Asignaciones y distribución por día, compartidas con by_employee
+        assignments = week_assignments(week_plan)
+        bundle = get_distribution_bundle(week_plan, assignments)
 
         for i, day_date in enumerate(week_days):
             day_key = day_date.isoformat()
             day_load = load_calculation.get('by_day', {}).get(day_key, {})
 
-            # Buscar forecast del día
-            forecast_day = None
-            for fc in forecast_data:
-                if fc.get('date') == day_key:
-                    forecast_day = fc
-                    break
-
-            fc = forecast_day or {'departures': 0, 'arrivals': 0, 'occupied': 0}
+            bundle_day = bundle['days'][day_key]
+            fc = bundle_day['forecast']
             departures = fc.get('departures', 0)
             arrivals = fc.get('arrivals', 0)
             occupied = fc.get('occupied', 0)
             stays = max(0, occupied - arrivals)
 
-            assigned_day = assignments_by_day.get(day_key, {}).get('DAY', [])
-            assigned_evening = assignments_by_day.get(day_key, {}).get('EVENING', [])
+            assigned_day = bundle_day['assigned']['DAY']
+            assigned_evening = bundle_day['assigned']['EVENING']
 
             # Calcular distribución de tareas por persona
             total_day_workers = len(assigned_day) + len(assigned_evening)  # EVENING ayuda con DAY
@@ -720,13 +693,7 @@ class WeekPlanViewSet(viewsets.ModelViewSet):
                 'explanation_text': '',
             }
 
-            # Calcular distribución diaria con el servicio centralizado
-            daily_distribution = distribution_calculator.calculate_day_distribution(
-                forecast=fc,
-                assigned_day=assigned_day,
-                assigned_evening=assigned_evening,
-            )
-            day_explanation['daily_distribution'] = daily_distribution
+            day_explanation['daily_distribution'] = bundle_day['distribution']
 
             # Calcular distribución de habitaciones por período
             num_day = len(assigned_day)
@@ -846,8 +813,12 @@ class WeekPlanViewSet(viewsets.ModelViewSet):
         """
         Optimiza las asignaciones del plan para minimizar tiempo libre.
         Ajusta el número de personas por día según la carga real de trabajo.
+
+        Body opcional:
+        - engine: 'greedy' (default) o 'local_search'
+        - time_budget: segundos de búsqueda para local_search
         """
-        from apps.planning.services.assignment_optimizer import AssignmentOptimizer
+        from apps.planning.services.assignment_optimizer import AssignmentOptimizer, SOLVER_ENGINES
 
         week_plan = self.get_object()
 
@@ -857,26 +828,84 @@ class WeekPlanViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+        engine = request.data.get('engine', 'greedy')
+        time_budget = request.data.get('time_budget')
+        if engine not in SOLVER_ENGINES:
+            return Response(
+                {'error': f'Motor desconocido: {engine} (opciones: {", ".join(SOLVER_ENGINES)})'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if _wants_async(request):
+            return _enqueue_job(request, 'WEEKPLAN_OPTIMIZE', {
+                'week_plan_id': week_plan.id,
+                'engine': engine,
+                'time_budget': time_budget,
+            })
+
         try:
             optimizer = AssignmentOptimizer()
-            result = optimizer.optimize_assignments(week_plan)
+            result = optimizer.optimize_assignments(week_plan, engine=engine, time_budget=time_budget)
 
             return Response({
                 'success': True,
                 'message': f'Se removieron {len(result["removed"])} asignaciones excedentes',
                 'changes': result,
             })
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response(
                 {'error': str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    @action(detail=True, methods=['post'])
+    def repair(self, request, pk=None):
+        """
+        Repara solo los días afectados por una ausencia o un cambio de
+        forecast, cambiando el mínimo de asignaciones. Devuelve el diff.
+
+        Body:
+        - dates: días a volver a resolver
+        - employee_id: empleado con una indisponibilidad nueva
+        - forecast: días con forecast nuevo [{date, departures, arrivals, occupied}]
+        - time_budget: tope de segundos de búsqueda
+        - dry_run: calcular el diff sin escribir
+        """
+        from apps.planning.services.schedule_repair import ScheduleRepairer
+
+        week_plan = self.get_object()
+        serializer = serializers.WeekPlanRepairSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        if _wants_async(request):
+            return _enqueue_job(request, 'WEEKPLAN_REPAIR', {
+                'week_plan_id': week_plan.id,
+                'dates': [day.isoformat() for day in data.get('dates', [])],
+                'employee_id': data.get('employee_id'),
+                'forecast': data.get('forecast'),
+                'time_budget': data.get('time_budget'),
+                'dry_run': data['dry_run'],
+            })
+
+        try:
+            result = ScheduleRepairer().repair(
+                week_plan,
+                dates=data.get('dates', []),
+                employee_id=data.get('employee_id'),
+                forecast=data.get('forecast'),
+                time_budget=data.get('time_budget'),
+                dry_run=data['dry_run'],
+            )
+            return Response(result)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
 
 class ShiftAssignmentViewSet(viewsets.ModelViewSet):
-    queryset = ShiftAssignment.objects.select_related(
-        'employee', 'team', 'shift_template', 'week_plan'
-    )
+    queryset = serializers.ShiftAssignmentSerializer.setup_eager_loading(ShiftAssignment.objects.all())
     serializer_class = serializers.ShiftAssignmentSerializer
     filterset_fields = ['date', 'is_day_off', 'week_plan']
 
@@ -890,6 +919,11 @@ class DailyPlanViewSet(viewsets.ModelViewSet):
             return serializers.DailyPlanListSerializer
         return serializers.DailyPlanSerializer
 
+    def get_queryset(self):
+        if self.action in ('list', 'retrieve'):
+            return self.get_serializer_class().setup_eager_loading(DailyPlan.objects.all())
+        return super().get_queryset()
+
     @action(detail=False, methods=['post'])
     def generate(self, request):
         """Genera un nuevo plan diario."""
@@ -899,20 +933,79 @@ class DailyPlanViewSet(viewsets.ModelViewSet):
 
         target_date = serializer.validated_data['date']
         week_plan_id = serializer.validated_data.get('week_plan_id')
+        time_budget = serializer.validated_data.get('time_budget')
 
         week_plan = None
         if week_plan_id:
             week_plan = get_object_or_404(WeekPlan, id=week_plan_id)
 
+        if _wants_async(request):
+            return _enqueue_job(request, 'DAILYPLAN_GENERATE', {
+                'date': target_date.isoformat(),
+                'week_plan_id': week_plan_id,
+                'time_budget': time_budget,
+            })
+
         generator = DailyPlanGenerator()
         try:
-            daily_plan = generator.generate_daily_plan(target_date, week_plan)
-            result_serializer = serializers.DailyPlanSerializer(daily_plan)
+            daily_plan = generator.generate_daily_plan(target_date, week_plan, time_budget=time_budget)
+            result_serializer = serializers.DailyPlanSerializer(
+                _reload_for_response(serializers.DailyPlanSerializer, daily_plan)
+            )
             return Response(result_serializer.data, status=status.HTTP_201_CREATED)
 
         except ValueError as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=False, methods=['post'], url_path='generate-range')
+    def generate_range(self, request):
+        """
+        Genera (o regenera los DRAFT) los planes diarios de la semana de un
+        WeekPlan o de un rango de fechas. En la petición los días van en
+        serie; con ?async=1 el job los reparte en el pool de procesos.
+
+        Body:
+            week_plan_id: WeekPlan cuya semana generar
+            date_from, date_to: Rango (en lugar de week_plan_id)
+            only_missing: Saltar también los días con plan en borrador
+            time_budget: Segundos del router de zonas por bloque
+        """
+        from apps.planning.services.daily_plan_batch import DailyPlanBatchGenerator
+
+        serializer = serializers.GenerateDailyPlanRangeSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        params = serializer.validated_data
+        week_plan = None
+        if params.get('week_plan_id'):
+            week_plan = get_object_or_404(WeekPlan, id=params['week_plan_id'])
+
+        if _wants_async(request):
+            return _enqueue_job(request, 'DAILYPLAN_GENERATE_RANGE', {
+                'week_plan_id': params.get('week_plan_id'),
+                'date_from': params['date_from'].isoformat() if params.get('date_from') else None,
+                'date_to': params['date_to'].isoformat() if params.get('date_to') else None,
+                'only_missing': params['only_missing'],
+                'time_budget': params.get('time_budget'),
+            })
+
+        try:
+            result = DailyPlanBatchGenerator().generate(
+                date_from=params.get('date_from'),
+                date_to=params.get('date_to'),
+                week_plan=week_plan,
+                only_missing=params['only_missing'],
+                time_budget=params.get('time_budget'),
+                # Sin pool en el hilo de la petición: crear procesos y cerrar
+                # las conexiones del worker web no es seguro aquí
+                workers=1,
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(result)
+
     @action(detail=True, methods=['post'])
     def regenerate(self, request, pk=None):
         """Regenera un plan diario existente."""
@@ -921,7 +1014,9 @@ class DailyPlanViewSet(viewsets.ModelViewSet):
         generator = DailyPlanGenerator()
         try:
             new_plan = generator.regenerate_daily_plan(daily_plan)
-            serializer = serializers.DailyPlanSerializer(new_plan)
+            serializer = serializers.DailyPlanSerializer(
+                _reload_for_response(serializers.DailyPlanSerializer, new_plan)
+            )
             return Response(serializer.data)
         except ValueError as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
@@ -970,9 +1065,7 @@ class DailyPlanViewSet(viewsets.ModelViewSet):
 
 
 class TaskAssignmentViewSet(viewsets.ModelViewSet):
-    queryset = TaskAssignment.objects.select_related(
-        'room_task', 'employee', 'team', 'zone', 'daily_plan'
-    )
+    queryset = serializers.TaskAssignmentSerializer.setup_eager_loading(TaskAssignment.objects.all())
     serializer_class = serializers.TaskAssignmentSerializer
 
     @action(detail=True, methods=['post'])
@@ -1015,6 +1108,15 @@ class PlanningAlertViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
+# === JOBS VIEWSETS ===
+
+class BackgroundJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """Estado y progreso de los trabajos en segundo plano."""
+    queryset = BackgroundJob.objects.all()
+    serializer_class = serializers.BackgroundJobSerializer
+    filterset_fields = ['status', 'job_type']
+
+
 # === CALCULATION VIEWS ===
 
 class LoadCalculationView(views.APIView):
@@ -1083,6 +1185,10 @@ class DashboardView(views.APIView):
     """Vista para el dashboard de la gouvernante."""
 
     def get(self, request):
+        # Cacheada por versión de datos; la semana por defecto depende de hoy
+        return cached_response(request, lambda: self._get(request), extra_key=[date.today().isoformat()])
+
+    def _get(self, request):
         # Obtener parámetros
         week_start_param = request.query_params.get('week_start')
 
@@ -1095,24 +1201,37 @@ class DashboardView(views.APIView):
             today = date.today()
             week_start = today - timezone.timedelta(days=today.weekday())
 
+        source = request.query_params.get(
+            'source', getattr(settings, 'DASHBOARD_LOAD_SOURCE', 'live')
+        )
+        if source not in DASHBOARD_LOAD_SOURCES:
+            return Response(
+                {'error': f"source inválido (usar {', '.join(DASHBOARD_LOAD_SOURCES)})"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
         # Calcular datos
-        load_calc = LoadCalculator()
-        capacity_calc = CapacityCalculator()
+        if source == 'materialized':
+            week_load, week_capacity = self._materialized_week(week_start)
+        else:
+            load_calc = LoadCalculator()
+            capacity_calc = CapacityCalculator()
 
-        week_load = load_calc.compute_week_load(week_start)
-        week_capacity = capacity_calc.compute_week_capacity(week_start)
+            week_load = load_calc.compute_week_load(week_start)
+            week_capacity = capacity_calc.compute_week_capacity(week_start)
 
         # Obtener alertas activas
         alerts = PlanningAlert.objects.filter(
             is_resolved=False,
             date__gte=week_start,
             date__lt=week_start + timezone.timedelta(days=7)
-        )
+        ).select_related('time_block')
 
         # Construir respuesta
         dashboard = {
             'week_start': week_start,
             'week_end': week_start + timezone.timedelta(days=6),
+            'source': source,
             'load': {
                 'total_minutes': week_load['totals']['minutes'],
                 'total_tasks': week_load['totals']['tasks'],
@@ -1154,6 +1273,40 @@ class DashboardView(views.APIView):
 
         return Response(dashboard)
 
+    def _materialized_week(self, week_start):
+        """
+        Carga y capacidad de la semana desde DailyLoadSummary, con las
+        mismas claves que compute_week_load / compute_week_capacity.
+        """
+        summaries = get_load_summaries(week_start, week_start + timezone.timedelta(days=6))
+
+        week_load = {
+            'days': {},
+            'totals': {'minutes': 0, 'tasks': 0},
+            'by_block': {},
+        }
+        week_capacity = {'days': {}, 'totals': {'minutes': 0}}
+
+        for current_date, blocks in summaries.items():
+            day_load = {'total_minutes': 0, 'total_tasks': 0}
+            day_capacity = {'total_minutes': 0}
+            for block_code, summary in blocks.items():
+                day_load['total_minutes'] += summary.total_minutes_required
+                day_load['total_tasks'] += summary.total_tasks
+                day_capacity['total_minutes'] += summary.total_minutes_available
+
+                block_totals = week_load['by_block'].setdefault(block_code, {'minutes': 0, 'tasks': 0})
+                block_totals['minutes'] += summary.total_minutes_required
+                block_totals['tasks'] += summary.total_tasks
+
+            week_load['days'][current_date.isoformat()] = day_load
+            week_load['totals']['minutes'] += day_load['total_minutes']
+            week_load['totals']['tasks'] += day_load['total_tasks']
+            week_capacity['days'][current_date.isoformat()] = day_capacity
+            week_capacity['totals']['minutes'] += day_capacity['total_minutes']
+
+        return week_load, week_capacity
+
 
 class ForecastWeekPlanView(views.APIView):
     """
@@ -1298,33 +1451,7 @@ class ForecastWeekPlanView(views.APIView):
         from datetime import timedelta
 
         # Preparar datos de carga para guardar
-        load_calculation_data = {
-            'totals': {
-                'total_hours': round(week_load['totals']['total_hours'], 1),
-                'day_shift_hours': round(week_load['totals']['day_minutes'] / 60, 1),
-                'evening_shift_hours': round(week_load['totals']['evening_minutes'] / 60, 1),
-            },
-            'by_day': {},
-        }
-
-        day_names = ['Lun', 'Mar', 'Mié', 'Jue', 'Vie', 'Sáb', 'Dom']
-        for i, (day_key, day_load) in enumerate(week_load['days'].items()):
-            req = requirements['by_day'][day_key]
-            load_calculation_data['by_day'][day_key] = {
-                'day_name': day_names[i],
-                'tasks': day_load['tasks'],
-                'shifts': {
-                    'DAY': {
-                        'hours': round(day_load['shifts']['DAY']['hours'], 1),
-                        'persons_needed': req['day_shift']['persons_needed'],
-                    },
-                    'EVENING': {
-                        'hours': round(day_load['shifts']['EVENING']['hours'], 1),
-                        'persons_needed': req['evening_shift']['persons_needed'],
-                    },
-                },
-                'total_hours': round(day_load['total_hours'], 1),
-            }
+        load_calculation_data = ForecastLoader.build_load_calculation(week_load, requirements)
 
         # Crear o actualizar WeekPlan
         week_plan, created = WeekPlan.objects.update_or_create(
@@ -1352,14 +1479,15 @@ class ForecastWeekPlanView(views.APIView):
         ).order_by('last_name')
 
         # Obtener equipos/parejas activos
-        teams = list(Team.objects.filter(is_active=True).prefetch_related('members'))
+        config = get_planning_config()
+        teams = list(config.get_teams())
 
         # Obtener indisponibilidades para la semana
         week_end = week_start + timedelta(days=6)
         unavailabilities = EmployeeUnavailability.objects.filter(
             date_start__lte=week_end,
             date_end__gte=week_start
-        )
+        ).order_by()
         unavailable_dates = {}
         for u in unavailabilities:
             if u.employee_id not in unavailable_dates:
@@ -1371,7 +1499,9 @@ class ForecastWeekPlanView(views.APIView):
 
         # Obtener plantillas de turno por rol y bloque
         shift_templates = {}
-        for st in ShiftTemplate.objects.filter(is_active=True).select_related('role', 'time_block'):
+        for st in config.shift_templates:
+            if not st.is_active:
+                continue
             key = (st.role.code if st.role else None, st.time_block.code if st.time_block else None)
             shift_templates[key] = st
 
@@ -1546,9 +1676,9 @@ class ForecastWeekPlanView(views.APIView):
         # 2. Luego: Cubrir MAÑANA (considerando que TARDE ayuda con tareas DAY)
         # 3. Finalmente: Balancear si es necesario
 
-        # Mínimos desde BD
-        day_block = TimeBlock.objects.filter(code='DAY').first()
-        evening_block = TimeBlock.objects.filter(code='EVENING').first()
+        # Mínimos desde la configuración
+        day_block = config.get_time_block('DAY')
+        evening_block = config.get_time_block('EVENING')
         min_day_staff = day_block.min_staff if day_block else 2
         min_evening_staff = evening_block.min_staff if evening_block else 2
 
@@ -1779,7 +1909,7 @@ class ForecastWeekPlanView(views.APIView):
                     'max_extra_day': float(rule.max_extra_hours_day),
                     'priority': rule.assignment_priority,
                 }
-                for rule in ElasticityRule.objects.all()
+                for rule in config.elasticity_rules.values()
             }
 
             # Empleados DAY con elasticidad MEDIUM o HIGH que pueden hacer EVENING
@@ -1820,7 +1950,7 @@ class ForecastWeekPlanView(views.APIView):
 
             if evening_shift_template:
                 # Obtener horas de couverture desde BD
-                couverture_task = TaskType.objects.filter(code='COUVERTURE').first()
+                couverture_task = config.task_types.get('COUVERTURE')
                 if couverture_task and couverture_task.earliest_start_time and couverture_task.latest_end_time:
                     from datetime import datetime as dt
                     start = dt.combine(week_start, couverture_task.earliest_start_time)
@@ -1917,6 +2047,9 @@ class ForecastUploadView(views.APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+        if _wants_async(request):
+            return _enqueue_job(request, 'FORECAST_UPLOAD', {}, input_file=pdf_file)
+
         # Guardar temporalmente
         import tempfile
         import os
@@ -1927,132 +2060,231 @@ class ForecastUploadView(views.APIView):
             tmp_path = tmp.name
 
         try:
-            # Parsear PDF
-            parser = ForecastPDFParser()
-            parsed_data = parser.parse_pdf(tmp_path)
+            result, status_code = self.process_pdf(tmp_path)
+            return Response(result, status=status_code)
 
-            if 'error' in parsed_data:
-                return Response(
-                    {'error': parsed_data['error']},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
+        except Exception as e:
+            import traceback
+            return Response(
+                {'error': f'Error al procesar PDF: {str(e)}',
+                 'traceback': traceback.format_exc()},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+        finally:
+            # Limpiar archivo temporal
+            os.unlink(tmp_path)
 
-            week_start_str = parsed_data.get('week_start')
-            forecast_data = parsed_data.get('forecast', [])
+    def process_pdf(self, pdf_path):
+        """
+        Parsea el PDF, genera el WeekPlan y sus asignaciones.
+        Usado tanto por el request síncrono como por el trabajo en segundo plano.
 
-            if not week_start_str or len(forecast_data) < 7:
-                return Response(
-                    {'error': 'No se pudieron extraer suficientes datos del PDF',
-                     'parsed': parsed_data},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
+        Returns:
+            Tuple de (datos de respuesta, código HTTP)
+        """
+        # Parsear PDF
+        parser = ForecastPDFParser()
+        parsed_data = parser.parse_pdf(pdf_path)
 
-            # Usar solo los primeros 7 días
-            forecast_data = forecast_data[:7]
+        if 'error' in parsed_data:
+            return {'error': parsed_data['error']}, status.HTTP_400_BAD_REQUEST
 
-            try:
-                week_start = datetime.strptime(week_start_str, '%Y-%m-%d').date()
-            except ValueError:
-                return Response(
-                    {'error': 'Error al parsear fecha de inicio'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
+        week_start_str = parsed_data.get('week_start')
+        forecast_data = parsed_data.get('forecast', [])
 
-            # Procesar forecast
-            processed_forecast = []
-            for i, day_data in enumerate(forecast_data):
-                day_date = week_start + timezone.timedelta(days=i)
-                processed_forecast.append({
-                    'date': day_date,
-                    'departures': int(day_data.get('departures', 0)),
-                    'arrivals': int(day_data.get('arrivals', 0)),
-                    'occupied': int(day_data.get('occupied', 0)),
-                })
+        if not week_start_str or len(forecast_data) < 7:
+            return (
+                {'error': 'No se pudieron extraer suficientes datos del PDF',
+                 'parsed': parsed_data},
+                status.HTTP_400_BAD_REQUEST
+            )
 
-            # Calcular carga
-            loader = ForecastLoader()
-            week_load = loader.calculate_week_load(processed_forecast)
-            requirements = loader.calculate_staffing_requirements(week_load)
+        # Usar solo los primeros 7 días
+        forecast_data = forecast_data[:7]
 
-            # Preparar forecast_data para guardar
-            forecast_data_to_save = [
-                {
-                    'date': (week_start + timezone.timedelta(days=i)).isoformat(),
-                    'departures': d['departures'],
-                    'arrivals': d['arrivals'],
-                    'occupied': d['occupied'],
-                }
-                for i, d in enumerate(forecast_data)
-            ]
+        try:
+            week_start = datetime.strptime(week_start_str, '%Y-%m-%d').date()
+        except ValueError:
+            return {'error': 'Error al parsear fecha de inicio'}, status.HTTP_400_BAD_REQUEST
 
-            # Generar WeekPlan (reusar lógica)
-            forecast_view = ForecastWeekPlanView()
-            week_plan = forecast_view._generate_weekplan(
-                week_start, week_load, requirements, forecast_data_to_save
-            )
+        # Procesar forecast
+        processed_forecast = []
+        for i, day_data in enumerate(forecast_data):
+            day_date = week_start + timezone.timedelta(days=i)
+            processed_forecast.append({
+                'date': day_date,
+                'departures': int(day_data.get('departures', 0)),
+                'arrivals': int(day_data.get('arrivals', 0)),
+                'occupied': int(day_data.get('occupied', 0)),
+            })
 
-            # Generar asignaciones óptimas garantizando horas contratadas
-            from apps.planning.services.assignment_optimizer import AssignmentOptimizer
-            optimizer = AssignmentOptimizer()
-            # IMPORTANTE: generate_optimal_assignments asegura que todos cumplan sus horas
-            optimization_result = optimizer.generate_optimal_assignments(week_plan, forecast_data_to_save)
+        # Calcular carga
+        loader = ForecastLoader()
+        week_load = loader.calculate_week_load(processed_forecast)
+        requirements = loader.calculate_staffing_requirements(week_load)
 
-            # Construir respuesta
-            result = {
-                'week_plan_id': week_plan.id,
-                'week_start': week_start.isoformat(),
-                'status': week_plan.status,
-                'parsed_data': {
-                    'forecast': [
-                        {
-                            'date': (week_start + timezone.timedelta(days=i)).isoformat(),
-                            'departures': d['departures'],
-                            'arrivals': d['arrivals'],
-                            'occupied': d['occupied'],
-                        }
-                        for i, d in enumerate(forecast_data)
-                    ]
-                },
-                'load_summary': {
-                    'total_hours': round(week_load['totals']['total_hours'], 1),
-                    'day_shift_hours': round(week_load['totals']['day_minutes'] / 60, 1),
-                    'evening_shift_hours': round(week_load['totals']['evening_minutes'] / 60, 1),
-                },
-                'daily_load': [],
-                'assignments': [],
+        # Preparar forecast_data para guardar
+        forecast_data_to_save = [
+            {
+                'date': (week_start + timezone.timedelta(days=i)).isoformat(),
+                'departures': d['departures'],
+                'arrivals': d['arrivals'],
+                'occupied': d['occupied'],
             }
+            for i, d in enumerate(forecast_data)
+        ]
 
-            # Agregar carga diaria
-            day_names = ['Lun', 'Mar', 'Mié', 'Jue', 'Vie', 'Sáb', 'Dom']
-            for i, (day_key, day_load) in enumerate(week_load['days'].items()):
-                req = requirements['by_day'][day_key]
-                result['daily_load'].append({
-                    'date': day_key,
-                    'day_name': day_names[i],
-                    'day_shift_hours': round(day_load['shifts']['DAY']['hours'], 1),
-                    'evening_shift_hours': round(day_load['shifts']['EVENING']['hours'], 1),
-                    'day_persons_needed': req['day_shift']['persons_needed'],
-                    'evening_persons_needed': req['evening_shift']['persons_needed'],
-                })
+        # Generar WeekPlan (reusar lógica)
+        forecast_view = ForecastWeekPlanView()
+        week_plan = forecast_view._generate_weekplan(
+            week_start, week_load, requirements, forecast_data_to_save
+        )
 
-            # Agregar asignaciones
-            for assignment in week_plan.shift_assignments.select_related('employee', 'shift_template').order_by('employee__last_name', 'date'):
-                result['assignments'].append({
-                    'employee': assignment.employee.full_name if assignment.employee else None,
-                    'date': assignment.date.isoformat(),
-                    'shift': assignment.shift_template.code if assignment.shift_template else None,
-                    'hours': float(assignment.assigned_hours),
-                })
+        # Generar asignaciones óptimas garantizando horas contratadas
+        from apps.planning.services.assignment_optimizer import AssignmentOptimizer
+        optimizer = AssignmentOptimizer()
+        # IMPORTANTE: generate_optimal_assignments asegura que todos cumplan sus horas
+        optimization_result = optimizer.generate_optimal_assignments(week_plan, forecast_data_to_save)
 
-            return Response(result, status=status.HTTP_201_CREATED)
+        # Construir respuesta
+        result = {
+            'week_plan_id': week_plan.id,
+            'week_start': week_start.isoformat(),
+            'status': week_plan.status,
+            'parsed_data': {
+                'forecast': [
+                    {
+                        'date': (week_start + timezone.timedelta(days=i)).isoformat(),
+                        'departures': d['departures'],
+                        'arrivals': d['arrivals'],
+                        'occupied': d['occupied'],
+                    }
+                    for i, d in enumerate(forecast_data)
+                ]
+            },
+            'load_summary': {
+                'total_hours': round(week_load['totals']['total_hours'], 1),
+                'day_shift_hours': round(week_load['totals']['day_minutes'] / 60, 1),
+                'evening_shift_hours': round(week_load['totals']['evening_minutes'] / 60, 1),
+            },
+            'daily_load': [],
+            'assignments': [],
+        }
 
-        except Exception as e:
-            import traceback
+        # Agregar carga diaria
+        day_names = ['Lun', 'Mar', 'Mié', 'Jue', 'Vie', 'Sáb', 'Dom']
+        for i, (day_key, day_load) in enumerate(week_load['days'].items()):
+            req = requirements['by_day'][day_key]
+            result['daily_load'].append({
+                'date': day_key,
+                'day_name': day_names[i],
+                'day_shift_hours': round(day_load['shifts']['DAY']['hours'], 1),
+                'evening_shift_hours': round(day_load['shifts']['EVENING']['hours'], 1),
+                'day_persons_needed': req['day_shift']['persons_needed'],
+                'evening_persons_needed': req['evening_shift']['persons_needed'],
+            })
+
+        # Agregar asignaciones
+        for assignment in week_plan.shift_assignments.select_related('employee', 'shift_template').order_by('employee__last_name', 'date'):
+            result['assignments'].append({
+                'employee': assignment.employee.full_name if assignment.employee else None,
+                'date': assignment.date.isoformat(),
+                'shift': assignment.shift_template.code if assignment.shift_template else None,
+                'hours': float(assignment.assigned_hours),
+            })
+
+        return result, status.HTTP_201_CREATED
+
+
+class ForecastHorizonView(views.APIView):
+    """
+    Genera los WeekPlan de varias semanas seguidas desde un forecast en
+    una sola pasada (ver HorizonPlanner).
+    """
+    authentication_classes = []
+    permission_classes = []
+
+    def post(self, request):
+        """
+        Body:
+            week_start: Lunes de la primera semana
+            forecast: [{departures, arrivals, occupied}, ...] 7 días por semana
+            weeks: Semanas (default: días del forecast / 7)
+            max_consecutive_days: Máximo de días seguidos de trabajo
+        """
+        from apps.planning.services.horizon_planner import HorizonPlanner
+
+        serializer = serializers.PlanHorizonSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        params = serializer.validated_data
+
+        if _wants_async(request):
+            return _enqueue_job(request, 'WEEKPLAN_HORIZON', {
+                'week_start': params['week_start'].isoformat(),
+                'forecast': params['forecast'],
+                'weeks': params.get('weeks'),
+                'max_consecutive_days': params.get('max_consecutive_days'),
+            })
+
+        try:
+            result = HorizonPlanner().plan(
+                params['week_start'],
+                params['forecast'],
+                weeks=params.get('weeks'),
+                created_by=str(request.user) if request.user.is_authenticated else '',
+                max_consecutive_days=params.get('max_consecutive_days'),
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(result, status=status.HTTP_201_CREATED)
+
+
+class ForecastScenarioView(views.APIView):
+    """
+    Simula un escenario sobre forecasts (guardados o enviados) sin
+    crear planes ni escribir en la BD.
+    """
+
+    def post(self, request):
+        """
+        Body:
+            date_from, date_to: Rango de forecasts guardados en WeekPlan
+            week_plan_ids: WeekPlans concretos (opcional)
+            forecast: [{date, departures, arrivals, occupied}, ...] en lugar de los guardados
+            scenario: {occupancy_factor, arrivals_factor, departures_factor,
+                       extra_departures, task_minutes, date_from, date_to,
+                       weekdays, day_staff, evening_staff}
+            include_weeks: Incluir detalle por semana (default true)
+        """
+        from apps.planning.services.scenario_simulator import ScenarioSimulator
+
+        try:
+            date_from = date.fromisoformat(request.data['date_from']) if request.data.get('date_from') else None
+            date_to = date.fromisoformat(request.data['date_to']) if request.data.get('date_to') else None
+        except ValueError:
             return Response(
-                {'error': f'Error al procesar PDF: {str(e)}',
-                 'traceback': traceback.format_exc()},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                {'error': 'Formato de fecha inválido (usar YYYY-MM-DD)'},
+                status=status.HTTP_400_BAD_REQUEST
             )
-        finally:
-            # Limpiar archivo temporal
-            os.unlink(tmp_path)
+
+        simulator = ScenarioSimulator()
+        forecast_days = request.data.get('forecast')
+        if not forecast_days:
+            forecast_days = simulator.load_forecasts(
+                date_from, date_to, request.data.get('week_plan_ids')
+            )
+
+        try:
+            result = simulator.simulate(
+                forecast_days,
+                request.data.get('scenario'),
+                # En el proceso de la petición salvo que se configure un pool
+                workers=getattr(settings, 'SCENARIO_SIMULATOR_WORKERS', 1),
+                include_weeks=str(request.data.get('include_weeks', True)).lower() not in ('false', '0'),
+            )
+        except (KeyError, ValueError) as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(result)
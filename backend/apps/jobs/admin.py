@@ -0,0 +1,22 @@
+"""Admin configuration for Jobs models."""
+from django.contrib import admin
+from .models import BackgroundJob
+
+
+@admin.register(BackgroundJob)
+class BackgroundJobAdmin(admin.ModelAdmin):
+    list_display = [
+        'id', 'job_type', 'status', 'progress', 'attempts',
+        'worker', 'created_by', 'created_at', 'finished_at'
+    ]
+    list_filter = ['status', 'job_type']
+    search_fields = ['idempotency_key', 'created_by']
+    readonly_fields = [
+        'job_type', 'params', 'input_file', 'idempotency_key', 'status',
+        'progress', 'progress_message', 'result', 'error', 'attempts',
+        'worker', 'created_by', 'created_at', 'started_at', 'heartbeat_at',
+        'finished_at'
+    ]
+
+    def has_add_permission(self, request):
+        return False
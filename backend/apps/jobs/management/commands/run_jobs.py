@@ -0,0 +1,76 @@
+"""
+Management command que ejecuta los trabajos en segundo plano.
+Puede lanzarse varias instancias en paralelo.
+"""
+import os
+import socket
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.jobs import queue
+
+
+class Command(BaseCommand):
+    help = 'Worker de la cola de trabajos (BackgroundJob)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Procesar los trabajos pendientes y salir'
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=2.0,
+            help='Segundos de espera cuando no hay trabajos'
+        )
+        parser.add_argument(
+            '--max-jobs',
+            type=int,
+            default=0,
+            help='Salir tras N trabajos (0 = sin límite)'
+        )
+        parser.add_argument(
+            '--stale-after',
+            type=int,
+            default=600,
+            help=(
+                'Segundos sin heartbeat para reencolar un trabajo RUNNING '
+                f'(el heartbeat se actualiza cada {queue.HEARTBEAT_SECONDS}s)'
+            )
+        )
+
+    def handle(self, *args, **options):
+        worker = f'{socket.gethostname()}:{os.getpid()}'
+        processed = 0
+        self.stdout.write(f'Worker {worker} iniciado')
+
+        try:
+            while True:
+                close_old_connections()
+                requeued = queue.requeue_stale(options['stale_after'])
+                if requeued:
+                    self.stdout.write(self.style.WARNING(f'  {requeued} trabajos reencolados'))
+
+                job = queue.claim_next(worker)
+                if job is None:
+                    if options['once']:
+                        break
+                    time.sleep(options['sleep'])
+                    continue
+
+                self.stdout.write(f'  → {job}')
+                job = queue.run_job(job)
+                style = self.style.SUCCESS if job.status == 'COMPLETED' else self.style.ERROR
+                self.stdout.write(style(f'    {job.get_status_display()}'))
+
+                processed += 1
+                if options['max_jobs'] and processed >= options['max_jobs']:
+                    break
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(f'Worker {worker} detenido ({processed} trabajos)')
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-17 02:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0002_dailyplan_generate_range'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='backgroundjob',
+            name='job_type',
+            field=models.CharField(choices=[('PROTEL_IMPORT', 'Importación CSV Protel'), ('FORECAST_UPLOAD', 'Forecast PDF → WeekPlan'), ('WEEKPLAN_GENERATE', 'Generar plan semanal'), ('WEEKPLAN_OPTIMIZE', 'Optimizar asignaciones'), ('DAILYPLAN_GENERATE', 'Generar plan diario'), ('DAILYPLAN_GENERATE_RANGE', 'Generar planes diarios (rango)'), ('WEEKPLAN_HORIZON', 'Generar planes semanales (horizonte)')], max_length=30),
+        ),
+    ]
@@ -0,0 +1,96 @@
+"""
+Jobs models - Cola de trabajos en segundo plano.
+Respaldada por la base de datos: no requiere broker externo.
+"""
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils import timezone
+
+
+class BackgroundJob(models.Model):
+    """
+    Trabajo pesado (importaciones, generación de planes) ejecutado
+    fuera del request por el comando run_jobs.
+    """
+    JOB_TYPE_CHOICES = [
+        ('PROTEL_IMPORT', 'Importación CSV Protel'),
+        ('FORECAST_UPLOAD', 'Forecast PDF → WeekPlan'),
+        ('WEEKPLAN_GENERATE', 'Generar plan semanal'),
+        ('WEEKPLAN_OPTIMIZE', 'Optimizar asignaciones'),
+        ('DAILYPLAN_GENERATE', 'Generar plan diario'),
+        ('DAILYPLAN_GENERATE_RANGE', 'Generar planes diarios (rango)'),
+        ('WEEKPLAN_HORIZON', 'Generar planes semanales (horizonte)'),
+        ('WEEKPLAN_REPAIR', 'Reparar plan semanal'),
+    ]
+    job_type = models.CharField(max_length=30, choices=JOB_TYPE_CHOICES)
+
+    # Parámetros de entrada y archivo subido (si aplica)
+    params = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)
+    input_file = models.FileField(upload_to='jobs/', blank=True)
+
+    # Clave de idempotencia: el mismo request no encola dos trabajos
+    idempotency_key = models.CharField(
+        max_length=100,
+        unique=True,
+        null=True,
+        blank=True,
+        help_text="Clave enviada por el cliente (header Idempotency-Key)"
+    )
+
+    # Estado
+    STATUS_CHOICES = [
+        ('PENDING', 'Pendiente'),
+        ('RUNNING', 'En ejecución'),
+        ('COMPLETED', 'Completado'),
+        ('FAILED', 'Fallido'),
+    ]
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='PENDING'
+    )
+
+    # Progreso
+    progress = models.PositiveSmallIntegerField(
+        default=0,
+        help_text="Progreso 0-100"
+    )
+    progress_message = models.CharField(max_length=255, blank=True)
+
+    # Resultado
+    result = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    error = models.TextField(blank=True)
+
+    # Ejecución
+    attempts = models.PositiveSmallIntegerField(default=0)
+    worker = models.CharField(max_length=100, blank=True)
+    created_by = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+        verbose_name = 'Trabajo en segundo plano'
+        verbose_name_plural = 'Trabajos en segundo plano'
+
+    def __str__(self):
+        return f"#{self.pk} {self.get_job_type_display()} ({self.get_status_display()})"
+
+    def report_progress(self, progress: int, message: str = ''):
+        """
+        Actualiza progreso y heartbeat sin tocar el resto de campos.
+        Lo llaman los handlers durante la ejecución.
+        """
+        self.progress = max(0, min(100, int(progress)))
+        self.progress_message = message[:255]
+        self.heartbeat_at = timezone.now()
+        BackgroundJob.objects.filter(pk=self.pk).update(
+            progress=self.progress,
+            progress_message=self.progress_message,
+            heartbeat_at=self.heartbeat_at,
+        )
@@ -0,0 +1,211 @@
+"""
+Cola de trabajos respaldada por BackgroundJob.
+
+Los handlers se registran por job_type en módulos `jobs.py` de cada app
+y el comando run_jobs los ejecuta fuera del request. Mientras el handler
+corre, un hilo actualiza el heartbeat cada HEARTBEAT_SECONDS, así que un
+trabajo largo no se reencola; el resultado solo se guarda si el worker
+sigue siendo el dueño del trabajo.
+"""
+import threading
+import traceback
+from datetime import timedelta
+from typing import Callable, Dict, Optional, Tuple
+
+from django.db import DatabaseError, IntegrityError, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from .models import BackgroundJob
+
+
+_HANDLERS: Dict[str, Callable[[BackgroundJob], Dict]] = {}
+_handlers_loaded = False
+
+# Intervalo del heartbeat: muy por debajo de run_jobs --stale-after
+HEARTBEAT_SECONDS = 30
+
+
+def register(job_type: str):
+    """Decorador para registrar el handler de un tipo de trabajo."""
+    def decorator(func):
+        _HANDLERS[job_type] = func
+        return func
+    return decorator
+
+
+def _load_handlers():
+    """Importa los módulos `jobs` de las apps instaladas (una vez)."""
+    global _handlers_loaded
+    if not _handlers_loaded:
+        autodiscover_modules('jobs')
+        _handlers_loaded = True
+
+
+def enqueue(
+    job_type: str,
+    params: Optional[Dict] = None,
+    idempotency_key: Optional[str] = None,
+    input_file=None,
+    created_by: str = ''
+) -> Tuple[BackgroundJob, bool]:
+    """
+    Encola un trabajo.
+
+    Si ya existe un trabajo con la misma idempotency_key se devuelve ese
+    en lugar de crear otro.
+
+    Returns:
+        Tuple de (job, created)
+    """
+    if idempotency_key:
+        existing = BackgroundJob.objects.filter(idempotency_key=idempotency_key).first()
+        if existing:
+            if existing.job_type != job_type:
+                raise ValueError(
+                    f'La clave de idempotencia ya se usó para {existing.job_type}'
+                )
+            return existing, False
+
+    job = BackgroundJob(
+        job_type=job_type,
+        params=params or {},
+        idempotency_key=idempotency_key or None,
+        created_by=created_by,
+    )
+    if input_file is not None:
+        job.input_file.save(input_file.name, input_file, save=False)
+
+    try:
+        with transaction.atomic():
+            job.save()
+    except IntegrityError:
+        # Otra petición con la misma clave llegó antes
+        if job.input_file:
+            job.input_file.delete(save=False)
+        if not idempotency_key:
+            raise
+        return BackgroundJob.objects.get(idempotency_key=idempotency_key), False
+
+    return job, True
+
+
+def claim_next(worker: str) -> Optional[BackgroundJob]:
+    """
+    Toma el trabajo pendiente más antiguo.
+    El UPDATE condicionado a PENDING evita que dos workers tomen el mismo.
+    """
+    pending_ids = BackgroundJob.objects.filter(
+        status='PENDING'
+    ).order_by('created_at').values_list('id', flat=True)[:10]
+
+    for job_id in pending_ids:
+        now = timezone.now()
+        claimed = BackgroundJob.objects.filter(pk=job_id, status='PENDING').update(
+            status='RUNNING',
+            worker=worker,
+            started_at=now,
+            heartbeat_at=now,
+            attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return BackgroundJob.objects.get(pk=job_id)
+    return None
+
+
+class _Heartbeat(threading.Thread):
+    """Actualiza heartbeat_at del trabajo en un hilo hasta stop()."""
+
+    def __init__(self, job: BackgroundJob, interval: float = HEARTBEAT_SECONDS):
+        super().__init__(name=f'heartbeat-{job.pk}', daemon=True)
+        self.job_id = job.pk
+        self.worker = job.worker
+        self.interval = interval
+        self._stopped = threading.Event()
+
+    def run(self):
+        try:
+            while not self._stopped.wait(self.interval):
+                try:
+                    BackgroundJob.objects.filter(
+                        pk=self.job_id, worker=self.worker, status='RUNNING'
+                    ).update(heartbeat_at=timezone.now())
+                except DatabaseError:
+                    # BD ocupada o caída: se reintenta en el siguiente intervalo
+                    pass
+        finally:
+            # El hilo tiene su propia conexión
+            connection.close()
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+
+def run_job(job: BackgroundJob) -> BackgroundJob:
+    """
+    Ejecuta el handler del trabajo y guarda resultado o error.
+
+    El resultado solo se escribe si el trabajo sigue RUNNING con este
+    worker: si se reencoló (y otro worker lo tomó) no se sobrescribe.
+    """
+    _load_handlers()
+    handler = _HANDLERS.get(job.job_type)
+
+    heartbeat = _Heartbeat(job)
+    heartbeat.start()
+    try:
+        if handler is None:
+            raise ValueError(f'No hay handler registrado para {job.job_type}')
+        result = handler(job)
+    except ValueError as e:
+        job.status = 'FAILED'
+        job.error = str(e)
+    except Exception:
+        job.status = 'FAILED'
+        job.error = traceback.format_exc()
+    else:
+        job.status = 'COMPLETED'
+        job.result = result
+        job.progress = 100
+    finally:
+        heartbeat.stop()
+
+    job.finished_at = timezone.now()
+    owned = BackgroundJob.objects.filter(pk=job.pk, worker=job.worker, status='RUNNING').update(
+        status=job.status,
+        result=job.result,
+        error=job.error,
+        progress=job.progress,
+        finished_at=job.finished_at,
+    )
+    if not owned:
+        # Reencolado o tomado por otro worker: su estado manda
+        job.refresh_from_db()
+        return job
+
+    # El archivo de entrada ya no hace falta
+    if job.status == 'COMPLETED' and job.input_file:
+        job.input_file.delete(save=False)
+        BackgroundJob.objects.filter(pk=job.pk).update(input_file='')
+    return job
+
+
+def requeue_stale(timeout_seconds: int, max_attempts: int = 3) -> int:
+    """
+    Devuelve a PENDING los trabajos RUNNING sin heartbeat reciente
+    (worker caído). Los que agotaron intentos quedan FAILED.
+
+    Returns:
+        Número de trabajos reencolados
+    """
+    cutoff = timezone.now() - timedelta(seconds=timeout_seconds)
+    stale = BackgroundJob.objects.filter(status='RUNNING', heartbeat_at__lt=cutoff)
+
+    stale.filter(attempts__gte=max_attempts).update(
+        status='FAILED',
+        error='El worker dejó de responder',
+        finished_at=timezone.now(),
+    )
+    return stale.filter(attempts__lt=max_attempts).update(status='PENDING', worker='')
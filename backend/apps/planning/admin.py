@@ -129,9 +129,9 @@ class TaskAssignmentAdmin(admin.ModelAdmin):
 class DailyLoadSummaryAdmin(admin.ModelAdmin):
     list_display = [
         'date', 'time_block', 'total_tasks', 'total_minutes_required',
-        'total_minutes_available', 'load_percentage', 'is_overloaded'
+        'total_minutes_available', 'load_percentage', 'is_overloaded', 'is_stale'
     ]
-    list_filter = ['time_block', 'date']
+    list_filter = ['time_block', 'is_stale', 'date']
     date_hierarchy = 'date'
 
     def is_overloaded(self, obj):
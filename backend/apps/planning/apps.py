@@ -5,3 +5,6 @@ class PlanningConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.planning'
     verbose_name = 'Planificación'
+
+    def ready(self):
+        from . import checks, signals  # noqa: F401
@@ -0,0 +1,44 @@
+"""
+System checks de Planning.
+
+Las versiones de la foto de configuración y de los datos viven en la cache
+por defecto: con una cache de un solo proceso (locmem, dummy) una edición
+no llega al worker de run_jobs ni a los demás procesos web.
+"""
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+
+# Backends que no se comparten entre procesos
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def uses_process_local_cache() -> bool:
+    return settings.CACHES.get('default', {}).get('BACKEND') in PROCESS_LOCAL_CACHES
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    if not uses_process_local_cache():
+        return []
+    return [Error(
+        'La foto de configuración de planificación necesita una cache compartida entre procesos.',
+        hint='Usar CACHE_BACKEND=file o db (o un backend compartido como Redis o Memcached).',
+        id='planning.E001',
+    )]
+
+
+@register(Tags.caches)
+def check_api_response_cache(app_configs, **kwargs):
+    # La versión de datos es por proceso con locmem: cada worker serviría
+    # respuestas y ETags distintos
+    if not (getattr(settings, 'API_RESPONSE_CACHE', False) and uses_process_local_cache()):
+        return []
+    return [Error(
+        'API_RESPONSE_CACHE requiere una cache compartida entre procesos.',
+        hint='Usar CACHE_BACKEND=file o db, o desactivarla con API_RESPONSE_CACHE=False.',
+        id='planning.E002',
+    )]
@@ -0,0 +1,75 @@
+"""
+Management command para medir el pipeline de planificación sobre un hotel
+sintético (ver paquete benchmarks). Vacía la BD: solo corre con
+DJANGO_SETTINGS_MODULE=benchmarks.settings (SQLite descartable).
+"""
+import json
+from datetime import date
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks.hotel import HotelConfig
+from benchmarks.runner import run_planning_benchmark
+
+
+class Command(BaseCommand):
+    help = 'Benchmark del pipeline de planificación con un hotel sintético (tiempo y queries por paso)'
+
+    def add_arguments(self, parser):
+        defaults = HotelConfig()
+        parser.add_argument('--rooms', type=int, default=defaults.rooms)
+        parser.add_argument('--floors', type=int, default=defaults.floors)
+        parser.add_argument('--zones-per-floor', type=int, default=defaults.zones_per_floor)
+        parser.add_argument('--employees', type=int, default=defaults.employees, help='FDC + VDC')
+        parser.add_argument('--fixed-teams', type=int, default=defaults.fixed_teams, help='Parejas FIXED')
+        parser.add_argument('--weeks', type=int, default=defaults.weeks, help='Semanas de forecast')
+        parser.add_argument('--start', type=str, default=defaults.start.isoformat(), help='Lunes inicial (YYYY-MM-DD)')
+        parser.add_argument('--seed', type=int, default=defaults.seed)
+        parser.add_argument('--output', type=str, help='Archivo JSON de resultados (default: stdout)')
+
+    def handle(self, *args, **options):
+        if not getattr(settings, 'BENCHMARK_DATABASE', False):
+            raise CommandError(
+                'Este comando vacía la BD. Ejecutar con DJANGO_SETTINGS_MODULE=benchmarks.settings'
+            )
+
+        try:
+            start = date.fromisoformat(options['start'])
+        except ValueError as e:
+            raise CommandError(f'Fecha inválida: {e}')
+        if start.weekday() != 0:
+            raise CommandError('--start debe ser un lunes')
+        if min(options['rooms'], options['floors'], options['zones_per_floor'], options['weeks']) < 1:
+            raise CommandError('rooms, floors, zones-per-floor y weeks deben ser >= 1')
+
+        config = HotelConfig(
+            rooms=options['rooms'],
+            floors=options['floors'],
+            zones_per_floor=options['zones_per_floor'],
+            employees=options['employees'],
+            fixed_teams=options['fixed_teams'],
+            weeks=options['weeks'],
+            start=start,
+            seed=options['seed'],
+        )
+
+        log = self.stderr.write
+        log(f"BD: {settings.DATABASES['default']['NAME']}")
+        call_command('migrate', verbosity=0)
+        call_command('flush', interactive=False, verbosity=0)
+
+        result = run_planning_benchmark(config, log=log)
+        content = json.dumps(result, indent=2)
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(content + '\n')
+            log(self.style.SUCCESS(f"Resultados en {options['output']}"))
+        else:
+            self.stdout.write(content)
+
+        log(f"\n{'paso':<28} {'llamadas':>8} {'seg total':>10} {'queries':>8}")
+        for name, step in result['steps'].items():
+            log(f"{name:<28} {step['calls']:>8} {step['seconds_total']:>10.3f} {step['queries_total']:>8}")
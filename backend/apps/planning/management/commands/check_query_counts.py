@@ -0,0 +1,201 @@
+"""
+Management command que verifica los presupuestos de queries de los
+caminos calientes de planificación sobre la BD actual. Sale con error si
+alguno los supera. Todo corre en una transacción que se deshace.
+
+    python manage.py check_query_counts
+
+Los listados de la API se miden además con varios tamaños de página: el
+número de queries no puede crecer con ellos (sin N+1).
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import override_settings
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.test import APIRequestFactory
+
+from apps.api import views
+
+from apps.planning.models import DailyPlan, ShiftAssignment, WeekPlan
+from apps.planning.services.daily_distribution import DailyDistributionCalculator
+from apps.planning.services.daily_plan_generator import DailyPlanGenerator
+from apps.planning.services.horizon_planner import HorizonPlanner
+from apps.planning.services.query_count import count_queries
+from apps.planning.services.schedule_repair import ScheduleRepairer
+from apps.staff.models import EmployeeUnavailability
+
+
+# === CHECKS ===
+# Cada check devuelve (preparar, medir): solo se cuentan las queries de medir.
+
+def distribution_week():
+    """7 días de calculate_day_distribution con el calculador ya construido."""
+    calculator = DailyDistributionCalculator()
+
+    staff = list(calculator.housekeeping_staff)
+    day_staff = [{'id': emp['id'], 'employee_short': emp['name']} for emp in staff[::2]]
+    evening_staff = [
+        {'employee_id': emp['id'], 'employee_short': emp['name'], 'end_time': '22:00'}
+        for emp in staff[1::2]
+    ]
+    forecasts = [
+        {'departures': 4 * day, 'arrivals': 3 * day, 'occupied': 10 + 5 * day}
+        for day in range(7)
+    ]
+
+    def run():
+        for forecast in forecasts:
+            calculator.calculate_day_distribution(forecast, day_staff, evening_staff)
+    return run
+
+
+def daily_plan_regenerate():
+    """Regenerar el último DailyPlan en borrador (p. ej. tras un late check-out)."""
+    daily_plan = DailyPlan.objects.filter(status='DRAFT').order_by('-date').first()
+    if daily_plan is None:
+        raise CommandError('No hay DailyPlan en borrador (ejecutar antes benchmark_planning)')
+
+    def run():
+        DailyPlanGenerator().regenerate_daily_plan(daily_plan)
+    return run
+
+
+def api_week_grid():
+    """GET de la rejilla del último WeekPlan sin la cache de respuestas."""
+    week_plan = WeekPlan.objects.order_by('-week_start_date').first()
+    if week_plan is None:
+        raise CommandError('No hay WeekPlan (ejecutar antes benchmark_planning)')
+    view = views.WeekPlanViewSet.as_view({'get': 'grid'})
+    request = APIRequestFactory().get('/')
+
+    def run():
+        with override_settings(API_RESPONSE_CACHE=False):
+            response = view(request, pk=week_plan.pk)
+        if response.status_code != 200:
+            raise CommandError(f'grid: HTTP {response.status_code}')
+    return run
+
+
+def horizon_4_weeks():
+    """Planificar 4 semanas nuevas tras el último WeekPlan."""
+    last = WeekPlan.objects.order_by('-week_start_date').first()
+    if last is None:
+        raise CommandError('No hay WeekPlan (ejecutar antes benchmark_planning)')
+    week_start = last.week_start_date + timedelta(weeks=1)
+    forecast = [
+        {'departures': 8 + day % 5, 'arrivals': 6 + day % 4, 'occupied': 40 + day % 7}
+        for day in range(28)
+    ]
+    planner = HorizonPlanner()
+
+    def run():
+        planner.plan(week_start, forecast)
+    return run
+
+
+def week_plan_repair():
+    """Reparar el último WeekPlan tras la baja de un empleado un día."""
+    assignment = ShiftAssignment.objects.filter(
+        week_plan__status='DRAFT', employee__isnull=False, is_day_off=False
+    ).select_related('week_plan').order_by('-date', 'id').first()
+    if assignment is None:
+        raise CommandError('No hay WeekPlan en borrador con turnos (ejecutar antes benchmark_planning)')
+    EmployeeUnavailability.objects.create(
+        employee_id=assignment.employee_id, date_start=assignment.date, date_end=assignment.date
+    )
+    repairer = ScheduleRepairer()
+
+    def run():
+        repairer.repair(assignment.week_plan, employee_id=assignment.employee_id)
+    return run
+
+
+QUERY_CHECKS = [
+    # (nombre, check, máximo de queries)
+    ('distribution_week', distribution_week, 0),
+    # No crece con las tareas, zonas ni unidades (salvo lotes de 500 filas)
+    ('daily_plan_regenerate', daily_plan_regenerate, 40),
+    # WeekPlan + una query de asignaciones
+    ('api_week_grid', api_week_grid, 2),
+    # Carga inicial + una escritura por lotes: no crece con las semanas
+    ('horizon_4_weeks', horizon_4_weeks, 12),
+    # Turnos + indisponibilidades + pasada de diferencias: no crece con la semana
+    ('week_plan_repair', week_plan_repair, 14),
+]
+
+
+# === LISTADOS DE LA API ===
+
+# Con 1 fila un prefetch vacío puede ahorrarse su query: se exige el mismo
+# número a partir de la segunda
+LIST_PAGE_SIZES = (1, 10, 100)
+
+LIST_ENDPOINTS = [
+    # (nombre, viewset, máximo de queries con cualquier tamaño de página)
+    ('api_week_plans', views.WeekPlanViewSet, 3),
+    ('api_shift_assignments', views.ShiftAssignmentViewSet, 3),
+    ('api_daily_plans', views.DailyPlanViewSet, 3),
+    ('api_task_assignments', views.TaskAssignmentViewSet, 3),
+]
+
+
+def api_list(viewset, page_size):
+    """GET del listado con page_size filas por página."""
+    pagination = type('CheckPagination', (PageNumberPagination,), {'page_size': page_size})
+    view = viewset.as_view({'get': 'list'}, pagination_class=pagination)
+    request = APIRequestFactory().get('/')
+
+    def run():
+        response = view(request)
+        if response.status_code != 200:
+            raise CommandError(f'{viewset.__name__}: HTTP {response.status_code}')
+    return run
+
+
+class Command(BaseCommand):
+    help = 'Verifica los presupuestos de queries de planificación (sale con error si se superan)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('checks', nargs='*', help='Checks a ejecutar (default: todos)')
+
+    def handle(self, *args, **options):
+        selected = options['checks']
+        unknown = set(selected) - {name for name, _, _ in QUERY_CHECKS} - {name for name, _, _ in LIST_ENDPOINTS}
+        if unknown:
+            raise CommandError(f"Checks desconocidos: {', '.join(sorted(unknown))}")
+
+        failures = []
+        with transaction.atomic():
+            for name, check, budget in QUERY_CHECKS:
+                if selected and name not in selected:
+                    continue
+                run = check()
+                with count_queries() as counter:
+                    run()
+                ok = counter.count <= budget
+                style = self.style.SUCCESS if ok else self.style.ERROR
+                self.stdout.write(style(f"{name:<32} {counter.count:>5} queries (máx {budget})"))
+                if not ok:
+                    failures.append(name)
+
+            for name, viewset, budget in LIST_ENDPOINTS:
+                if selected and name not in selected:
+                    continue
+                counts = []
+                for page_size in LIST_PAGE_SIZES:
+                    run = api_list(viewset, page_size)
+                    with count_queries() as counter:
+                        run()
+                    counts.append(counter.count)
+                ok = len(set(counts[1:])) == 1 and max(counts) <= budget
+                style = self.style.SUCCESS if ok else self.style.ERROR
+                sizes = ', '.join(f'{size}: {count}' for size, count in zip(LIST_PAGE_SIZES, counts))
+                self.stdout.write(style(f"{name:<32} {max(counts):>5} queries (máx {budget}; página {sizes})"))
+                if not ok:
+                    failures.append(name)
+            transaction.set_rollback(True)
+
+        if failures:
+            raise CommandError(f"Presupuesto de queries superado: {', '.join(failures)}")
@@ -0,0 +1,233 @@
+"""
+Management command que ejecuta EXPLAIN sobre las queries calientes de
+planificación y sale con error si alguna recorre entera una tabla grande
+(tareas, estados, turnos, indisponibilidades, alertas). Funciona con
+SQLite (EXPLAIN QUERY PLAN) y MySQL (EXPLAIN FORMAT=JSON).
+
+Antes actualiza las estadísticas (ANALYZE) para que el planificador elija
+como lo haría en producción:
+
+    python manage.py check_query_plans
+    python manage.py check_query_plans --min-rows 1000   # MySQL con pocos datos
+"""
+import json
+import re
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from apps.planning.models import PlanningAlert, ShiftAssignment, WeekPlan
+from apps.planning.services.config_snapshot import get_planning_config
+from apps.rooms.models import RoomDailyState, RoomDailyTask
+from apps.staff.models import Employee, EmployeeUnavailability
+
+
+# Tablas que no deben recorrerse enteras
+HOT_MODELS = [RoomDailyState, RoomDailyTask, ShiftAssignment, EmployeeUnavailability, PlanningAlert]
+
+
+# === QUERIES ===
+# Mismos filtros y orden que el código que las lanza; reciben el contexto
+# de sample_context.
+
+def load_week_tasks(ctx):
+    """LoadCalculator.compute_week_load."""
+    return RoomDailyTask.objects.filter(
+        room_daily_state__date__range=(ctx['date'], ctx['date'] + timedelta(days=6)),
+        time_block_id__in=ctx['block_ids'],
+        status__in=['PENDING', 'ASSIGNED']
+    ).order_by('priority', 'task_type__priority', 'id').values(
+        'id', 'time_block_id', 'task_type__code', 'room_daily_state__date',
+        'room_daily_state__room__zone__code',
+    )
+
+
+def daily_plan_tasks(ctx):
+    """DailyPlanGenerator._get_tasks_by_block."""
+    return RoomDailyTask.objects.filter(
+        room_daily_state__date=ctx['date'],
+        time_block__in=ctx['block_ids'],
+        status='PENDING'
+    ).select_related(
+        'room_daily_state', 'room_daily_state__room', 'room_daily_state__room__zone', 'task_type'
+    ).order_by(
+        'room_daily_state__room__zone__priority_order',
+        'room_daily_state__room__zone__floor_number',
+        'room_daily_state__room__order_in_zone',
+        'task_type__priority'
+    )
+
+
+def daily_plan_shifts(ctx):
+    """DailyPlanGenerator._get_units_by_block."""
+    return ShiftAssignment.objects.filter(
+        week_plan_id=ctx['week_plan_id'],
+        date=ctx['date'],
+        shift_template__time_block__in=ctx['block_ids'],
+        is_day_off=False
+    ).select_related('employee', 'team', 'shift_template').order_by('id')
+
+
+def week_block_shifts(ctx):
+    """WeekPlanGenerator: capacidad asignada por día y bloque."""
+    return ShiftAssignment.objects.filter(
+        week_plan_id=ctx['week_plan_id'],
+        date=ctx['date'],
+        shift_template__time_block_id=ctx['block_ids'][0],
+        is_day_off=False
+    ).order_by()
+
+
+def employee_week_shifts(ctx):
+    """EmployeeViewSet.schedule."""
+    return ShiftAssignment.objects.filter(
+        employee_id=ctx['employee_id'],
+        date__gte=ctx['date'],
+        date__lt=ctx['date'] + timedelta(days=7)
+    ).select_related('shift_template')
+
+
+def unavailability_overlap(ctx):
+    """AvailabilityIndex: ausencias que solapan el rango."""
+    return EmployeeUnavailability.objects.filter(
+        employee__is_active=True,
+        date_start__lte=ctx['date'] + timedelta(days=6),
+        date_end__gte=ctx['date'],
+    ).order_by().values_list('employee_id', 'date_start', 'date_end')
+
+
+def dashboard_alerts(ctx):
+    """DashboardView: alertas activas de la semana."""
+    return PlanningAlert.objects.filter(
+        is_resolved=False,
+        date__gte=ctx['date'],
+        date__lt=ctx['date'] + timedelta(days=7)
+    ).select_related('time_block')
+
+
+def alerts_by_date(ctx):
+    """PlanningAlertViewSet?date=."""
+    return PlanningAlert.objects.filter(date=ctx['date']).select_related('time_block')
+
+
+QUERY_PLANS = [
+    ('load_week_tasks', load_week_tasks),
+    ('daily_plan_tasks', daily_plan_tasks),
+    ('daily_plan_shifts', daily_plan_shifts),
+    ('week_block_shifts', week_block_shifts),
+    ('employee_week_shifts', employee_week_shifts),
+    ('unavailability_overlap', unavailability_overlap),
+    ('dashboard_alerts', dashboard_alerts),
+    ('alerts_by_date', alerts_by_date),
+]
+
+
+def sample_context():
+    """Parámetros reales de la BD (el último día con estados) para que el plan sea representativo."""
+    last_state = RoomDailyState.objects.order_by('-date').values_list('date', flat=True).first()
+    if last_state is None:
+        raise CommandError('No hay RoomDailyState (ejecutar antes benchmark_planning o un import)')
+    week_plan = WeekPlan.objects.order_by('-week_start_date').values_list('id', flat=True).first()
+    employee = Employee.objects.order_by().values_list('id', flat=True).first()
+    return {
+        'date': last_state,
+        'block_ids': [block.id for block in get_planning_config().active_time_blocks] or [0],
+        'week_plan_id': week_plan or 0,
+        'employee_id': employee or 0,
+    }
+
+
+# === EXPLAIN ===
+
+def full_scans(queryset):
+    """Tablas que el plan recorre enteras (tabla o índice completo)."""
+    if connection.vendor == 'sqlite':
+        scans = []
+        for line in queryset.explain().splitlines():
+            # "id parent notused detail": SCAN <tabla> [USING (COVERING) INDEX ...]
+            match = re.search(r'\bSCAN (\w+)', line)
+            if match:
+                scans.append(match.group(1))
+        return scans
+
+    if connection.vendor == 'mysql':
+        # ALL = tabla completa, index = índice completo
+        return [
+            table['table_name']
+            for table in _mysql_tables(json.loads(queryset.explain(format='json')))
+            if table.get('access_type') in ('ALL', 'index')
+        ]
+
+    raise CommandError(f'Base de datos no soportada: {connection.vendor}')
+
+
+def _mysql_tables(node):
+    if isinstance(node, dict):
+        if 'table_name' in node:
+            yield node
+        for value in node.values():
+            yield from _mysql_tables(value)
+    elif isinstance(node, list):
+        for value in node:
+            yield from _mysql_tables(value)
+
+
+def analyze_tables(tables):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute('ANALYZE')
+        elif connection.vendor == 'mysql':
+            cursor.execute('ANALYZE TABLE ' + ', '.join(connection.ops.quote_name(t) for t in tables))
+            cursor.fetchall()
+
+
+class Command(BaseCommand):
+    help = 'Verifica con EXPLAIN que las queries calientes no recorren tablas enteras'
+
+    def add_arguments(self, parser):
+        parser.add_argument('checks', nargs='*', help='Queries a comprobar (default: todas)')
+        parser.add_argument(
+            '--min-rows',
+            type=int,
+            default=0,
+            help='No fallar en tablas con menos filas (el planificador las recorre aunque haya índice)'
+        )
+        parser.add_argument('--no-analyze', action='store_true', help='No actualizar estadísticas antes')
+        parser.add_argument('--verbose-plans', action='store_true', help='Imprimir el plan de cada query')
+
+    def handle(self, *args, **options):
+        selected = options['checks']
+        unknown = set(selected) - {name for name, _ in QUERY_PLANS}
+        if unknown:
+            raise CommandError(f"Queries desconocidas: {', '.join(sorted(unknown))}")
+
+        hot_tables = {model._meta.db_table: model for model in HOT_MODELS}
+        if not options['no_analyze']:
+            analyze_tables(hot_tables)
+        small_tables = {
+            table for table, model in hot_tables.items()
+            if model.objects.count() < options['min_rows']
+        }
+
+        ctx = sample_context()
+        failures = []
+        for name, build in QUERY_PLANS:
+            if selected and name not in selected:
+                continue
+            queryset = build(ctx)
+            scanned = [table for table in full_scans(queryset) if table in hot_tables]
+            bad = [table for table in scanned if table not in small_tables]
+
+            if bad:
+                self.stdout.write(self.style.ERROR(f"{name:<28} recorre entera: {', '.join(bad)}"))
+                failures.append(name)
+            elif scanned:
+                self.stdout.write(self.style.WARNING(f"{name:<28} ok (tablas pequeñas: {', '.join(scanned)})"))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"{name:<28} ok"))
+            if options['verbose_plans']:
+                self.stdout.write(queryset.explain())
+
+        if failures:
+            raise CommandError(f"Queries con recorridos completos: {', '.join(failures)}")
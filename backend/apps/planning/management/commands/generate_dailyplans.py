@@ -0,0 +1,82 @@
+"""
+Management command para generar los planes diarios de una semana o de un
+rango de fechas (p. ej. el domingo por la noche para la semana siguiente).
+Los días se generan en paralelo; los DRAFT existentes se regeneran.
+"""
+import json
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+
+from apps.planning.models import WeekPlan
+from apps.planning.services.daily_plan_batch import DailyPlanBatchGenerator
+
+
+class Command(BaseCommand):
+    help = 'Genera los DailyPlan de un WeekPlan o de un rango de fechas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--week-plan', type=int, help='ID del WeekPlan cuya semana generar')
+        parser.add_argument('--from', dest='date_from', type=str, help='Primer día (YYYY-MM-DD)')
+        parser.add_argument('--to', dest='date_to', type=str, help='Último día (YYYY-MM-DD)')
+        parser.add_argument(
+            '--only-missing',
+            action='store_true',
+            help='Saltar también los días que ya tienen plan en borrador'
+        )
+        parser.add_argument('--time-budget', type=float, help='Segundos del router de zonas por bloque')
+        parser.add_argument('--workers', type=int, help='Procesos del pool (default: CPUs)')
+        parser.add_argument('--json', action='store_true', help='Imprimir el resultado completo en JSON')
+
+    def handle(self, *args, **options):
+        try:
+            date_from = date.fromisoformat(options['date_from']) if options['date_from'] else None
+            date_to = date.fromisoformat(options['date_to']) if options['date_to'] else None
+        except ValueError as e:
+            raise CommandError(f'Argumento inválido: {e}')
+
+        week_plan = None
+        if options['week_plan']:
+            week_plan = WeekPlan.objects.filter(pk=options['week_plan']).first()
+            if week_plan is None:
+                raise CommandError(f"No existe el WeekPlan {options['week_plan']}")
+
+        try:
+            result = DailyPlanBatchGenerator().generate(
+                date_from=date_from,
+                date_to=date_to,
+                week_plan=week_plan,
+                only_missing=options['only_missing'],
+                time_budget=options['time_budget'],
+                workers=options['workers'],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if options['json']:
+            self.stdout.write(json.dumps(result, cls=DjangoJSONEncoder, indent=2))
+            return
+
+        self.stdout.write(self.style.NOTICE(
+            f"=== PLANES DIARIOS {result['date_from']} → {result['date_to']} ===\n"
+        ))
+        self.stdout.write(f"{'día':<12} {'estado':<9} {'plan':>6} {'tareas':>7} {'asign.':>7} {'alertas':>8} {'seg':>7}")
+        for day in result['days']:
+            style = self.style.ERROR if day['status'] == 'FAILED' else (lambda text: text)
+            self.stdout.write(style(
+                f"{day['date']:<12} {day['status']:<9} {day['daily_plan_id'] or '-':>6} "
+                f"{day['pending_tasks']:>7} {day['assigned_tasks']:>7} {len(day['alerts']):>8} "
+                f"{day['seconds']:>7.2f}"
+            ))
+            if day['message']:
+                self.stdout.write(f"    {day['message']}")
+
+        totals = result['totals']
+        self.stdout.write(
+            f"\nCreados {totals['created']}, regenerados {totals['replaced']}, "
+            f"saltados {totals['skipped']}, fallidos {totals['failed']} "
+            f"en {result['seconds']:.2f}s ({result['workers']} procesos)"
+        )
+        if totals['failed']:
+            raise CommandError(f"{totals['failed']} días fallidos")
@@ -0,0 +1,74 @@
+"""
+Management command para generar los planes semanales de varias semanas
+seguidas (p. ej. el mes que se publica con cuatro semanas de antelación)
+desde un forecast en JSON:
+
+    python manage.py plan_horizon 2026-06-01 --forecast junio.json
+    python manage.py plan_horizon 2026-06-01 --forecast junio.json --weeks 4 --json
+
+El archivo es una lista de días desde el lunes ({departures, arrivals,
+occupied}) o un objeto con esa lista en 'forecast'.
+"""
+import json
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+
+from apps.planning.services.horizon_planner import HorizonPlanner
+
+
+class Command(BaseCommand):
+    help = 'Genera los WeekPlan de varias semanas seguidas en una sola pasada'
+
+    def add_arguments(self, parser):
+        parser.add_argument('week_start', type=str, help='Lunes de la primera semana (YYYY-MM-DD)')
+        parser.add_argument('--forecast', required=True, help='Archivo JSON con el forecast por día')
+        parser.add_argument('--weeks', type=int, help='Semanas a planificar (default: días del forecast / 7)')
+        parser.add_argument('--max-consecutive-days', type=int, help='Máximo de días seguidos de trabajo')
+        parser.add_argument('--json', action='store_true', help='Imprimir el resultado completo en JSON')
+
+    def handle(self, *args, **options):
+        try:
+            week_start = date.fromisoformat(options['week_start'])
+        except ValueError as e:
+            raise CommandError(f'Argumento inválido: {e}')
+
+        try:
+            with open(options['forecast'], encoding='utf-8') as file:
+                forecast = json.load(file)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"No se pudo leer {options['forecast']}: {e}")
+        if isinstance(forecast, dict):
+            forecast = forecast.get('forecast', [])
+
+        try:
+            result = HorizonPlanner().plan(
+                week_start,
+                forecast,
+                weeks=options['weeks'],
+                created_by='plan_horizon',
+                max_consecutive_days=options['max_consecutive_days'],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if options['json']:
+            self.stdout.write(json.dumps(result, cls=DjangoJSONEncoder, indent=2))
+            return
+
+        self.stdout.write(self.style.NOTICE(f"=== HORIZONTE {result['week_start']} ({result['weeks']} semanas) ===\n"))
+        self.stdout.write(f"{'semana':<12} {'estado':<9} {'plan':>6} {'turnos':>7} {'horas':>7} {'bajo obj.':>10}")
+        for week in result['weeks_detail']:
+            self.stdout.write(
+                f"{week['week_start']:<12} {week['status']:<9} {week['week_plan_id']:>6} "
+                f"{week['assignments']:>7} {week['load_summary']['total_hours']:>7} "
+                f"{week['stats']['employees_under_target']:>10}"
+            )
+
+        for violation in result['consecutive_violations']:
+            self.stdout.write(self.style.WARNING(
+                f"{violation['employee']}: {violation['days']} días seguidos "
+                f"({violation['from']} → {violation['to']})"
+            ))
+        self.stdout.write(f"\n{result['queries']} queries en {result['seconds']:.2f}s")
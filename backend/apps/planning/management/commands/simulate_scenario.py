@@ -0,0 +1,97 @@
+"""
+Management command para simular escenarios de staffing sobre forecasts.
+Usa los forecasts guardados en WeekPlan (o un archivo JSON) y no escribe
+en la base de datos.
+"""
+import json
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+
+from apps.planning.services.scenario_simulator import ScenarioSimulator
+
+
+class Command(BaseCommand):
+    help = 'Simula un escenario (ocupación, salidas, tiempos) sin crear planes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='date_from', type=str, help='Primer día (YYYY-MM-DD)')
+        parser.add_argument('--to', dest='date_to', type=str, help='Último día (YYYY-MM-DD)')
+        parser.add_argument('--week-plan', type=int, nargs='+', help='IDs de WeekPlan a usar')
+        parser.add_argument(
+            '--forecast-file',
+            type=str,
+            help='JSON con [{date, departures, arrivals, occupied}, ...] en lugar de los WeekPlans'
+        )
+        parser.add_argument('--occupancy-factor', type=float, default=1.0)
+        parser.add_argument('--arrivals-factor', type=float, default=1.0)
+        parser.add_argument('--departures-factor', type=float, default=1.0)
+        parser.add_argument('--extra-departures', type=int, default=0)
+        parser.add_argument(
+            '--task-minutes',
+            type=str,
+            nargs='+',
+            default=[],
+            help='Tiempos de tarea, p. ej. DEPART=55 RECOUCH=25'
+        )
+        parser.add_argument('--apply-from', type=str, help='Aplicar el escenario desde (YYYY-MM-DD)')
+        parser.add_argument('--apply-to', type=str, help='Aplicar el escenario hasta (YYYY-MM-DD)')
+        parser.add_argument('--weekdays', type=int, nargs='+', help='Días ISO donde aplicar (1=lunes)')
+        parser.add_argument('--day-staff', type=int, help='Personal fijo turno mañana')
+        parser.add_argument('--evening-staff', type=int, help='Personal fijo turno tarde')
+        parser.add_argument('--workers', type=int, help='Procesos del pool (default: CPUs)')
+        parser.add_argument('--json', action='store_true', help='Imprimir el resultado completo en JSON')
+
+    def handle(self, *args, **options):
+        try:
+            task_minutes = {}
+            for item in options['task_minutes']:
+                code, minutes = item.split('=')
+                task_minutes[code.upper()] = int(minutes)
+            date_from = date.fromisoformat(options['date_from']) if options['date_from'] else None
+            date_to = date.fromisoformat(options['date_to']) if options['date_to'] else None
+        except ValueError as e:
+            raise CommandError(f'Argumento inválido: {e}')
+
+        scenario = {
+            'occupancy_factor': options['occupancy_factor'],
+            'arrivals_factor': options['arrivals_factor'],
+            'departures_factor': options['departures_factor'],
+            'extra_departures': options['extra_departures'],
+            'task_minutes': task_minutes,
+            'date_from': options['apply_from'],
+            'date_to': options['apply_to'],
+            'weekdays': options['weekdays'],
+            'day_staff': options['day_staff'],
+            'evening_staff': options['evening_staff'],
+        }
+
+        simulator = ScenarioSimulator()
+        if options['forecast_file']:
+            with open(options['forecast_file']) as f:
+                forecast_days = json.load(f)
+        else:
+            forecast_days = simulator.load_forecasts(date_from, date_to, options['week_plan'])
+
+        began = time.perf_counter()
+        try:
+            result = simulator.simulate(forecast_days, scenario, workers=options['workers'])
+        except ValueError as e:
+            raise CommandError(str(e))
+        elapsed = time.perf_counter() - began
+
+        if options['json']:
+            self.stdout.write(json.dumps(result, cls=DjangoJSONEncoder, indent=2))
+            return
+
+        self.stdout.write(self.style.NOTICE(
+            f"=== ESCENARIO {result['date_from']} → {result['date_to']} ({result['days']} días) ===\n"
+        ))
+        baseline = result['baseline']['totals']
+        simulated = result['simulated']['totals']
+        self.stdout.write(f"{'':<24} {'base':>10} {'escenario':>10} {'delta':>10}")
+        for key, delta in result['delta'].items():
+            self.stdout.write(f"{key:<24} {baseline[key]:>10} {simulated[key]:>10} {delta:>+10}")
+        self.stdout.write(f'\nCalculado en {elapsed:.2f}s')
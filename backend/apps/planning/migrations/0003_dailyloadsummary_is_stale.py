@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planning', '0002_add_forecast_load_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dailyloadsummary',
+            name='is_stale',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planning', '0003_dailyloadsummary_is_stale'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='weekplan',
+            name='distribution_bundle',
+            field=models.JSONField(blank=True, help_text='Distribución diaria calculada (caché de by_employee y load_explanation)', null=True),
+        ),
+    ]
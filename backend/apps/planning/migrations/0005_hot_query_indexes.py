@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-17 02:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planning', '0004_weekplan_distribution_bundle'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='planningalert',
+            index=models.Index(fields=['is_resolved', 'date'], name='alert_resolved_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='planningalert',
+            index=models.Index(fields=['date'], name='alert_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='shiftassignment',
+            index=models.Index(fields=['week_plan', 'date'], name='sa_week_plan_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='shiftassignment',
+            index=models.Index(fields=['employee', 'date'], name='sa_employee_date_idx'),
+        ),
+    ]
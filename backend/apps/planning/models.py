@@ -64,6 +64,11 @@ class WeekPlan(models.Model):
         blank=True,
         help_text="Cálculo de carga: horas por turno, personas necesarias"
     )
+    distribution_bundle = models.JSONField(
+        null=True,
+        blank=True,
+        help_text="Distribución diaria calculada (caché de by_employee y load_explanation)"
+    )
 
     class Meta:
         unique_together = ['week_start_date']
@@ -153,6 +158,10 @@ class ShiftAssignment(models.Model):
 
     class Meta:
         ordering = ['date', 'shift_template__time_block__order']
+        indexes = [
+            models.Index(fields=['week_plan', 'date'], name='sa_week_plan_date_idx'),
+            models.Index(fields=['employee', 'date'], name='sa_employee_date_idx'),
+        ]
         verbose_name = 'Asignación de Turno'
         verbose_name_plural = 'Asignaciones de Turno'
 
@@ -352,6 +361,9 @@ class DailyLoadSummary(models.Model):
     def is_overloaded(self):
         return self.total_minutes_required > self.total_minutes_available
 
+    # Obsoleta: cambió la configuración, se recalcula al leer
+    is_stale = models.BooleanField(default=False)
+
     # Timestamps
     calculated_at = models.DateTimeField(auto_now=True)
 
@@ -420,6 +432,11 @@ class PlanningAlert(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Alertas activas de la semana (dashboard) y filtro por fecha
+            models.Index(fields=['is_resolved', 'date'], name='alert_resolved_date_idx'),
+            models.Index(fields=['date'], name='alert_date_idx'),
+        ]
         verbose_name = 'Alerta de Planificación'
         verbose_name_plural = 'Alertas de Planificación'
 
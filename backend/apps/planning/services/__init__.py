@@ -1,11 +1,19 @@
 """
 Planning services.
+
+Los calculadores se importan al usarlos (PEP 562): así los módulos que
+no dependen de Django (distribution_kernel, staffing_rules) se pueden
+importar sin configurarlo.
 """
-from .load import LoadCalculator
-from .capacity import CapacityCalculator
-from .time_calculator import TimeCalculator
-from .week_plan_generator import WeekPlanGenerator
-from .daily_plan_generator import DailyPlanGenerator
+from importlib import import_module
+
+_EXPORTS = {
+    'LoadCalculator': '.load',
+    'CapacityCalculator': '.capacity',
+    'TimeCalculator': '.time_calculator',
+    'WeekPlanGenerator': '.week_plan_generator',
+    'DailyPlanGenerator': '.daily_plan_generator',
+}
 
 __all__ = [
     'LoadCalculator',
@@ -14,3 +22,9 @@ __all__ = [
     'WeekPlanGenerator',
     'DailyPlanGenerator',
 ]
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -6,19 +6,88 @@ PRIORIDAD DE ASIGNACIÓN:
 1. Trabajadores con horas semanales disponibles (no cumplen sus 39h)
 2. Solo usar elasticidad si NO hay trabajadores disponibles
 """
+from dataclasses import dataclass
 from datetime import date, timedelta
-from typing import Dict, List, Any, Tuple, Set
+from typing import Dict, List, Any, Optional, Tuple, Set
 from decimal import Decimal
 
+from django.conf import settings
 from django.db import transaction
 
-from apps.core.models import TimeBlock, TaskType
 from apps.staff.models import Employee, Team
 from apps.shifts.models import ShiftTemplate
 from apps.planning.models import WeekPlan, ShiftAssignment
 from apps.planning.services.forecast_loader import ForecastLoader
 from apps.planning.services.daily_distribution import DailyDistributionCalculator
 from apps.planning.services.staffing_rules import get_evening_persons_needed
+from apps.planning.services.config_snapshot import get_planning_config
+from apps.planning.services.data_version import mark_data_changed
+from apps.planning.services.query_count import count_queries
+from apps.planning.services.shift_solver import (
+    OFF, MORNING, EVENING, ShiftSolver, SolverDay, SolverEmployee,
+)
+
+
+BULK_BATCH_SIZE = 500
+
+# Motores de optimize_assignments
+SOLVER_ENGINES = ('greedy', 'local_search')
+MAX_SOLVER_TIME_BUDGET = 60.0
+
+
+@dataclass(eq=False)
+class PlannedShift:
+    """
+    Asignación de turno en memoria.
+    El optimizador trabaja sobre estas y persiste la semana al final
+    en una sola pasada (ver AssignmentOptimizer._persist_assignments).
+    """
+    employee: Optional[Employee]
+    date: date
+    shift_template: ShiftTemplate
+    assigned_hours: float
+    is_day_off: bool = False
+    assignment_id: Optional[int] = None  # Fila existente en BD (None = nueva)
+    team: Optional[Team] = None          # Asignaciones por equipo (sin empleado)
+
+    @classmethod
+    def from_assignment(cls, assignment: ShiftAssignment) -> 'PlannedShift':
+        return cls(
+            employee=assignment.employee,
+            date=assignment.date,
+            shift_template=assignment.shift_template,
+            assigned_hours=assignment.assigned_hours,
+            is_day_off=assignment.is_day_off,
+            assignment_id=assignment.id,
+            team=assignment.team,
+        )
+
+    @property
+    def employee_id(self) -> Optional[int]:
+        return self.employee.id if self.employee else None
+
+    @property
+    def label(self) -> str:
+        """Nombre para los resúmenes: empleado o, si no hay, equipo."""
+        if self.employee:
+            return self.employee.first_name
+        return self.team.name if self.team else ''
+
+
+@dataclass
+class WeekCarry:
+    """
+    Estado que pasa de una semana a la siguiente cuando se planifican
+    varias seguidas (ver horizon_planner). Sin carry cada semana se
+    planifica por separado, como hasta ahora.
+    """
+    # emp_id -> días seguidos trabajados hasta el domingo anterior
+    streaks: Dict[int, int]
+    # emp_id -> horas a recuperar (+) o compensar (-) respecto al objetivo semanal
+    hours_balance: Dict[int, float]
+    # emp_id -> fechas ISO en las que no puede trabajar (indisponibilidades)
+    unavailable: Dict[int, Set[str]]
+    max_consecutive_days: int
 
 
 class AssignmentOptimizer:
@@ -37,15 +106,17 @@ class AssignmentOptimizer:
         self._load_config()
 
     def _load_config(self):
-        """Carga configuración desde BD."""
+        """Carga configuración (foto de configuración) y empleados desde BD."""
+        self.config = get_planning_config()
+
         # Configuración de turnos
-        self.day_block = TimeBlock.objects.filter(code='DAY').first()
-        self.evening_block = TimeBlock.objects.filter(code='EVENING').first()
+        self.day_block = self.config.get_time_block('DAY')
+        self.evening_block = self.config.get_time_block('EVENING')
 
         # Horas por turno desde ShiftTemplate
-        day_template = ShiftTemplate.objects.filter(code='FDC_MANANA').first()
-        evening_template = ShiftTemplate.objects.filter(code='FDC_TARDE').first()
-        day_short_template = ShiftTemplate.objects.filter(code='FDC_MANANA_CORTO').first()
+        day_template = self.config.get_shift_template('FDC_MANANA')
+        evening_template = self.config.get_shift_template('FDC_TARDE')
+        day_short_template = self.config.get_shift_template('FDC_MANANA_CORTO')
 
         self.day_shift_hours = day_template.total_hours if day_template else 8.0
         self.evening_shift_hours = evening_template.total_hours if evening_template else 8.0
@@ -64,13 +135,13 @@ class AssignmentOptimizer:
         self.employee_allowed_blocks = {}
         self.employee_days_off = {}
         for emp in self.employees:
-            self.employee_allowed_blocks[emp.id] = set(emp.allowed_blocks.values_list('code', flat=True))
-            # Convertir códigos de día a iso_weekday (1=Lun, 7=Dom)
-            days_off_codes = list(emp.fixed_days_off.values_list('iso_weekday', flat=True))
-            self.employee_days_off[emp.id] = set(days_off_codes)
+            # Desde el prefetch (values_list haría una query por empleado)
+            self.employee_allowed_blocks[emp.id] = {block.code for block in emp.allowed_blocks.all()}
+            # iso_weekday: 1=Lun, 7=Dom
+            self.employee_days_off[emp.id] = {day.iso_weekday for day in emp.fixed_days_off.all()}
 
         # Parejas FIXED (deben trabajar siempre juntas)
-        self.teams = list(Team.objects.filter(is_active=True, team_type='FIXED').prefetch_related('members'))
+        self.teams = list(self.config.get_teams(team_types=['FIXED']))
         self.employee_team = {}
         self.fixed_pairs = []  # Lista de tuplas (emp1_id, emp2_id)
         for team in self.teams:
@@ -82,14 +153,11 @@ class AssignmentOptimizer:
 
         # Shift templates (normales y cortos)
         self.shifts = {
-            'FDC_MANANA': ShiftTemplate.objects.filter(code='FDC_MANANA').first(),
-            'FDC_TARDE': ShiftTemplate.objects.filter(code='FDC_TARDE').first(),
-            'VDC_MANANA': ShiftTemplate.objects.filter(code='VDC_MANANA').first(),
-            'VDC_TARDE': ShiftTemplate.objects.filter(code='VDC_TARDE').first(),
-            'FDC_MANANA_CORTO': ShiftTemplate.objects.filter(code='FDC_MANANA_CORTO').first(),
-            'FDC_TARDE_CORTO': ShiftTemplate.objects.filter(code='FDC_TARDE_CORTO').first(),
-            'VDC_MANANA_CORTO': ShiftTemplate.objects.filter(code='VDC_MANANA_CORTO').first(),
-            'VDC_TARDE_CORTO': ShiftTemplate.objects.filter(code='VDC_TARDE_CORTO').first(),
+            code: self.config.get_shift_template(code)
+            for code in (
+                'FDC_MANANA', 'FDC_TARDE', 'VDC_MANANA', 'VDC_TARDE',
+                'FDC_MANANA_CORTO', 'FDC_TARDE_CORTO', 'VDC_MANANA_CORTO', 'VDC_TARDE_CORTO',
+            )
         }
 
     def can_employee_work_shift(self, emp_id: int, shift_type: str) -> bool:
@@ -119,7 +187,8 @@ class AssignmentOptimizer:
         self,
         week_start: date,
         day_workloads: List[Dict],
-        employee_state: Dict[int, Dict]
+        employee_state: Dict[int, Dict],
+        carry: Optional[WeekCarry] = None
     ) -> Dict[int, Set[str]]:
         """
         Calcula los días libres CONSECUTIVOS óptimos para cada empleado.
@@ -127,6 +196,8 @@ class AssignmentOptimizer:
         - Si tiene fixed_days_off configurados → usar esos
         - Si no tiene → elegir los 2 días consecutivos con menor carga
         - Parejas FIXED deben tener los mismos días libres
+        - Con carry, solo pares que no superen max_consecutive_days
+          contando los días seguidos de la semana anterior
 
         Returns:
             Dict[emp_id] -> Set de day_keys que son días libres
@@ -166,6 +237,17 @@ class AssignmentOptimizer:
         # Contar cuántos empleados ya tienen asignado cada par
         pair_usage = {pair['pair']: 0 for pair in pair_workloads}
 
+        def allowed_pairs(*emp_ids):
+            """Pares que no alargan la racha de la semana anterior por encima del máximo."""
+            if carry is None:
+                return pair_workloads
+            streak = max(carry.streaks.get(emp_id, 0) for emp_id in emp_ids)
+            allowed = [
+                pw for pw in pair_workloads
+                if streak + pw['pair'][0] - 1 <= carry.max_consecutive_days
+            ]
+            return allowed or pair_workloads
+
         # Resultado
         employee_days_off_calculated = {}
 
@@ -195,7 +277,7 @@ class AssignmentOptimizer:
             else:
                 # Elegir el mejor par de días consecutivos disponible
                 best_pair = None
-                for pw in pair_workloads:
+                for pw in allowed_pairs(emp1_id, emp2_id):
                     p = pw['pair']
                     # Verificar que ambos empleados puedan tener esos días libres
                     # (no conflicta con días que DEBEN trabajar)
@@ -237,7 +319,7 @@ class AssignmentOptimizer:
                 best_pair = None
                 best_score = 999999
 
-                for pw in pair_workloads:
+                for pw in allowed_pairs(emp_id):
                     p = pw['pair']
                     # Score = carga del par + (uso * 1000) para balancear
                     score = pw['workload'] + (pair_usage[p] * 500)
@@ -257,9 +339,14 @@ class AssignmentOptimizer:
 
         return employee_days_off_calculated
 
-    def get_employee_weekly_availability(self, week_plan: WeekPlan) -> Dict[int, Dict]:
+    def get_employee_weekly_availability(
+        self,
+        week_plan: WeekPlan,
+        assignments: List[ShiftAssignment] = None
+    ) -> Dict[int, Dict]:
         """
         Calcula horas disponibles por empleado para la semana.
+        assignments: asignaciones ya cargadas (evita volver a consultarlas)
 
         Returns:
             Dict con employee_id -> {
@@ -283,7 +370,9 @@ class AssignmentOptimizer:
             }
 
         # Calcular horas ya asignadas
-        for assignment in week_plan.shift_assignments.select_related('employee', 'shift_template'):
+        if assignments is None:
+            assignments = week_plan.shift_assignments.select_related('employee', 'shift_template').order_by()
+        for assignment in assignments:
             emp_id = assignment.employee_id
             if emp_id in availability:
                 hours = float(assignment.assigned_hours or 8)
@@ -339,9 +428,10 @@ class AssignmentOptimizer:
         Calcula las necesidades reales de personal por día.
         Usa datos de forecast_data del week_plan.
         """
+        return self._daily_needs(week_plan.week_start_date, week_plan.forecast_data or [])
+
+    def _daily_needs(self, week_start: date, forecast_data: List[Dict]) -> Dict[str, Dict]:
         daily_needs = {}
-        week_start = week_plan.week_start_date
-        forecast_data = week_plan.forecast_data or []
 
         # Indexar forecast por fecha
         forecast_by_date = {}
@@ -429,7 +519,12 @@ class AssignmentOptimizer:
 
         return daily_needs
 
-    def optimize_assignments(self, week_plan: WeekPlan) -> Dict[str, Any]:
+    def optimize_assignments(
+        self,
+        week_plan: WeekPlan,
+        engine: str = 'greedy',
+        time_budget: float = None
+    ) -> Dict[str, Any]:
         """
         Optimiza las asignaciones del plan semanal.
 
@@ -437,31 +532,59 @@ class AssignmentOptimizer:
         1. Si hay déficit de trabajo → agregar trabajadores con horas disponibles
         2. Solo usar elasticidad si NO hay trabajadores con horas disponibles
         3. Si hay exceso de personal → remover los que tienen más horas asignadas
+
+        Motores:
+        - greedy: la heurística anterior
+        - local_search: parte del resultado greedy y lo mejora con ShiftSolver
+          durante time_budget segundos; nunca devuelve un plan con peor
+          'objective' que el greedy
+
+        Las asignaciones se ajustan en memoria y se persisten al final
+        con una sola pasada de diferencias.
         """
-        daily_needs = self.calculate_daily_needs(week_plan)
+        if engine not in SOLVER_ENGINES:
+            raise ValueError(f'Motor desconocido: {engine} (opciones: {", ".join(SOLVER_ENGINES)})')
+        if time_budget is None:
+            time_budget = getattr(settings, 'ASSIGNMENT_SOLVER_TIME_BUDGET', 2.0)
+        try:
+            time_budget = float(time_budget)
+        except (TypeError, ValueError):
+            raise ValueError(f'time_budget inválido: {time_budget}')
+        if not 0 < time_budget <= MAX_SOLVER_TIME_BUDGET:
+            raise ValueError(f'time_budget debe estar entre 0 y {MAX_SOLVER_TIME_BUDGET:g} segundos')
+
+        with count_queries() as counter:
+            changes = self._optimize_assignments(week_plan, engine, time_budget)
+        changes['queries'] = counter.count
+        return changes
 
-        # Obtener disponibilidad de empleados
-        availability = self.get_employee_weekly_availability(week_plan)
+    def _optimize_assignments(self, week_plan: WeekPlan, engine: str, time_budget: float) -> Dict[str, Any]:
+        daily_needs = self.calculate_daily_needs(week_plan)
 
         # Obtener asignaciones actuales
         current_assignments = list(week_plan.shift_assignments.select_related(
-            'employee', 'shift_template'
+            'employee', 'team', 'shift_template'
         ).order_by('date', 'employee__last_name'))
 
-        # Agrupar por día y turno
+        # Obtener disponibilidad de empleados
+        availability = self.get_employee_weekly_availability(week_plan, current_assignments)
+
+        # Semana en memoria, agrupada por día y turno
+        planned = [PlannedShift.from_assignment(a) for a in current_assignments]
         by_day = {}
-        for assignment in current_assignments:
-            day_key = assignment.date.isoformat()
+        for shift in planned:
+            day_key = shift.date.isoformat()
             if day_key not in by_day:
                 by_day[day_key] = {'morning': [], 'evening': []}
 
-            is_morning = 'MANANA' in (assignment.shift_template.code if assignment.shift_template else '')
+            is_morning = 'MANANA' in (shift.shift_template.code if shift.shift_template else '')
             shift_key = 'morning' if is_morning else 'evening'
-            by_day[day_key][shift_key].append(assignment)
+            by_day[day_key][shift_key].append(shift)
 
         changes = {
             'removed': [],
             'added': [],
+            'moved': [],
             'kept': [],
             'summary': {},
             'workers_with_available_hours': [],
@@ -478,301 +601,303 @@ class AssignmentOptimizer:
                     'target_hours': info['target'],
                 })
 
-        with transaction.atomic():
-            for day_key, needs in daily_needs.items():
-                day_assignments = by_day.get(day_key, {'morning': [], 'evening': []})
-                current_date = needs['date']
+        def add_shift(emp, current_date, shift_template, hours):
+            shift = PlannedShift(
+                employee=emp,
+                date=current_date,
+                shift_template=shift_template,
+                assigned_hours=hours,
+            )
+            planned.append(shift)
+            return shift
+
+        for day_key, needs in daily_needs.items():
+            day_assignments = by_day.get(day_key, {'morning': [], 'evening': []})
+            current_date = needs['date']
+
+            morning_needed = needs['morning_persons']
+            evening_needed = needs['evening_persons']
+
+            morning_current = day_assignments['morning']
+            evening_current = day_assignments['evening']
+            # Asignaciones de mañana vigentes tras altas y bajas del día
+            morning_today = list(morning_current)
+
+            # === TURNO MAÑANA ===
+            morning_count = len(morning_current)
+
+            if morning_count < morning_needed:
+                # DÉFICIT: Necesitamos más personas
+                # PRIORIDAD 1: Agregar trabajadores con horas disponibles
+                assigned_ids = {a.employee_id for a in morning_current}
+                available_employees = self.get_available_employees_for_day(
+                    day_key, 'morning', availability, assigned_ids
+                )
 
-                morning_needed = needs['morning_persons']
-                evening_needed = needs['evening_persons']
+                # Preferir FDC para mañana
+                fdc_available = [e for e in available_employees if e.role.code == 'FDC']
+                vdc_available = [e for e in available_employees if e.role.code == 'VDC']
+                sorted_available = fdc_available + vdc_available
 
-                morning_current = day_assignments['morning']
-                evening_current = day_assignments['evening']
+                to_add = morning_needed - morning_count
+                added_count = 0
 
-                # === TURNO MAÑANA ===
-                morning_count = len(morning_current)
+                for emp in sorted_available:
+                    if added_count >= to_add:
+                        break
 
-                if morning_count < morning_needed:
-                    # DÉFICIT: Necesitamos más personas
-                    # PRIORIDAD 1: Agregar trabajadores con horas disponibles
-                    assigned_ids = {a.employee_id for a in morning_current}
-                    available_employees = self.get_available_employees_for_day(
-                        day_key, 'morning', availability, assigned_ids
-                    )
+                    # Crear asignación
+                    shift_template = self.shifts.get(f'{emp.role.code}_MANANA')
+                    if shift_template:
+                        morning_today.append(
+                            add_shift(emp, current_date, shift_template, self.day_shift_hours)
+                        )
+                        changes['added'].append({
+                            'date': day_key,
+                            'employee': emp.first_name,
+                            'shift': 'mañana',
+                            'reason': 'horas_disponibles',
+                        })
 
-                    # Preferir FDC para mañana
-                    fdc_available = [e for e in available_employees if e.role.code == 'FDC']
-                    vdc_available = [e for e in available_employees if e.role.code == 'VDC']
-                    sorted_available = fdc_available + vdc_available
+                        # Actualizar disponibilidad
+                        availability[emp.id]['assigned'] += self.day_shift_hours
+                        availability[emp.id]['available'] -= self.day_shift_hours
+                        availability[emp.id]['days_assigned'].add(day_key)
 
-                    to_add = morning_needed - morning_count
-                    added_count = 0
+                        added_count += 1
 
-                    for emp in sorted_available:
-                        if added_count >= to_add:
-                            break
+                morning_count += added_count
 
-                        # Crear asignación
-                        shift_template = self.shifts.get(f'{emp.role.code}_MANANA')
-                        if shift_template:
-                            ShiftAssignment.objects.create(
-                                week_plan=week_plan,
-                                date=current_date,
-                                employee=emp,
-                                shift_template=shift_template,
-                                assigned_hours=self.day_shift_hours,
-                                is_day_off=False
-                            )
-                            changes['added'].append({
-                                'date': day_key,
-                                'employee': emp.first_name,
-                                'shift': 'mañana',
-                                'reason': 'horas_disponibles',
-                            })
+            elif morning_count > morning_needed:
+                # EXCESO: Remover personal (priorizar mantener parejas)
+                morning_sorted = sorted(
+                    morning_current,
+                    key=lambda a: (
+                        0 if a.employee_id in self.employee_team else 1,
+                        -availability.get(a.employee_id, {}).get('available', 0),
+                        a.employee.last_name if a.employee else ''
+                    )
+                )
+                for assignment in morning_sorted[morning_needed:]:
+                    changes['removed'].append({
+                        'date': day_key,
+                        'employee': assignment.label,
+                        'shift': 'mañana',
+                    })
+                    # Devolver horas al empleado
+                    emp_id = assignment.employee_id
+                    if emp_id in availability:
+                        hours = float(assignment.assigned_hours or self.day_shift_hours)
+                        availability[emp_id]['assigned'] -= hours
+                        availability[emp_id]['available'] += hours
+                        availability[emp_id]['days_assigned'].discard(day_key)
+                    planned.remove(assignment)
+                    morning_today.remove(assignment)
+
+            # === TURNO TARDE ===
+            evening_count = len(evening_current)
+
+            if evening_count < evening_needed:
+                # DÉFICIT: Agregar trabajadores con horas disponibles
+                assigned_ids = {a.employee_id for a in evening_current}
+                # También excluir los que trabajan mañana ese día
+                for a in morning_current:
+                    assigned_ids.add(a.employee_id)
+
+                available_employees = self.get_available_employees_for_day(
+                    day_key, 'evening', availability, assigned_ids
+                )
 
-                            # Actualizar disponibilidad
-                            availability[emp.id]['assigned'] += self.day_shift_hours
-                            availability[emp.id]['available'] -= self.day_shift_hours
-                            availability[emp.id]['days_assigned'].add(day_key)
+                # Preferir VDC para tarde
+                vdc_available = [e for e in available_employees if e.role.code == 'VDC']
+                fdc_available = [e for e in available_employees if e.role.code == 'FDC']
+                sorted_available = vdc_available + fdc_available
 
-                            added_count += 1
+                to_add = evening_needed - evening_count
+                added_count = 0
 
-                    morning_count += added_count
+                for emp in sorted_available:
+                    if added_count >= to_add:
+                        break
 
-                elif morning_count > morning_needed:
-                    # EXCESO: Remover personal (priorizar mantener parejas)
-                    morning_sorted = sorted(
-                        morning_current,
-                        key=lambda a: (
-                            0 if a.employee_id in self.employee_team else 1,
-                            -availability.get(a.employee_id, {}).get('available', 0),
-                            a.employee.last_name
-                        )
-                    )
-                    for assignment in morning_sorted[morning_needed:]:
-                        changes['removed'].append({
+                    shift_template = self.shifts.get(f'{emp.role.code}_TARDE')
+                    if shift_template:
+                        add_shift(emp, current_date, shift_template, self.evening_shift_hours)
+                        changes['added'].append({
                             'date': day_key,
-                            'employee': assignment.employee.first_name,
-                            'shift': 'mañana',
+                            'employee': emp.first_name,
+                            'shift': 'tarde',
+                            'reason': 'horas_disponibles',
                         })
-                        # Devolver horas al empleado
-                        emp_id = assignment.employee_id
-                        if emp_id in availability:
-                            hours = float(assignment.assigned_hours or self.day_shift_hours)
-                            availability[emp_id]['assigned'] -= hours
-                            availability[emp_id]['available'] += hours
-                            availability[emp_id]['days_assigned'].discard(day_key)
-                        assignment.delete()
-
-                # === TURNO TARDE ===
-                evening_count = len(evening_current)
 
-                if evening_count < evening_needed:
-                    # DÉFICIT: Agregar trabajadores con horas disponibles
-                    assigned_ids = {a.employee_id for a in evening_current}
-                    # También excluir los que trabajan mañana ese día
-                    for a in morning_current:
-                        assigned_ids.add(a.employee_id)
-
-                    available_employees = self.get_available_employees_for_day(
-                        day_key, 'evening', availability, assigned_ids
-                    )
+                        availability[emp.id]['assigned'] += self.evening_shift_hours
+                        availability[emp.id]['available'] -= self.evening_shift_hours
+                        availability[emp.id]['days_assigned'].add(day_key)
+
+                        added_count += 1
+
+                # Si aún faltan personas, usar ELASTICIDAD
+                if added_count < to_add:
+                    # Buscar empleados que puedan usar horas extra
+                    elasticity_candidates = []
+                    for emp_id, info in availability.items():
+                        if emp_id in assigned_ids:
+                            continue
+                        if day_key in info.get('days_assigned', set()):
+                            continue
+
+                        emp = info.get('employee')
+                        if not emp:
+                            continue
 
-                    # Preferir VDC para tarde
-                    vdc_available = [e for e in available_employees if e.role.code == 'VDC']
-                    fdc_available = [e for e in available_employees if e.role.code == 'FDC']
-                    sorted_available = vdc_available + fdc_available
+                        # Verificar si puede trabajar tarde
+                        if not self.can_employee_work_shift(emp_id, 'evening'):
+                            continue
 
-                    to_add = evening_needed - evening_count
-                    added_count = 0
+                        # Verificar elasticidad
+                        rule = self.config.elasticity_rules.get(emp.elasticity)
+                        max_extra = float(rule.max_extra_hours_week) if rule else 0
 
-                    for emp in sorted_available:
+                        if max_extra > 0:
+                            extra_used = max(0, float(info['assigned']) - float(emp.weekly_hours_target))
+                            remaining_elasticity = max_extra - extra_used
+                            if remaining_elasticity >= self.evening_shift_hours:
+                                elasticity_candidates.append((emp, remaining_elasticity))
+
+                    # Ordenar por elasticidad restante
+                    elasticity_candidates.sort(key=lambda x: -x[1])
+
+                    for emp, _ in elasticity_candidates:
                         if added_count >= to_add:
                             break
 
                         shift_template = self.shifts.get(f'{emp.role.code}_TARDE')
                         if shift_template:
-                            ShiftAssignment.objects.create(
-                                week_plan=week_plan,
-                                date=current_date,
-                                employee=emp,
-                                shift_template=shift_template,
-                                assigned_hours=self.evening_shift_hours,
-                                is_day_off=False
-                            )
+                            add_shift(emp, current_date, shift_template, self.evening_shift_hours)
                             changes['added'].append({
                                 'date': day_key,
                                 'employee': emp.first_name,
                                 'shift': 'tarde',
-                                'reason': 'horas_disponibles',
+                                'reason': 'elasticidad',
                             })
+                            changes['elasticity_used'] = True
 
                             availability[emp.id]['assigned'] += self.evening_shift_hours
                             availability[emp.id]['available'] -= self.evening_shift_hours
                             availability[emp.id]['days_assigned'].add(day_key)
+                            assigned_ids.add(emp.id)
 
                             added_count += 1
 
-                    # Si aún faltan personas, usar ELASTICIDAD
-                    if added_count < to_add:
-                        from apps.rules.models import ElasticityRule
-
-                        # Buscar empleados que puedan usar horas extra
-                        elasticity_candidates = []
-                        for emp_id, info in availability.items():
-                            if emp_id in assigned_ids:
-                                continue
-                            if day_key in info.get('days_assigned', set()):
-                                continue
-
-                            emp = info.get('employee')
-                            if not emp:
-                                continue
-
-                            # Verificar si puede trabajar tarde
-                            can_evening = emp.allowed_blocks.filter(code='EVENING').exists()
-                            if not can_evening:
-                                continue
-
-                            # Verificar elasticidad
-                            try:
-                                rule = ElasticityRule.objects.get(elasticity_level=emp.elasticity)
-                                max_extra = float(rule.max_extra_hours_week)
-                            except ElasticityRule.DoesNotExist:
-                                max_extra = 0
-
-                            if max_extra > 0:
-                                extra_used = max(0, float(info['assigned']) - float(emp.weekly_hours_target))
-                                remaining_elasticity = max_extra - extra_used
-                                if remaining_elasticity >= self.evening_shift_hours:
-                                    elasticity_candidates.append((emp, remaining_elasticity))
-
-                        # Ordenar por elasticidad restante
-                        elasticity_candidates.sort(key=lambda x: -x[1])
-
-                        for emp, _ in elasticity_candidates:
-                            if added_count >= to_add:
-                                break
-
-                            shift_template = self.shifts.get(f'{emp.role.code}_TARDE')
-                            if shift_template:
-                                ShiftAssignment.objects.create(
-                                    week_plan=week_plan,
-                                    date=current_date,
-                                    employee=emp,
-                                    shift_template=shift_template,
-                                    assigned_hours=self.evening_shift_hours,
-                                    is_day_off=False
-                                )
-                                changes['added'].append({
-                                    'date': day_key,
-                                    'employee': emp.first_name,
-                                    'shift': 'tarde',
-                                    'reason': 'elasticidad',
-                                })
-
-                                availability[emp.id]['assigned'] += self.evening_shift_hours
-                                availability[emp.id]['available'] -= self.evening_shift_hours
-                                availability[emp.id]['days_assigned'].add(day_key)
-                                assigned_ids.add(emp.id)
-
-                                added_count += 1
-
-                    evening_count += added_count
-
-                    # Si aún faltan personas para tarde, REDISTRIBUIR desde mañana
-                    if evening_count < evening_needed:
-                        # Re-consultar asignaciones de mañana ACTUALES
-                        current_morning_assignments = list(ShiftAssignment.objects.filter(
-                            week_plan=week_plan,
-                            date=current_date,
-                            shift_template__time_block__code='DAY'
-                        ).select_related('employee'))
-
-                        # Buscar empleados en MAÑANA que pueden hacer TARDE
-                        candidates_to_move = []
-                        for assignment in current_morning_assignments:
-                            emp = assignment.employee
-                            if not emp:
-                                continue
-                            # Verificar si puede trabajar tarde
-                            can_evening = emp.allowed_blocks.filter(code='EVENING').exists()
-                            if can_evening:
-                                candidates_to_move.append(assignment)
-
-                        # Ordenar por elasticidad (HIGH primero - más flexibles)
-                        elasticity_order = {'HIGH': 0, 'MEDIUM': 1, 'LOW': 2}
-                        candidates_to_move.sort(
-                            key=lambda a: elasticity_order.get(a.employee.elasticity, 1)
-                        )
+                evening_count += added_count
 
-                        # Mover de mañana a tarde hasta cubrir
-                        still_needed = evening_needed - evening_count
-                        moved_count = 0
+                # Si aún faltan personas para tarde, REDISTRIBUIR desde mañana
+                if evening_count < evening_needed:
+                    # Buscar empleados en MAÑANA (bloque DAY) que pueden hacer TARDE
+                    candidates_to_move = [
+                        shift for shift in morning_today
+                        if shift.employee
+                        and self.day_block
+                        and shift.shift_template.time_block_id == self.day_block.id
+                        and self.can_employee_work_shift(shift.employee_id, 'evening')
+                    ]
+
+                    # Ordenar por elasticidad (HIGH primero - más flexibles)
+                    elasticity_order = {'HIGH': 0, 'MEDIUM': 1, 'LOW': 2}
+                    candidates_to_move.sort(
+                        key=lambda a: elasticity_order.get(a.employee.elasticity, 1)
+                    )
 
-                        for assignment in candidates_to_move:
-                            if moved_count >= still_needed:
-                                break
+                    # Mover de mañana a tarde hasta cubrir
+                    still_needed = evening_needed - evening_count
+                    moved_count = 0
 
-                            emp = assignment.employee
-                            # Obtener template de tarde para este empleado
-                            evening_template = self.shifts.get(f'{emp.role.code}_TARDE')
-                            if not evening_template:
-                                continue
-
-                            # Cambiar de mañana a tarde
-                            old_hours = float(assignment.assigned_hours)
-                            assignment.shift_template = evening_template
-                            assignment.assigned_hours = self.evening_shift_hours
-                            assignment.save()
-
-                            changes['moved'].append({
-                                'date': day_key,
-                                'employee': emp.first_name,
-                                'from': 'mañana',
-                                'to': 'tarde',
-                                'reason': 'cubrir_couvertures',
-                            })
+                    for assignment in candidates_to_move:
+                        if moved_count >= still_needed:
+                            break
 
-                            moved_count += 1
+                        emp = assignment.employee
+                        # Obtener template de tarde para este empleado
+                        evening_template = self.shifts.get(f'{emp.role.code}_TARDE')
+                        if not evening_template:
+                            continue
 
-                        evening_count += moved_count
+                        # Cambiar de mañana a tarde
+                        assignment.shift_template = evening_template
+                        assignment.assigned_hours = self.evening_shift_hours
 
-                elif evening_count > evening_needed:
-                    # EXCESO: Remover personal
-                    evening_sorted = sorted(
-                        evening_current,
-                        key=lambda a: (
-                            0 if a.employee_id in self.employee_team else 1,
-                            -availability.get(a.employee_id, {}).get('available', 0),
-                            a.employee.last_name
-                        )
-                    )
-                    for assignment in evening_sorted[evening_needed:]:
-                        changes['removed'].append({
+                        changes['moved'].append({
                             'date': day_key,
-                            'employee': assignment.employee.first_name,
-                            'shift': 'tarde',
+                            'employee': emp.first_name,
+                            'from': 'mañana',
+                            'to': 'tarde',
+                            'reason': 'cubrir_couvertures',
                         })
-                        emp_id = assignment.employee_id
-                        if emp_id in availability:
-                            hours = float(assignment.assigned_hours or self.evening_shift_hours)
-                            availability[emp_id]['assigned'] -= hours
-                            availability[emp_id]['available'] += hours
-                            availability[emp_id]['days_assigned'].discard(day_key)
-                        assignment.delete()
-
-                changes['summary'][day_key] = {
-                    'needed': {'morning': morning_needed, 'evening': evening_needed},
-                    'after': {
-                        'morning': morning_count,
-                        'evening': evening_count,
-                    },
-                    'deficit': {
-                        'morning': max(0, morning_needed - morning_count),
-                        'evening': max(0, evening_needed - evening_count),
-                    },
-                }
+
+                        moved_count += 1
+
+                    evening_count += moved_count
+
+            elif evening_count > evening_needed:
+                # EXCESO: Remover personal
+                evening_sorted = sorted(
+                    evening_current,
+                    key=lambda a: (
+                        0 if a.employee_id in self.employee_team else 1,
+                        -availability.get(a.employee_id, {}).get('available', 0),
+                        a.employee.last_name if a.employee else ''
+                    )
+                )
+                for assignment in evening_sorted[evening_needed:]:
+                    changes['removed'].append({
+                        'date': day_key,
+                        'employee': assignment.label,
+                        'shift': 'tarde',
+                    })
+                    emp_id = assignment.employee_id
+                    if emp_id in availability:
+                        hours = float(assignment.assigned_hours or self.evening_shift_hours)
+                        availability[emp_id]['assigned'] -= hours
+                        availability[emp_id]['available'] += hours
+                        availability[emp_id]['days_assigned'].discard(day_key)
+                    planned.remove(assignment)
+
+            changes['summary'][day_key] = {
+                'needed': {'morning': morning_needed, 'evening': evening_needed},
+                'after': {
+                    'morning': morning_count,
+                    'evening': evening_count,
+                },
+                'deficit': {
+                    'morning': max(0, morning_needed - morning_count),
+                    'evening': max(0, evening_needed - evening_count),
+                },
+            }
+
+        # === MOTOR DE BÚSQUEDA LOCAL ===
+        solver, grid = self._build_solver_model(daily_needs, planned)
+        changes['engine'] = engine
+        if engine == 'local_search':
+            result = solver.solve(grid, time_budget=time_budget)
+            planned = self._planned_from_grid(solver, result.grid, planned)
+            availability = self.get_employee_weekly_availability(week_plan, planned)
+            self._describe_changes(changes, current_assignments, planned, daily_needs)
+            changes['elasticity_used'] = any(
+                info['assigned'] > info['target'] for info in availability.values()
+            )
+            changes['objective'] = result.breakdown
+            changes['solver'] = {
+                'greedy_cost': result.seed_cost,
+                'cost': result.cost,
+                'improved': result.improved,
+                'iterations': result.iterations,
+                'elapsed': round(result.elapsed, 3),
+                'time_budget': time_budget,
+            }
+        else:
+            changes['objective'] = solver.evaluate(grid)
+
+        changes['persisted'] = self._persist_assignments(week_plan, planned, current_assignments)
 
         # Resumen final de disponibilidad
         changes['final_availability'] = []
@@ -786,6 +911,292 @@ class AssignmentOptimizer:
 
         return changes
 
+    def _build_solver_model(
+        self,
+        daily_needs: Dict[str, Dict],
+        planned: List[PlannedShift],
+        unavailable: Optional[Dict[int, Set[str]]] = None,
+        repair_days: Optional[Set[str]] = None
+    ) -> Tuple[ShiftSolver, Dict[int, List]]:
+        """
+        Traduce empleados, restricciones y necesidades diarias al modelo
+        de ShiftSolver, con el plan actual como rejilla semilla.
+        Los turnos fuera de DAY/EVENING quedan bloqueados.
+
+        Args:
+            unavailable: Días indisponibles (ISO) por empleado, como días libres
+            repair_days: Reparación incremental: solo cambian estos días, la
+                rejilla actual es la referencia de estabilidad y las parejas
+                con un miembro indisponible en ellos se reparten por separado
+        """
+        unavailable = unavailable or {}
+        day_keys = list(daily_needs)
+        day_index = {day_key: idx for idx, day_key in enumerate(day_keys)}
+        days = [
+            SolverDay(
+                key=day_key,
+                morning_needed=needs['morning_persons'],
+                evening_needed=needs['evening_persons'],
+            )
+            for day_key, needs in daily_needs.items()
+        ]
+
+        grid = {emp.id: [OFF] * len(days) for emp in self.employees}
+        locked = {emp.id: {} for emp in self.employees}
+        for shift in planned:
+            day_idx = day_index.get(shift.date.isoformat())
+            if shift.employee_id not in grid or day_idx is None:
+                continue
+            hours = float(shift.assigned_hours or 0)
+            block_id = shift.shift_template.time_block_id if shift.shift_template else None
+            if self.day_block and block_id == self.day_block.id:
+                grid[shift.employee_id][day_idx] = (MORNING, hours)
+            elif self.evening_block and block_id == self.evening_block.id:
+                grid[shift.employee_id][day_idx] = (EVENING, hours)
+            else:
+                locked[shift.employee_id][day_idx] = hours
+
+        frozen = frozenset()
+        split = set()
+        if repair_days is not None:
+            frozen = frozenset(idx for idx, day_key in enumerate(day_keys) if day_key not in repair_days)
+            split = {emp_id for emp_id, days in unavailable.items() if days & repair_days}
+
+        employees = []
+        for emp in self.employees:
+            target = float(emp.weekly_hours_target) if emp.weekly_hours_target else 39.0
+            rule = self.config.elasticity_rules.get(emp.elasticity)
+            max_extra = float(rule.max_extra_hours_week) if rule else 0
+            partner_id = self.get_partner_id(emp.id)
+            employees.append(SolverEmployee(
+                id=emp.id,
+                role=emp.role.code,
+                target_hours=target,
+                max_hours=target + max_extra,
+                can_morning=self.can_employee_work_shift(emp.id, 'morning'),
+                can_evening=self.can_employee_work_shift(emp.id, 'evening'),
+                days_off=frozenset(
+                    idx for idx, day_key in enumerate(day_keys)
+                    if self.is_employee_day_off(emp.id, daily_needs[day_key]['date'])
+                    or day_key in unavailable.get(emp.id, ())
+                ),
+                partner_id=partner_id if emp.id not in split and partner_id not in split else None,
+                locked=frozenset(locked[emp.id]),
+                locked_hours=sum(locked[emp.id].values()),
+                frozen=frozen,
+            ))
+
+        # Turno corto solo si existen sus plantillas
+        has_short = bool(self.shifts.get('FDC_MANANA_CORTO') and self.shifts.get('FDC_TARDE_CORTO'))
+        solver = ShiftSolver(
+            employees,
+            days,
+            day_hours=self.day_shift_hours,
+            evening_hours=self.evening_shift_hours,
+            short_hours=self.short_shift_hours if has_short else None,
+            reference={emp_id: list(cells) for emp_id, cells in grid.items()} if repair_days is not None else None,
+        )
+        return solver, grid
+
+    def _planned_from_grid(
+        self,
+        solver: ShiftSolver,
+        grid: Dict[int, List],
+        planned: List[PlannedShift]
+    ) -> List[PlannedShift]:
+        """Convierte la rejilla del solver en PlannedShift, reutilizando los que no cambian."""
+        day_index = {day.key: idx for idx, day in enumerate(solver.days)}
+        employees = {emp.id: emp for emp in self.employees}
+
+        result = []
+        seed = {}
+        for shift in planned:
+            day_idx = day_index.get(shift.date.isoformat())
+            emp = solver.employees.get(shift.employee_id)
+            if emp is None or day_idx is None or day_idx in emp.locked:
+                result.append(shift)
+            else:
+                seed[(shift.employee_id, day_idx)] = shift
+
+        for emp_id, cells in grid.items():
+            emp = employees[emp_id]
+            for day_idx, cell in enumerate(cells):
+                if cell is OFF or day_idx in solver.employees[emp_id].locked:
+                    continue
+                shift_type, hours = cell
+                shift = seed.get((emp_id, day_idx))
+                block = self.day_block if shift_type == MORNING else self.evening_block
+                if shift and shift.shift_template.time_block_id == block.id and float(shift.assigned_hours) == hours:
+                    result.append(shift)
+                    continue
+
+                suffix = 'MANANA' if shift_type == MORNING else 'TARDE'
+                full_hours = self.day_shift_hours if shift_type == MORNING else self.evening_shift_hours
+                if hours < full_hours:
+                    suffix += '_CORTO'
+                shift_template = self.shifts.get(f'{emp.role.code}_{suffix}') or self.shifts.get(f'FDC_{suffix}')
+
+                if shift:
+                    shift.shift_template = shift_template
+                    shift.assigned_hours = hours
+                else:
+                    shift = PlannedShift(
+                        employee=emp,
+                        date=date.fromisoformat(solver.days[day_idx].key),
+                        shift_template=shift_template,
+                        assigned_hours=hours,
+                    )
+                result.append(shift)
+
+        return result
+
+    def _describe_changes(
+        self,
+        changes: Dict[str, Any],
+        initial: List[ShiftAssignment],
+        planned: List[PlannedShift],
+        daily_needs: Dict[str, Dict]
+    ):
+        """Recalcula added/removed/moved/summary comparando el plan inicial con el final."""
+        def shift_kind(shift):
+            code = shift.shift_template.code if shift.shift_template else ''
+            return 'morning' if 'MANANA' in code else 'evening'
+
+        def shift_key(shift):
+            owner = shift.employee_id if shift.employee_id else f'team-{shift.team.id if shift.team else None}'
+            return (owner, shift.date.isoformat())
+
+        labels = {'morning': 'mañana', 'evening': 'tarde'}
+        before = {shift_key(a): a for a in map(PlannedShift.from_assignment, initial)}
+        after = {shift_key(s): s for s in planned}
+
+        changes['added'] = []
+        changes['removed'] = []
+        changes['moved'] = []
+        for key in sorted(set(before) | set(after), key=lambda k: (k[1], str(k[0]))):
+            old, new = before.get(key), after.get(key)
+            day_key = key[1]
+            if old is None:
+                changes['added'].append({
+                    'date': day_key,
+                    'employee': new.label,
+                    'shift': labels[shift_kind(new)],
+                    'reason': 'local_search',
+                })
+            elif new is None:
+                changes['removed'].append({
+                    'date': day_key,
+                    'employee': old.label,
+                    'shift': labels[shift_kind(old)],
+                })
+            elif shift_kind(old) != shift_kind(new):
+                changes['moved'].append({
+                    'date': day_key,
+                    'employee': new.label,
+                    'from': labels[shift_kind(old)],
+                    'to': labels[shift_kind(new)],
+                    'reason': 'local_search',
+                })
+
+        counts = {}
+        for shift in planned:
+            day_counts = counts.setdefault(shift.date.isoformat(), {'morning': 0, 'evening': 0})
+            day_counts[shift_kind(shift)] += 1
+
+        changes['summary'] = {}
+        for day_key, needs in daily_needs.items():
+            day_counts = counts.get(day_key, {'morning': 0, 'evening': 0})
+            changes['summary'][day_key] = {
+                'needed': {'morning': needs['morning_persons'], 'evening': needs['evening_persons']},
+                'after': dict(day_counts),
+                'deficit': {
+                    'morning': max(0, needs['morning_persons'] - day_counts['morning']),
+                    'evening': max(0, needs['evening_persons'] - day_counts['evening']),
+                },
+            }
+
+    def _persist_assignments(
+        self,
+        week_plan: WeekPlan,
+        planned: List[PlannedShift],
+        existing: List[ShiftAssignment] = None
+    ) -> Dict[str, int]:
+        """
+        Persiste la semana planificada con una sola pasada de diferencias:
+        bulk_update de las filas que cambian, bulk_create de las nuevas y
+        un único delete de las sobrantes.
+
+        Las filas existentes se reutilizan por id y, si no, por
+        (empleado, fecha), así un reemplazo no borra y vuelve a crear.
+        """
+        if existing is None:
+            existing = list(week_plan.shift_assignments.all())
+        existing_by_id = {a.id: a for a in existing}
+
+        claimed = {shift.assignment_id for shift in planned if shift.assignment_id in existing_by_id}
+        free_by_key = {}
+        for assignment in existing:
+            if assignment.id not in claimed:
+                free_by_key.setdefault((assignment.employee_id, assignment.date), []).append(assignment)
+
+        to_create = []
+        to_update = []
+        for shift in planned:
+            assignment = existing_by_id.get(shift.assignment_id)
+            if assignment is None:
+                reusable = free_by_key.get((shift.employee_id, shift.date))
+                if reusable:
+                    assignment = reusable.pop()
+                    claimed.add(assignment.id)
+
+            hours = Decimal(str(round(float(shift.assigned_hours), 2)))
+            if assignment is None:
+                to_create.append(ShiftAssignment(
+                    week_plan=week_plan,
+                    date=shift.date,
+                    employee=shift.employee,
+                    shift_template=shift.shift_template,
+                    assigned_hours=hours,
+                    is_day_off=shift.is_day_off,
+                ))
+                continue
+
+            shift.assignment_id = assignment.id
+            values = {
+                'date': shift.date,
+                'employee_id': shift.employee_id,
+                'shift_template_id': shift.shift_template.id,
+                'assigned_hours': hours,
+                'is_day_off': shift.is_day_off,
+            }
+            if any(getattr(assignment, field) != value for field, value in values.items()):
+                for field, value in values.items():
+                    setattr(assignment, field, value)
+                to_update.append(assignment)
+
+        to_delete = [a.id for a in existing if a.id not in claimed]
+
+        with transaction.atomic():
+            if to_delete:
+                ShiftAssignment.objects.filter(id__in=to_delete).delete()
+            if to_update:
+                ShiftAssignment.objects.bulk_update(
+                    to_update,
+                    ['date', 'employee', 'shift_template', 'assigned_hours', 'is_day_off'],
+                    batch_size=BULK_BATCH_SIZE
+                )
+            if to_create:
+                ShiftAssignment.objects.bulk_create(to_create, batch_size=BULK_BATCH_SIZE)
+            # bulk_update/bulk_create no emiten señales
+            if to_update or to_create:
+                mark_data_changed()
+
+        return {
+            'created': len(to_create),
+            'updated': len(to_update),
+            'deleted': len(to_delete),
+        }
+
     def generate_optimal_assignments(
         self,
         week_plan: WeekPlan,
@@ -800,16 +1211,57 @@ class AssignmentOptimizer:
         3. Parejas FIXED deben trabajar siempre juntas
         4. Usar turno corto (7h) para el último día si es necesario para llegar exacto
         5. Solo usar elasticidad si TODOS están al 100% de sus horas
+
+        La semana se construye en memoria y reemplaza las asignaciones
+        existentes con una sola pasada de diferencias.
         """
-        # Eliminar asignaciones existentes
-        week_plan.shift_assignments.all().delete()
+        with count_queries() as counter:
+            result = self._generate_optimal_assignments(week_plan, forecast_data)
+        result['queries'] = counter.count
+        return result
 
-        week_start = week_plan.week_start_date
+    def _generate_optimal_assignments(
+        self,
+        week_plan: WeekPlan,
+        forecast_data: List[Dict]
+    ) -> Dict[str, Any]:
+        planned, result = self.plan_optimal_week(
+            week_plan.week_start_date, week_plan.forecast_data or []
+        )
+        persisted = self._persist_assignments(week_plan, planned)
+        return {
+            'assignments': result['assignments'],
+            'employee_summary': result['employee_summary'],
+            'stats': result['stats'],
+            'persisted': persisted,
+            'daily_coverage': result['daily_coverage'],
+        }
+
+    def plan_optimal_week(
+        self,
+        week_start: date,
+        forecast_data: List[Dict],
+        carry: Optional[WeekCarry] = None
+    ) -> Tuple[List[PlannedShift], Dict[str, Any]]:
+        """
+        Construye en memoria la semana de generate_optimal_assignments sin
+        escribir en la BD.
+
+        Args:
+            week_start: Lunes de la semana
+            forecast_data: Forecast de la semana ([{date ISO, departures, ...}])
+            carry: Estado de la semana anterior (planificación por horizonte)
+
+        Returns:
+            (turnos planificados, resumen: assignments, employee_summary,
+             stats, daily_coverage y, por empleado, assigned_hours y
+             days_assigned para la semana siguiente)
+        """
         week_days = [week_start + timedelta(days=i) for i in range(7)]
         day_names = ['Lun', 'Mar', 'Mié', 'Jue', 'Vie', 'Sáb', 'Dom']
 
         # Calcular necesidades por día basado en CARGA DE TRABAJO
-        daily_needs = self.calculate_daily_needs(week_plan)
+        daily_needs = self._daily_needs(week_start, forecast_data)
 
         # Calcular carga de trabajo por día
         day_workloads = []
@@ -834,6 +1286,8 @@ class AssignmentOptimizer:
         employee_state = {}
         for emp in self.employees:
             target = float(emp.weekly_hours_target) if emp.weekly_hours_target else 39.0
+            if carry is not None:
+                target += carry.hours_balance.get(emp.id, 0.0)
             employee_state[emp.id] = {
                 'employee': emp,
                 'target_hours': target,
@@ -845,17 +1299,20 @@ class AssignmentOptimizer:
         # ========== CALCULAR DÍAS LIBRES CONSECUTIVOS ==========
         # Cada empleado debe tener 2 días libres consecutivos
         employee_days_off = self.calculate_consecutive_days_off(
-            week_start, day_workloads, employee_state
+            week_start, day_workloads, employee_state, carry
         )
+        unavailable = carry.unavailable if carry is not None else {}
 
-        # Helper para verificar si es día libre
+        # Helper para verificar si es día libre (o no disponible)
         def is_day_off(emp_id: int, day_key: str) -> bool:
-            return day_key in employee_days_off.get(emp_id, set())
+            return day_key in employee_days_off.get(emp_id, set()) or day_key in unavailable.get(emp_id, ())
 
         # Reiniciar employee_state (el anterior era temporal para calcular días libres)
         employee_state = {}
         for emp in self.employees:
             target = float(emp.weekly_hours_target) if emp.weekly_hours_target else 39.0
+            if carry is not None:
+                target += carry.hours_balance.get(emp.id, 0.0)
             employee_state[emp.id] = {
                 'employee': emp,
                 'target_hours': target,
@@ -866,6 +1323,16 @@ class AssignmentOptimizer:
 
         assignments_created = []
         assignments_by_day = {d['day_key']: {'morning': [], 'evening': []} for d in day_workloads}
+        # Semana en memoria: (emp_id, day_key) -> PlannedShift
+        planned: Dict[Tuple[int, str], PlannedShift] = {}
+
+        def plan_shift(emp, day_date, shift_template, hours):
+            planned[(emp.id, day_date.isoformat())] = PlannedShift(
+                employee=emp,
+                date=day_date,
+                shift_template=shift_template,
+                assigned_hours=hours,
+            )
 
         # ========== PASO 1: Asignar PAREJAS FIXED primero ==========
         # Las parejas deben trabajar juntas, priorizando días con más carga
@@ -956,14 +1423,7 @@ class AssignmentOptimizer:
                     if not shift_template:
                         shift_template = self.shifts.get(f'FDC_{shift_suffix}') or self.shifts.get(f'VDC_{shift_suffix}')
 
-                    ShiftAssignment.objects.create(
-                        week_plan=week_plan,
-                        date=day_date,
-                        employee=emp,
-                        shift_template=shift_template,
-                        assigned_hours=hours,
-                        is_day_off=False
-                    )
+                    plan_shift(emp, day_date, shift_template, hours)
 
                     employee_state[emp.id]['assigned_hours'] += hours
                     employee_state[emp.id]['days_assigned'].add(day_key)
@@ -1035,14 +1495,7 @@ class AssignmentOptimizer:
                 if not shift_template:
                     shift_template = self.shifts.get(f'FDC_{suffix}')
 
-                ShiftAssignment.objects.create(
-                    week_plan=week_plan,
-                    date=day_date,
-                    employee=emp,
-                    shift_template=shift_template,
-                    assigned_hours=hours,
-                    is_day_off=False
-                )
+                plan_shift(emp, day_date, shift_template, hours)
 
                 state['assigned_hours'] += hours
                 state['days_assigned'].add(day_key)
@@ -1107,12 +1560,7 @@ class AssignmentOptimizer:
                     # Mover los necesarios
                     to_move = min(evening_deficit, can_move, len(moveable))
                     for emp_id in moveable[:to_move]:
-                        # Eliminar de mañana
-                        assignment = ShiftAssignment.objects.filter(
-                            week_plan=week_plan,
-                            date=day_date,
-                            employee_id=emp_id
-                        ).first()
+                        assignment = planned.get((emp_id, day_key))
 
                         if assignment:
                             emp = assignment.employee
@@ -1128,7 +1576,6 @@ class AssignmentOptimizer:
                                 shift_template = self.shifts.get(f'FDC_{suffix}')
 
                             assignment.shift_template = shift_template
-                            assignment.save()
 
                             # Actualizar tracking
                             assignments_by_day[day_key]['morning'].remove(emp_id)
@@ -1227,14 +1674,7 @@ class AssignmentOptimizer:
                     shift_template = self.shifts.get('FDC_MANANA')
                     hours = self.day_shift_hours
 
-                ShiftAssignment.objects.create(
-                    week_plan=week_plan,
-                    date=day_date,
-                    employee=emp,
-                    shift_template=shift_template,
-                    assigned_hours=hours,
-                    is_day_off=False
-                )
+                plan_shift(emp, day_date, shift_template, hours)
 
                 state['assigned_hours'] += hours
                 state['days_assigned'].add(day_key)
@@ -1267,7 +1707,7 @@ class AssignmentOptimizer:
             else:
                 employees_under_target += 1
 
-        return {
+        result = {
             'assignments': assignments_created,
             'employee_summary': employee_summary,
             'stats': {
@@ -1282,4 +1722,13 @@ class AssignmentOptimizer:
                 }
                 for day_key in assignments_by_day
             },
+            'employee_state': {
+                emp_id: {
+                    'target_hours': state['target_hours'],
+                    'assigned_hours': state['assigned_hours'],
+                    'days_assigned': set(state['days_assigned']),
+                }
+                for emp_id, state in employee_state.items()
+            },
         }
+        return list(planned.values()), result
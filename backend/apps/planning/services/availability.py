@@ -0,0 +1,98 @@
+"""
+Availability Matrix.
+Disponibilidad empleado × fecha × bloque para un rango de fechas,
+construida con unas pocas queries en bloque (empleados con sus M2M e
+indisponibilidades del rango) en lugar de tres queries por empleado,
+bloque y día.
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Dict, FrozenSet, Iterable, List, Set, Tuple
+
+from apps.staff.models import Employee, EmployeeUnavailability
+
+
+class AvailabilityMatrix:
+    """
+    Empleados activos y su disponibilidad para [date_from, date_to].
+
+    Reglas (las de CapacityCalculator._is_employee_available):
+    - empleado activo y bloque en sus allowed_blocks
+    - NIGHT solo si can_work_night
+    - no es uno de sus fixed_days_off
+    - sin EmployeeUnavailability que cubra la fecha
+    """
+
+    def __init__(self, date_from: date, date_to: date, night_block_ids: Iterable[int] = ()):
+        self.date_from = date_from
+        self.date_to = date_to
+        night_block_ids = frozenset(night_block_ids)
+
+        self.employees: List[Employee] = list(
+            Employee.objects.filter(is_active=True).select_related('role').prefetch_related(
+                'allowed_blocks', 'fixed_days_off', 'eligible_tasks'
+            )
+        )
+        self.employees_by_id: Dict[int, Employee] = {emp.id: emp for emp in self.employees}
+
+        self.allowed_block_ids: Dict[int, FrozenSet[int]] = {}
+        self.days_off: Dict[int, FrozenSet[int]] = {}
+        self.eligible_tasks: Dict[int, Tuple] = {}
+        for emp in self.employees:
+            block_ids = frozenset(block.id for block in emp.allowed_blocks.all())
+            if not emp.can_work_night:
+                block_ids -= night_block_ids
+            self.allowed_block_ids[emp.id] = block_ids
+            self.days_off[emp.id] = frozenset(day.iso_weekday for day in emp.fixed_days_off.all())
+            self.eligible_tasks[emp.id] = tuple(emp.eligible_tasks.all())
+
+        # Índice de indisponibilidades por fecha
+        self.unavailable: Dict[date, Set[int]] = defaultdict(set)
+        intervals = EmployeeUnavailability.objects.filter(
+            employee__is_active=True,
+            date_start__lte=date_to,
+            date_end__gte=date_from,
+        ).order_by().values_list('employee_id', 'date_start', 'date_end')
+        for emp_id, start, end in intervals:
+            current = max(start, date_from)
+            last = min(end, date_to)
+            while current <= last:
+                self.unavailable[current].add(emp_id)
+                current += timedelta(days=1)
+
+        # Matriz: (empleado, fecha) -> bloques disponibles
+        self.matrix: Dict[Tuple[int, date], FrozenSet[int]] = {}
+        current = date_from
+        while current <= date_to:
+            weekday = current.isoweekday()
+            unavailable_today = self.unavailable.get(current, set())
+            for emp in self.employees:
+                if emp.id in unavailable_today or weekday in self.days_off[emp.id]:
+                    self.matrix[(emp.id, current)] = frozenset()
+                else:
+                    self.matrix[(emp.id, current)] = self.allowed_block_ids[emp.id]
+            current += timedelta(days=1)
+
+    def covers(self, date_from: date, date_to: date = None) -> bool:
+        return self.date_from <= date_from and (date_to or date_from) <= self.date_to
+
+    def is_available(self, employee_id: int, target_date: date, time_block_id: int) -> bool:
+        return time_block_id in self.matrix.get((employee_id, target_date), frozenset())
+
+    def common_block_ids(self, employee_ids: Iterable[int]) -> FrozenSet[int]:
+        """Bloques permitidos a todos (equivale a Team.get_common_blocks)."""
+        sets = [self.allowed_block_ids.get(emp_id, frozenset()) for emp_id in employee_ids]
+        return frozenset.intersection(*sets) if sets else frozenset()
+
+    def common_task_codes(self, employee_ids: Iterable[int]) -> List[str]:
+        """Tareas que pueden hacer todos, en el orden de TaskType (priority, code)."""
+        task_lists = [self.eligible_tasks.get(emp_id, ()) for emp_id in employee_ids]
+        if not task_lists:
+            return []
+        common = set.intersection(*(set(task.id for task in tasks) for tasks in task_lists))
+        tasks = [task for task in task_lists[0] if task.id in common]
+        tasks.sort(key=lambda task: (task.priority, task.code))
+        return [task.code for task in tasks]
+
+    def task_codes(self, employee_id: int) -> List[str]:
+        return [task.code for task in self.eligible_tasks.get(employee_id, ())]
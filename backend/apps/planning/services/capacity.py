@@ -8,36 +8,41 @@ from collections import defaultdict
 from decimal import Decimal
 
 from apps.core.models import TimeBlock, DayOfWeek
-from apps.staff.models import Employee, Team, EmployeeUnavailability
+from apps.staff.models import Employee
 from apps.shifts.models import ShiftTemplate
 from apps.rules.models import ElasticityRule
+from .availability import AvailabilityMatrix
+from .config_snapshot import get_planning_config
 
 
 class CapacityCalculator:
     """
     Calculador de capacidad del personal.
     Determina cuántas horas/minutos puede trabajar el equipo.
+
+    La disponibilidad se lee de una AvailabilityMatrix cargada para el
+    rango pedido (ver prepare) y reutilizada mientras cubra las fechas.
     """
 
     def __init__(self):
-        self._elasticity_cache = None
+        self.config = get_planning_config()
+        self.availability: Optional[AvailabilityMatrix] = None
+
+    def prepare(self, date_from: date, date_to: date = None) -> AvailabilityMatrix:
+        """Carga la matriz de disponibilidad para el rango (si la actual no lo cubre)."""
+        date_to = date_to or date_from
+        if self.availability is None or not self.availability.covers(date_from, date_to):
+            night_ids = [block.id for block in self.config.time_blocks.values() if block.code == 'NIGHT']
+            self.availability = AvailabilityMatrix(date_from, date_to, night_block_ids=night_ids)
+        return self.availability
 
     def _get_elasticity_rules(self) -> Dict[str, ElasticityRule]:
-        """Obtiene reglas de elasticidad con cache."""
-        if self._elasticity_cache is None:
-            self._elasticity_cache = {
-                rule.elasticity_level: rule
-                for rule in ElasticityRule.objects.all()
-            }
-        return self._elasticity_cache
+        """Obtiene reglas de elasticidad de la foto de configuración."""
+        return self.config.elasticity_rules
 
     def _get_day_of_week(self, target_date: date) -> Optional[DayOfWeek]:
         """Obtiene el DayOfWeek para una fecha."""
-        iso_weekday = target_date.isoweekday()
-        try:
-            return DayOfWeek.objects.get(iso_weekday=iso_weekday)
-        except DayOfWeek.DoesNotExist:
-            return None
+        return self.config.days_of_week.get(target_date.isoweekday())
 
     def _is_employee_available(
         self,
@@ -46,35 +51,11 @@ class CapacityCalculator:
         time_block: TimeBlock
     ) -> bool:
         """
-        Verifica si un empleado está disponible para una fecha y bloque.
+        Verifica si un empleado está disponible para una fecha y bloque
+        (activo, bloque permitido, NIGHT, días fijos e indisponibilidades).
         """
-        # Verificar si está activo
-        if not employee.is_active:
-            return False
-
-        # Verificar si puede trabajar en este bloque
-        if not employee.allowed_blocks.filter(id=time_block.id).exists():
-            return False
-
-        # Verificar bloque NIGHT
-        if time_block.code == 'NIGHT' and not employee.can_work_night:
-            return False
-
-        # Verificar días fijos de descanso
-        day_of_week = self._get_day_of_week(target_date)
-        if day_of_week and employee.fixed_days_off.filter(id=day_of_week.id).exists():
-            return False
-
-        # Verificar indisponibilidades (vacaciones, bajas, etc.)
-        has_unavailability = EmployeeUnavailability.objects.filter(
-            employee=employee,
-            date_start__lte=target_date,
-            date_end__gte=target_date
-        ).exists()
-        if has_unavailability:
-            return False
-
-        return True
+        availability = self.prepare(target_date)
+        return availability.is_available(employee.id, target_date, time_block.id)
 
     def _get_shift_template(
         self,
@@ -82,12 +63,11 @@ class CapacityCalculator:
         time_block: TimeBlock
     ) -> Optional[ShiftTemplate]:
         """Obtiene la plantilla de turno para un empleado y bloque."""
-        # Usar filter().first() porque puede haber múltiples templates (ej: FDC_MANANA y FDC_MANANA_CORTO)
-        return ShiftTemplate.objects.filter(
-            role=employee.role,
-            time_block=time_block,
-            is_active=True
-        ).first()
+        # Primer template que coincida: puede haber varios (ej: FDC_MANANA y FDC_MANANA_CORTO)
+        return self.config.first_shift_template(
+            role_id=employee.role_id,
+            time_block_id=time_block.id
+        )
 
     def compute_capacity(
         self,
@@ -116,8 +96,9 @@ class CapacityCalculator:
         if time_block:
             blocks = [time_block]
         else:
-            blocks = TimeBlock.objects.filter(is_active=True)
+            blocks = self.config.active_time_blocks
 
+        self.prepare(target_date)
         for block in blocks:
             block_result = self._compute_block_capacity(target_date, block)
             result['blocks'][block.code] = block_result
@@ -132,6 +113,7 @@ class CapacityCalculator:
         time_block: TimeBlock
     ) -> Dict[str, Any]:
         """Calcula capacidad para un bloque específico."""
+        availability = self.prepare(target_date)
         result = {
             'time_block': time_block.code,
             'total_minutes': 0,
@@ -142,27 +124,24 @@ class CapacityCalculator:
 
         # Primero, procesar equipos (parejas)
         processed_employees = set()
-        teams = Team.objects.filter(
-            is_active=True,
-            team_type__in=['FIXED', 'PREFERRED']
-        ).prefetch_related('members')
+        teams = self.config.get_teams(team_types=['FIXED', 'PREFERRED'])
 
         for team in teams:
             # Verificar que todos los miembros estén disponibles
-            members = list(team.members.filter(is_active=True))
+            members = [m for m in team.members.all() if m.is_active]
             if not members:
                 continue
 
+            member_ids = [m.id for m in members]
             all_available = all(
-                self._is_employee_available(m, target_date, time_block)
-                for m in members
+                availability.is_available(member_id, target_date, time_block.id)
+                for member_id in member_ids
             )
             if not all_available:
                 continue
 
             # Verificar que el equipo puede trabajar en este bloque
-            common_blocks = team.get_common_blocks()
-            if not common_blocks.filter(id=time_block.id).exists():
+            if time_block.id not in availability.common_block_ids(member_ids):
                 continue
 
             # Obtener plantilla de turno (usar la del primer miembro)
@@ -183,7 +162,7 @@ class CapacityCalculator:
                 'shift_template': shift_template,
                 'shift_template_code': shift_template.code,
                 'available_minutes': team_minutes,
-                'eligible_tasks': list(team.get_common_eligible_tasks().values_list('code', flat=True)),
+                'eligible_tasks': availability.common_task_codes(member_ids),
                 'elasticity': min(m.elasticity for m in members),  # Usar el menor
             })
 
@@ -197,14 +176,10 @@ class CapacityCalculator:
                 result['by_role'][member.role.code]['count'] += 1
 
         # Luego, procesar empleados individuales (no en equipos)
-        employees = Employee.objects.filter(
-            is_active=True
-        ).exclude(
-            id__in=processed_employees
-        ).select_related('role')
+        employees = [e for e in availability.employees if e.id not in processed_employees]
 
         for employee in employees:
-            if not self._is_employee_available(employee, target_date, time_block):
+            if not availability.is_available(employee.id, target_date, time_block.id):
                 continue
 
             shift_template = self._get_shift_template(employee, time_block)
@@ -221,7 +196,7 @@ class CapacityCalculator:
                 'shift_template': shift_template,
                 'shift_template_code': shift_template.code,
                 'available_minutes': emp_minutes,
-                'eligible_tasks': list(employee.eligible_tasks.values_list('code', flat=True)),
+                'eligible_tasks': availability.task_codes(employee.id),
                 'elasticity': employee.elasticity,
             })
 
@@ -255,6 +230,8 @@ class CapacityCalculator:
             }),
         }
 
+        availability = self.prepare(week_start, week_start + timedelta(days=6))
+
         for day_offset in range(7):
             current_date = week_start + timedelta(days=day_offset)
             day_capacity = self.compute_capacity(current_date)
@@ -276,7 +253,7 @@ class CapacityCalculator:
 
         # Agregar horas objetivo
         if consider_hours_target:
-            for emp in Employee.objects.filter(is_active=True):
+            for emp in availability.employees:
                 result['by_employee'][emp.id]['target_hours'] = float(emp.weekly_hours_target)
 
         return result
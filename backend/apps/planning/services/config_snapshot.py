@@ -0,0 +1,190 @@
+"""
+Planning Config Snapshot.
+Foto inmutable de la configuración de planificación (bloques, tareas,
+turnos, equipos, reglas), construida una vez y cacheada por proceso.
+
+Se invalida con señales post_save/post_delete/m2m_changed sobre los
+modelos de configuración (ver apps/planning/signals.py). La invalidación
+llega a todos los procesos (web y run_jobs) a través de la clave de
+versión, así que la cache tiene que ser compartida (system check
+planning.E001 en apps/planning/checks.py).
+"""
+import threading
+import uuid
+from dataclasses import dataclass, fields
+from types import MappingProxyType
+from typing import Iterable, Mapping, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Prefetch
+
+from apps.core.models import TimeBlock, TaskType, RoomType, DayOfWeek
+from apps.staff.models import Employee, Team
+from apps.shifts.models import ShiftTemplate
+from apps.rules.models import ElasticityRule, TaskTimeRule
+
+
+VERSION_CACHE_KEY = 'planning_config:version'
+SNAPSHOT_CACHE_KEY = 'planning_config:snapshot:{version}'
+
+
+@dataclass(frozen=True)
+class PlanningConfigSnapshot:
+    """
+    Configuración de planificación en memoria.
+    Los modelos que contiene son de solo lectura: no modificarlos.
+    """
+    version: str
+    time_blocks: Mapping[str, TimeBlock]            # por code, orden TimeBlock.order
+    task_types: Mapping[str, TaskType]              # por code, con allowed_blocks precargados
+    room_types: Mapping[int, RoomType]              # por id
+    days_of_week: Mapping[int, DayOfWeek]           # por iso_weekday
+    shift_templates: Tuple[ShiftTemplate, ...]      # orden del modelo
+    teams: Tuple[Team, ...]                         # con members (y su role) precargados
+    elasticity_rules: Mapping[str, ElasticityRule]  # por elasticity_level
+    task_time_rules: Tuple[TaskTimeRule, ...]       # activas, orden -priority
+
+    @property
+    def active_time_blocks(self) -> Tuple[TimeBlock, ...]:
+        return tuple(block for block in self.time_blocks.values() if block.is_active)
+
+    def get_time_block(self, code: str) -> Optional[TimeBlock]:
+        return self.time_blocks.get(code)
+
+    def get_shift_template(self, code: str) -> Optional[ShiftTemplate]:
+        for template in self.shift_templates:
+            if template.code == code:
+                return template
+        return None
+
+    def first_shift_template(
+        self,
+        codes: Iterable[str] = None,
+        role_id: int = None,
+        time_block_id: int = None,
+        active_only: bool = True
+    ) -> Optional[ShiftTemplate]:
+        """Equivalente a ShiftTemplate.objects.filter(...).first() en memoria."""
+        codes = set(codes) if codes is not None else None
+        for template in self.shift_templates:
+            if active_only and not template.is_active:
+                continue
+            if codes is not None and template.code not in codes:
+                continue
+            if role_id is not None and template.role_id != role_id:
+                continue
+            if time_block_id is not None and template.time_block_id != time_block_id:
+                continue
+            return template
+        return None
+
+    def get_teams(self, team_types: Iterable[str] = None, active_only: bool = True) -> Tuple[Team, ...]:
+        team_types = set(team_types) if team_types is not None else None
+        return tuple(
+            team for team in self.teams
+            if (not active_only or team.is_active)
+            and (team_types is None or team.team_type in team_types)
+        )
+
+    def __reduce__(self):
+        # MappingProxyType no se puede serializar: guardar dicts planos
+        state = {
+            f.name: dict(value) if isinstance(value, MappingProxyType) else value
+            for f in fields(self)
+            for value in [getattr(self, f.name)]
+        }
+        return (_snapshot_from_state, (state,))
+
+
+def _snapshot_from_state(state: dict) -> PlanningConfigSnapshot:
+    return PlanningConfigSnapshot(**{
+        name: MappingProxyType(value) if isinstance(value, dict) else value
+        for name, value in state.items()
+    })
+
+
+_lock = threading.Lock()
+_snapshot: Optional[PlanningConfigSnapshot] = None
+
+
+def _build_snapshot(version: str) -> PlanningConfigSnapshot:
+    """Carga toda la configuración de la BD (una query por modelo)."""
+    return PlanningConfigSnapshot(
+        version=version,
+        time_blocks=MappingProxyType({
+            block.code: block for block in TimeBlock.objects.all()
+        }),
+        task_types=MappingProxyType({
+            task.code: task for task in TaskType.objects.prefetch_related('allowed_blocks')
+        }),
+        room_types=MappingProxyType({
+            room_type.id: room_type for room_type in RoomType.objects.all()
+        }),
+        days_of_week=MappingProxyType({
+            day.iso_weekday: day for day in DayOfWeek.objects.all()
+        }),
+        shift_templates=tuple(
+            ShiftTemplate.objects.select_related('role', 'time_block').order_by(
+                'role', 'time_block__order', 'pk'
+            )
+        ),
+        teams=tuple(Team.objects.prefetch_related(
+            Prefetch('members', queryset=Employee.objects.select_related('role'))
+        ).order_by('pk')),
+        elasticity_rules=MappingProxyType({
+            rule.elasticity_level: rule for rule in ElasticityRule.objects.all()
+        }),
+        task_time_rules=tuple(
+            TaskTimeRule.objects.filter(is_active=True).order_by('-priority')
+        ),
+    )
+
+
+def get_planning_config() -> PlanningConfigSnapshot:
+    """
+    Devuelve la foto de configuración vigente.
+    Solo consulta la BD si la versión cambió desde la última construcción.
+
+    Sin clave de versión en la cache (vaciada o expulsada) la versión es
+    desconocida: se publica una nueva y se reconstruye. Nunca se vuelve a
+    publicar la versión de la foto de este proceso, que puede ser antigua.
+    """
+    global _snapshot
+
+    version = cache.get(VERSION_CACHE_KEY)
+    snapshot = _snapshot
+    if snapshot is not None and version is not None and snapshot.version == version:
+        return snapshot
+
+    with _lock:
+        version = cache.get(VERSION_CACHE_KEY)
+        if version is None:
+            # Como get_data_version: si otro proceso se adelanta, usar la suya
+            version = uuid.uuid4().hex
+            if not cache.add(VERSION_CACHE_KEY, version, None):
+                version = cache.get(VERSION_CACHE_KEY, version)
+
+        if _snapshot is not None and _snapshot.version == version:
+            return _snapshot
+
+        shared = getattr(settings, 'PLANNING_CONFIG_SHARED_CACHE', False)
+        snapshot = cache.get(SNAPSHOT_CACHE_KEY.format(version=version)) if shared else None
+        if snapshot is None:
+            snapshot = _build_snapshot(version)
+            if shared:
+                cache.set(SNAPSHOT_CACHE_KEY.format(version=version), snapshot, None)
+
+        _snapshot = snapshot
+        return snapshot
+
+
+def invalidate_planning_config(**kwargs):
+    """
+    Invalida la foto de configuración en este proceso y, vía la clave de
+    versión en la cache, en los demás. Usable como receptor de señales.
+    """
+    global _snapshot
+    with _lock:
+        _snapshot = None
+        cache.set(VERSION_CACHE_KEY, uuid.uuid4().hex, None)
@@ -0,0 +1,243 @@
+"""
+Daily Plan Batch Service.
+Genera (o regenera) los DailyPlan de un rango de fechas o de la semana de
+un WeekPlan en una sola llamada.
+
+Cada día es independiente (su propia transacción en generate_daily_plan),
+así que los días se reparten en un pool de procesos con una conexión a la
+BD por proceso. La configuración se carga antes de crear el pool y los
+hijos la heredan: ningún día arranca en frío.
+"""
+import multiprocessing
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+
+from django.db import connection, connections
+
+from apps.planning.models import DailyPlan, WeekPlan
+from .config_snapshot import get_planning_config
+from .daily_plan_generator import MAX_ROUTING_TIME_BUDGET, DailyPlanGenerator
+
+
+# Días máximos por llamada
+MAX_BATCH_DAYS = 31
+
+
+# === PROCESO TRABAJADOR ===
+
+_worker_generator: Optional[DailyPlanGenerator] = None
+
+
+def _init_worker():
+    global _worker_generator
+    _worker_generator = DailyPlanGenerator()
+
+
+def _generate_day(
+    day: str,
+    week_plan_id: Optional[int],
+    only_missing: bool,
+    time_budget: Optional[float]
+) -> Dict[str, Any]:
+    """Genera el plan de un día y devuelve su resumen. Un día fallido no para el resto."""
+    if _worker_generator is None:
+        _init_worker()
+    generator = _worker_generator
+
+    target_date = date.fromisoformat(day)
+    result = {
+        'date': day,
+        'week_plan_id': week_plan_id,
+        'status': None,
+        'daily_plan_id': None,
+        'pending_tasks': 0,
+        'assigned_tasks': 0,
+        'routing': {},
+        'alerts': [],
+        'message': None,
+        'seconds': 0.0,
+    }
+    began = time.perf_counter()
+
+    existing = DailyPlan.objects.filter(date=target_date).values_list('status', flat=True).first()
+    if existing and (only_missing or existing != 'DRAFT'):
+        result['status'] = 'SKIPPED'
+        result['message'] = f'Ya existe un plan diario con estado {existing}'
+        return result
+
+    try:
+        week_plan = WeekPlan.objects.get(pk=week_plan_id) if week_plan_id else None
+        daily_plan = generator.generate_daily_plan(target_date, week_plan, time_budget=time_budget)
+    except Exception as e:
+        result['status'] = 'FAILED'
+        result['message'] = str(e)
+    else:
+        result.update({
+            'status': 'REPLACED' if existing else 'CREATED',
+            'daily_plan_id': daily_plan.id,
+            'pending_tasks': generator.pending_tasks,
+            'assigned_tasks': daily_plan.task_assignments.count(),
+            'routing': generator.routing,
+            'alerts': [
+                {
+                    'type': alert['type'],
+                    'severity': alert['severity'],
+                    'time_block': alert['time_block'].code if alert.get('time_block') else None,
+                    'title': alert['title'],
+                    'message': alert['message'],
+                }
+                for alert in generator.alerts
+            ],
+        })
+
+    result['seconds'] = round(time.perf_counter() - began, 3)
+    return result
+
+
+# === GENERADOR POR LOTES ===
+
+class DailyPlanBatchGenerator:
+    """
+    Genera los planes diarios de varios días.
+    Los días con plan DRAFT se regeneran; los que tienen un plan en otro
+    estado (o cualquier plan con only_missing) se saltan.
+    """
+
+    def resolve_days(
+        self,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        week_plan: Optional[WeekPlan] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Días a generar con su WeekPlan: la semana del week_plan o el rango
+        [date_from, date_to] con el WeekPlan (no archivado, el más reciente)
+        de la semana de cada día, si existe.
+
+        Returns:
+            [{'date': date, 'week_plan_id': int | None}, ...]
+        """
+        if week_plan is not None:
+            return [
+                {'date': week_plan.week_start_date + timedelta(days=offset), 'week_plan_id': week_plan.id}
+                for offset in range(7)
+            ]
+
+        if date_from is None or date_to is None:
+            raise ValueError('Indicar week_plan o date_from y date_to')
+        if date_to < date_from:
+            raise ValueError('date_to no puede ser anterior a date_from')
+        days = (date_to - date_from).days + 1
+        if days > MAX_BATCH_DAYS:
+            raise ValueError(f'El rango no puede superar {MAX_BATCH_DAYS} días')
+
+        # Una query para todas las semanas del rango
+        plans_by_week = {}
+        for plan in WeekPlan.objects.filter(
+            week_start_date__gt=date_from - timedelta(days=7),
+            week_start_date__lte=date_to,
+        ).exclude(status='ARCHIVED').order_by('week_start_date', 'id'):
+            plans_by_week[plan.week_start_date] = plan.id
+
+        result = []
+        for offset in range(days):
+            day = date_from + timedelta(days=offset)
+            week_start = day - timedelta(days=day.weekday())
+            result.append({'date': day, 'week_plan_id': plans_by_week.get(week_start)})
+        return result
+
+    def generate(
+        self,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        week_plan: Optional[WeekPlan] = None,
+        only_missing: bool = False,
+        time_budget: Optional[float] = None,
+        workers: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Genera los planes del rango (ver resolve_days).
+
+        Args:
+            date_from, date_to: Rango de fechas (ambas incluidas)
+            week_plan: WeekPlan cuya semana generar (en lugar del rango)
+            only_missing: Saltar también los días con plan DRAFT
+            time_budget: Segundos del router de zonas por bloque
+            workers: Procesos del pool (default: CPUs; 1 = en serie)
+
+        Returns:
+            {
+                'date_from', 'date_to', 'workers', 'seconds',
+                'days': [resumen por día (ver _generate_day)],
+                'totals': {'created', 'replaced', 'skipped', 'failed',
+                           'pending_tasks', 'assigned_tasks', 'alerts': {severidad: n}},
+            }
+        """
+        days = self.resolve_days(date_from, date_to, week_plan)
+        # Mejor un error que el mismo fallo en cada día
+        if time_budget is not None and not 0 <= float(time_budget) <= MAX_ROUTING_TIME_BUDGET:
+            raise ValueError(f'time_budget debe estar entre 0 y {MAX_ROUTING_TIME_BUDGET:g} segundos')
+        tasks = [
+            (day['date'].isoformat(), day['week_plan_id'], only_missing, time_budget)
+            for day in days
+        ]
+
+        began = time.perf_counter()
+        workers = self._workers(workers, len(tasks))
+        results = self._run(tasks, workers)
+
+        statuses = Counter(day['status'] for day in results)
+        return {
+            'date_from': days[0]['date'].isoformat(),
+            'date_to': days[-1]['date'].isoformat(),
+            'workers': workers,
+            'seconds': round(time.perf_counter() - began, 3),
+            'days': results,
+            'totals': {
+                'created': statuses['CREATED'],
+                'replaced': statuses['REPLACED'],
+                'skipped': statuses['SKIPPED'],
+                'failed': statuses['FAILED'],
+                'pending_tasks': sum(day['pending_tasks'] for day in results),
+                'assigned_tasks': sum(day['assigned_tasks'] for day in results),
+                'alerts': dict(Counter(
+                    alert['severity'] for day in results for alert in day['alerts']
+                )),
+            },
+        }
+
+    @staticmethod
+    def _workers(workers: Optional[int], days: int) -> int:
+        """
+        Procesos a usar. En serie dentro de una transacción (los hijos no la
+        verían) y con SQLite (un solo escritor por archivo).
+        """
+        if connection.in_atomic_block or connection.vendor == 'sqlite':
+            return 1
+        if workers is None:
+            workers = os.cpu_count() or 1
+        return max(1, min(workers, days))
+
+    @staticmethod
+    def _run(tasks, workers: int) -> List[Dict[str, Any]]:
+        """Ejecuta los días en un pool de procesos (o aquí si workers=1)."""
+        # Configuración cargada una vez: el pool la hereda con fork
+        get_planning_config()
+
+        if workers == 1:
+            _init_worker()
+            return [_generate_day(*task) for task in tasks]
+
+        # Cada hijo abre su propia conexión a la BD
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=context,
+            initializer=_init_worker,
+        ) as pool:
+            return list(pool.map(_generate_day, *zip(*tasks)))
@@ -4,19 +4,31 @@ Genera el plan diario (asignación de tareas específicas).
 Implementa asignación zonificada para eficiencia.
 """
 from datetime import date
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional
 from collections import defaultdict
+from django.conf import settings
 from django.db import transaction
 
-from apps.core.models import TimeBlock, Zone, Room
-from apps.staff.models import Employee, Team
-from apps.rooms.models import RoomDailyTask, RoomDailyState
+from apps.core.models import TimeBlock, Zone
+from apps.staff.models import Team
+from apps.rooms.models import RoomDailyTask
 from apps.planning.models import (
     WeekPlan, ShiftAssignment, DailyPlan, TaskAssignment, PlanningAlert
 )
 from apps.rules.models import ZoneAssignmentRule
 from .load import LoadCalculator
+from .config_snapshot import get_planning_config
 from .time_calculator import TimeCalculator
+from .data_version import mark_data_changed
+from .zone_router import (
+    W_WALK, RoutePlan, RouteTask, RouteUnit, RouteZone, UnitRoute, ZoneRouter,
+)
+
+
+BULK_BATCH_SIZE = 500
+
+# Segundos máximos de búsqueda local del router por bloque
+MAX_ROUTING_TIME_BUDGET = 10.0
 
 
 class DailyPlanGenerator:
@@ -30,38 +42,50 @@ class DailyPlanGenerator:
         self.load_calculator = LoadCalculator()
         self.time_calculator = TimeCalculator()
         self.alerts: List[Dict] = []
+        # Minutos por tarea del día en proceso (task_id -> minutos)
+        self.task_minutes: Dict[int, int] = {}
+        # Resultado del router por bloque (código -> métricas)
+        self.routing: Dict[str, Dict[str, Any]] = {}
+        # Tareas pendientes del último día generado (asignadas o no)
+        self.pending_tasks = 0
 
     def _get_zone_assignment_rules(self) -> Dict[str, Any]:
-        """Obtiene reglas de asignación de zonas."""
-        rules = {
-            'COMPLETE_ZONE_FIRST': ZoneAssignmentRule.get_value('COMPLETE_ZONE_FIRST', True),
-            'MAX_ZONES_PER_EMPLOYEE': ZoneAssignmentRule.get_value('MAX_ZONES_PER_EMPLOYEE', 3),
-            'ADJACENT_ZONES_PREFERRED': ZoneAssignmentRule.get_value('ADJACENT_ZONES_PREFERRED', True),
-            'PAIR_SAME_ZONE': ZoneAssignmentRule.get_value('PAIR_SAME_ZONE', True),
-        }
-        return rules
-
-    def _get_available_units_for_day(
+        """Obtiene reglas de asignación de zonas (una query)."""
+        return ZoneAssignmentRule.get_values({
+            'COMPLETE_ZONE_FIRST': True,
+            'MAX_ZONES_PER_EMPLOYEE': 3,
+            'ADJACENT_ZONES_PREFERRED': True,
+            'PAIR_SAME_ZONE': True,
+        })
+
+    def _get_units_by_block(
         self,
         target_date: date,
-        time_block: TimeBlock,
+        time_blocks: List[TimeBlock],
         week_plan: Optional[WeekPlan] = None
-    ) -> List[Dict[str, Any]]:
+    ) -> Dict[int, List[Dict[str, Any]]]:
         """
-        Obtiene las unidades disponibles para un día según el WeekPlan.
+        Unidades disponibles del día por bloque (time_block_id) según el
+        WeekPlan. Con WeekPlan son tres queries (asignaciones y
+        elegibilidad de empleados y equipos) para todos los bloques.
         """
-        units = []
+        units_by_block = {block.id: [] for block in time_blocks}
 
         if week_plan:
             # Usar asignaciones del WeekPlan
             assignments = ShiftAssignment.objects.filter(
                 week_plan=week_plan,
                 date=target_date,
-                shift_template__time_block=time_block,
+                shift_template__time_block__in=list(units_by_block),
                 is_day_off=False
-            ).select_related('employee', 'team', 'shift_template')
+            ).select_related(
+                'employee', 'team', 'shift_template'
+            ).prefetch_related(
+                'employee__eligible_tasks', 'team__members__eligible_tasks'
+            ).order_by('id')
 
             for assignment in assignments:
+                units = units_by_block[assignment.shift_template.time_block_id]
                 if assignment.employee:
                     units.append({
                         'type': 'employee',
@@ -69,7 +93,7 @@ class DailyPlanGenerator:
                         'employee_id': assignment.employee.id,
                         'name': assignment.employee.full_name,
                         'available_minutes': int(assignment.assigned_hours * 60),
-                        'eligible_tasks': list(assignment.employee.eligible_tasks.values_list('code', flat=True)),
+                        'eligible_tasks': [task.code for task in assignment.employee.eligible_tasks.all()],
                         'assigned_minutes': 0,
                         'assigned_zones': [],
                         'assigned_tasks': [],
@@ -81,45 +105,59 @@ class DailyPlanGenerator:
                         'team_id': assignment.team.id,
                         'name': str(assignment.team),
                         'available_minutes': int(assignment.assigned_hours * 60),
-                        'eligible_tasks': list(assignment.team.get_common_eligible_tasks().values_list('code', flat=True)),
+                        'eligible_tasks': self._team_task_codes(assignment.team),
                         'assigned_minutes': 0,
                         'assigned_zones': [],
                         'assigned_tasks': [],
                     })
         else:
-            # Sin WeekPlan, usar todos los disponibles
+            # Sin WeekPlan, usar todos los disponibles (una matriz para el día)
             from .capacity import CapacityCalculator
             capacity_calc = CapacityCalculator()
-            capacity = capacity_calc.compute_capacity(target_date, time_block)
-
-            for unit_data in capacity['blocks'].get(time_block.code, {}).get('units', []):
-                units.append({
-                    'type': unit_data['type'],
-                    'employee': unit_data.get('employee'),
-                    'team': unit_data.get('team'),
-                    'employee_id': unit_data.get('employee_id'),
-                    'team_id': unit_data.get('team_id'),
-                    'name': unit_data.get('employee_name') or unit_data.get('team_name'),
-                    'available_minutes': unit_data['available_minutes'],
-                    'eligible_tasks': unit_data['eligible_tasks'],
-                    'assigned_minutes': 0,
-                    'assigned_zones': [],
-                    'assigned_tasks': [],
-                })
-
-        return units
-
-    def _get_tasks_by_zone(
+
+            for time_block in time_blocks:
+                capacity = capacity_calc.compute_capacity(target_date, time_block)
+                for unit_data in capacity['blocks'].get(time_block.code, {}).get('units', []):
+                    units_by_block[time_block.id].append({
+                        'type': unit_data['type'],
+                        'employee': unit_data.get('employee'),
+                        'team': unit_data.get('team'),
+                        'employee_id': unit_data.get('employee_id'),
+                        'team_id': unit_data.get('team_id'),
+                        'name': unit_data.get('employee_name') or unit_data.get('team_name'),
+                        'available_minutes': unit_data['available_minutes'],
+                        'eligible_tasks': unit_data['eligible_tasks'],
+                        'assigned_minutes': 0,
+                        'assigned_zones': [],
+                        'assigned_tasks': [],
+                    })
+
+        return units_by_block
+
+    @staticmethod
+    def _team_task_codes(team: Team) -> List[str]:
+        """Tareas que pueden hacer todos los miembros (Team.get_common_eligible_tasks, sin queries)."""
+        members = list(team.members.all())
+        if not members:
+            return []
+        common = set(task.code for task in members[0].eligible_tasks.all())
+        for member in members[1:]:
+            common &= set(task.code for task in member.eligible_tasks.all())
+        return sorted(common)
+
+    def _get_tasks_by_block(
         self,
         target_date: date,
-        time_block: TimeBlock
-    ) -> Dict[str, List[RoomDailyTask]]:
+        time_blocks: List[TimeBlock]
+    ) -> Dict[int, Dict[str, List[RoomDailyTask]]]:
         """
-        Obtiene tareas agrupadas por zona, ordenadas para recorrido eficiente.
+        Tareas pendientes del día con estado, habitación, zona y tipo (una
+        query), agrupadas por bloque (time_block_id) y zona, ordenadas para
+        recorrido eficiente.
         """
         tasks = RoomDailyTask.objects.filter(
             room_daily_state__date=target_date,
-            time_block=time_block,
+            time_block__in=[block.id for block in time_blocks],
             status='PENDING'
         ).select_related(
             'room_daily_state',
@@ -133,146 +171,127 @@ class DailyPlanGenerator:
             'task_type__priority'
         )
 
-        # Agrupar por zona
-        tasks_by_zone = defaultdict(list)
+        # Tiempos de todo el día en una pasada
+        tasks = list(tasks)
+        self.task_minutes.update(
+            zip((task.id for task in tasks), self.time_calculator.calculate_many(tasks))
+        )
+
+        # Agrupar por bloque y zona
+        tasks_by_block = {block.id: defaultdict(list) for block in time_blocks}
         for task in tasks:
             zone = task.room_daily_state.room.zone
-            tasks_by_zone[zone.code].append(task)
+            tasks_by_block[task.time_block_id][zone.code].append(task)
 
-        return dict(tasks_by_zone)
+        return {block_id: dict(by_zone) for block_id, by_zone in tasks_by_block.items()}
 
     def _calculate_zone_load(
         self,
         tasks: List[RoomDailyTask]
     ) -> int:
         """Calcula la carga total de una zona en minutos."""
-        total = 0
-        for task in tasks:
-            total += self.time_calculator.calculate_task_time(task)
-        return total
+        return sum(self._get_task_minutes(task) for task in tasks)
+
+    def _get_task_minutes(self, task: RoomDailyTask) -> int:
+        """Minutos de una tarea, precalculados para el día en _get_tasks_by_block."""
+        minutes = self.task_minutes.get(task.id)
+        if minutes is None:
+            minutes = self.time_calculator.calculate_task_time(task)
+            self.task_minutes[task.id] = minutes
+        return minutes
 
-    def _find_best_unit_for_zone(
+    def _route_block(
         self,
-        zone: Zone,
-        zone_tasks: List[RoomDailyTask],
+        zones: List[Zone],
+        tasks_by_zone: Dict[str, List[RoomDailyTask]],
         available_units: List[Dict],
-        rules: Dict
-    ) -> Optional[Dict]:
+        rules: Dict,
+        time_budget: float
+    ) -> RoutePlan:
         """
-        Encuentra la mejor unidad para asignar una zona.
-        Considera:
-        - Elegibilidad de tareas
-        - Capacidad disponible
-        - Zonas ya asignadas (preferir adyacentes)
+        Reparte las zonas entre las unidades y ordena su recorrido con
+        ZoneRouter (ver zone_router.py). Sin queries: todo sale de las
+        tareas ya cargadas con su habitación y zona.
         """
-        zone_load = self._calculate_zone_load(zone_tasks)
-
-        # Obtener tipos de tarea en la zona
-        task_types_in_zone = set(t.task_type.code for t in zone_tasks)
-
-        best_unit = None
-        best_score = -1
-
-        for unit in available_units:
-            # Verificar capacidad
-            remaining_capacity = unit['available_minutes'] - unit['assigned_minutes']
-            if remaining_capacity < zone_load * 0.3:  # Al menos 30% de la zona
-                continue
-
-            # Verificar elegibilidad
-            can_do_tasks = task_types_in_zone.intersection(set(unit['eligible_tasks']))
-            if not can_do_tasks:
-                continue
-
-            # Calcular score
-            score = 0
-
-            # Bonus por capacidad disponible
-            score += min(remaining_capacity / zone_load, 1.0) * 30
-
-            # Bonus por zonas adyacentes
-            if rules['ADJACENT_ZONES_PREFERRED'] and unit['assigned_zones']:
-                last_zone = unit['assigned_zones'][-1]
-                try:
-                    last_zone_obj = Zone.objects.get(code=last_zone)
-                    if last_zone_obj.floor_number and zone.floor_number:
-                        floor_diff = abs(last_zone_obj.floor_number - zone.floor_number)
-                        if floor_diff <= 1:
-                            score += 20
-                        elif floor_diff <= 2:
-                            score += 10
-                except Zone.DoesNotExist:
-                    pass
-            elif not unit['assigned_zones']:
-                # Sin zonas asignadas, bonus neutral
-                score += 15
-
-            # Penalización por muchas zonas
-            if len(unit['assigned_zones']) >= rules['MAX_ZONES_PER_EMPLOYEE']:
+        route_zones = []
+        for zone in zones:
+            # Orden del recorrido original: orden en zona y prioridad de tarea
+            sorted_tasks = sorted(
+                tasks_by_zone.get(zone.code, []),
+                key=lambda t: (
+                    t.room_daily_state.room.order_in_zone,
+                    t.task_type.priority
+                )
+            )
+            if not sorted_tasks:
                 continue
+            route_zones.append(RouteZone(
+                code=zone.code,
+                building_id=zone.building_id,
+                floor=zone.floor_number,
+                tasks=tuple(
+                    RouteTask(
+                        id=task.id,
+                        room_id=task.room_daily_state.room_id,
+                        order=task.room_daily_state.room.order_in_zone,
+                        side=task.room_daily_state.room.corridor_side,
+                        code=task.task_type.code,
+                        minutes=self._get_task_minutes(task),
+                    )
+                    for task in sorted_tasks
+                ),
+            ))
+
+        route_units = [
+            RouteUnit(
+                capacity=unit['available_minutes'] - unit['assigned_minutes'],
+                eligible=frozenset(unit['eligible_tasks']),
+                max_zones=int(rules['MAX_ZONES_PER_EMPLOYEE']),
+            )
+            for unit in available_units
+        ]
 
-            # Elegibilidad de tareas (más tareas = mejor)
-            score += len(can_do_tasks) * 5
-
-            if score > best_score:
-                best_score = score
-                best_unit = unit
-
-        return best_unit
+        router = ZoneRouter(
+            route_zones,
+            route_units,
+            walk_weight=W_WALK if rules['ADJACENT_ZONES_PREFERRED'] else 0,
+        )
+        return router.solve(time_budget=time_budget)
 
-    def _assign_zone_to_unit(
+    def _assign_route_to_unit(
         self,
         unit: Dict,
-        zone: Zone,
-        zone_tasks: List[RoomDailyTask],
+        route: UnitRoute,
+        zones_by_code: Dict[str, Zone],
+        tasks_by_id: Dict[int, RoomDailyTask],
         daily_plan: DailyPlan
     ) -> List[TaskAssignment]:
         """
-        Asigna las tareas de una zona a una unidad.
-        Ordena las tareas para recorrido eficiente dentro de la zona.
+        Crea las asignaciones de una unidad en el orden de su recorrido.
+        El router ya comprobó elegibilidad y capacidad.
         """
         assignments = []
-
-        # Ordenar tareas por orden en zona y prioridad de tarea
-        sorted_tasks = sorted(
-            zone_tasks,
-            key=lambda t: (
-                t.room_daily_state.room.order_in_zone,
-                t.task_type.priority
-            )
-        )
-
-        # Verificar elegibilidad y asignar
         order = len(unit['assigned_tasks'])
-        for task in sorted_tasks:
-            if task.task_type.code not in unit['eligible_tasks']:
-                continue
-
-            task_time = self.time_calculator.calculate_task_time(task)
-
-            # Verificar capacidad
-            remaining = unit['available_minutes'] - unit['assigned_minutes']
-            if remaining < task_time:
-                continue
-
-            assignment = TaskAssignment(
-                daily_plan=daily_plan,
-                room_task=task,
-                employee=unit.get('employee'),
-                team=unit.get('team'),
-                zone=zone,
-                order_in_assignment=order,
-                status='PENDING'
-            )
-            assignments.append(assignment)
-
-            unit['assigned_minutes'] += task_time
-            unit['assigned_tasks'].append(task.id)
-            order += 1
-
-        # Marcar zona como asignada
-        if zone.code not in unit['assigned_zones']:
-            unit['assigned_zones'].append(zone.code)
+        for zone_code, route_tasks in route.stops:
+            zone = zones_by_code[zone_code]
+            for route_task in route_tasks:
+                task = tasks_by_id[route_task.id]
+                assignments.append(TaskAssignment(
+                    daily_plan=daily_plan,
+                    room_task=task,
+                    employee=unit.get('employee'),
+                    team=unit.get('team'),
+                    zone=zone,
+                    order_in_assignment=order,
+                    status='PENDING'
+                ))
+                unit['assigned_minutes'] += route_task.minutes
+                unit['assigned_tasks'].append(task.id)
+                order += 1
+
+            # Marcar zona como asignada
+            if zone_code not in unit['assigned_zones']:
+                unit['assigned_zones'].append(zone_code)
 
         return assignments
 
@@ -280,25 +299,42 @@ class DailyPlanGenerator:
     def generate_daily_plan(
         self,
         target_date: date,
-        week_plan: Optional[WeekPlan] = None
+        week_plan: Optional[WeekPlan] = None,
+        time_budget: float = None
     ) -> DailyPlan:
         """
         Genera el plan diario con asignación zonificada.
 
+        Carga todo el día por adelantado (tareas con estado, habitación y
+        zona, asignaciones del WeekPlan y reglas) con un número fijo de
+        queries y escribe con bulk_create / update al final.
+
         Args:
             target_date: Fecha del plan
             week_plan: Plan semanal asociado (opcional)
+            time_budget: Segundos de búsqueda local del router por bloque
+                (default: settings.ZONE_ROUTING_TIME_BUDGET)
 
         Returns:
             DailyPlan generado
         """
+        if time_budget is None:
+            time_budget = getattr(settings, 'ZONE_ROUTING_TIME_BUDGET', 0.5)
+        try:
+            time_budget = float(time_budget)
+        except (TypeError, ValueError):
+            raise ValueError(f'time_budget inválido: {time_budget}')
+        if not 0 <= time_budget <= MAX_ROUTING_TIME_BUDGET:
+            raise ValueError(f'time_budget debe estar entre 0 y {MAX_ROUTING_TIME_BUDGET:g} segundos')
+
         self.alerts = []
+        self.routing = {}
 
         # Verificar si ya existe
         existing = DailyPlan.objects.filter(date=target_date).first()
         if existing:
             if existing.status == 'DRAFT':
-                existing.delete()
+                self._release_plan(existing)
             else:
                 raise ValueError(f"Ya existe un plan diario con estado {existing.status}")
 
@@ -309,18 +345,32 @@ class DailyPlanGenerator:
             status='DRAFT'
         )
 
-        # Obtener reglas
+        # Cargar el día completo
         rules = self._get_zone_assignment_rules()
+        time_blocks = get_planning_config().active_time_blocks
+        units_by_block = self._get_units_by_block(target_date, time_blocks, week_plan)
+        tasks_by_block = self._get_tasks_by_block(target_date, time_blocks)
+        self.pending_tasks = sum(
+            len(tasks) for by_zone in tasks_by_block.values() for tasks in by_zone.values()
+        )
 
-        # Procesar cada bloque temporal
-        for time_block in TimeBlock.objects.filter(is_active=True):
-            self._process_time_block(
-                daily_plan, target_date, time_block, week_plan, rules
-            )
+        # Procesar cada bloque temporal (en memoria)
+        assignments = []
+        for time_block in time_blocks:
+            assignments.extend(self._process_time_block(
+                daily_plan, time_block, units_by_block[time_block.id],
+                tasks_by_block[time_block.id], rules, time_budget
+            ))
+
+        # Persistir asignaciones y estado de tareas
+        TaskAssignment.objects.bulk_create(assignments, batch_size=BULK_BATCH_SIZE)
+        self._set_task_status([a.room_task_id for a in assignments], 'ASSIGNED')
+        for assignment in assignments:
+            assignment.room_task.status = 'ASSIGNED'
 
         # Crear alertas
-        for alert_data in self.alerts:
-            PlanningAlert.objects.create(
+        PlanningAlert.objects.bulk_create([
+            PlanningAlert(
                 date=target_date,
                 time_block=alert_data.get('time_block'),
                 alert_type=alert_data['type'],
@@ -328,105 +378,116 @@ class DailyPlanGenerator:
                 title=alert_data['title'],
                 message=alert_data['message']
             )
+            for alert_data in self.alerts
+        ], batch_size=BULK_BATCH_SIZE)
+        if self.alerts:
+            # bulk_create no emite señales y el dashboard incluye las alertas
+            mark_data_changed()
 
         return daily_plan
 
     def _process_time_block(
         self,
         daily_plan: DailyPlan,
-        target_date: date,
         time_block: TimeBlock,
-        week_plan: Optional[WeekPlan],
-        rules: Dict
-    ):
-        """Procesa un bloque temporal para asignación zonificada."""
-
-        # Obtener unidades disponibles
-        available_units = self._get_available_units_for_day(
-            target_date, time_block, week_plan
+        available_units: List[Dict],
+        tasks_by_zone: Dict[str, List[RoomDailyTask]],
+        rules: Dict,
+        time_budget: float
+    ) -> List[TaskAssignment]:
+        """
+        Asignación zonificada de un bloque sobre los datos ya cargados.
+        Devuelve las asignaciones sin guardar; las alertas van a self.alerts.
+        """
+        if not available_units or not tasks_by_zone:
+            return []
+
+        # Zonas activas ordenadas por prioridad (vienen con las tareas)
+        zones_by_code = {}
+        for zone_tasks in tasks_by_zone.values():
+            zone = zone_tasks[0].room_daily_state.room.zone
+            if zone.is_active:
+                zones_by_code[zone.code] = zone
+        zones = sorted(
+            zones_by_code.values(),
+            key=lambda z: (z.priority_order, z.floor_number is not None, z.floor_number or 0, z.id)
         )
+        tasks_by_id = {task.id: task for tasks in tasks_by_zone.values() for task in tasks}
+
+        # Repartir zonas y ordenar recorridos
+        plan = self._route_block(zones, tasks_by_zone, available_units, rules, time_budget)
+        self.routing[time_block.code] = {
+            'walk_min': plan.walk_min,
+            'unassigned_min': plan.unassigned_min,
+            'cost': round(plan.cost, 2),
+            'seed_cost': round(plan.seed_cost, 2),
+            'iterations': plan.iterations,
+            'seconds': round(plan.elapsed, 3),
+        }
 
-        if not available_units:
-            return
-
-        # Obtener tareas por zona
-        tasks_by_zone = self._get_tasks_by_zone(target_date, time_block)
-
-        if not tasks_by_zone:
-            return
-
-        # Obtener zonas ordenadas por prioridad
-        zones = Zone.objects.filter(
-            code__in=tasks_by_zone.keys(),
-            is_active=True
-        ).order_by('priority_order', 'floor_number')
-
-        # Asignar zonas completas a unidades
-        for zone in zones:
-            zone_tasks = tasks_by_zone.get(zone.code, [])
-            if not zone_tasks:
-                continue
-
-            # Encontrar mejor unidad para esta zona
-            best_unit = self._find_best_unit_for_zone(
-                zone, zone_tasks, available_units, rules
-            )
-
-            if best_unit:
-                assignments = self._assign_zone_to_unit(
-                    best_unit, zone, zone_tasks, daily_plan
-                )
-                for assignment in assignments:
-                    assignment.save()
-
-                # Actualizar estado de tareas
-                for assignment in assignments:
-                    assignment.room_task.status = 'ASSIGNED'
-                    assignment.room_task.save(update_fields=['status'])
-            else:
-                # No hay unidad disponible para esta zona
-                zone_load = self._calculate_zone_load(zone_tasks)
-                self.alerts.append({
-                    'type': 'UNDERSTAFF',
-                    'severity': 'HIGH',
-                    'time_block': time_block,
-                    'title': f'Sin personal para {zone.name}',
-                    'message': f'{len(zone_tasks)} tareas ({zone_load} min) sin asignar en {zone.name}'
-                })
+        assignments = []
+        for unit, route in zip(available_units, plan.routes):
+            assignments.extend(self._assign_route_to_unit(
+                unit, route, zones_by_code, tasks_by_id, daily_plan
+            ))
+
+        # Zonas sin unidad disponible
+        for zone_code in plan.unassigned_zones:
+            zone = zones_by_code[zone_code]
+            zone_tasks = tasks_by_zone[zone_code]
+            zone_load = self._calculate_zone_load(zone_tasks)
+            self.alerts.append({
+                'type': 'UNDERSTAFF',
+                'severity': 'HIGH',
+                'time_block': time_block,
+                'title': f'Sin personal para {zone.name}',
+                'message': f'{len(zone_tasks)} tareas ({zone_load} min) sin asignar en {zone.name}'
+            })
 
         # Verificar tareas sin asignar
-        unassigned = RoomDailyTask.objects.filter(
-            room_daily_state__date=target_date,
-            time_block=time_block,
-            status='PENDING'
-        )
-        if unassigned.exists():
+        unassigned = len(tasks_by_id) - len(assignments)
+        if unassigned:
             self.alerts.append({
                 'type': 'WARNING',
                 'severity': 'MEDIUM',
                 'time_block': time_block,
                 'title': 'Tareas sin asignar',
-                'message': f'{unassigned.count()} tareas pendientes de asignación'
+                'message': f'{unassigned} tareas pendientes de asignación'
             })
 
-    def regenerate_daily_plan(self, daily_plan: DailyPlan) -> DailyPlan:
+        return assignments
+
+    def _set_task_status(self, task_ids: List[int], status: str):
+        """Cambia el estado de muchas tareas con un UPDATE por lote (sin señales)."""
+        for start in range(0, len(task_ids), BULK_BATCH_SIZE):
+            RoomDailyTask.objects.filter(
+                id__in=task_ids[start:start + BULK_BATCH_SIZE]
+            ).update(status=status)
+        if task_ids:
+            # PENDING y ASSIGNED cuentan igual en la carga: solo cambia la versión de datos
+            mark_data_changed()
+
+    def _release_plan(self, daily_plan: DailyPlan):
+        """
+        Devuelve a PENDING las tareas del plan que siguen ASSIGNED y lo borra
+        con sus asignaciones. Las completadas, en curso o canceladas conservan
+        su estado y no entran en el plan nuevo.
+        """
+        task_ids = list(daily_plan.task_assignments.filter(
+            room_task__status='ASSIGNED'
+        ).order_by().values_list('room_task_id', flat=True))
+        self._set_task_status(task_ids, 'PENDING')
+        daily_plan.delete()
+
+    def regenerate_daily_plan(self, daily_plan: DailyPlan, time_budget: float = None) -> DailyPlan:
         """
-        Regenera un plan diario existente.
+        Regenera un plan diario existente (p. ej. tras un late check-out).
         """
         if daily_plan.status != 'DRAFT':
             raise ValueError("Solo se pueden regenerar planes en estado DRAFT")
 
-        target_date = daily_plan.date
-        week_plan = daily_plan.week_plan
-
-        # Restaurar estado de tareas
-        for assignment in daily_plan.task_assignments.all():
-            assignment.room_task.status = 'PENDING'
-            assignment.room_task.save(update_fields=['status'])
-
-        daily_plan.delete()
-
-        return self.generate_daily_plan(target_date, week_plan)
+        # generate_daily_plan libera las tareas del borrador y lo sustituye
+        return self.generate_daily_plan(daily_plan.date, daily_plan.week_plan, time_budget=time_budget)
 
     def get_daily_plan_summary(
         self,
@@ -0,0 +1,50 @@
+"""
+Data Version.
+Versión global de los datos de planificación (asignaciones, forecasts,
+tareas, indisponibilidades, alertas y configuración), guardada en la cache.
+
+Cambia al confirmar cualquier transacción que toque esos datos (ver
+apps/planning/signals.py); las respuestas cacheadas de la API la usan
+como parte de la clave y del ETag. Como la foto de configuración, solo
+se comparte entre procesos con un backend de cache compartido; por eso
+API_RESPONSE_CACHE con locmem falla el system check planning.E002.
+"""
+import threading
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+
+
+DATA_VERSION_CACHE_KEY = 'planning_data:version'
+
+_local = threading.local()
+
+
+def get_data_version() -> str:
+    version = cache.get(DATA_VERSION_CACHE_KEY)
+    if version is None:
+        # Cache vacía o expulsada: versión nueva (invalida lo anterior)
+        version = uuid.uuid4().hex
+        if not cache.add(DATA_VERSION_CACHE_KEY, version, None):
+            version = cache.get(DATA_VERSION_CACHE_KEY, version)
+    return version
+
+
+def bump_data_version():
+    cache.set(DATA_VERSION_CACHE_KEY, uuid.uuid4().hex, None)
+
+
+def mark_data_changed(**kwargs):
+    """
+    Cambia la versión al confirmar la transacción actual (una vez por
+    transacción). Usable como receptor de señales.
+    """
+    _local.dirty = True
+    transaction.on_commit(_flush)
+
+
+def _flush():
+    if getattr(_local, 'dirty', False):
+        _local.dirty = False
+        bump_data_version()
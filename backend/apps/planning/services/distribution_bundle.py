@@ -0,0 +1,219 @@
+"""
+Distribution Bundle.
+Distribución diaria de una semana (calculate_day_distribution de los 7
+días, spare por empleado y orden de parejas) calculada una vez y guardada
+en WeekPlan.distribution_bundle. by_employee y load_explanation leen de
+aquí en lugar de recalcular cada uno la semana.
+
+El bundle lleva una huella (formato, configuración que usa el cálculo,
+forecast y asignaciones): si cualquiera cambia se recalcula en la
+siguiente lectura. La configuración entra por su contenido (KernelConfig:
+tiempos de tarea, turnos, equipos, personal y elasticidad), no por la
+versión de la foto, que es distinta en cada arranque.
+"""
+import dataclasses
+import hashlib
+import json
+from datetime import timedelta
+from typing import Any, Dict, List
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from apps.planning.models import WeekPlan, ShiftAssignment
+from .config_snapshot import get_planning_config
+from .daily_distribution import DailyDistributionCalculator
+
+
+# Cambiar si cambia la estructura del bundle
+BUNDLE_FORMAT = 1
+
+EMPTY_FORECAST = {'departures': 0, 'arrivals': 0, 'occupied': 0}
+
+
+def week_assignments(week_plan: WeekPlan) -> List[ShiftAssignment]:
+    """Asignaciones de la semana con lo que necesitan el bundle y las vistas."""
+    return list(
+        week_plan.shift_assignments.select_related(
+            'employee', 'employee__role', 'team', 'shift_template', 'shift_template__time_block'
+        ).order_by('date')
+    )
+
+
+def get_distribution_bundle(
+    week_plan: WeekPlan,
+    assignments: List[ShiftAssignment] = None
+) -> Dict[str, Any]:
+    """
+    Devuelve el bundle guardado si sigue vigente; si no, lo calcula y lo
+    guarda (sin save(): no cambia updated_at ni emite señales).
+
+    Returns:
+        {
+            'fingerprint': str,
+            'days': {fecha ISO: {
+                'has_forecast', 'forecast',
+                'assigned': {'DAY': [...], 'EVENING': [...]},
+                'distribution': resultado de calculate_day_distribution,
+                'employee_spare': {employee_id (str): minutos},
+            }},
+            'team_order': {employee_id (str): [orden equipo, orden miembro]},
+        }
+    Claves de empleado como str: el bundle pasa por JSON.
+    """
+    if assignments is None:
+        assignments = week_assignments(week_plan)
+
+    calculator = DailyDistributionCalculator()
+    fingerprint = _fingerprint(week_plan, assignments, calculator)
+    bundle = week_plan.distribution_bundle
+    if bundle and bundle.get('fingerprint') == fingerprint:
+        return bundle
+
+    bundle = _build_bundle(week_plan, assignments, calculator)
+    bundle['fingerprint'] = fingerprint
+    # Mismo formato venga de la BD o recién calculado
+    bundle = json.loads(json.dumps(bundle, cls=DjangoJSONEncoder))
+
+    WeekPlan.objects.filter(pk=week_plan.pk).update(distribution_bundle=bundle)
+    week_plan.distribution_bundle = bundle
+    return bundle
+
+
+def _fingerprint(
+    week_plan: WeekPlan,
+    assignments: List[ShiftAssignment],
+    calculator: DailyDistributionCalculator
+) -> str:
+    rows = []
+    for a in assignments:
+        # Nombres y horario del turno también van al bundle
+        template = a.shift_template
+        employee = a.employee
+        rows.append([
+            a.id, a.date.isoformat(), a.employee_id, a.team_id,
+            a.shift_template_id, str(a.assigned_hours), a.is_day_off,
+            employee.full_name if employee else None,
+            employee.first_name if employee else None,
+            template.start_time if template else None,
+            template.end_time if template else None,
+            template.time_block.code if template and template.time_block else None,
+        ])
+    content = json.dumps(
+        [BUNDLE_FORMAT, dataclasses.asdict(calculator.kernel), week_plan.forecast_data, rows],
+        cls=DjangoJSONEncoder,
+        sort_keys=True,
+    )
+    return hashlib.sha1(content.encode()).hexdigest()
+
+
+def _build_bundle(
+    week_plan: WeekPlan,
+    assignments: List[ShiftAssignment],
+    calculator: DailyDistributionCalculator
+) -> Dict[str, Any]:
+    assigned_by_day = _assigned_by_day(assignments)
+    forecast_by_day = {
+        fc.get('date'): fc for fc in (week_plan.forecast_data or []) if fc.get('date')
+    }
+
+    days = {}
+    for offset in range(7):
+        day_key = (week_plan.week_start_date + timedelta(days=offset)).isoformat()
+        forecast = forecast_by_day.get(day_key)
+        assigned = assigned_by_day.get(day_key, {'DAY': [], 'EVENING': []})
+
+        try:
+            distribution = calculator.calculate_day_distribution(
+                forecast=forecast or EMPTY_FORECAST,
+                assigned_day=assigned['DAY'],
+                assigned_evening=assigned['EVENING'],
+            )
+            employee_spare = _employee_spare(distribution, assigned['DAY'], assigned['EVENING'])
+        except Exception:
+            # Un día con datos inconsistentes no debe romper la semana
+            distribution = None
+            employee_spare = {}
+
+        days[day_key] = {
+            'has_forecast': forecast is not None,
+            'forecast': forecast or EMPTY_FORECAST,
+            'assigned': assigned,
+            'distribution': distribution,
+            'employee_spare': employee_spare,
+        }
+
+    return {
+        'format': BUNDLE_FORMAT,
+        'days': days,
+        'team_order': _team_order(),
+    }
+
+
+def _assigned_by_day(assignments: List[ShiftAssignment]) -> Dict[str, Dict[str, List[Dict]]]:
+    """Empleados (y equipos) con turno por día y bloque DAY/EVENING, sin días libres."""
+    assigned_by_day = {}
+    for assignment in assignments:
+        template = assignment.shift_template
+        if assignment.is_day_off or not template or not template.time_block:
+            continue
+        block_code = template.time_block.code
+        if block_code not in ('DAY', 'EVENING'):
+            continue
+
+        day_key = assignment.date.isoformat()
+        day = assigned_by_day.setdefault(day_key, {'DAY': [], 'EVENING': []})
+        employee = assignment.employee
+        day[block_code].append({
+            'employee_id': employee.id if employee else None,
+            'employee': employee.full_name if employee else None,
+            'employee_short': employee.first_name if employee else None,
+            'hours': float(assignment.assigned_hours),
+            'start_time': template.start_time.strftime('%H:%M') if template.start_time else None,
+            'end_time': template.end_time.strftime('%H:%M') if template.end_time else None,
+        })
+    return assigned_by_day
+
+
+def _employee_spare(distribution: Dict, assigned_day: List[Dict], assigned_evening: List[Dict]) -> Dict[int, float]:
+    """
+    Tiempo libre por empleado en el día (minutos):
+    mañana = P1 + su parte de P2; tarde = su parte de P2 + P3 + couvertures.
+    """
+    periods = distribution.get('periods', {})
+
+    # Spare por persona del período (per_person_min si existe, sino total / workers)
+    def spare_per_person(period_data):
+        spare = period_data.get('spare', {})
+        if 'per_person_min' in spare:
+            return spare.get('per_person_min', 0)
+        total = spare.get('total_min', spare.get('value', 0))
+        workers = spare.get('num_workers', 1)
+        return total / workers if workers > 0 else 0
+
+    p1_spare_pp = spare_per_person(periods.get('p1', {}))
+    p2_data = periods.get('p2', {})
+    p2_employee_spare = p2_data.get('employee_spare', {})
+    p3_spare_pp = spare_per_person(periods.get('p3', {}))
+    couv_spare_pp = spare_per_person(periods.get('couvertures', {}))
+
+    employee_spare = {}
+    for emp in assigned_day:
+        emp_id = emp.get('employee_id')
+        if emp_id:
+            p2_spare = p2_employee_spare.get(emp_id, p2_data.get('morning_spare_pp', 0))
+            employee_spare[emp_id] = p1_spare_pp + p2_spare
+    for emp in assigned_evening:
+        emp_id = emp.get('employee_id')
+        if emp_id:
+            p2_spare = p2_employee_spare.get(emp_id, p2_data.get('evening_spare_pp', 0))
+            employee_spare[emp_id] = p2_spare + p3_spare_pp + couv_spare_pp
+    return employee_spare
+
+
+def _team_order() -> Dict[int, List[int]]:
+    """Orden de parejas para listar: employee_id -> [equipo, miembro]."""
+    team_order = {}
+    for team_index, team in enumerate(get_planning_config().get_teams()):
+        for member_index, member in enumerate(team.members.all()):
+            team_order[member.id] = [team_index, member_index]
+    return team_order
@@ -0,0 +1,989 @@
+"""
+Distribution Kernel.
+Aritmética de la distribución diaria (períodos P1/P2/P3 y couvertures,
+parejas, reparto de habitaciones y tiempo sobrante) sobre dataclasses
+planas, sin ORM ni Django: se puede llamar desde procesos trabajadores o
+trabajos por lotes sin configurar Django.
+
+DailyDistributionCalculator carga la configuración de la BD, construye un
+KernelConfig y delega aquí los cálculos.
+"""
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple, TypedDict
+
+from apps.planning.services.staffing_rules import get_evening_persons_needed
+
+
+# === CONFIGURACIÓN ===
+
+class AssignedEmployee(TypedDict, total=False):
+    """Empleado asignado a un turno (claves que lee el kernel)."""
+    employee_id: Optional[int]
+    id: Optional[int]               # alternativa a employee_id
+    employee: Optional[str]         # nombre completo
+    employee_short: Optional[str]
+    team_name: Optional[str]
+    end_time: Optional[str]         # HH:MM, fin de turno (couvertures)
+
+
+@dataclass(frozen=True)
+class TaskTimes:
+    """Minutos por tarea con pareja y en solitario."""
+    depart_pair: int = 50
+    depart_solo: int = 75
+    recouch_pair: int = 20
+    recouch_solo: int = 30
+    couverture: int = 15
+
+    @classmethod
+    def from_task_config(cls, task_config: Mapping[str, Mapping[str, Any]]) -> 'TaskTimes':
+        """Desde el dict de DailyDistributionCalculator.task_config."""
+        depart = task_config.get('DEPART', {})
+        recouch = task_config.get('RECOUCH', {})
+        return cls(
+            depart_pair=depart.get('base_minutes', 50),
+            depart_solo=depart.get('solo_minutes', 75),
+            recouch_pair=recouch.get('base_minutes', 20),
+            recouch_solo=recouch.get('solo_minutes', 30),
+            couverture=task_config.get('COUVERTURE', {}).get('base_minutes', 15),
+        )
+
+
+@dataclass(frozen=True)
+class PeriodConfig:
+    """Períodos del día (HH:MM) y su duración en minutos."""
+    p1_start: str
+    p1_end: str
+    p1_min: int
+    lunch_day_start: str
+    lunch_day_end: str
+    p2_start: str
+    p2_end: str
+    p2_min: int
+    p3_start: str
+    p3_end: str
+    p3_min: int
+    lunch_evening_start: str
+    lunch_evening_end: str
+    couv_start: str
+    couv_end: str
+    couv_period_min: int
+
+    @classmethod
+    def from_shifts(
+        cls,
+        day_start: str,
+        day_end: str,
+        day_break_start: str,
+        day_break_end: str,
+        evening_start: str,
+        evening_end: str,
+        evening_break_start: str,
+        evening_break_end: str,
+        couv_earliest: Optional[str] = None,
+    ) -> 'PeriodConfig':
+        """
+        Calcula los períodos a partir de los turnos de mañana y tarde.
+        couv_earliest: earliest_start de COUVERTURE (HH:MM) si lo tiene.
+        """
+        # P2: Mañana + Tarde juntos (después break mañana hasta fin turno día)
+        p2_start_min = max(time_to_minutes(day_break_end), time_to_minutes(evening_start))
+        p2_end_min = min(time_to_minutes(day_end), time_to_minutes(evening_break_start))
+
+        # P3: Tarde sola antes de cena (fin turno día hasta break tarde)
+        p3_start_min = time_to_minutes(day_end)
+        p3_end_min = time_to_minutes(evening_break_start)
+
+        # Couvertures: después de cena (o earliest_start de la tarea) hasta fin turno tarde
+        couv_start_min = time_to_minutes(evening_break_end)
+        if couv_earliest:
+            couv_start_min = max(couv_start_min, time_to_minutes(couv_earliest))
+
+        return cls(
+            # P1: Mañana sola (inicio turno día hasta break mañana)
+            p1_start=day_start,
+            p1_end=day_break_start,
+            p1_min=time_to_minutes(day_break_start) - time_to_minutes(day_start),
+            lunch_day_start=day_break_start,
+            lunch_day_end=day_break_end,
+            p2_start=minutes_to_time(p2_start_min),
+            p2_end=minutes_to_time(p2_end_min),
+            p2_min=p2_end_min - p2_start_min,
+            p3_start=minutes_to_time(p3_start_min),
+            p3_end=minutes_to_time(p3_end_min),
+            p3_min=max(0, p3_end_min - p3_start_min),
+            lunch_evening_start=evening_break_start,
+            lunch_evening_end=evening_break_end,
+            couv_start=minutes_to_time(couv_start_min),
+            couv_end=evening_end,
+            couv_period_min=time_to_minutes(evening_end) - couv_start_min,
+        )
+
+
+@dataclass(frozen=True)
+class TeamInfo:
+    """Equipo configurado (parejas fijas u otros)."""
+    id: int
+    name: str
+    type: str
+    member_ids: Tuple[int, ...]
+
+
+@dataclass(frozen=True)
+class KernelConfig:
+    """
+    Todo lo que necesita calculate_day_distribution. Solo tipos básicos:
+    se puede serializar (pickle) a procesos trabajadores.
+    """
+    task_times: TaskTimes
+    periods: PeriodConfig
+    teams: Tuple[TeamInfo, ...] = ()
+    # Personal FDC/VDC activo: {id, name, role, weekly_target}
+    housekeeping_staff: Tuple[Dict[str, Any], ...] = ()
+    # employee_id -> nivel de elasticidad
+    employee_elasticity: Mapping[int, str] = field(default_factory=dict)
+    # nivel de elasticidad -> minutos extra máximos por día
+    elasticity_max_day: Mapping[str, float] = field(default_factory=dict)
+
+
+# === UTILIDADES ===
+
+def time_to_minutes(time_str: str) -> int:
+    """Convierte HH:MM a minutos desde medianoche."""
+    if not time_str:
+        return 0
+    parts = time_str.split(':')
+    return int(parts[0]) * 60 + int(parts[1])
+
+
+def minutes_to_time(minutes: int) -> str:
+    """Convierte minutos desde medianoche a HH:MM."""
+    hours = minutes // 60
+    mins = minutes % 60
+    return f"{hours:02d}:{mins:02d}"
+
+
+def format_spare(minutes: int, num_workers: int = 1) -> Dict[str, Any]:
+    """Formatea tiempo sobrante para mostrar (por persona y total)."""
+    if minutes == 0:
+        return {'value': 0, 'display': None, 'is_positive': True, 'per_person': 0, 'total': 0}
+
+    abs_min = abs(minutes)
+    sign = '+' if minutes > 0 else '-'
+    is_positive = minutes >= 0
+
+    # Tiempo por persona
+    per_person_min = abs_min / num_workers if num_workers > 0 else abs_min
+
+    # Formatear total
+    if abs_min < 60:
+        total_display = f"{sign}{abs_min}min"
+    else:
+        hours = abs_min / 60
+        total_display = f"{sign}{hours:.1f}h"
+
+    # Formatear por persona
+    if per_person_min < 60:
+        per_person_display = f"{sign}{int(per_person_min)}min/pers"
+    else:
+        per_person_hours = per_person_min / 60
+        per_person_display = f"{sign}{per_person_hours:.1f}h/pers"
+
+    # Display combinado
+    if num_workers > 1:
+        display = f"{per_person_display} ({total_display} total)"
+    else:
+        display = total_display
+
+    return {
+        'value': minutes,
+        'display': display,
+        'is_positive': is_positive,
+        'per_person_min': round(per_person_min, 1),
+        'total_min': abs_min,
+        'num_workers': num_workers,
+    }
+
+
+# === CÁLCULO ===
+
+def distribute_work_to_units(
+    pairs: List[Dict],
+    solos: List[str],
+    departs_to_do: int,
+    recouches_to_do: int,
+    period_minutes: int,
+    depart_pair_min: int,
+    depart_solo_min: int,
+    recouch_pair_min: int,
+    recouch_solo_min: int,
+) -> Dict[str, Any]:
+    """
+    Distribuye trabajo BALANCEADO entre unidades.
+    Cada unidad recibe una carga proporcional para equilibrar tiempo libre.
+    """
+    num_pairs = len(pairs)
+    num_solos = len(solos)
+    total_units = num_pairs + num_solos
+
+    if total_units == 0:
+        return {
+            'units': [],
+            'display': '',
+            'total_departs': 0,
+            'total_recouches': 0,
+            'total_spare_min': 0,
+            'departs_remaining': departs_to_do,
+            'recouches_remaining': recouches_to_do,
+        }
+
+    # Calcular trabajo total en minutos (usando tiempo de pareja como referencia)
+    total_work_min = (departs_to_do * depart_pair_min) + (recouches_to_do * recouch_pair_min)
+    total_capacity_min = total_units * period_minutes
+
+    # Si no hay trabajo, todos libres con tiempo completo
+    if total_work_min == 0:
+        units_work = []
+        for pair in pairs:
+            units_work.append({
+                'type': 'pair', 'display': pair.get('display', ''),
+                'names': pair.get('names', []), 'departs': 0, 'recouches': 0,
+                'spare_min': period_minutes,
+            })
+        for solo_item in solos:
+            # Handle both dict (with shift info) and string (legacy) formats
+            if isinstance(solo_item, dict):
+                solo_name = solo_item.get('name', solo_item.get('display', 'Anónimo'))
+            else:
+                solo_name = solo_item
+            units_work.append({
+                'type': 'solo', 'display': solo_name,
+                'names': [solo_name], 'departs': 0, 'recouches': 0,
+                'spare_min': period_minutes,
+            })
+        # Formatear display con tiempo libre
+        display_parts = []
+        for u in units_work:
+            spare_str = f"⏱️+{period_minutes // 60}h{period_minutes % 60}min" if period_minutes % 60 else f"⏱️+{period_minutes // 60}h"
+            display_parts.append(f"{u['display']}:libre {spare_str}")
+        return {
+            'units': units_work,
+            'display': ' · '.join(display_parts),
+            'total_departs': 0, 'total_recouches': 0,
+            'total_spare_min': total_capacity_min,
+            'departs_remaining': 0, 'recouches_remaining': 0,
+        }
+
+    # Calcular cuota de trabajo por unidad (en minutos)
+    work_quota_per_unit = total_work_min / total_units
+
+    units_work = []
+    departs_left = departs_to_do
+    recouches_left = recouches_to_do
+
+    # Distribuir a parejas (más eficientes)
+    for pair in pairs:
+        target_work_min = work_quota_per_unit
+        unit_departs = 0
+        unit_recouches = 0
+        work_done_min = 0
+
+        # Asignar departs primero (más prioritarios)
+        if departs_left > 0 and depart_pair_min > 0:
+            # Cuántos departs para alcanzar la cuota
+            departs_for_quota = int(target_work_min / depart_pair_min)
+            unit_departs = min(departs_left, departs_for_quota, period_minutes // depart_pair_min)
+            work_done_min += unit_departs * depart_pair_min
+            departs_left -= unit_departs
+
+        # Completar con recouches hasta la cuota
+        remaining_quota = target_work_min - work_done_min
+        if recouches_left > 0 and recouch_pair_min > 0 and remaining_quota > 0:
+            recouches_for_quota = int(remaining_quota / recouch_pair_min)
+            max_capacity = (period_minutes - work_done_min) // recouch_pair_min
+            unit_recouches = min(recouches_left, recouches_for_quota, max_capacity)
+            work_done_min += unit_recouches * recouch_pair_min
+            recouches_left -= unit_recouches
+
+        spare_min = period_minutes - work_done_min
+        units_work.append({
+            'type': 'pair',
+            'display': pair.get('display', ''),
+            'names': pair.get('names', []),
+            'ids': pair.get('ids', []),  # Track employee IDs for per-employee spare
+            'shifts': pair.get('shifts', []),  # Track which shift each member belongs to
+            'departs': unit_departs,
+            'recouches': unit_recouches,
+            'spare_min': max(0, spare_min),
+        })
+
+    # Distribuir a solos (menos eficientes, más tiempo por tarea)
+    for solo_item in solos:
+        # Handle both dict (with shift info) and string (legacy) formats
+        if isinstance(solo_item, dict):
+            solo_name = solo_item.get('name', solo_item.get('display', 'Anónimo'))
+            solo_shift = solo_item.get('shift', 'unknown')
+            solo_id = solo_item.get('id')
+        else:
+            solo_name = solo_item
+            solo_shift = 'unknown'
+            solo_id = None
+        target_work_min = work_quota_per_unit
+        unit_departs = 0
+        unit_recouches = 0
+        work_done_min = 0
+
+        # Solo trabaja más lento, ajustar cuota al ratio de velocidad
+        # Si pareja=50min y solo=75min, solo hace 50/75 = 0.67 de las habitaciones
+        depart_ratio = depart_pair_min / depart_solo_min if depart_solo_min > 0 else 1
+        recouch_ratio = recouch_pair_min / recouch_solo_min if recouch_solo_min > 0 else 1
+
+        # Asignar departs
+        if departs_left > 0 and depart_solo_min > 0:
+            departs_for_quota = int((target_work_min / depart_pair_min) * depart_ratio)
+            unit_departs = min(departs_left, departs_for_quota, period_minutes // depart_solo_min)
+            work_done_min += unit_departs * depart_solo_min
+            departs_left -= unit_departs
+
+        # Completar con recouches
+        remaining_time = period_minutes - work_done_min
+        if recouches_left > 0 and recouch_solo_min > 0 and remaining_time > 0:
+            recouches_for_quota = int(((target_work_min - (unit_departs * depart_pair_min)) / recouch_pair_min) * recouch_ratio)
+            max_capacity = remaining_time // recouch_solo_min
+            unit_recouches = min(recouches_left, max(0, recouches_for_quota), max_capacity)
+            work_done_min += unit_recouches * recouch_solo_min
+            recouches_left -= unit_recouches
+
+        spare_min = period_minutes - work_done_min
+        units_work.append({
+            'type': 'solo',
+            'display': solo_name,
+            'names': [solo_name],
+            'ids': [solo_id] if solo_id else [],  # Track employee ID for per-employee spare
+            'shifts': [solo_shift],  # Track shift for solo worker
+            'departs': unit_departs,
+            'recouches': unit_recouches,
+            'spare_min': max(0, spare_min),
+        })
+
+    # Segunda pasada: redistribuir trabajo restante a unidades con capacidad
+    for _ in range(3):  # Máximo 3 pasadas de rebalanceo
+        if departs_left <= 0 and recouches_left <= 0:
+            break
+
+        for unit in units_work:
+            if departs_left <= 0 and recouches_left <= 0:
+                break
+
+            is_pair = unit['type'] == 'pair'
+            d_min = depart_pair_min if is_pair else depart_solo_min
+            r_min = recouch_pair_min if is_pair else recouch_solo_min
+
+            # Calcular tiempo usado actual
+            time_used = unit['departs'] * d_min + unit['recouches'] * r_min
+            available = period_minutes - time_used
+
+            # Asignar departs extras
+            if departs_left > 0 and d_min > 0 and available >= d_min:
+                extra_departs = min(departs_left, available // d_min)
+                unit['departs'] += extra_departs
+                departs_left -= extra_departs
+                available -= extra_departs * d_min
+                unit['spare_min'] = max(0, available)
+
+            # Asignar recouches extras
+            if recouches_left > 0 and r_min > 0 and available >= r_min:
+                extra_recouches = min(recouches_left, available // r_min)
+                unit['recouches'] += extra_recouches
+                recouches_left -= extra_recouches
+                available -= extra_recouches * r_min
+                unit['spare_min'] = max(0, available)
+
+    # Generar display formateado con tiempo libre individual
+    display_parts = []
+    for unit in units_work:
+        work_str = ""
+        if unit['departs'] > 0 and unit['recouches'] > 0:
+            work_str = f"{unit['departs']}D+{unit['recouches']}R"
+        elif unit['departs'] > 0:
+            work_str = f"{unit['departs']}D"
+        elif unit['recouches'] > 0:
+            work_str = f"{unit['recouches']}R"
+
+        # Agregar tiempo libre si hay
+        spare_min = unit.get('spare_min', 0)
+        spare_str = ""
+        if spare_min >= 60:
+            spare_str = f"⏱️+{spare_min // 60}h{spare_min % 60}min" if spare_min % 60 else f"⏱️+{spare_min // 60}h"
+        elif spare_min > 0:
+            spare_str = f"⏱️+{spare_min}min"
+
+        if work_str:
+            if spare_str:
+                display_parts.append(f"{unit['display']}:{work_str} {spare_str}")
+            else:
+                display_parts.append(f"{unit['display']}:{work_str}")
+        else:
+            display_parts.append(f"{unit['display']}:libre {spare_str}" if spare_str else f"{unit['display']}:libre")
+
+    total_departs = sum(u['departs'] for u in units_work)
+    total_recouches = sum(u['recouches'] for u in units_work)
+    total_spare = sum(u['spare_min'] for u in units_work)
+
+    return {
+        'units': units_work,
+        'display': ' · '.join(display_parts),
+        'total_departs': total_departs,
+        'total_recouches': total_recouches,
+        'total_spare_min': total_spare,
+        'departs_remaining': departs_left,
+        'recouches_remaining': recouches_left,
+    }
+
+
+def calculate_pairs(assigned_employees: List[Dict], teams: Sequence[TeamInfo]) -> Dict[str, Any]:
+    """
+    Calcula parejas configuradas y temporales.
+
+    Args:
+        assigned_employees: Lista de empleados asignados con employee_id
+
+    Returns:
+        Diccionario con parejas configuradas, temporales, solos y totales
+    """
+    employee_ids = [emp.get('employee_id') or emp.get('id') for emp in assigned_employees if emp]
+
+    configured_pairs = []  # Parejas de equipos configurados
+    temp_pairs = []        # Parejas temporales
+    solos = []             # Personas sin pareja
+    used_employees = set()
+
+    # 1. Buscar parejas configuradas (equipos donde ambos miembros están asignados)
+    for team in teams:
+        member_ids = team.member_ids
+        assigned_members = [mid for mid in member_ids if mid in employee_ids]
+
+        # Si al menos 2 miembros del equipo están asignados, forman pareja
+        if len(assigned_members) >= 2:
+            # Tomar los primeros 2
+            pair_ids = assigned_members[:2]
+            for emp_id in pair_ids:
+                used_employees.add(emp_id)
+
+            # Obtener nombres
+            pair_names = []
+            for emp_id in pair_ids:
+                for emp in assigned_employees:
+                    if (emp.get('employee_id') or emp.get('id')) == emp_id:
+                        name = emp.get('employee_short') or emp.get('employee', '').split(' ')[0]
+                        pair_names.append(name)
+                        break
+
+            # Track shifts of pair members (for P2 spare calculation)
+            pair_shifts = []
+            for emp_id in pair_ids:
+                for emp in assigned_employees:
+                    if (emp.get('employee_id') or emp.get('id')) == emp_id:
+                        pair_shifts.append(emp.get('_shift', 'unknown'))
+                        break
+
+            configured_pairs.append({
+                'ids': pair_ids,
+                'names': pair_names,
+                'team_name': team.name,
+                'display': f"({'+'.join(pair_names)})",
+                'shifts': pair_shifts,  # e.g. ['morning', 'morning'] or ['morning', 'evening']
+            })
+
+    # 2. Empleados sin pareja configurada pueden formar parejas temporales
+    remaining_employees = [
+        emp for emp in assigned_employees
+        if (emp.get('employee_id') or emp.get('id')) not in used_employees
+    ]
+
+    # Helper function to get name safely
+    def get_employee_name(emp_dict):
+        name = emp_dict.get('employee_short')
+        if name:
+            return name
+        full_name = emp_dict.get('employee') or emp_dict.get('team_name') or 'Anónimo'
+        if full_name and ' ' in full_name:
+            return full_name.split(' ')[0]
+        return full_name
+
+    # Formar parejas temporales con los restantes
+    for i in range(0, len(remaining_employees), 2):
+        if i + 1 < len(remaining_employees):
+            emp1 = remaining_employees[i]
+            emp2 = remaining_employees[i+1]
+            name1 = get_employee_name(emp1)
+            name2 = get_employee_name(emp2)
+            shift1 = emp1.get('_shift', 'unknown')
+            shift2 = emp2.get('_shift', 'unknown')
+            id1 = emp1.get('employee_id') or emp1.get('id')
+            id2 = emp2.get('employee_id') or emp2.get('id')
+            temp_pairs.append({
+                'names': [name1, name2],
+                'ids': [id1, id2],  # Track employee IDs
+                'display': f"[{name1}+{name2}]",
+                'shifts': [shift1, shift2],
+            })
+        else:
+            # Impar - queda solo
+            emp = remaining_employees[i]
+            name = get_employee_name(emp)
+            solo_shift = emp.get('_shift', 'unknown')
+            solo_id = emp.get('employee_id') or emp.get('id')
+            solos.append({'name': name, 'shift': solo_shift, 'id': solo_id})
+
+    total_pairs = len(configured_pairs) + len(temp_pairs)
+
+    # Generar display formateado
+    display_parts = []
+    for pair in configured_pairs:
+        display_parts.append(pair['display'])
+    for pair in temp_pairs:
+        display_parts.append(pair['display'])
+    for solo in solos:
+        # solos can be dict (with shift info) or string (legacy)
+        if isinstance(solo, dict):
+            display_parts.append(solo['name'])
+        else:
+            display_parts.append(solo)
+
+    return {
+        'configured_pairs': configured_pairs,
+        'temp_pairs': temp_pairs,
+        'solos': solos,
+        'total_pairs': total_pairs,
+        'total_solos': len(solos),
+        'display': ' · '.join(display_parts),
+    }
+
+
+def calculate_day_distribution(
+    config: KernelConfig,
+    forecast: Dict[str, int],
+    assigned_day: List[Dict],
+    assigned_evening: List[Dict],
+) -> Dict[str, Any]:
+    """
+    Calcula la distribución completa del trabajo para un día.
+
+    Args:
+        config: Configuración del kernel (tiempos, períodos, equipos, personal)
+        forecast: {departures, arrivals, occupied}
+        assigned_day: Lista de empleados asignados turno día
+        assigned_evening: Lista de empleados asignados turno tarde
+
+    Returns:
+        Diccionario con toda la distribución por períodos
+    """
+    departures = forecast.get('departures', 0)
+    arrivals = forecast.get('arrivals', 0)
+    occupied = forecast.get('occupied', 0)
+    stays = max(0, occupied - arrivals)
+
+    total_departs = departures
+    total_recouches = stays
+    total_rooms = total_departs + total_recouches
+
+    task_times = config.task_times
+    periods = config.periods
+
+    # Tiempos de tareas (PAREJA)
+    DEPART_MIN = task_times.depart_pair
+    RECOUCH_MIN = task_times.recouch_pair
+    COUV_MIN = task_times.couverture
+
+    # Tiempos de tareas (SOLO)
+    DEPART_SOLO_MIN = task_times.depart_solo
+    RECOUCH_SOLO_MIN = task_times.recouch_solo
+
+    # Períodos de trabajo (calculados dinámicamente desde ShiftTemplates)
+    P1_MIN = periods.p1_min  # Mañana sola
+    P2_MIN = periods.p2_min  # Mañana + Tarde juntos
+    P3_MIN = periods.p3_min  # Tarde sola antes de cena
+
+    # Calcular parejas por turno
+    day_pair_info = calculate_pairs(assigned_day, config.teams)
+    evening_pair_info = calculate_pairs(assigned_evening, config.teams)
+
+    # Para P2, marcamos cada empleado con su turno de origen
+    # Esto nos permite calcular spare separado para mañana vs tarde
+    day_with_shift = [{**emp, '_shift': 'morning'} for emp in assigned_day]
+    evening_with_shift = [{**emp, '_shift': 'evening'} for emp in assigned_evening]
+    p2_pair_info = calculate_pairs(day_with_shift + evening_with_shift, config.teams)
+
+    pairs_day = day_pair_info['total_pairs']
+    pairs_evening = evening_pair_info['total_pairs']
+    pairs_p2 = p2_pair_info['total_pairs']
+
+    num_day = len(assigned_day)
+    num_evening = len(assigned_evening)
+
+    # ========== PASO 1: CALCULAR COUVERTURES PRIMERO ==========
+    # Couvertures son prioritarias y determinan cuántas personas necesitamos
+
+    # Nombres individuales para couvertures
+    evening_individual_names = ', '.join([
+        emp.get('employee_short') or emp.get('employee', '').split(' ')[0]
+        for emp in assigned_evening
+    ])
+
+    # Calcular hora de fin real basada en los horarios de los empleados
+    actual_couv_end = periods.couv_end  # fallback al máximo permitido
+    if assigned_evening:
+        end_times = [emp.get('end_time') for emp in assigned_evening if emp.get('end_time')]
+        if end_times:
+            actual_couv_end = max(end_times)
+
+    # Período real de couvertures (desde couv_start hasta fin de turno)
+    actual_couv_period_min = time_to_minutes(actual_couv_end) - time_to_minutes(periods.couv_start)
+    if actual_couv_period_min <= 0:
+        actual_couv_period_min = periods.couv_period_min  # fallback
+
+    # Trabajo total de couvertures
+    total_couv_work_min = occupied * COUV_MIN
+
+    # Capacidad actual con personas asignadas
+    current_couv_capacity = num_evening * actual_couv_period_min
+
+    # Déficit real en minutos (puede ser negativo si hay exceso)
+    couv_deficit_min = total_couv_work_min - current_couv_capacity
+
+    # === PRIORIDAD DE COBERTURA DE DÉFICIT ===
+    # 1. Primero: Trabajadores con horas semanales disponibles (no cumplen 39h)
+    # 2. Segundo: Elasticidad (solo si no hay trabajadores disponibles)
+
+    # Obtener IDs de empleados ya asignados
+    assigned_employee_ids = set()
+    for emp in assigned_day + assigned_evening:
+        emp_id = emp.get('employee_id') or emp.get('id')
+        if emp_id:
+            assigned_employee_ids.add(emp_id)
+
+    # Buscar trabajadores con horas disponibles (no asignados este día)
+    # TODO: Calcular horas ya asignadas en la semana para cada empleado
+    # Por ahora asumimos que si no está asignado este día, tiene horas disponibles
+    workers_with_available_hours = [
+        dict(emp) for emp in config.housekeeping_staff
+        if emp['id'] not in assigned_employee_ids
+    ]
+
+    has_workers_available = len(workers_with_available_hours) > 0
+
+    # Calcular elasticidad disponible total de los empleados EVENING
+    total_elasticity_available = 0
+    elasticity_per_person = 0
+    for emp in assigned_evening:
+        emp_id = emp.get('employee_id') or emp.get('id')
+        if emp_id and emp_id in config.employee_elasticity:
+            level = config.employee_elasticity[emp_id]
+            total_elasticity_available += config.elasticity_max_day.get(level, 0)
+
+    if num_evening > 0:
+        elasticity_per_person = total_elasticity_available / num_evening
+
+    MAX_ELASTICITY_PER_PERSON = 60
+
+    extra_min_per_person_raw = 0
+    if couv_deficit_min > 0 and num_evening > 0:
+        extra_min_per_person_raw = couv_deficit_min / num_evening
+
+    def round_to_15(minutes):
+        if minutes <= 0:
+            return 0
+        return int(((minutes + 14) // 15) * 15)
+
+    extra_min_per_person = round_to_15(extra_min_per_person_raw)
+
+    # NUEVA LÓGICA DE PRIORIDAD:
+    # 1. Si hay déficit Y hay trabajadores disponibles → sugerir agregar trabajadores
+    # 2. Solo si NO hay trabajadores disponibles → considerar elasticidad
+    can_add_workers = couv_deficit_min > 0 and has_workers_available
+
+    # Solo considerar elasticidad si NO hay trabajadores disponibles
+    can_cover_with_elasticity = (
+        couv_deficit_min > 0 and
+        not has_workers_available and
+        extra_min_per_person <= MAX_ELASTICITY_PER_PERSON and
+        couv_deficit_min <= total_elasticity_available
+    )
+
+    # Necesitamos más personas si:
+    # 1. Hay déficit Y hay trabajadores disponibles (agregar trabajador primero)
+    # 2. O si no hay trabajadores Y la elasticidad no alcanza
+    couv_needs_more_persons = (
+        (couv_deficit_min > 0 and has_workers_available) or
+        (couv_deficit_min > 0 and not has_workers_available and (
+            couv_deficit_min > total_elasticity_available or
+            extra_min_per_person_raw > MAX_ELASTICITY_PER_PERSON
+        ))
+    )
+
+    couv_extra_persons_needed = 0
+    if couv_needs_more_persons and actual_couv_period_min > 0:
+        # Calcular cuántas personas más necesitamos
+        # Si el problema es que cada persona necesita más de 60 min, calculamos con el límite
+        if extra_min_per_person_raw > MAX_ELASTICITY_PER_PERSON:
+            # Cuánto trabajo queda después de usar 60 min de cada persona asignada
+            covered_by_elasticity = num_evening * MAX_ELASTICITY_PER_PERSON
+            remaining_work = couv_deficit_min - covered_by_elasticity
+            if remaining_work > 0:
+                couv_extra_persons_needed = max(1, int((remaining_work + actual_couv_period_min - 1) // actual_couv_period_min))
+        else:
+            # La elasticidad total no alcanza
+            remaining_deficit = couv_deficit_min - total_elasticity_available
+            couv_extra_persons_needed = max(1, int((remaining_deficit + actual_couv_period_min - 1) // actual_couv_period_min))
+
+    # Tiempo que cada persona dedica a couvertures
+    couv_time_per_person = (total_couv_work_min / num_evening) if num_evening > 0 else total_couv_work_min
+
+    # Spare time (considerando elasticidad usada)
+    if can_cover_with_elasticity:
+        # Si usamos elasticidad, el spare es lo que queda de la elasticidad
+        actual_couv_spare = total_elasticity_available - couv_deficit_min
+    elif couv_deficit_min <= 0:
+        # Si no hay déficit, el spare es la capacidad - trabajo
+        actual_couv_spare = -couv_deficit_min
+    else:
+        # Si hay déficit y no podemos cubrir, spare es 0
+        actual_couv_spare = 0
+
+    # Personas efectivas = las asignadas (ya no inflamos el número)
+    effective_couv_persons = num_evening
+
+    # ========== PASO 2: DISTRIBUIR HABITACIONES ==========
+    # Usar la nueva función que distribuye a unidades específicas
+
+    departs_left = total_departs
+    recouches_left = total_recouches
+
+    # Obtener parejas y solos de cada turno
+    day_pairs = day_pair_info['configured_pairs'] + day_pair_info['temp_pairs']
+    day_solos = day_pair_info['solos']
+    evening_pairs = evening_pair_info['configured_pairs'] + evening_pair_info['temp_pairs']
+    evening_solos = evening_pair_info['solos']
+    p2_pairs = p2_pair_info['configured_pairs'] + p2_pair_info['temp_pairs']
+    p2_solos = p2_pair_info['solos']
+
+    # Unidades de trabajo
+    units_day = len(day_pairs) + len(day_solos)
+    units_evening = len(evening_pairs) + len(evening_solos)
+    units_p2 = len(p2_pairs) + len(p2_solos)
+
+    # P1: Solo mañana (09:00 - 12:30 = 210 min)
+    p1_work = distribute_work_to_units(
+        pairs=day_pairs,
+        solos=day_solos,
+        departs_to_do=departs_left,
+        recouches_to_do=recouches_left,
+        period_minutes=P1_MIN,
+        depart_pair_min=DEPART_MIN,
+        depart_solo_min=DEPART_SOLO_MIN,
+        recouch_pair_min=RECOUCH_MIN,
+        recouch_solo_min=RECOUCH_SOLO_MIN,
+    )
+    departs_left = p1_work['departs_remaining']
+    recouches_left = p1_work['recouches_remaining']
+
+    # P2: Mañana + Tarde juntos (13:30 - 17:00 = 210 min)
+    p2_work = distribute_work_to_units(
+        pairs=p2_pairs,
+        solos=p2_solos,
+        departs_to_do=departs_left,
+        recouches_to_do=recouches_left,
+        period_minutes=P2_MIN,
+        depart_pair_min=DEPART_MIN,
+        depart_solo_min=DEPART_SOLO_MIN,
+        recouch_pair_min=RECOUCH_MIN,
+        recouch_solo_min=RECOUCH_SOLO_MIN,
+    )
+    departs_left = p2_work['departs_remaining']
+    recouches_left = p2_work['recouches_remaining']
+
+    # P3: Solo tarde termina (17:00 - 18:30 = 90 min)
+    p3_work = distribute_work_to_units(
+        pairs=evening_pairs,
+        solos=evening_solos,
+        departs_to_do=departs_left,
+        recouches_to_do=recouches_left,
+        period_minutes=P3_MIN,
+        depart_pair_min=DEPART_MIN,
+        depart_solo_min=DEPART_SOLO_MIN,
+        recouch_pair_min=RECOUCH_MIN,
+        recouch_solo_min=RECOUCH_SOLO_MIN,
+    )
+    departs_left = p3_work['departs_remaining']
+    recouches_left = p3_work['recouches_remaining']
+
+    # ========== PASO 3: VERIFICAR ESTADO TOTAL ==========
+    rooms_deficit = departs_left + recouches_left
+    # Solo hay déficit si no podemos completar las habitaciones
+    # Couvertures no genera déficit porque calculamos con personas efectivas
+    has_deficit = rooms_deficit > 0
+
+    # ========== PASO 4: CALCULAR SPARE POR EMPLEADO EN P2 ==========
+    # En P2, mañana y tarde trabajan juntos. Cada empleado tiene su propio
+    # spare basado en la unidad donde trabaja.
+    #
+    # IMPORTANTE: Cuando una pareja trabaja junta, AMBOS tienen el mismo tiempo libre.
+    # El spare de la unidad NO se divide entre ellos - si la pareja tiene 120min
+    # spare, cada persona tiene 120min libre (trabajan juntos, descansan juntos).
+
+    # Build per-employee spare mapping for P2
+    p2_employee_spare = {}  # employee_id -> spare_min
+
+    for unit in p2_work['units']:
+        unit_spare = unit.get('spare_min', 0)
+        unit_ids = unit.get('ids', [])
+
+        # Each person in the unit gets the FULL spare time
+        for emp_id in unit_ids:
+            if emp_id:
+                p2_employee_spare[emp_id] = unit_spare
+
+    # Also calculate averages per shift for fallback
+    p2_morning_spare_total = 0
+    p2_morning_persons = 0
+    p2_evening_spare_total = 0
+    p2_evening_persons = 0
+
+    for unit in p2_work['units']:
+        unit_spare = unit.get('spare_min', 0)
+        unit_shifts = unit.get('shifts', [])
+
+        morning_in_unit = sum(1 for s in unit_shifts if s == 'morning')
+        evening_in_unit = sum(1 for s in unit_shifts if s == 'evening')
+
+        if morning_in_unit > 0:
+            p2_morning_spare_total += unit_spare * morning_in_unit
+            p2_morning_persons += morning_in_unit
+        if evening_in_unit > 0:
+            p2_evening_spare_total += unit_spare * evening_in_unit
+            p2_evening_persons += evening_in_unit
+
+    p2_morning_spare_pp = (p2_morning_spare_total / p2_morning_persons) if p2_morning_persons > 0 else 0
+    p2_evening_spare_pp = (p2_evening_spare_total / p2_evening_persons) if p2_evening_persons > 0 else 0
+
+    return {
+        'summary': {
+            'total_rooms': total_rooms,
+            'total_departs': total_departs,
+            'total_recouches': total_recouches,
+            'total_couvertures': occupied,
+            'stays': stays,
+            'has_deficit': has_deficit,
+            'rooms_deficit': rooms_deficit,
+            'couv_needs_more_persons': couv_needs_more_persons,
+            'couv_extra_persons_needed': couv_extra_persons_needed,
+        },
+        'periods': {
+            'p1': {
+                'name': 'morning_alone',
+                'time_range': f"{periods.p1_start} - {periods.p1_end}",
+                'pairs': len(day_pairs),
+                'solos': len(day_solos),
+                'units': units_day,
+                'units_work': p1_work['units'],
+                'work_display': p1_work['display'],
+                'spare': format_spare(p1_work['total_spare_min'], units_day),
+                'departs_done': p1_work['total_departs'],
+                'recouch_done': p1_work['total_recouches'],
+                'rooms_done': p1_work['total_departs'] + p1_work['total_recouches'],
+            },
+            'lunch_morning': {
+                'name': 'morning_lunch',
+                'time_range': f"{periods.lunch_day_start} - {periods.lunch_day_end}",
+            },
+            'p2': {
+                'name': 'morning_evening',
+                'time_range': f"{periods.p2_start} - {periods.p2_end}",
+                'pairs': len(p2_pairs),
+                'solos': len(p2_solos),
+                'units': units_p2,
+                'units_work': p2_work['units'],
+                'work_display': p2_work['display'],
+                'spare': format_spare(p2_work['total_spare_min'], units_p2),
+                # Per-employee spare mapping (employee_id -> spare_min)
+                'employee_spare': p2_employee_spare,
+                # Fallback averages by shift
+                'morning_spare_pp': round(p2_morning_spare_pp, 1),
+                'evening_spare_pp': round(p2_evening_spare_pp, 1),
+                'morning_persons': p2_morning_persons,
+                'evening_persons': p2_evening_persons,
+                'departs_done': p2_work['total_departs'],
+                'recouch_done': p2_work['total_recouches'],
+                'rooms_done': p2_work['total_departs'] + p2_work['total_recouches'],
+            },
+            'p3': {
+                'name': 'evening_finishes',
+                'time_range': f"{periods.p3_start} - {periods.p3_end}",
+                'pairs': len(evening_pairs),
+                'solos': len(evening_solos),
+                'units': units_evening,
+                'units_work': p3_work['units'],
+                'work_display': p3_work['display'],
+                'spare': format_spare(p3_work['total_spare_min'], units_evening),
+                'departs_done': p3_work['total_departs'],
+                'recouch_done': p3_work['total_recouches'],
+                'rooms_done': p3_work['total_departs'] + p3_work['total_recouches'],
+                'rooms_deficit': rooms_deficit,
+            },
+            'lunch_evening': {
+                'name': 'evening_lunch',
+                'time_range': f"{periods.lunch_evening_start} - {periods.lunch_evening_end}",
+            },
+            'couvertures': {
+                'name': 'couvertures',
+                'time_range': f"{periods.couv_start} - {actual_couv_end}",
+                'persons_assigned': num_evening,
+                # Regla centralizada en staffing_rules.py
+                'persons_needed': get_evening_persons_needed(occupied),
+                'persons_effective': effective_couv_persons,
+                # Comparar con regla de negocio
+                'needs_more_persons': num_evening < get_evening_persons_needed(occupied),
+                'extra_persons_needed': max(0, get_evening_persons_needed(occupied) - num_evening),
+                'persons_display': evening_individual_names,
+                'capacity_min': current_couv_capacity,
+                'period_min': actual_couv_period_min,
+                'work_min': total_couv_work_min,
+                'deficit_min': max(0, couv_deficit_min),
+                'time_per_person_min': round(couv_time_per_person, 1),
+                'spare_min': round(actual_couv_spare, 1),
+                'spare': format_spare(int(actual_couv_spare), num_evening),
+                'couvertures_count': occupied,
+                'per_person': round(occupied / num_evening, 1) if num_evening > 0 else 0,
+                # PRIORIDAD: Trabajadores disponibles ANTES que elasticidad
+                'has_workers_available': has_workers_available,
+                'workers_available': workers_with_available_hours[:3],  # Top 3 sugeridos
+                'can_add_workers': can_add_workers,
+                # Elasticidad (solo si no hay trabajadores disponibles)
+                'can_cover_with_elasticity': can_cover_with_elasticity,
+                'elasticity_available_min': round(total_elasticity_available, 1),
+                'elasticity_extra_per_person_min': round(extra_min_per_person, 1),
+                'has_deficit': num_evening < get_evening_persons_needed(occupied),
+                # Sugerencia clara
+                'suggestion': (
+                    f"Agregar trabajador: {workers_with_available_hours[0]['name']}" if can_add_workers and workers_with_available_hours
+                    else f"+{extra_min_per_person}min/persona (elasticidad)" if can_cover_with_elasticity
+                    else "Sin cobertura posible" if couv_deficit_min > 0
+                    else None
+                ),
+            },
+        },
+        'workers': {
+            'day_count': num_day,
+            'evening_count': num_evening,
+            'total_count': num_day + num_evening,
+        },
+        'task_config': {
+            'depart_pair_min': DEPART_MIN,
+            'depart_solo_min': DEPART_SOLO_MIN,
+            'recouch_pair_min': RECOUCH_MIN,
+            'recouch_solo_min': RECOUCH_SOLO_MIN,
+            'couv_min': COUV_MIN,
+            'couv_period_min': periods.couv_period_min,
+        },
+    }
@@ -0,0 +1,245 @@
+"""
+Forecast Engine.
+Cálculo vectorizado (NumPy/pandas) de carga y personal para un horizonte
+de N días: una semana, un mes o una temporada completa.
+
+Mismas reglas que ForecastLoader, pero sobre columnas: cada paso es una
+operación sobre arrays en lugar de un bucle por día.
+"""
+from datetime import date
+from typing import Any, Dict, Iterable, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+# Couvertures por encima de cada umbral suman una persona de TARDE
+# (> 38 → 4, > 25 → 3, > 13 → 2, > 0 → 1)
+EVENING_STAFF_THRESHOLDS = np.array([0, 13, 25, 38])
+
+# Horas de trabajo por persona usadas para 'persons_needed'
+HOURS_PER_PERSON = 8
+
+
+class ForecastEngine:
+    """
+    Motor de forecast columnar.
+    Recibe la configuración ya cargada (ver ForecastLoader.engine) y no
+    consulta la base de datos.
+    """
+
+    def __init__(
+        self,
+        task_times: Dict[str, int],
+        task_persons: Dict[str, int],
+        shift_config: Dict[str, Dict],
+        task_constraints: Dict[str, Dict]
+    ):
+        self.depart_factor = task_times.get('DEPART', 50) * task_persons.get('DEPART', 2)
+        self.recouch_factor = task_times.get('RECOUCH', 20) * task_persons.get('RECOUCH', 2)
+        self.couverture_factor = task_times.get('COUVERTURE', 20) * task_persons.get('COUVERTURE', 1)
+
+        day_config = shift_config.get('DAY', {})
+        evening_config = shift_config.get('EVENING', {})
+        self.morning_shift_hours = day_config.get('shift_hours', 8.0)
+        self.morning_min_staff = day_config.get('min_staff', 2)
+        self.evening_help_day_hours = evening_config.get('helps_other_shift_hours', 4.5)
+        self.evening_couverture_hours = task_constraints.get('COUVERTURE', {}).get('available_hours', 3.5)
+
+    # === CÁLCULO ===
+
+    def compute(
+        self,
+        dates: Iterable,
+        departures: Sequence[int],
+        arrivals: Sequence[int],
+        occupied: Sequence[int]
+    ) -> pd.DataFrame:
+        """
+        Calcula carga y personal para todos los días a la vez.
+
+        Args:
+            dates: Fechas del horizonte (date, str ISO o DatetimeIndex)
+            departures, arrivals, occupied: Un valor por fecha
+
+        Returns:
+            DataFrame indexado por fecha con conteos, minutos-persona,
+            horas por turno y personal necesario
+        """
+        departures = np.asarray(departures, dtype=np.int64)
+        arrivals = np.asarray(arrivals, dtype=np.int64)
+        occupied = np.asarray(occupied, dtype=np.int64)
+
+        # Tareas
+        depart_count = departures
+        recouch_count = np.maximum(occupied - arrivals, 0)
+        couverture_count = occupied
+
+        # Minutos-persona (tiempo × personas requeridas)
+        depart_minutes = depart_count * self.depart_factor
+        recouch_minutes = recouch_count * self.recouch_factor
+        couverture_minutes = couverture_count * self.couverture_factor
+        day_minutes = depart_minutes + recouch_minutes
+        evening_minutes = couverture_minutes
+
+        frame = pd.DataFrame({
+            'departures': departures,
+            'arrivals': arrivals,
+            'occupied': occupied,
+            'depart_count': depart_count,
+            'recouch_count': recouch_count,
+            'couverture_count': couverture_count,
+            'depart_minutes': depart_minutes,
+            'recouch_minutes': recouch_minutes,
+            'couverture_minutes': couverture_minutes,
+            'day_minutes': day_minutes,
+            'evening_minutes': evening_minutes,
+            'total_minutes': day_minutes + evening_minutes,
+            'day_hours': day_minutes / 60,
+            'evening_hours': evening_minutes / 60,
+        }, index=self._date_index(dates))
+
+        staffing = self.staffing(frame['day_hours'].to_numpy(), couverture_count)
+        for column, values in staffing.items():
+            frame[column] = values
+        return frame
+
+    def compute_records(self, forecast_data: List[Dict[str, Any]]) -> pd.DataFrame:
+        """compute() a partir de la lista de dicts que usa ForecastLoader."""
+        return self.compute(
+            [row['date'] for row in forecast_data],
+            [row['departures'] for row in forecast_data],
+            [row['arrivals'] for row in forecast_data],
+            [row['occupied'] for row in forecast_data],
+        )
+
+    def staffing(self, day_hours: np.ndarray, couverture_count: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Personal necesario por día.
+        1. Personas TARDE según número de couvertures
+        2. Cada persona TARDE aporta evening_help_day_hours a tareas DAY
+        3. Personas MAÑANA para el resto (mínimo morning_min_staff si hay trabajo)
+        """
+        day_hours = np.asarray(day_hours, dtype=np.float64)
+        couverture_count = np.asarray(couverture_count, dtype=np.int64)
+
+        evening_persons = np.searchsorted(EVENING_STAFF_THRESHOLDS, couverture_count, side='left')
+        covered_by_evening = evening_persons * self.evening_help_day_hours
+        remaining_day_hours = np.maximum(day_hours - covered_by_evening, 0)
+
+        # np.round redondea al par igual que round()
+        calculated = np.round(remaining_day_hours / self.morning_shift_hours).astype(np.int64)
+        morning_persons = np.where(
+            calculated > 0, np.maximum(calculated, self.morning_min_staff), 0
+        )
+
+        return {
+            'evening_persons': evening_persons.astype(np.int64),
+            'covered_by_evening': covered_by_evening,
+            'remaining_day_hours': remaining_day_hours,
+            'morning_persons': morning_persons.astype(np.int64),
+            'pairs_needed': (morning_persons + 1) // 2,
+        }
+
+    # === FORMATOS DE ForecastLoader ===
+
+    def to_week_load(self, frame: pd.DataFrame) -> Dict[str, Any]:
+        """Convierte el resultado al formato de ForecastLoader.calculate_week_load."""
+        result = {
+            'days': {},
+            'totals': {
+                'day_minutes': int(frame['day_minutes'].sum()),
+                'evening_minutes': int(frame['evening_minutes'].sum()),
+                'total_minutes': int(frame['total_minutes'].sum()),
+            },
+            'persons_needed': {},
+        }
+
+        columns = [
+            'depart_count', 'depart_minutes', 'recouch_count', 'recouch_minutes',
+            'couverture_count', 'couverture_minutes', 'day_minutes', 'evening_minutes',
+        ]
+        rows = zip(self._date_keys(frame.index), *(frame[c].tolist() for c in columns))
+        for (day_key, depart_count, depart_minutes, recouch_count, recouch_minutes,
+                couverture_count, couverture_minutes, day_minutes, evening_minutes) in rows:
+            day_hours = day_minutes / 60
+            evening_hours = evening_minutes / 60
+            result['days'][day_key] = {
+                'tasks': {
+                    'DEPART': {'count': depart_count, 'minutes': depart_minutes},
+                    'RECOUCH': {'count': recouch_count, 'minutes': recouch_minutes},
+                    'COUVERTURE': {'count': couverture_count, 'minutes': couverture_minutes},
+                },
+                'shifts': {
+                    'DAY': {'minutes': day_minutes, 'hours': day_hours},
+                    'EVENING': {'minutes': evening_minutes, 'hours': evening_hours},
+                },
+                'total_minutes': day_minutes + evening_minutes,
+                'total_hours': (day_minutes + evening_minutes) / 60,
+            }
+
+            day_persons = day_hours / HOURS_PER_PERSON
+            evening_persons = evening_hours / HOURS_PER_PERSON
+            result['persons_needed'][day_key] = {
+                'day': round(day_persons, 1),
+                'evening': round(evening_persons, 1),
+                'total': round(day_persons + evening_persons, 1),
+            }
+
+        result['totals']['total_hours'] = result['totals']['total_minutes'] / 60
+        return result
+
+    def to_requirements(self, day_keys: List[str], day_hours, evening_hours, couverture_count) -> Dict[str, Any]:
+        """Formato de ForecastLoader.calculate_staffing_requirements."""
+        staffing = self.staffing(day_hours, couverture_count)
+        day_totals = staffing['morning_persons'].tolist()
+        evening_totals = staffing['evening_persons'].tolist()
+
+        by_day = {}
+        rows = zip(
+            day_keys, day_totals, evening_totals, staffing['pairs_needed'].tolist(),
+            staffing['covered_by_evening'].tolist(), staffing['remaining_day_hours'].tolist(),
+            np.asarray(day_hours, dtype=np.float64).tolist(),
+            np.asarray(evening_hours, dtype=np.float64).tolist(),
+        )
+        for (day_key, morning_persons, evening_persons, pairs, covered,
+                remaining, day_task_hours, couverture_hours) in rows:
+            by_day[day_key] = {
+                'day_shift': {
+                    'hours_needed': round(day_task_hours, 1),
+                    'persons_needed': morning_persons,
+                    'pairs_needed': pairs,
+                    'available_hours_per_person': self.morning_shift_hours,
+                    'covered_by_evening': round(covered, 1),
+                    # max(0, x) de la versión por día devolvía el int 0
+                    'remaining_hours': round(remaining, 1) if remaining > 0 else 0,
+                },
+                'evening_shift': {
+                    'hours_needed': round(couverture_hours, 1),
+                    'persons_needed': evening_persons,
+                    'available_hours_per_person': self.evening_couverture_hours,
+                    'also_helps_day_hours': self.evening_help_day_hours,
+                },
+            }
+
+        return {
+            'by_day': by_day,
+            'summary': {
+                'max_day_shift': max(day_totals) if day_totals else 0,
+                'max_evening_shift': max(evening_totals) if evening_totals else 0,
+                'avg_day_shift': sum(day_totals) / len(day_totals) if day_totals else 0,
+                'avg_evening_shift': sum(evening_totals) / len(evening_totals) if evening_totals else 0,
+            }
+        }
+
+    # === UTILIDADES ===
+
+    @staticmethod
+    def _date_index(dates: Iterable) -> pd.Index:
+        if isinstance(dates, pd.DatetimeIndex):
+            return pd.Index(dates.date, dtype=object, name='date')
+        return pd.Index(list(dates), dtype=object, name='date')
+
+    @staticmethod
+    def _date_keys(index: pd.Index) -> List[str]:
+        return [d.isoformat() if isinstance(d, date) else d for d in index]
@@ -6,8 +6,10 @@ from datetime import date, timedelta
 from typing import Dict, List, Any
 from decimal import Decimal
 from django.db import transaction
+import pandas as pd
 
-from apps.core.models import TaskType, TimeBlock
+from .config_snapshot import get_planning_config
+from .forecast_engine import ForecastEngine
 
 
 class ForecastLoader:
@@ -17,15 +19,19 @@ class ForecastLoader:
     """
 
     def __init__(self):
+        self.config = get_planning_config()
         self.task_times = self._load_task_times()
         self.task_persons = self._load_task_persons()
         self.task_constraints = self._load_task_constraints()
         self.shift_config = self._load_shift_config()
+        self.engine = ForecastEngine(
+            self.task_times, self.task_persons, self.shift_config, self.task_constraints
+        )
 
     def _load_shift_config(self) -> Dict[str, Dict]:
         """Carga la configuración de turnos desde la base de datos."""
         config = {}
-        for block in TimeBlock.objects.filter(is_active=True):
+        for block in self.config.active_time_blocks:
             shift_hours = 8.0
             if block.start_time and block.end_time:
                 from datetime import datetime
@@ -45,14 +51,14 @@ class ForecastLoader:
     def _load_task_times(self) -> Dict[str, int]:
         """Carga los tiempos de tarea desde la base de datos."""
         times = {}
-        for task in TaskType.objects.all():
+        for task in self.config.task_types.values():
             times[task.code] = task.base_minutes
         return times
 
     def _load_task_persons(self) -> Dict[str, int]:
         """Carga las personas requeridas por tarea desde la base de datos."""
         persons = {}
-        for task in TaskType.objects.all():
+        for task in self.config.task_types.values():
             persons[task.code] = task.persons_required
         return persons
 
@@ -60,7 +66,7 @@ class ForecastLoader:
         """Carga las restricciones de horario de cada tarea."""
         from datetime import datetime, time as dt_time
         constraints = {}
-        for task in TaskType.objects.all():
+        for task in self.config.task_types.values():
             available_hours = 8.0  # Default
             if task.earliest_start_time and task.latest_end_time:
                 # Calcular horas disponibles para esta tarea
@@ -137,45 +143,20 @@ class ForecastLoader:
         Returns:
             Diccionario con carga por día y totales
         """
-        result = {
-            'days': {},
-            'totals': {
-                'day_minutes': 0,
-                'evening_minutes': 0,
-                'total_minutes': 0,
-            },
-            'persons_needed': {},
-        }
-
-        for day_data in week_data:
-            day_date = day_data['date']
-            day_load = self.calculate_daily_load(
-                departures=day_data['departures'],
-                arrivals=day_data['arrivals'],
-                occupied=day_data['occupied']
-            )
+        return self.engine.to_week_load(self.engine.compute_records(week_data))
 
-            day_key = day_date.isoformat() if isinstance(day_date, date) else day_date
-            result['days'][day_key] = day_load
-
-            # Acumular totales
-            result['totals']['day_minutes'] += day_load['shifts']['DAY']['minutes']
-            result['totals']['evening_minutes'] += day_load['shifts']['EVENING']['minutes']
-            result['totals']['total_minutes'] += day_load['total_minutes']
-
-            # Calcular personas necesarias (8h de trabajo por turno)
-            day_persons = day_load['shifts']['DAY']['hours'] / 8
-            evening_persons = day_load['shifts']['EVENING']['hours'] / 8
-
-            result['persons_needed'][day_key] = {
-                'day': round(day_persons, 1),
-                'evening': round(evening_persons, 1),
-                'total': round(day_persons + evening_persons, 1),
-            }
+    def calculate_horizon(self, forecast_data: List[Dict[str, Any]]) -> pd.DataFrame:
+        """
+        Calcula carga y personal para un horizonte de cualquier longitud.
 
-        result['totals']['total_hours'] = result['totals']['total_minutes'] / 60
+        Args:
+            forecast_data: Lista de diccionarios con datos por día
+                [{'date': date, 'departures': int, 'arrivals': int, 'occupied': int}, ...]
 
-        return result
+        Returns:
+            DataFrame indexado por fecha (ver ForecastEngine.compute)
+        """
+        return self.engine.compute_records(forecast_data)
 
     def calculate_staffing_requirements(
         self,
@@ -203,90 +184,45 @@ class ForecastLoader:
         Returns:
             Requerimientos de personal por día
         """
-        requirements = {
+        days = week_load['days']
+        return self.engine.to_requirements(
+            list(days.keys()),
+            [day_load['shifts']['DAY']['hours'] for day_load in days.values()],
+            [day_load['shifts']['EVENING']['hours'] for day_load in days.values()],
+            [day_load['tasks']['COUVERTURE']['count'] for day_load in days.values()],
+        )
+
+    @staticmethod
+    def build_load_calculation(week_load: Dict[str, Any], requirements: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Resumen de carga y personal que se guarda en WeekPlan.load_calculation
+        (leyenda del plan y load_explanation).
+        """
+        load_calculation = {
+            'totals': {
+                'total_hours': round(week_load['totals']['total_hours'], 1),
+                'day_shift_hours': round(week_load['totals']['day_minutes'] / 60, 1),
+                'evening_shift_hours': round(week_load['totals']['evening_minutes'] / 60, 1),
+            },
             'by_day': {},
-            'summary': {
-                'max_day_shift': 0,
-                'max_evening_shift': 0,
-                'avg_day_shift': 0,
-                'avg_evening_shift': 0,
-            }
         }
 
-        day_totals = []
-        evening_totals = []
-
-        # Configuración de turnos desde BD
-        day_config = self.shift_config.get('DAY', {})
-        evening_config = self.shift_config.get('EVENING', {})
-
-        # 8h de trabajo por turno (el almuerzo se suma al horario, no se resta)
-        morning_shift_hours = day_config.get('shift_hours', 8.0)
-        morning_min_staff = day_config.get('min_staff', 2)
-
-        evening_help_day_hours = evening_config.get('helps_other_shift_hours', 4.5)
-        evening_min_staff = evening_config.get('min_staff', 2)
-        evening_couverture_hours = self.task_constraints.get('COUVERTURE', {}).get('available_hours', 3.5)
-
-        for day_key, day_load in week_load['days'].items():
-            day_task_hours = day_load['shifts']['DAY']['hours']  # Horas totales DEPART + RECOUCH
-            couverture_hours = day_load['shifts']['EVENING']['hours']  # Horas totales COUVERTURE
-
-            # Número de couvertures = número de habitaciones ocupadas
-            couvertures_count = day_load['tasks']['COUVERTURE']['count']
-
-            # REGLA DE NEGOCIO SIMPLE:
-            # > 38 couvertures → 4 personas
-            # > 25 couvertures → 3 personas
-            # > 13 couvertures → 2 personas
-            # 1-13 couvertures → 1 persona
-            # 0 couvertures → 0 personas
-            if couvertures_count > 38:
-                evening_persons = 4
-            elif couvertures_count > 25:
-                evening_persons = 3
-            elif couvertures_count > 13:
-                evening_persons = 2
-            elif couvertures_count > 0:
-                evening_persons = 1
-            else:
-                evening_persons = 0
-
-            # Paso 2: Esas personas TARDE también ayudan con tareas DAY
-            # Cada persona TARDE aporta evening_help_day_hours a tareas DEPART/RECOUCH
-            evening_contribution_to_day = evening_persons * evening_help_day_hours
-
-            # Paso 3: Calcular personas MAÑANA necesarias para el resto
-            remaining_day_hours = max(0, day_task_hours - evening_contribution_to_day)
-            morning_persons = 0
-            if remaining_day_hours > 0:
-                # Aplicar mínimo de staff para trabajo en parejas
-                calculated = round(remaining_day_hours / morning_shift_hours)
-                morning_persons = max(morning_min_staff, calculated) if calculated > 0 else 0
-
-            requirements['by_day'][day_key] = {
-                'day_shift': {
-                    'hours_needed': round(day_task_hours, 1),
-                    'persons_needed': morning_persons,
-                    'pairs_needed': (morning_persons + 1) // 2,
-                    'available_hours_per_person': morning_shift_hours,
-                    'covered_by_evening': round(evening_contribution_to_day, 1),
-                    'remaining_hours': round(remaining_day_hours, 1),
-                },
-                'evening_shift': {
-                    'hours_needed': round(couverture_hours, 1),
-                    'persons_needed': evening_persons,
-                    'available_hours_per_person': evening_couverture_hours,
-                    'also_helps_day_hours': evening_help_day_hours,
+        day_names = ['Lun', 'Mar', 'Mié', 'Jue', 'Vie', 'Sáb', 'Dom']
+        for i, (day_key, day_load) in enumerate(week_load['days'].items()):
+            req = requirements['by_day'][day_key]
+            load_calculation['by_day'][day_key] = {
+                'day_name': day_names[i],
+                'tasks': day_load['tasks'],
+                'shifts': {
+                    'DAY': {
+                        'hours': round(day_load['shifts']['DAY']['hours'], 1),
+                        'persons_needed': req['day_shift']['persons_needed'],
+                    },
+                    'EVENING': {
+                        'hours': round(day_load['shifts']['EVENING']['hours'], 1),
+                        'persons_needed': req['evening_shift']['persons_needed'],
+                    },
                 },
+                'total_hours': round(day_load['total_hours'], 1),
             }
-
-            day_totals.append(morning_persons)
-            evening_totals.append(evening_persons)
-
-        requirements['summary']['max_day_shift'] = max(day_totals) if day_totals else 0
-        requirements['summary']['max_evening_shift'] = max(evening_totals) if evening_totals else 0
-        requirements['summary']['avg_day_shift'] = sum(day_totals) / len(day_totals) if day_totals else 0
-        requirements['summary']['avg_evening_shift'] = sum(evening_totals) / len(evening_totals) if evening_totals else 0
-
-        return requirements
+        return load_calculation
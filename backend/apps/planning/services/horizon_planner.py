@@ -0,0 +1,390 @@
+"""
+Horizon Planner Service.
+Genera los WeekPlan de varias semanas seguidas (p. ej. las cuatro que se
+publican con antelación) en una sola pasada.
+
+Empleados, configuración, indisponibilidades y carga del forecast se
+cargan una vez para todo el horizonte. Cada semana se planifica con el
+optimizador de asignaciones (plan_optimal_week) arrastrando el estado de
+la anterior (WeekCarry):
+- días seguidos trabajados hasta el domingo: los días libres de la
+  semana siguiente no alargan la racha por encima del máximo
+- horas por encima o por debajo del objetivo: se compensan en la
+  siguiente, hasta el máximo semanal de la elasticidad del empleado
+  (las ausencias no se recuperan)
+
+Al final todos los WeekPlan y ShiftAssignment se escriben por lotes en
+una sola transacción.
+"""
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from apps.planning.models import ShiftAssignment, WeekPlan
+from apps.staff.models import EmployeeUnavailability
+from . import load_summary
+from .assignment_optimizer import BULK_BATCH_SIZE, AssignmentOptimizer, PlannedShift, WeekCarry
+from .data_version import mark_data_changed
+from .forecast_loader import ForecastLoader
+from .query_count import count_queries
+
+
+# Semanas máximas por llamada
+MAX_HORIZON_WEEKS = 12
+
+DEFAULT_MAX_CONSECUTIVE_DAYS = 6
+
+
+class HorizonPlanner:
+    """
+    Planificador de varias semanas.
+    Las semanas con plan DRAFT se regeneran (se reutiliza el WeekPlan);
+    si alguna tiene un plan en otro estado no se escribe nada.
+    """
+
+    def __init__(self):
+        self.loader = ForecastLoader()
+        self.optimizer = AssignmentOptimizer()
+        self.config = self.optimizer.config
+
+    def plan(
+        self,
+        week_start: date,
+        forecast: List[Dict[str, Any]],
+        weeks: Optional[int] = None,
+        created_by: str = '',
+        max_consecutive_days: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Genera los planes del horizonte.
+
+        Args:
+            week_start: Lunes de la primera semana
+            forecast: Un dict por día desde week_start ({departures, arrivals,
+                occupied}), 7 por semana
+            weeks: Semanas a planificar (default: len(forecast) / 7)
+            created_by: Usuario que crea los planes
+            max_consecutive_days: Máximo de días seguidos de trabajo
+                (default HORIZON_MAX_CONSECUTIVE_DAYS)
+
+        Returns:
+            {
+                'week_start', 'weeks', 'seconds', 'queries',
+                'weeks_detail': [{'week_plan_id', 'week_start', 'status' (CREATED/REPLACED),
+                                  'assignments', 'load_summary', 'stats', 'daily_coverage'}],
+                'consecutive_violations': [{'employee_id', 'employee', 'from', 'to', 'days'}],
+                'hours_balance': {employee_id: horas pendientes al final del horizonte},
+            }
+        """
+        began = time.perf_counter()
+        with count_queries() as counter:
+            result = self._plan(week_start, forecast, weeks, created_by, max_consecutive_days)
+        result['queries'] = counter.count
+        result['seconds'] = round(time.perf_counter() - began, 3)
+        return result
+
+    def _plan(self, week_start, forecast, weeks, created_by, max_consecutive_days) -> Dict[str, Any]:
+        if week_start.weekday() != 0:
+            raise ValueError('week_start debe ser un lunes')
+        if weeks is None:
+            weeks = len(forecast) // 7
+        if not 1 <= weeks <= MAX_HORIZON_WEEKS:
+            raise ValueError(f'El horizonte debe tener entre 1 y {MAX_HORIZON_WEEKS} semanas')
+        if len(forecast) != weeks * 7:
+            raise ValueError(f'forecast debe contener {weeks * 7} días ({weeks} semanas)')
+        if max_consecutive_days is None:
+            max_consecutive_days = getattr(settings, 'HORIZON_MAX_CONSECUTIVE_DAYS', DEFAULT_MAX_CONSECUTIVE_DAYS)
+        if not 1 <= max_consecutive_days <= 7 * MAX_HORIZON_WEEKS:
+            raise ValueError('max_consecutive_days inválido')
+
+        date_to = week_start + timedelta(days=weeks * 7 - 1)
+        week_starts = [week_start + timedelta(days=7 * index) for index in range(weeks)]
+
+        # Falla pronto; _persist lo vuelve a comprobar con los planes bloqueados
+        self._check_drafts(WeekPlan.objects.filter(week_start_date__in=week_starts))
+
+        days = []
+        for index, day_data in enumerate(forecast):
+            try:
+                days.append({
+                    'date': week_start + timedelta(days=index),
+                    'departures': int(day_data.get('departures', 0)),
+                    'arrivals': int(day_data.get('arrivals', 0)),
+                    'occupied': int(day_data.get('occupied', 0)),
+                })
+            except (AttributeError, TypeError, ValueError) as e:
+                raise ValueError(f'Error en datos del día {index + 1}: {e}')
+
+        # Carga de todo el horizonte en una pasada
+        frame = self.loader.calculate_horizon(days)
+
+        carry = WeekCarry(
+            streaks=self._streaks_before(week_start, max_consecutive_days),
+            hours_balance={},
+            unavailable=self._unavailable_days(week_start, date_to),
+            max_consecutive_days=max_consecutive_days,
+        )
+        initial_streaks = dict(carry.streaks)
+
+        planned_weeks = []
+        for index, start in enumerate(week_starts):
+            week_days = days[index * 7:(index + 1) * 7]
+            week_load = self.loader.engine.to_week_load(frame.iloc[index * 7:(index + 1) * 7])
+            requirements = self.loader.calculate_staffing_requirements(week_load)
+            forecast_data = [
+                {
+                    'date': day['date'].isoformat(),
+                    'departures': day['departures'],
+                    'arrivals': day['arrivals'],
+                    'occupied': day['occupied'],
+                }
+                for day in week_days
+            ]
+
+            planned, summary = self.optimizer.plan_optimal_week(start, forecast_data, carry)
+            self._advance_carry(carry, start, summary['employee_state'])
+
+            planned_weeks.append({
+                'week_start': start,
+                'forecast_data': forecast_data,
+                'load_calculation': ForecastLoader.build_load_calculation(week_load, requirements),
+                'planned': planned,
+                'summary': summary,
+            })
+
+        week_plans, replaced = self._persist(planned_weeks, created_by)
+
+        return {
+            'week_start': week_start.isoformat(),
+            'weeks': weeks,
+            'weeks_detail': [
+                {
+                    'week_plan_id': week_plans[week['week_start']].id,
+                    'week_start': week['week_start'].isoformat(),
+                    'status': 'REPLACED' if week['week_start'] in replaced else 'CREATED',
+                    'assignments': len(week['planned']),
+                    'load_summary': week['load_calculation']['totals'],
+                    'stats': week['summary']['stats'],
+                    'daily_coverage': week['summary']['daily_coverage'],
+                }
+                for week in planned_weeks
+            ],
+            'consecutive_violations': self._consecutive_violations(
+                planned_weeks, initial_streaks, week_start, max_consecutive_days
+            ),
+            'hours_balance': {
+                emp_id: round(balance, 2)
+                for emp_id, balance in carry.hours_balance.items() if balance
+            },
+        }
+
+    # === ESTADO ENTRE SEMANAS ===
+
+    def _streaks_before(self, week_start: date, max_consecutive_days: int) -> Dict[int, int]:
+        """Días seguidos trabajados justo antes de week_start (planes ya existentes)."""
+        window_start = week_start - timedelta(days=max_consecutive_days)
+        worked = {}
+        for emp_id, day in ShiftAssignment.objects.filter(
+            date__gte=window_start,
+            date__lt=week_start,
+            employee__isnull=False,
+            is_day_off=False,
+        ).exclude(week_plan__status='ARCHIVED').order_by().values_list('employee_id', 'date'):
+            worked.setdefault(emp_id, set()).add(day)
+
+        streaks = {}
+        for emp_id, dates in worked.items():
+            streak = 0
+            day = week_start - timedelta(days=1)
+            while day in dates:
+                streak += 1
+                day -= timedelta(days=1)
+            if streak:
+                streaks[emp_id] = streak
+        return streaks
+
+    def _unavailable_days(self, date_from: date, date_to: date) -> Dict[int, set]:
+        """emp_id -> fechas ISO con indisponibilidad en el horizonte (una query)."""
+        unavailable = {}
+        for emp_id, start, end in EmployeeUnavailability.objects.filter(
+            employee__is_active=True,
+            date_start__lte=date_to,
+            date_end__gte=date_from,
+        ).order_by().values_list('employee_id', 'date_start', 'date_end'):
+            day = max(start, date_from)
+            while day <= min(end, date_to):
+                unavailable.setdefault(emp_id, set()).add(day.isoformat())
+                day += timedelta(days=1)
+        return unavailable
+
+    def _advance_carry(self, carry: WeekCarry, week_start: date, employee_state: Dict[int, Dict]):
+        """Racha al domingo y horas a compensar tras planificar la semana."""
+        week_keys = [(week_start + timedelta(days=offset)).isoformat() for offset in range(7)]
+        for emp in self.optimizer.employees:
+            state = employee_state.get(emp.id)
+            if state is None:
+                continue
+
+            # Racha: días seguidos hasta el domingo (toda la semana suma a la anterior)
+            worked = state['days_assigned']
+            trailing = 0
+            for day_key in reversed(week_keys):
+                if day_key not in worked:
+                    break
+                trailing += 1
+            if trailing == 7:
+                trailing += carry.streaks.get(emp.id, 0)
+            carry.streaks[emp.id] = trailing
+
+            # Horas: las ausencias no se recuperan
+            absent = carry.unavailable.get(emp.id, set()).intersection(week_keys)
+            if absent:
+                carry.hours_balance[emp.id] = 0.0
+                continue
+            rule = self.config.elasticity_rules.get(emp.elasticity)
+            limit = float(rule.max_extra_hours_week) if rule else 0.0
+            balance = state['target_hours'] - state['assigned_hours']
+            carry.hours_balance[emp.id] = max(-limit, min(limit, balance))
+
+    def _consecutive_violations(
+        self,
+        planned_weeks: List[Dict],
+        initial_streaks: Dict[int, int],
+        week_start: date,
+        max_consecutive_days: int
+    ) -> List[Dict[str, Any]]:
+        """Rachas del horizonte por encima del máximo (p. ej. por días libres fijos)."""
+        worked = {}
+        names = {}
+        for week in planned_weeks:
+            for shift in week['planned']:
+                if shift.employee is None or shift.is_day_off:
+                    continue
+                worked.setdefault(shift.employee.id, set()).add(shift.date)
+                names[shift.employee.id] = shift.employee.full_name
+
+        violations = []
+        for emp_id, dates in worked.items():
+            streak = initial_streaks.get(emp_id, 0)
+            run_start = week_start - timedelta(days=streak)
+            for day in sorted(dates) + [None]:
+                if day is not None and day == run_start + timedelta(days=streak):
+                    streak += 1
+                    continue
+                if streak > max_consecutive_days:
+                    violations.append({
+                        'employee_id': emp_id,
+                        'employee': names[emp_id],
+                        'from': run_start.isoformat(),
+                        'to': (run_start + timedelta(days=streak - 1)).isoformat(),
+                        'days': streak,
+                    })
+                if day is not None:
+                    run_start, streak = day, 1
+        violations.sort(key=lambda violation: (violation['from'], violation['employee_id']))
+        return violations
+
+    # === ESCRITURA ===
+
+    @staticmethod
+    def _check_drafts(plans) -> None:
+        blocked = sorted(
+            f'{plan.week_start_date} ({plan.status})'
+            for plan in plans if plan.status != 'DRAFT'
+        )
+        if blocked:
+            raise ValueError(f"Ya existen planes que no están en borrador: {', '.join(blocked)}")
+
+    def _persist(
+        self,
+        planned_weeks: List[Dict],
+        created_by: str
+    ) -> Tuple[Dict[date, WeekPlan], Set[date]]:
+        """
+        Escribe el horizonte en una transacción: los WeekPlan DRAFT existentes
+        se reutilizan (conservan id y planes diarios), el resto se crean con
+        bulk_create, y las asignaciones se reemplazan con un delete y un
+        bulk_create.
+
+        Los planes existentes se releen con select_for_update dentro de la
+        transacción: uno publicado (o creado) mientras se calculaba el
+        horizonte no se sobrescribe.
+
+        Returns:
+            (WeekPlan por lunes, lunes de los planes reutilizados)
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            existing = {
+                plan.week_start_date: plan
+                for plan in WeekPlan.objects.select_for_update().filter(
+                    week_start_date__in=[week['week_start'] for week in planned_weeks]
+                )
+            }
+            self._check_drafts(existing.values())
+
+            to_update = []
+            to_create = []
+            for week in planned_weeks:
+                start = week['week_start']
+                plan = existing.get(start) or WeekPlan(week_start_date=start, created_by=created_by)
+                plan.name = f"Semana {start.strftime('%d/%m/%Y')}"
+                plan.status = 'DRAFT'
+                plan.forecast_data = week['forecast_data']
+                plan.load_calculation = week['load_calculation']
+                plan.distribution_bundle = None
+                plan.updated_at = now
+                (to_update if plan.pk else to_create).append(plan)
+
+            if to_update:
+                WeekPlan.objects.bulk_update(
+                    to_update,
+                    ['name', 'status', 'forecast_data', 'load_calculation', 'distribution_bundle', 'updated_at'],
+                    batch_size=BULK_BATCH_SIZE
+                )
+                ShiftAssignment.objects.filter(week_plan__in=to_update).delete()
+            if to_create:
+                WeekPlan.objects.bulk_create(to_create, batch_size=BULK_BATCH_SIZE)
+
+            # bulk_create no devuelve ids en todos los motores (MySQL)
+            week_plans = {
+                plan.week_start_date: plan
+                for plan in WeekPlan.objects.filter(
+                    week_start_date__in=[week['week_start'] for week in planned_weeks]
+                )
+            }
+
+            ShiftAssignment.objects.bulk_create(
+                [
+                    self._assignment(week_plans[week['week_start']], shift)
+                    for week in planned_weeks
+                    for shift in week['planned']
+                ],
+                batch_size=BULK_BATCH_SIZE
+            )
+
+            # bulk_update/bulk_create no emiten señales
+            load_summary.mark_range_dirty(
+                planned_weeks[0]['week_start'],
+                planned_weeks[-1]['week_start'] + timedelta(days=6)
+            )
+            mark_data_changed()
+
+        return week_plans, set(existing)
+
+    @staticmethod
+    def _assignment(week_plan: WeekPlan, shift: PlannedShift) -> ShiftAssignment:
+        return ShiftAssignment(
+            week_plan=week_plan,
+            date=shift.date,
+            employee=shift.employee,
+            team=shift.team,
+            shift_template=shift.shift_template,
+            assigned_hours=Decimal(str(round(float(shift.assigned_hours), 2))),
+            is_day_off=shift.is_day_off,
+        )
@@ -2,15 +2,15 @@
 Load Calculator Service.
 Calcula la carga de trabajo (demanda) por día y bloque temporal.
 """
-from datetime import date
-from typing import Dict, List, Any
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List
 from collections import defaultdict
-from django.db.models import Sum
 
 from apps.core.models import TimeBlock, Zone
-from apps.rooms.models import RoomDailyState, RoomDailyTask
+from apps.rooms.models import RoomDailyTask
 from apps.planning.models import DailyLoadSummary
-from .time_calculator import TimeCalculator
+from .config_snapshot import get_planning_config
+from .time_calculator import TimeCalculator, TASK_ROW_FIELDS
 
 
 class LoadCalculator:
@@ -37,36 +37,8 @@ class LoadCalculator:
         Returns:
             Diccionario con la carga calculada
         """
-        result = {
-            'date': target_date,
-            'blocks': {},
-            'total_minutes': 0,
-            'total_tasks': 0,
-            'by_zone': defaultdict(lambda: {'minutes': 0, 'tasks': 0}),
-            'hard_rooms': [],
-        }
-
-        # Obtener bloques a calcular
-        if time_block:
-            blocks = [time_block]
-        else:
-            blocks = TimeBlock.objects.filter(is_active=True)
-
-        for block in blocks:
-            block_result = self._compute_block_load(target_date, block)
-            result['blocks'][block.code] = block_result
-            result['total_minutes'] += block_result['total_minutes']
-            result['total_tasks'] += block_result['total_tasks']
-
-            # Agregar a resumen por zona
-            for zone_code, zone_data in block_result['by_zone'].items():
-                result['by_zone'][zone_code]['minutes'] += zone_data['minutes']
-                result['by_zone'][zone_code]['tasks'] += zone_data['tasks']
-
-            # Agregar habitaciones difíciles
-            result['hard_rooms'].extend(block_result['hard_rooms'])
-
-        return result
+        blocks = [time_block] if time_block else None
+        return self.compute_range_load(target_date, target_date, blocks)[target_date]
 
     def _compute_block_load(
         self,
@@ -76,72 +48,132 @@ class LoadCalculator:
         """
         Calcula la carga para un bloque específico.
         """
-        result = {
-            'time_block': time_block.code,
-            'total_minutes': 0,
-            'total_tasks': 0,
-            'by_task_type': defaultdict(lambda: {'minutes': 0, 'count': 0}),
-            'by_zone': defaultdict(lambda: {'minutes': 0, 'tasks': 0, 'rooms': []}),
-            'hard_rooms': [],
-            'tasks_detail': [],
-        }
+        return self.compute_load(target_date, time_block)['blocks'][time_block.code]
 
-        # Obtener tareas del día para este bloque
-        tasks = RoomDailyTask.objects.filter(
-            room_daily_state__date=target_date,
-            time_block=time_block,
+    def compute_range_load(
+        self,
+        date_from: date,
+        date_to: date,
+        time_blocks: Iterable[TimeBlock] = None
+    ) -> Dict[date, Dict[str, Any]]:
+        """
+        Calcula la carga de todos los días de un rango con una sola query:
+        trae las tareas con values() (solo las columnas necesarias), calcula
+        los minutos en lote y agrega por fecha, bloque, zona y tipo de tarea
+        en una pasada.
+
+        Returns:
+            Dict fecha -> mismo formato que compute_load
+        """
+        if time_blocks is None:
+            time_blocks = get_planning_config().active_time_blocks
+        blocks = list(time_blocks)
+        block_codes = {block.id: block.code for block in blocks}
+
+        days = {}
+        current = date_from
+        while current <= date_to:
+            days[current] = {
+                'date': current,
+                'blocks': {block.code: self._empty_block_load(block.code) for block in blocks},
+                'total_minutes': 0,
+                'total_tasks': 0,
+                'by_zone': defaultdict(lambda: {'minutes': 0, 'tasks': 0}),
+                'hard_rooms': [],
+            }
+            current += timedelta(days=1)
+
+        rows = list(RoomDailyTask.objects.filter(
+            room_daily_state__date__range=(date_from, date_to),
+            time_block_id__in=list(block_codes),
             status__in=['PENDING', 'ASSIGNED']
-        ).select_related(
-            'room_daily_state',
-            'room_daily_state__room',
-            'room_daily_state__room__zone',
-            'room_daily_state__room__room_type',
-            'task_type'
-        )
-
-        for task in tasks:
-            room_state = task.room_daily_state
-            room = room_state.room
-            zone = room.zone
-
-            # Calcular tiempo
-            estimated_minutes = self.time_calculator.calculate_task_time(task, room_state)
+        ).order_by('priority', 'task_type__priority', 'id').values(
+            'id',
+            'time_block_id',
+            'task_type__code',
+            'room_daily_state__date',
+            'room_daily_state__room__number',
+            'room_daily_state__room__zone__code',
+            'room_daily_state__night_expected_difficulty',
+            *TASK_ROW_FIELDS
+        ))
+        task_minutes = self.time_calculator.calculate_rows(rows)
+
+        # Habitaciones ya contadas por (fecha, bloque, zona)
+        seen_rooms = defaultdict(set)
+
+        for row, estimated_minutes in zip(rows, task_minutes):
+            task_date = row['room_daily_state__date']
+            block_code = block_codes[row['time_block_id']]
+            block_result = days[task_date]['blocks'][block_code]
+            task_code = row['task_type__code']
+            room_number = row['room_daily_state__room__number']
+            zone_code = row['room_daily_state__room__zone__code']
+            difficulty = row['room_daily_state__night_expected_difficulty']
 
             # Actualizar contadores
-            result['total_minutes'] += estimated_minutes
-            result['total_tasks'] += 1
+            block_result['total_minutes'] += estimated_minutes
+            block_result['total_tasks'] += 1
 
             # Por tipo de tarea
-            result['by_task_type'][task.task_type.code]['minutes'] += estimated_minutes
-            result['by_task_type'][task.task_type.code]['count'] += 1
+            block_result['by_task_type'][task_code]['minutes'] += estimated_minutes
+            block_result['by_task_type'][task_code]['count'] += 1
 
             # Por zona
-            result['by_zone'][zone.code]['minutes'] += estimated_minutes
-            result['by_zone'][zone.code]['tasks'] += 1
-            if room.number not in result['by_zone'][zone.code]['rooms']:
-                result['by_zone'][zone.code]['rooms'].append(room.number)
+            zone_result = block_result['by_zone'][zone_code]
+            zone_result['minutes'] += estimated_minutes
+            zone_result['tasks'] += 1
+            rooms = seen_rooms[(task_date, block_code, zone_code)]
+            if room_number not in rooms:
+                rooms.add(room_number)
+                zone_result['rooms'].append(room_number)
 
             # Habitaciones difíciles
-            if room_state.night_expected_difficulty in ('HARD', 'VERY_HARD'):
-                result['hard_rooms'].append({
-                    'room': room.number,
-                    'zone': zone.code,
-                    'difficulty': room_state.night_expected_difficulty,
-                    'reason': 'recouch_declined' if room_state.day_cleaning_status == 'DECLINED' else 'other'
+            if difficulty in ('HARD', 'VERY_HARD'):
+                block_result['hard_rooms'].append({
+                    'room': room_number,
+                    'zone': zone_code,
+                    'difficulty': difficulty,
+                    'reason': 'recouch_declined' if row['room_daily_state__day_cleaning_status'] == 'DECLINED' else 'other'
                 })
 
             # Detalle de tareas
-            result['tasks_detail'].append({
-                'task_id': task.id,
-                'room': room.number,
-                'zone': zone.code,
-                'task_type': task.task_type.code,
+            block_result['tasks_detail'].append({
+                'task_id': row['id'],
+                'room': room_number,
+                'zone': zone_code,
+                'task_type': task_code,
                 'estimated_minutes': estimated_minutes,
-                'is_vip': room_state.is_vip,
-                'difficulty': room_state.night_expected_difficulty,
+                'is_vip': row['room_daily_state__is_vip'],
+                'difficulty': difficulty,
             })
 
-        return result
+        # Totales por día, en el orden de los bloques
+        for day_result in days.values():
+            for block_result in day_result['blocks'].values():
+                day_result['total_minutes'] += block_result['total_minutes']
+                day_result['total_tasks'] += block_result['total_tasks']
+
+                # Agregar a resumen por zona
+                for zone_code, zone_data in block_result['by_zone'].items():
+                    day_result['by_zone'][zone_code]['minutes'] += zone_data['minutes']
+                    day_result['by_zone'][zone_code]['tasks'] += zone_data['tasks']
+
+                # Agregar habitaciones difíciles
+                day_result['hard_rooms'].extend(block_result['hard_rooms'])
+
+        return days
+
+    def _empty_block_load(self, block_code: str) -> Dict[str, Any]:
+        return {
+            'time_block': block_code,
+            'total_minutes': 0,
+            'total_tasks': 0,
+            'by_task_type': defaultdict(lambda: {'minutes': 0, 'count': 0}),
+            'by_zone': defaultdict(lambda: {'minutes': 0, 'tasks': 0, 'rooms': []}),
+            'hard_rooms': [],
+            'tasks_detail': [],
+        }
 
     def compute_week_load(
         self,
@@ -156,8 +188,6 @@ class LoadCalculator:
         Returns:
             Diccionario con carga por día
         """
-        from datetime import timedelta
-
         result = {
             'week_start': week_start,
             'days': {},
@@ -168,10 +198,8 @@ class LoadCalculator:
             'by_block': defaultdict(lambda: {'minutes': 0, 'tasks': 0}),
         }
 
-        for day_offset in range(7):
-            current_date = week_start + timedelta(days=day_offset)
-            day_load = self.compute_load(current_date)
-
+        week_load = self.compute_range_load(week_start, week_start + timedelta(days=6))
+        for current_date, day_load in week_load.items():
             result['days'][current_date.isoformat()] = day_load
             result['totals']['minutes'] += day_load['total_minutes']
             result['totals']['tasks'] += day_load['total_tasks']
@@ -184,25 +212,11 @@ class LoadCalculator:
 
     def save_load_summary(self, target_date: date) -> List[DailyLoadSummary]:
         """
-        Calcula y guarda el resumen de carga para un día.
+        Calcula y guarda el resumen de carga (y capacidad) para un día.
         """
-        load = self.compute_load(target_date)
-        summaries = []
-
-        for block_code, block_data in load['blocks'].items():
-            time_block = TimeBlock.objects.get(code=block_code)
-
-            summary, created = DailyLoadSummary.objects.update_or_create(
-                date=target_date,
-                time_block=time_block,
-                defaults={
-                    'total_tasks': block_data['total_tasks'],
-                    'total_minutes_required': block_data['total_minutes'],
-                }
-            )
-            summaries.append(summary)
-
-        return summaries
+        from .load_summary import refresh_load_summaries
+
+        return list(refresh_load_summaries([(target_date, None)]).values())
 
     def get_zones_load(
         self,
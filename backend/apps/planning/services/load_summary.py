@@ -0,0 +1,241 @@
+"""
+Load Summary.
+Mantiene DailyLoadSummary materializado de forma incremental.
+
+Las señales (ver apps/planning/signals.py) anotan los (fecha, bloque)
+afectados por cambios en tareas, estados, turnos asignados e
+indisponibilidades; al confirmar la transacción se recalculan solo esas
+filas. Los cambios de configuración (reglas de tiempo, turnos, empleados)
+afectan a todas las fechas: marcan las filas como obsoletas y se
+recalculan al leerlas (get_load_summaries).
+"""
+import threading
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db import connection, transaction
+
+from apps.planning.models import DailyLoadSummary
+from apps.rooms.models import RoomDailyState
+from .capacity import CapacityCalculator
+from .config_snapshot import get_planning_config
+from .load import LoadCalculator
+
+
+# (fecha, time_block_id); time_block_id None = todos los bloques activos
+SummaryKey = Tuple[date, Optional[int]]
+
+SUMMARY_FIELDS = [
+    'total_tasks', 'total_minutes_required',
+    'total_employees', 'total_minutes_available',
+    'is_stale', 'calculated_at',
+]
+
+# Origen de los datos del dashboard: cálculo en vivo o filas materializadas
+DASHBOARD_LOAD_SOURCES = ('live', 'materialized')
+
+_pending = threading.local()
+
+
+# === MARCADO ===
+
+def mark_dirty(keys: Iterable[SummaryKey]):
+    """
+    Anota filas a recalcular al confirmar la transacción actual
+    (inmediatamente si no hay transacción abierta).
+    """
+    keys = set(keys)
+    if not keys:
+        return
+    pending = getattr(_pending, 'keys', None)
+    if pending is None:
+        pending = _pending.keys = set()
+    pending.update(keys)
+    transaction.on_commit(flush_pending)
+
+
+def mark_task_dirty(room_daily_state_id: int, time_block_id: Optional[int] = None):
+    """
+    Como mark_dirty, pero por estado de habitación: la fecha se resuelve
+    al recalcular (una query para todo el lote en lugar de una por tarea).
+    """
+    pending = getattr(_pending, 'task_keys', None)
+    if pending is None:
+        pending = _pending.task_keys = set()
+    pending.add((room_daily_state_id, time_block_id))
+    transaction.on_commit(flush_pending)
+
+
+def mark_dates_dirty(dates: Iterable[date]):
+    mark_dirty((target_date, None) for target_date in dates)
+
+
+def mark_range_dirty(date_from: date, date_to: date):
+    mark_dates_dirty(
+        date_from + timedelta(days=offset)
+        for offset in range((date_to - date_from).days + 1)
+    )
+
+
+def mark_all_stale() -> int:
+    """Marca todas las filas como obsoletas (cambio de configuración)."""
+    return DailyLoadSummary.objects.filter(is_stale=False).update(is_stale=True)
+
+
+def flush_pending():
+    """Recalcula las filas anotadas (una vez por transacción)."""
+    keys = getattr(_pending, 'keys', None) or set()
+    task_keys = getattr(_pending, 'task_keys', None) or set()
+    if not keys and not task_keys:
+        return
+    _pending.keys = set()
+    _pending.task_keys = set()
+
+    if task_keys:
+        state_dates = dict(
+            RoomDailyState.objects.filter(
+                id__in={state_id for state_id, _ in task_keys}
+            ).order_by().values_list('id', 'date')
+        )
+        # Estados borrados: su propia señal ya anotó la fecha
+        keys |= {
+            (state_dates[state_id], block_id)
+            for state_id, block_id in task_keys
+            if state_id in state_dates
+        }
+    refresh_load_summaries(keys, existing_only=True)
+
+
+# === RECÁLCULO ===
+
+def refresh_load_summaries(
+    keys: Iterable[SummaryKey],
+    existing_only: bool = False
+) -> Dict[Tuple[date, int], DailyLoadSummary]:
+    """
+    Recalcula carga y capacidad de los (fecha, bloque) indicados y los
+    guarda con un único upsert.
+
+    La carga sale de LoadCalculator.compute_range_load (una query por
+    tramo de días consecutivos) y la capacidad de una sola
+    AvailabilityMatrix para todo el rango.
+
+    Con existing_only solo se recalculan filas que ya existen: las demás
+    se crean la primera vez que se leen (así una indisponibilidad de meses
+    no materializa fechas que nadie consulta).
+
+    Returns:
+        Dict (fecha, time_block_id) -> DailyLoadSummary guardado
+    """
+    config = get_planning_config()
+    blocks_by_id = {block.id: block for block in config.active_time_blocks}
+
+    block_ids_by_date = defaultdict(set)
+    for target_date, block_id in keys:
+        if block_id is None:
+            block_ids_by_date[target_date].update(blocks_by_id)
+        elif block_id in blocks_by_id:
+            block_ids_by_date[target_date].add(block_id)
+    if existing_only and block_ids_by_date:
+        existing = set(
+            DailyLoadSummary.objects.filter(
+                date__in=list(block_ids_by_date)
+            ).order_by().values_list('date', 'time_block_id')
+        )
+        block_ids_by_date = {
+            target_date: {block_id for block_id in block_ids if (target_date, block_id) in existing}
+            for target_date, block_ids in block_ids_by_date.items()
+        }
+        block_ids_by_date = {d: ids for d, ids in block_ids_by_date.items() if ids}
+    if not block_ids_by_date:
+        return {}
+
+    load_calc = LoadCalculator()
+    capacity_calc = CapacityCalculator()
+    dates = sorted(block_ids_by_date)
+    capacity_calc.prepare(dates[0], dates[-1])
+
+    summaries = {}
+    for run_start, run_end in _consecutive_runs(dates):
+        run_block_ids = set().union(*(
+            block_ids_by_date[run_start + timedelta(days=offset)]
+            for offset in range((run_end - run_start).days + 1)
+        ))
+        run_blocks = [block for block_id, block in blocks_by_id.items() if block_id in run_block_ids]
+        range_load = load_calc.compute_range_load(run_start, run_end, run_blocks)
+
+        for target_date, day_load in range_load.items():
+            for block_id in block_ids_by_date[target_date]:
+                block = blocks_by_id[block_id]
+                block_load = day_load['blocks'][block.code]
+                block_capacity = capacity_calc._compute_block_capacity(target_date, block)
+                summaries[(target_date, block_id)] = DailyLoadSummary(
+                    date=target_date,
+                    time_block=block,
+                    total_tasks=block_load['total_tasks'],
+                    total_minutes_required=block_load['total_minutes'],
+                    total_employees=block_capacity['employee_count'],
+                    total_minutes_available=block_capacity['total_minutes'],
+                    is_stale=False,
+                )
+
+    # MySQL hace el upsert por cualquier clave única (no admite unique_fields)
+    unique_fields = (
+        ['date', 'time_block'] if connection.features.supports_update_conflicts_with_target else None
+    )
+    DailyLoadSummary.objects.bulk_create(
+        list(summaries.values()),
+        update_conflicts=True,
+        unique_fields=unique_fields,
+        update_fields=SUMMARY_FIELDS,
+    )
+    return summaries
+
+
+def _consecutive_runs(dates: List[date]) -> List[Tuple[date, date]]:
+    """Agrupa fechas ordenadas en tramos de días consecutivos."""
+    runs = []
+    for target_date in dates:
+        if runs and target_date - runs[-1][1] == timedelta(days=1):
+            runs[-1][1] = target_date
+        else:
+            runs.append([target_date, target_date])
+    return [(start, end) for start, end in runs]
+
+
+# === LECTURA ===
+
+def get_load_summaries(date_from: date, date_to: date) -> Dict[date, Dict[str, DailyLoadSummary]]:
+    """
+    Resúmenes materializados del rango para los bloques activos.
+    Recalcula antes las filas que faltan o están obsoletas.
+
+    Returns:
+        Dict fecha -> {código de bloque: DailyLoadSummary}
+    """
+    config = get_planning_config()
+    blocks = config.active_time_blocks
+
+    rows = {
+        (summary.date, summary.time_block_id): summary
+        for summary in DailyLoadSummary.objects.filter(
+            date__range=(date_from, date_to),
+            time_block_id__in=[block.id for block in blocks],
+        ).order_by()
+    }
+
+    days = [date_from + timedelta(days=offset) for offset in range((date_to - date_from).days + 1)]
+    missing = [
+        (target_date, block.id)
+        for target_date in days
+        for block in blocks
+        if (target_date, block.id) not in rows or rows[(target_date, block.id)].is_stale
+    ]
+    if missing:
+        rows.update(refresh_load_summaries(missing))
+
+    return {
+        target_date: {block.code: rows[(target_date, block.id)] for block in blocks}
+        for target_date in days
+    }
@@ -0,0 +1,32 @@
+"""
+Query Count.
+Cuenta las queries ejecutadas dentro de un bloque, también con
+DEBUG=False, para incluirlas en el resultado de los servicios.
+"""
+from contextlib import contextmanager
+
+from django.db import connection
+
+
+class QueryCounter:
+    """execute_wrapper que cuenta las queries que pasan por la conexión."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+@contextmanager
+def count_queries(conn=None):
+    """
+    Uso:
+        with count_queries() as counter:
+            ...
+        counter.count
+    """
+    counter = QueryCounter()
+    with (conn or connection).execute_wrapper(counter):
+        yield counter
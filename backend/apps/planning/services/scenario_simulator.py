@@ -0,0 +1,404 @@
+"""
+Scenario Simulator Service.
+Simula escenarios "qué pasa si" (ocupación, salidas, tiempos de tarea)
+sobre forecasts de muchas semanas sin crear WeekPlans.
+
+La única lectura de BD es la carga inicial (forecasts guardados,
+configuración y personal). El cálculo por semana corre en memoria,
+repartido en un pool de procesos, y nunca escribe en la BD.
+"""
+import copy
+import multiprocessing
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from django.db import connections
+
+from apps.planning.models import WeekPlan
+from . import distribution_kernel
+from .daily_distribution import DailyDistributionCalculator
+from .distribution_kernel import KernelConfig
+from .forecast_engine import ForecastEngine
+from .forecast_loader import ForecastLoader
+
+
+# Parámetros de escenario y valores neutros
+DEFAULT_SCENARIO = {
+    'occupancy_factor': 1.0,     # Multiplica habitaciones ocupadas
+    'arrivals_factor': 1.0,      # Multiplica llegadas
+    'departures_factor': 1.0,    # Multiplica salidas
+    'extra_departures': 0,       # Salidas adicionales por día
+    'task_minutes': {},          # {código de tarea: minutos con pareja}
+    'date_from': None,           # Ventana donde aplican las perturbaciones (todas,
+    'date_to': None,             # también task_minutes y el personal fijo)
+    'weekdays': None,            # Días ISO (1=lunes) donde aplican, None = todos
+    'day_staff': None,           # Personal fijo de mañana, None = el necesario
+    'evening_staff': None,       # Personal fijo de tarde, None = el necesario
+}
+
+TOTAL_KEYS = [
+    'departures', 'arrivals', 'occupied',
+    'day_hours_needed', 'evening_hours_needed', 'total_hours_needed',
+    'day_person_shifts', 'evening_person_shifts', 'staffed_hours',
+    'spare_hours', 'rooms_deficit', 'couv_deficit_hours', 'deficit_days',
+]
+
+
+def normalize_scenario(scenario: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Valida el escenario y completa los valores por defecto."""
+    scenario = scenario or {}
+    unknown = set(scenario) - set(DEFAULT_SCENARIO)
+    if unknown:
+        raise ValueError(f'Parámetros de escenario desconocidos: {", ".join(sorted(unknown))}')
+
+    result = {**DEFAULT_SCENARIO, **scenario}
+    try:
+        for key in ('occupancy_factor', 'arrivals_factor', 'departures_factor'):
+            result[key] = float(result[key])
+            if result[key] < 0:
+                raise ValueError(f'{key} no puede ser negativo')
+        result['extra_departures'] = int(result['extra_departures'])
+        result['task_minutes'] = {
+            code: int(minutes) for code, minutes in (result['task_minutes'] or {}).items()
+        }
+        for key in ('date_from', 'date_to'):
+            if isinstance(result[key], str):
+                result[key] = date.fromisoformat(result[key])
+        if result['weekdays'] is not None:
+            result['weekdays'] = sorted({int(day) for day in result['weekdays']})
+        for key in ('day_staff', 'evening_staff'):
+            if result[key] is not None:
+                result[key] = int(result[key])
+    except (TypeError, ValueError) as e:
+        raise ValueError(f'Escenario inválido: {e}')
+    return result
+
+
+def scenario_mask(dates: List[date], scenario: Dict) -> np.ndarray:
+    """Días dentro de la ventana del escenario (date_from, date_to, weekdays)."""
+    mask = np.ones(len(dates), dtype=bool)
+    if scenario['date_from']:
+        mask &= np.array([d >= scenario['date_from'] for d in dates], dtype=bool)
+    if scenario['date_to']:
+        mask &= np.array([d <= scenario['date_to'] for d in dates], dtype=bool)
+    if scenario['weekdays']:
+        mask &= np.isin([d.isoweekday() for d in dates], scenario['weekdays'])
+    return mask
+
+
+def apply_scenario(dates: List[date], forecast: Dict[str, np.ndarray], scenario: Dict) -> Dict[str, np.ndarray]:
+    """Aplica las perturbaciones del escenario a las columnas del forecast."""
+    mask = scenario_mask(dates, scenario)
+
+    def perturb(values, factor, extra=0):
+        changed = np.maximum(np.rint(values * factor).astype(np.int64) + extra, 0)
+        return np.where(mask, changed, values)
+
+    return {
+        'departures': perturb(forecast['departures'], scenario['departures_factor'], scenario['extra_departures']),
+        'arrivals': perturb(forecast['arrivals'], scenario['arrivals_factor']),
+        'occupied': perturb(forecast['occupied'], scenario['occupancy_factor']),
+    }
+
+
+# === PROCESO TRABAJADOR ===
+
+# Solo los KernelConfig ('baseline' y 'simulated'): los hijos no necesitan
+# Django. Cada día indica el suyo (los tiempos del escenario solo aplican
+# dentro de su ventana).
+_worker_kernels: Dict[str, KernelConfig] = {}
+
+
+def _init_worker(kernels: Dict[str, KernelConfig]):
+    global _worker_kernels
+    _worker_kernels = kernels
+
+
+def _simulate_week(days: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Distribución diaria de una semana en memoria. No accede a la BD."""
+    totals = dict.fromkeys(TOTAL_KEYS, 0)
+
+    for day in days:
+        kernel = _worker_kernels[day['kernel']]
+        assigned_day = [{'id': None, 'employee_short': f'M{i + 1}'} for i in range(day['day_persons'])]
+        assigned_evening = [{'id': None, 'employee_short': f'T{i + 1}'} for i in range(day['evening_persons'])]
+        distribution = distribution_kernel.calculate_day_distribution(
+            kernel, day, assigned_day, assigned_evening
+        )
+
+        periods = distribution['periods']
+        couvertures = periods['couvertures']
+        spare_min = sum(periods[p]['spare']['value'] for p in ('p1', 'p2', 'p3'))
+        spare_min += max(0, couvertures['spare_min'])
+        rooms_deficit = distribution['summary']['rooms_deficit']
+
+        totals['departures'] += day['departures']
+        totals['arrivals'] += day['arrivals']
+        totals['occupied'] += day['occupied']
+        totals['day_hours_needed'] += day['day_hours']
+        totals['evening_hours_needed'] += day['evening_hours']
+        totals['total_hours_needed'] += day['day_hours'] + day['evening_hours']
+        totals['day_person_shifts'] += day['day_persons']
+        totals['evening_person_shifts'] += day['evening_persons']
+        totals['staffed_hours'] += day['staffed_hours']
+        totals['spare_hours'] += spare_min / 60
+        totals['rooms_deficit'] += rooms_deficit
+        totals['couv_deficit_hours'] += couvertures['deficit_min'] / 60
+        if rooms_deficit > 0 or couvertures['deficit_min'] > 0:
+            totals['deficit_days'] += 1
+
+    return {
+        'week_start': days[0]['week_start'],
+        'days': len(days),
+        **{key: _round(value) for key, value in totals.items()},
+    }
+
+
+def _round(value):
+    return round(value, 1) if isinstance(value, float) else value
+
+
+# === SIMULADOR ===
+
+class ScenarioSimulator:
+    """
+    Simulador de escenarios de staffing.
+    Compara el forecast original con el perturbado: horas necesarias,
+    personal, tiempo sobrante y déficit por semana y en total.
+    """
+
+    def __init__(self):
+        self.loader = ForecastLoader()
+        self.distribution_calc = DailyDistributionCalculator()
+
+    def load_forecasts(
+        self,
+        date_from: date = None,
+        date_to: date = None,
+        week_plan_ids: List[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Lee WeekPlan.forecast_data guardados (una query)."""
+        week_plans = WeekPlan.objects.exclude(forecast_data__isnull=True)
+        if week_plan_ids:
+            week_plans = week_plans.filter(id__in=week_plan_ids)
+        if date_from:
+            week_plans = week_plans.filter(week_start_date__gt=date_from - timedelta(days=7))
+        if date_to:
+            week_plans = week_plans.filter(week_start_date__lte=date_to)
+
+        days = []
+        for forecast_data in week_plans.order_by('week_start_date').values_list('forecast_data', flat=True):
+            for day in forecast_data or []:
+                day_date = date.fromisoformat(day['date'])
+                if (date_from and day_date < date_from) or (date_to and day_date > date_to):
+                    continue
+                days.append({**day, 'date': day_date})
+        return days
+
+    def simulate(
+        self,
+        forecast_days: List[Dict[str, Any]],
+        scenario: Dict[str, Any] = None,
+        workers: int = None,
+        include_weeks: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Simula el forecast original y el escenario.
+
+        Args:
+            forecast_days: [{'date': date|str, 'departures', 'arrivals', 'occupied'}, ...]
+            scenario: Perturbaciones (ver DEFAULT_SCENARIO)
+            workers: Procesos del pool (None = CPUs, 1 = en este proceso)
+            include_weeks: Incluir el detalle por semana
+
+        Returns:
+            Totales y detalle semanal de 'baseline' y 'simulated', y su diferencia
+        """
+        scenario = normalize_scenario(scenario)
+        if not forecast_days:
+            raise ValueError('No hay datos de forecast para simular')
+
+        forecast_days = sorted(forecast_days, key=lambda d: self._as_date(d['date']))
+        dates = [self._as_date(d['date']) for d in forecast_days]
+        baseline = {
+            key: np.array([int(d.get(key, 0)) for d in forecast_days], dtype=np.int64)
+            for key in ('departures', 'arrivals', 'occupied')
+        }
+        perturbed = apply_scenario(dates, baseline, scenario)
+        mask = scenario_mask(dates, scenario)
+
+        kernels = {
+            'baseline': self.distribution_calc.kernel,
+            'simulated': self._scenario_kernel(scenario),
+        }
+
+        tasks = []
+        for variant, forecast in (('baseline', baseline), ('simulated', perturbed)):
+            if variant == 'simulated':
+                days = self._build_days(dates, forecast, scenario, mask)
+            else:
+                days = self._build_days(dates, forecast)
+            for week in self._split_weeks(days):
+                tasks.append((variant, week))
+
+        weeks_by_variant = defaultdict(list)
+        for variant, week_result in zip([t[0] for t in tasks], self._run(tasks, kernels, workers)):
+            weeks_by_variant[variant].append(week_result)
+
+        result = {
+            'date_from': dates[0].isoformat(),
+            'date_to': dates[-1].isoformat(),
+            'days': len(dates),
+            'scenario': {
+                **scenario,
+                'date_from': scenario['date_from'].isoformat() if scenario['date_from'] else None,
+                'date_to': scenario['date_to'].isoformat() if scenario['date_to'] else None,
+            },
+        }
+        for variant in ('baseline', 'simulated'):
+            weeks = weeks_by_variant[variant]
+            result[variant] = {
+                'totals': {key: _round(sum(week[key] for week in weeks)) for key in TOTAL_KEYS},
+            }
+            if include_weeks:
+                result[variant]['by_week'] = weeks
+        result['delta'] = {
+            key: _round(result['simulated']['totals'][key] - result['baseline']['totals'][key])
+            for key in TOTAL_KEYS
+        }
+        return result
+
+    # === UTILIDADES ===
+
+    @staticmethod
+    def _as_date(value) -> date:
+        return date.fromisoformat(value) if isinstance(value, str) else value
+
+    def _scenario_engine(self, scenario: Dict) -> ForecastEngine:
+        """Motor de forecast con los tiempos de tarea del escenario."""
+        if not scenario['task_minutes']:
+            return self.loader.engine
+        return ForecastEngine(
+            {**self.loader.task_times, **scenario['task_minutes']},
+            self.loader.task_persons,
+            self.loader.shift_config,
+            self.loader.task_constraints,
+        )
+
+    def _scenario_kernel(self, scenario: Dict) -> KernelConfig:
+        """Configuración del kernel con los tiempos de tarea del escenario."""
+        if not scenario['task_minutes']:
+            return self.distribution_calc.kernel
+
+        task_config = copy.deepcopy(self.distribution_calc.task_config)
+        for code, minutes in scenario['task_minutes'].items():
+            task = task_config.setdefault(
+                code, {'base_minutes': minutes, 'solo_minutes': minutes, 'persons_required': 1}
+            )
+            # El tiempo en solitario escala en la misma proporción
+            if task['base_minutes']:
+                task['solo_minutes'] = round(task['solo_minutes'] * minutes / task['base_minutes'])
+            task['base_minutes'] = minutes
+        return self.distribution_calc.build_kernel_config(task_config)
+
+    def _build_days(
+        self,
+        dates: List[date],
+        forecast: Dict[str, np.ndarray],
+        scenario: Optional[Dict] = None,
+        mask: Optional[np.ndarray] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Carga y personal de todos los días con el motor vectorizado.
+        Con escenario, sus tiempos de tarea y su personal fijo solo se usan
+        en los días de mask; el resto se calcula como la base.
+        """
+        if mask is None:
+            mask = np.zeros(len(dates), dtype=bool)
+        columns = (forecast['departures'], forecast['arrivals'], forecast['occupied'])
+
+        frame = self.loader.engine.compute(dates, *columns)
+        day_hours = frame['day_hours'].to_numpy()
+        evening_hours = frame['evening_hours'].to_numpy()
+        day_persons = frame['morning_persons'].to_numpy()
+        evening_persons = frame['evening_persons'].to_numpy()
+
+        engine = self._scenario_engine(scenario) if scenario else self.loader.engine
+        if engine is not self.loader.engine and mask.any():
+            scenario_frame = engine.compute(dates, *columns)
+            day_hours = np.where(mask, scenario_frame['day_hours'].to_numpy(), day_hours)
+            evening_hours = np.where(mask, scenario_frame['evening_hours'].to_numpy(), evening_hours)
+            day_persons = np.where(mask, scenario_frame['morning_persons'].to_numpy(), day_persons)
+            evening_persons = np.where(mask, scenario_frame['evening_persons'].to_numpy(), evening_persons)
+        if scenario and scenario['day_staff'] is not None:
+            day_persons = np.where(mask, scenario['day_staff'], day_persons)
+        if scenario and scenario['evening_staff'] is not None:
+            evening_persons = np.where(mask, scenario['evening_staff'], evening_persons)
+        kernels = np.where(mask, 'simulated', 'baseline')
+
+        shift_config = self.loader.shift_config
+        day_shift_hours = shift_config.get('DAY', {}).get('shift_hours', 8.0)
+        evening_shift_hours = shift_config.get('EVENING', {}).get('shift_hours', 8.0)
+        staffed_hours = day_persons * day_shift_hours + evening_persons * evening_shift_hours
+
+        rows = zip(
+            dates,
+            forecast['departures'].tolist(), forecast['arrivals'].tolist(), forecast['occupied'].tolist(),
+            day_hours.tolist(), evening_hours.tolist(),
+            day_persons.tolist(), evening_persons.tolist(), staffed_hours.tolist(),
+            kernels.tolist(),
+        )
+        return [
+            {
+                'date': day_date.isoformat(),
+                'week_start': (day_date - timedelta(days=day_date.weekday())).isoformat(),
+                'departures': departures,
+                'arrivals': arrivals,
+                'occupied': occupied,
+                'day_hours': day_hours,
+                'evening_hours': evening_hours,
+                'day_persons': int(day_count),
+                'evening_persons': int(evening_count),
+                'staffed_hours': float(staffed),
+                'kernel': kernel,
+            }
+            for (day_date, departures, arrivals, occupied, day_hours, evening_hours,
+                 day_count, evening_count, staffed, kernel) in rows
+        ]
+
+    @staticmethod
+    def _split_weeks(days: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        weeks = defaultdict(list)
+        for day in days:
+            weeks[day['week_start']].append(day)
+        return [weeks[key] for key in sorted(weeks)]
+
+    @staticmethod
+    def _run(tasks, kernels, workers: Optional[int]) -> List[Dict[str, Any]]:
+        """Ejecuta las semanas en un pool de procesos (o aquí si workers=1)."""
+        if workers is None:
+            workers = os.cpu_count() or 1
+        workers = max(1, min(workers, len(tasks)))
+
+        if workers == 1:
+            _init_worker(kernels)
+            return [_simulate_week(days) for _, days in tasks]
+
+        # Los hijos no deben heredar conexiones abiertas a la BD
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(kernels,)
+        ) as pool:
+            return list(pool.map(
+                _simulate_week,
+                [days for _, days in tasks],
+                chunksize=max(1, len(tasks) // (workers * 4)),
+            ))
@@ -0,0 +1,331 @@
+"""
+Schedule Repair Service.
+Reparación incremental de un WeekPlan tras una ausencia
+(EmployeeUnavailability) o un cambio del forecast de algún día.
+
+En lugar de rehacer la semana (regenerate / optimize_assignments), solo
+se vuelven a resolver los días afectados:
+- los turnos de empleados indisponibles esos días se quitan
+- el resto de días quedan congelados
+- ShiftSolver parte del plan actual y penaliza cada celda que cambia
+  (W_CHANGE), así que solo mueve a alguien si cubre un turno que falta
+  o si incumple una restricción dura (p. ej. trabaja en su día libre fijo)
+
+Devuelve el diff por fila de ShiftAssignment y lo persiste con la pasada
+de diferencias del optimizador.
+"""
+import time
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from apps.planning.models import DailyPlan, WeekPlan
+from apps.staff.models import EmployeeUnavailability
+from . import load_summary
+from .assignment_optimizer import MAX_SOLVER_TIME_BUDGET, AssignmentOptimizer, PlannedShift
+from .query_count import count_queries
+
+
+DEFAULT_REPAIR_TIME_BUDGET = 0.5
+
+# Iteraciones de búsqueda por día reparado (con semilla fija el resultado
+# es reproducible; time_budget es solo el tope)
+REPAIR_ITERATIONS_PER_DAY = 2000
+
+FORECAST_FIELDS = ('departures', 'arrivals', 'occupied')
+
+
+class ScheduleRepairer:
+    """
+    Reparador de planes semanales.
+    Los días anteriores a hoy no se tocan; los planes archivados no se reparan.
+    """
+
+    def __init__(self):
+        self.optimizer = AssignmentOptimizer()
+
+    def repair(
+        self,
+        week_plan: WeekPlan,
+        dates: Iterable[date] = (),
+        employee_id: Optional[int] = None,
+        forecast: Optional[List[Dict[str, Any]]] = None,
+        time_budget: Optional[float] = None,
+        dry_run: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Repara los días afectados del plan.
+
+        Args:
+            week_plan: Plan a reparar
+            dates: Días a volver a resolver
+            employee_id: Empleado con una indisponibilidad nueva: se reparan
+                los días en que está indisponible y tenía turno
+            forecast: Días con forecast nuevo ([{date, departures, arrivals,
+                occupied}]); se guardan en el plan y se reparan si cambian
+            time_budget: Segundos de búsqueda (default ASSIGNMENT_REPAIR_TIME_BUDGET)
+            dry_run: Calcular el diff sin escribir
+
+        Returns:
+            {
+                'week_plan_id', 'dry_run', 'repaired_dates', 'skipped_dates',
+                'forecast_changed_dates',
+                'changes': [{'action' (added/removed/changed), 'assignment_id',
+                             'employee_id', 'employee', 'date', 'before', 'after'}],
+                'changed_rows', 'persisted', 'coverage', 'objective', 'solver',
+                'stale_daily_plans', 'queries', 'seconds',
+            }
+        """
+        if time_budget is None:
+            time_budget = getattr(settings, 'ASSIGNMENT_REPAIR_TIME_BUDGET', DEFAULT_REPAIR_TIME_BUDGET)
+        try:
+            time_budget = float(time_budget)
+        except (TypeError, ValueError):
+            raise ValueError(f'time_budget inválido: {time_budget}')
+        if not 0 < time_budget <= MAX_SOLVER_TIME_BUDGET:
+            raise ValueError(f'time_budget debe estar entre 0 y {MAX_SOLVER_TIME_BUDGET:g} segundos')
+
+        began = time.perf_counter()
+        with count_queries() as counter:
+            result = self._repair(week_plan, set(dates), employee_id, forecast or [], time_budget, dry_run)
+        result['queries'] = counter.count
+        result['seconds'] = round(time.perf_counter() - began, 3)
+        return result
+
+    def _repair(self, week_plan, dates, employee_id, forecast, time_budget, dry_run) -> Dict[str, Any]:
+        if week_plan.status == 'ARCHIVED':
+            raise ValueError('No se puede reparar un plan archivado')
+        if not dates and employee_id is None and not forecast:
+            raise ValueError('Indicar dates, employee_id o forecast')
+
+        week_days = week_plan.get_days()
+        outside = sorted(day.isoformat() for day in dates if day not in week_days)
+        if outside:
+            raise ValueError(f"Fechas fuera de la semana del plan: {', '.join(outside)}")
+
+        forecast_data, forecast_changed = self._merge_forecast(week_plan, forecast, week_days)
+
+        current = list(week_plan.shift_assignments.select_related(
+            'employee', 'team', 'shift_template'
+        ).order_by('date', 'employee__last_name'))
+        unavailable = self._unavailable_days(week_plan)
+
+        affected = {day.isoformat() for day in dates} | forecast_changed
+        if employee_id is not None:
+            affected |= {
+                a.date.isoformat() for a in current
+                if a.employee_id == employee_id and not a.is_day_off
+                and a.date.isoformat() in unavailable.get(employee_id, ())
+            }
+
+        today = timezone.localdate().isoformat()
+        skipped = sorted(day_key for day_key in affected if day_key < today)
+        repair_days = {day_key for day_key in affected if day_key >= today}
+
+        # Turnos de indisponibles en los días a reparar: se quitan siempre
+        planned = [
+            PlannedShift.from_assignment(a) for a in current
+            if not (
+                a.employee_id is not None and not a.is_day_off
+                and a.date.isoformat() in repair_days
+                and a.date.isoformat() in unavailable.get(a.employee_id, ())
+            )
+        ]
+
+        daily_needs = self.optimizer._daily_needs(week_plan.week_start_date, forecast_data)
+        solver, grid = self.optimizer._build_solver_model(
+            daily_needs, planned, unavailable=unavailable, repair_days=repair_days
+        )
+        if repair_days:
+            solved = solver.solve(
+                grid,
+                time_budget=time_budget,
+                max_iterations=REPAIR_ITERATIONS_PER_DAY * len(repair_days),
+            )
+            planned = self.optimizer._planned_from_grid(solver, solved.grid, planned)
+            objective = solved.breakdown
+            solver_info = {
+                'seed_cost': solved.seed_cost,
+                'cost': solved.cost,
+                'iterations': solved.iterations,
+                'elapsed': round(solved.elapsed, 3),
+                'time_budget': time_budget,
+            }
+        else:
+            objective = solver.evaluate(grid)
+            solver_info = None
+
+        changes = self._diff(current, planned)
+        changed_dates = sorted({change['date'] for change in changes})
+
+        persisted = None
+        stale_daily_plans = []
+        if not dry_run:
+            with transaction.atomic():
+                if forecast_changed:
+                    week_plan.forecast_data = forecast_data
+                    week_plan.load_calculation = self._load_calculation(forecast_data)
+                    week_plan.save(update_fields=['forecast_data', 'load_calculation', 'updated_at'])
+                persisted = self.optimizer._persist_assignments(week_plan, planned, current)
+                if changes:
+                    load_summary.mark_dates_dirty(date.fromisoformat(day_key) for day_key in changed_dates)
+            if changes:
+                stale_daily_plans = list(DailyPlan.objects.filter(
+                    week_plan=week_plan, date__in=changed_dates
+                ).order_by('date').values_list('id', flat=True))
+
+        return {
+            'week_plan_id': week_plan.id,
+            'dry_run': dry_run,
+            'repaired_dates': sorted(repair_days),
+            'skipped_dates': skipped,
+            'forecast_changed_dates': sorted(forecast_changed),
+            'changes': changes,
+            'changed_rows': len(changes),
+            'persisted': persisted,
+            'coverage': self._coverage(planned, daily_needs, repair_days),
+            'objective': objective,
+            'solver': solver_info,
+            'stale_daily_plans': stale_daily_plans,
+        }
+
+    # === ENTRADAS ===
+
+    def _merge_forecast(self, week_plan, forecast, week_days):
+        """Aplica los días de forecast nuevos; devuelve (forecast_data, fechas que cambian)."""
+        forecast_data = [dict(day) for day in (week_plan.forecast_data or [])]
+        by_date = {day.get('date'): day for day in forecast_data}
+        week_keys = {day.isoformat() for day in week_days}
+
+        changed = set()
+        for index, day_data in enumerate(forecast):
+            try:
+                day_key = str(day_data['date'])
+                values = {field: int(day_data.get(field, 0)) for field in FORECAST_FIELDS}
+            except (KeyError, AttributeError, TypeError, ValueError) as e:
+                raise ValueError(f'Error en forecast, día {index + 1}: {e}')
+            if day_key not in week_keys:
+                raise ValueError(f'Forecast fuera de la semana del plan: {day_key}')
+
+            existing = by_date.get(day_key)
+            if existing is None:
+                existing = {'date': day_key}
+                forecast_data.append(existing)
+                by_date[day_key] = existing
+            elif all(existing.get(field) == value for field, value in values.items()):
+                continue
+            existing.update(values)
+            changed.add(day_key)
+
+        forecast_data.sort(key=lambda day: day.get('date') or '')
+        return forecast_data, changed
+
+    def _unavailable_days(self, week_plan) -> Dict[int, Set[str]]:
+        """Días indisponibles (ISO) de la semana por empleado (una query)."""
+        week_start, week_end = week_plan.week_start_date, week_plan.week_end_date
+        unavailable: Dict[int, Set[str]] = {}
+        for emp_id, start, end in EmployeeUnavailability.objects.filter(
+            date_start__lte=week_end,
+            date_end__gte=week_start,
+        ).order_by().values_list('employee_id', 'date_start', 'date_end'):
+            days = unavailable.setdefault(emp_id, set())
+            for day in week_plan.get_days():
+                if max(start, week_start) <= day <= min(end, week_end):
+                    days.add(day.isoformat())
+        return unavailable
+
+    def _load_calculation(self, forecast_data) -> Dict[str, Any]:
+        loader = self.optimizer.forecast_loader
+        week_load = loader.calculate_week_load([
+            {
+                'date': date.fromisoformat(day['date']),
+                **{field: int(day.get(field, 0)) for field in FORECAST_FIELDS},
+            }
+            for day in forecast_data
+        ])
+        requirements = loader.calculate_staffing_requirements(week_load)
+        return loader.build_load_calculation(week_load, requirements)
+
+    # === RESULTADO ===
+
+    @staticmethod
+    def _diff(initial, planned) -> List[Dict[str, Any]]:
+        """Filas de ShiftAssignment que se crean, borran o cambian."""
+        def describe(shift):
+            return {
+                'shift_template': shift.shift_template.code if shift.shift_template else None,
+                'assigned_hours': round(float(shift.assigned_hours), 2),
+            }
+
+        kept = {shift.assignment_id: shift for shift in planned if shift.assignment_id}
+        changes = []
+        for assignment in initial:
+            before = PlannedShift.from_assignment(assignment)
+            shift = kept.get(assignment.id)
+            if shift is None:
+                changes.append({
+                    'action': 'removed',
+                    'assignment_id': assignment.id,
+                    'employee_id': before.employee_id,
+                    'employee': before.label,
+                    'date': before.date.isoformat(),
+                    'before': describe(before),
+                    'after': None,
+                })
+            elif describe(shift) != describe(before) or shift.date != before.date:
+                changes.append({
+                    'action': 'changed',
+                    'assignment_id': assignment.id,
+                    'employee_id': shift.employee_id,
+                    'employee': shift.label,
+                    'date': shift.date.isoformat(),
+                    'before': describe(before),
+                    'after': describe(shift),
+                })
+
+        for shift in planned:
+            if not shift.assignment_id:
+                changes.append({
+                    'action': 'added',
+                    'assignment_id': None,
+                    'employee_id': shift.employee_id,
+                    'employee': shift.label,
+                    'date': shift.date.isoformat(),
+                    'before': None,
+                    'after': describe(shift),
+                })
+
+        changes.sort(key=lambda change: (change['date'], change['employee']))
+        return changes
+
+    def _coverage(self, planned, daily_needs, repair_days) -> Dict[str, Dict]:
+        """Personas necesarias vs asignadas en los días reparados."""
+        counts = {day_key: {'morning': 0, 'evening': 0} for day_key in repair_days}
+        shift_keys = {}
+        if self.optimizer.day_block:
+            shift_keys[self.optimizer.day_block.id] = 'morning'
+        if self.optimizer.evening_block:
+            shift_keys[self.optimizer.evening_block.id] = 'evening'
+        for shift in planned:
+            day_counts = counts.get(shift.date.isoformat())
+            if day_counts is None or shift.is_day_off or not shift.shift_template:
+                continue
+            shift_key = shift_keys.get(shift.shift_template.time_block_id)
+            if shift_key:
+                day_counts[shift_key] += 1
+
+        coverage = {}
+        for day_key in sorted(repair_days):
+            needs = daily_needs[day_key]
+            coverage[day_key] = {
+                'needed': {'morning': needs['morning_persons'], 'evening': needs['evening_persons']},
+                'after': counts[day_key],
+                'deficit': {
+                    'morning': max(0, needs['morning_persons'] - counts[day_key]['morning']),
+                    'evening': max(0, needs['evening_persons'] - counts[day_key]['evening']),
+                },
+            }
+        return coverage
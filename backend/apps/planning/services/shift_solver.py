@@ -0,0 +1,383 @@
+"""
+Shift Solver.
+Motor de búsqueda local (sin servicios externos) para el plan semanal de
+FDC/VDC. Parte de un plan semilla (el del optimizador greedy) y solo
+acepta la solución final si su coste es menor o igual: el resultado
+nunca es peor que la semilla según la función objetivo.
+
+Modelo por empleado y día: libre, mañana o tarde (8h o turno corto).
+Restricciones duras (penalización HARD_PENALTY):
+- allowed_blocks, fixed_days_off y máximo MAX_WORK_DAYS días trabajados
+- Parejas FIXED: mismo turno los mismos días
+- Horas ≤ objetivo semanal + elasticidad (ElasticityRule.max_extra_hours_week)
+Objetivo (en orden de peso): déficit de cobertura por turno, horas por
+debajo del objetivo, horas de elasticidad, exceso de personal, rol fuera
+de su turno preferido y días libres no consecutivos.
+
+Reparación incremental: con una rejilla de referencia cada celda distinta
+de ella cuesta W_CHANGE (menos que un turno sin cubrir, más que las horas
+de un turno), y los días 'frozen' no se tocan.
+
+No consulta la base de datos: ver AssignmentOptimizer._build_solver_model.
+"""
+import math
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+
+OFF = None
+MORNING = 'M'
+EVENING = 'E'
+
+MAX_WORK_DAYS = 5
+
+HARD_PENALTY = 100000
+W_DEFICIT = 1000        # por persona que falta en un turno
+W_UNDER_HOUR = 10       # por hora bajo el objetivo semanal
+W_ELASTIC_HOUR = 4      # por hora de elasticidad usada
+W_EXCESS = 2            # por persona de más en un turno
+W_OFF_ROLE = 1          # FDC de tarde / VDC de mañana
+W_SPLIT_DAYS_OFF = 3    # días libres no consecutivos
+W_CHANGE = 200          # por celda distinta de la referencia (solo reparación)
+
+# Turno preferido por rol
+PREFERRED_SHIFT = {'FDC': MORNING, 'VDC': EVENING}
+
+# Una celda es (turno, horas) o None (libre)
+Cell = Optional[Tuple[str, float]]
+
+
+@dataclass(frozen=True)
+class SolverEmployee:
+    id: int
+    role: str
+    target_hours: float
+    max_hours: float                    # objetivo + elasticidad
+    can_morning: bool
+    can_evening: bool
+    days_off: FrozenSet[int]            # índices de día (0-6) libres fijos
+    partner_id: Optional[int] = None
+    locked: FrozenSet[int] = frozenset()  # días que el solver no toca
+    locked_hours: float = 0.0           # horas de los días bloqueados
+    frozen: FrozenSet[int] = frozenset()  # días que no cambian pero cuentan con su celda
+
+
+@dataclass(frozen=True)
+class SolverDay:
+    key: str
+    morning_needed: int
+    evening_needed: int
+
+
+@dataclass
+class SolverResult:
+    grid: Dict[int, List[Cell]]
+    cost: float
+    seed_cost: float
+    breakdown: Dict[str, float]
+    iterations: int
+    accepted: int
+    elapsed: float
+    improved: bool = field(init=False)
+
+    def __post_init__(self):
+        self.improved = self.cost < self.seed_cost
+
+
+class ShiftSolver:
+    """
+    Búsqueda local con recocido simulado sobre la rejilla empleado × día.
+
+    Movimientos:
+    - cambiar la celda de un empleado (y de su pareja)
+    - mover un día trabajado a un día libre
+    - intercambiar turnos de dos empleados sin pareja el mismo día
+    """
+
+    def __init__(
+        self,
+        employees: Sequence[SolverEmployee],
+        days: Sequence[SolverDay],
+        day_hours: float = 8.0,
+        evening_hours: float = 8.0,
+        short_hours: Optional[float] = None,
+        seed: int = 0,
+        reference: Optional[Dict[int, List[Cell]]] = None
+    ):
+        self.employees = {emp.id: emp for emp in employees}
+        self.reference = reference
+        self.emp_ids = [emp.id for emp in employees]
+        self.days = list(days)
+        self.n_days = len(self.days)
+        self.random = random.Random(seed)
+
+        self.options = {}
+        for emp in employees:
+            options = [OFF]
+            if emp.can_morning:
+                options.append((MORNING, day_hours))
+                if short_hours:
+                    options.append((MORNING, short_hours))
+            if emp.can_evening:
+                options.append((EVENING, evening_hours))
+                if short_hours:
+                    options.append((EVENING, short_hours))
+            self.options[emp.id] = options
+
+        self.singles = [
+            emp_id for emp_id in self.emp_ids
+            if self.employees[emp_id].partner_id not in self.employees
+        ]
+
+    # === FUNCIÓN OBJETIVO ===
+
+    def employee_cost(self, emp: SolverEmployee, cells: List[Cell]) -> float:
+        """Coste propio de un empleado (horas, días, restricciones)."""
+        cost = 0.0
+        hours = emp.locked_hours
+        worked = len(emp.locked)
+        off_days = []
+
+        for day_idx, cell in enumerate(cells):
+            if day_idx in emp.locked:
+                continue
+            if cell is OFF:
+                off_days.append(day_idx)
+                continue
+            shift, cell_hours = cell
+            hours += cell_hours
+            worked += 1
+            if day_idx in emp.days_off:
+                cost += HARD_PENALTY
+            if (shift == MORNING and not emp.can_morning) or (shift == EVENING and not emp.can_evening):
+                cost += HARD_PENALTY
+            preferred = PREFERRED_SHIFT.get(emp.role)
+            if preferred and shift != preferred:
+                cost += W_OFF_ROLE
+
+        if worked > MAX_WORK_DAYS:
+            cost += HARD_PENALTY * (worked - MAX_WORK_DAYS)
+        if hours > emp.max_hours + 1e-6:
+            cost += HARD_PENALTY * math.ceil(hours - emp.max_hours)
+
+        cost += W_UNDER_HOUR * max(0.0, emp.target_hours - hours)
+        cost += W_ELASTIC_HOUR * max(0.0, min(hours, emp.max_hours) - emp.target_hours)
+
+        if len(off_days) >= 2 and not any(b - a == 1 for a, b in zip(off_days, off_days[1:])):
+            cost += W_SPLIT_DAYS_OFF
+        if self.reference is not None:
+            cost += W_CHANGE * self._changed_cells(emp, cells)
+        return cost
+
+    def _changed_cells(self, emp: SolverEmployee, cells: List[Cell]) -> int:
+        reference = self.reference.get(emp.id)
+        if reference is None:
+            return 0
+        return sum(
+            1 for day_idx, cell in enumerate(cells)
+            if day_idx not in emp.locked and cell != reference[day_idx]
+        )
+
+    def pair_cost(self, cells1: List[Cell], cells2: List[Cell]) -> float:
+        """Las parejas FIXED trabajan el mismo turno los mismos días."""
+        mismatched = 0
+        for cell1, cell2 in zip(cells1, cells2):
+            shift1 = cell1[0] if cell1 else None
+            shift2 = cell2[0] if cell2 else None
+            if shift1 != shift2:
+                mismatched += 1
+        return HARD_PENALTY * mismatched
+
+    def day_cost(self, day_idx: int, counts: Dict[str, int]) -> float:
+        day = self.days[day_idx]
+        cost = 0.0
+        for shift, needed in ((MORNING, day.morning_needed), (EVENING, day.evening_needed)):
+            count = counts[shift]
+            cost += W_DEFICIT * max(0, needed - count)
+            cost += W_EXCESS * max(0, count - needed)
+        return cost
+
+    def evaluate(self, grid: Dict[int, List[Cell]]) -> Dict[str, float]:
+        """Coste total desglosado de una rejilla."""
+        counts = self._day_counts(grid)
+        coverage = sum(self.day_cost(d, counts[d]) for d in range(self.n_days))
+        employees = sum(self.employee_cost(self.employees[e], grid[e]) for e in self.emp_ids)
+        pairs = sum(self.pair_cost(grid[a], grid[b]) for a, b in self._pairs())
+
+        deficit = sum(
+            max(0, self.days[d].morning_needed - counts[d][MORNING])
+            + max(0, self.days[d].evening_needed - counts[d][EVENING])
+            for d in range(self.n_days)
+        )
+        under_hours = 0.0
+        for emp_id in self.emp_ids:
+            emp = self.employees[emp_id]
+            hours = emp.locked_hours + sum(cell[1] for i, cell in enumerate(grid[emp_id]) if cell and i not in emp.locked)
+            under_hours += max(0.0, emp.target_hours - hours)
+
+        changed = 0
+        if self.reference is not None:
+            changed = sum(self._changed_cells(self.employees[e], grid[e]) for e in self.emp_ids)
+
+        return {
+            'total': coverage + employees + pairs,
+            'coverage': coverage,
+            'employees': employees,
+            'pairs': pairs,
+            'deficit_shifts': deficit,
+            'under_target_hours': round(under_hours, 1),
+            'changed_cells': changed,
+        }
+
+    # === BÚSQUEDA ===
+
+    def solve(
+        self,
+        seed_grid: Dict[int, List[Cell]],
+        time_budget: float = 2.0,
+        max_iterations: Optional[int] = None
+    ) -> SolverResult:
+        """
+        Mejora seed_grid durante time_budget segundos (o max_iterations).
+        Devuelve la mejor rejilla encontrada; si nada mejora, la semilla.
+        """
+        began = time.perf_counter()
+        grid = {emp_id: list(seed_grid.get(emp_id, [OFF] * self.n_days)) for emp_id in self.emp_ids}
+        counts = self._day_counts(grid)
+
+        seed_cost = self.evaluate(grid)['total']
+        current_cost = seed_cost
+        best_cost = seed_cost
+        best_grid = {emp_id: list(cells) for emp_id, cells in grid.items()}
+
+        temperature = 50.0
+        iterations = accepted = 0
+        deadline = began + max(0.0, time_budget)
+
+        while True:
+            if max_iterations is not None and iterations >= max_iterations:
+                break
+            if iterations % 256 == 0 and time.perf_counter() >= deadline:
+                break
+            iterations += 1
+
+            changes = self._propose(grid)
+            if not changes:
+                continue
+
+            delta = self._apply(grid, counts, changes)
+            if delta <= 0 or self.random.random() < math.exp(-delta / temperature):
+                current_cost += delta
+                accepted += 1
+                if current_cost < best_cost - 1e-9:
+                    best_cost = current_cost
+                    best_grid = {emp_id: list(cells) for emp_id, cells in grid.items()}
+            else:
+                self._apply(grid, counts, [(e, d, old) for e, d, _, old in changes])
+
+            temperature = max(0.5, temperature * 0.9995)
+
+        return SolverResult(
+            grid=best_grid,
+            cost=best_cost,
+            seed_cost=seed_cost,
+            breakdown=self.evaluate(best_grid),
+            iterations=iterations,
+            accepted=accepted,
+            elapsed=time.perf_counter() - began,
+        )
+
+    def _propose(self, grid) -> List[Tuple[int, int, Cell, Cell]]:
+        """Movimiento aleatorio como lista de (emp_id, día, nueva, anterior)."""
+        move = self.random.random()
+        emp_id = self.random.choice(self.emp_ids)
+        free_days = [d for d in range(self.n_days) if not self._fixed(emp_id, d)]
+        if not free_days:
+            return []
+
+        if move < 0.5:
+            day_idx = self.random.choice(free_days)
+            new_cell = self.random.choice(self.options[emp_id])
+            cells = [(emp_id, day_idx, new_cell)]
+        elif move < 0.8:
+            worked = [d for d in free_days if grid[emp_id][d] is not OFF]
+            off = [d for d in free_days if grid[emp_id][d] is OFF]
+            if not worked or not off:
+                return []
+            from_day = self.random.choice(worked)
+            to_day = self.random.choice(off)
+            cells = [(emp_id, to_day, grid[emp_id][from_day]), (emp_id, from_day, OFF)]
+        else:
+            if len(self.singles) < 2:
+                return []
+            emp_id, other_id = self.random.sample(self.singles, 2)
+            day_idx = self.random.randrange(self.n_days)
+            if self._fixed(emp_id, day_idx) or self._fixed(other_id, day_idx):
+                return []
+            cells = [
+                (emp_id, day_idx, grid[other_id][day_idx]),
+                (other_id, day_idx, grid[emp_id][day_idx]),
+            ]
+
+        # La pareja sigue al empleado (mismo turno y horas)
+        changes = []
+        for changed_id, day_idx, new_cell in cells:
+            changes.append((changed_id, day_idx, new_cell, grid[changed_id][day_idx]))
+            partner_id = self.employees[changed_id].partner_id
+            if partner_id in self.employees and not self._fixed(partner_id, day_idx):
+                partner_cell = new_cell if new_cell is OFF or self._allows(partner_id, new_cell) else OFF
+                changes.append((partner_id, day_idx, partner_cell, grid[partner_id][day_idx]))
+
+        if all(new == old for _, _, new, old in changes):
+            return []
+        return changes
+
+    def _apply(self, grid, counts, changes) -> float:
+        """Aplica cambios y devuelve la variación de coste."""
+        emp_ids = {change[0] for change in changes}
+        day_ids = {change[1] for change in changes}
+        pairs = {pair for pair in self._pairs() if pair[0] in emp_ids or pair[1] in emp_ids}
+
+        before = self._partial_cost(grid, counts, emp_ids, day_ids, pairs)
+        for emp_id, day_idx, new_cell, *_ in changes:
+            old_cell = grid[emp_id][day_idx]
+            if old_cell is not OFF:
+                counts[day_idx][old_cell[0]] -= 1
+            if new_cell is not OFF:
+                counts[day_idx][new_cell[0]] += 1
+            grid[emp_id][day_idx] = new_cell
+        after = self._partial_cost(grid, counts, emp_ids, day_ids, pairs)
+        return after - before
+
+    def _partial_cost(self, grid, counts, emp_ids, day_ids, pairs) -> float:
+        return (
+            sum(self.employee_cost(self.employees[e], grid[e]) for e in emp_ids)
+            + sum(self.day_cost(d, counts[d]) for d in day_ids)
+            + sum(self.pair_cost(grid[a], grid[b]) for a, b in pairs)
+        )
+
+    # === UTILIDADES ===
+
+    def _fixed(self, emp_id: int, day_idx: int) -> bool:
+        """Día que el solver no puede cambiar (bloqueado o congelado)."""
+        emp = self.employees[emp_id]
+        return day_idx in emp.locked or day_idx in emp.frozen
+
+    def _allows(self, emp_id: int, cell: Cell) -> bool:
+        return cell in self.options[emp_id]
+
+    def _pairs(self) -> List[Tuple[int, int]]:
+        return [
+            (emp_id, emp.partner_id) for emp_id, emp in self.employees.items()
+            if emp.partner_id in self.employees and emp_id < emp.partner_id
+        ]
+
+    def _day_counts(self, grid) -> List[Dict[str, int]]:
+        counts = [{MORNING: 0, EVENING: 0} for _ in range(self.n_days)]
+        for emp_id in self.emp_ids:
+            for day_idx, cell in enumerate(grid[emp_id]):
+                if cell is not OFF:
+                    counts[day_idx][cell[0]] += 1
+        return counts
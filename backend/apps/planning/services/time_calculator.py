@@ -1,12 +1,45 @@
 """
 Time Calculator Service.
 Calcula el tiempo estimado para tareas aplicando reglas configurables.
+
+Las reglas se compilan una vez por instancia en una tabla
+(task_type_id, room_type_id, máscara de condiciones) → minutos,
+así calcular miles de tareas es una búsqueda en dict por tarea.
 """
+from collections import defaultdict
+from datetime import time
 from decimal import Decimal
-from typing import Optional
-from apps.core.models import TaskType, RoomType
+from typing import Dict, Iterable, List, Optional, Tuple
+from apps.core.models import RoomType
 from apps.rooms.models import RoomDailyState, RoomDailyTask
-from apps.rules.models import TaskTimeRule
+from .config_snapshot import get_planning_config
+
+
+# Bit de cada condición de TaskTimeRule en la máscara
+CONDITION_BITS = {
+    'SUITE': 1 << 0,
+    'VIP': 1 << 1,
+    'RECOUCH_DECLINED': 1 << 2,
+    'STAY_LONG': 1 << 3,
+    'FIRST_DAY': 1 << 4,
+    'LATE_CHECKOUT': 1 << 5,
+    'EARLY_CHECKIN': 1 << 6,
+}
+
+SUITE_ROOM_TYPE_CODES = ('SUITE', 'JUNIOR_SUITE', 'PRESIDENTIAL')
+
+# Campos de RoomDailyTask.values() que necesita calculate_rows
+TASK_ROW_FIELDS = (
+    'task_type_id',
+    'room_daily_state__room__room_type_id',
+    'room_daily_state__is_vip',
+    'room_daily_state__day_cleaning_status',
+    'room_daily_state__stay_day_number',
+    'room_daily_state__expected_checkout_time',
+    'room_daily_state__expected_checkin_time',
+)
+LATE_CHECKOUT_AFTER = time(12, 0)
+EARLY_CHECKIN_BEFORE = time(14, 0)
 
 
 class TimeCalculator:
@@ -16,123 +49,199 @@ class TimeCalculator:
     """
 
     def __init__(self):
-        # Cache de reglas
-        self._rules_cache = {}
-
-    def _get_rules_for_task(self, task_type: TaskType) -> list:
-        """Obtiene reglas para un tipo de tarea, usando cache."""
-        if task_type.id not in self._rules_cache:
-            self._rules_cache[task_type.id] = list(
-                TaskTimeRule.objects.filter(
-                    task_type=task_type,
-                    is_active=True
-                ).order_by('-priority')
-            )
-        return self._rules_cache[task_type.id]
+        # Tabla compilada: (task_type_id, room_type_id, máscara) -> minutos
+        self._table: Dict[Tuple[int, int, int], int] = {}
+        # Por (task_type_id, room_type_id): (base, multiplicador, [(bit, multiplicador)])
+        self._compiled: Dict[Tuple[int, int], Tuple] = {}
+        # Datos fuente, cargados en la primera llamada
+        self._rules_by_task_type: Optional[Dict[int, list]] = None
+        self._task_base_minutes: Dict[int, int] = {}
+        self._room_types: Dict[int, RoomType] = {}
+        self._suite_room_type_ids = set()
 
-    def calculate_task_time(
-        self,
-        room_task: RoomDailyTask,
-        room_state: Optional[RoomDailyState] = None
-    ) -> int:
-        """
-        Calcula el tiempo estimado para una tarea específica.
+    def _load_rules(self, force: bool = False):
+        """Carga reglas activas, tiempos base y tipos de habitación desde la foto de configuración."""
+        if self._rules_by_task_type is not None and not force:
+            return
 
-        Args:
-            room_task: Tarea de habitación
-            room_state: Estado diario de la habitación (opcional)
+        config = get_planning_config()
+        rules_by_task_type = defaultdict(list)
+        for rule in config.task_time_rules:
+            rules_by_task_type[rule.task_type_id].append(rule)
+        self._rules_by_task_type = rules_by_task_type
 
-        Returns:
-            Tiempo estimado en minutos
-        """
-        task_type = room_task.task_type
-        room = room_task.room_daily_state.room
-        room_type = room.room_type
+        self._task_base_minutes = {
+            task_type.id: task_type.base_minutes for task_type in config.task_types.values()
+        }
+        self._room_types = dict(config.room_types)
+        self._suite_room_type_ids = {
+            room_type.id for room_type in self._room_types.values()
+            if room_type.code.upper() in SUITE_ROOM_TYPE_CODES
+        }
+        self._compiled = {}
+        self._table = {}
 
-        if room_state is None:
-            room_state = room_task.room_daily_state
+    def _compile(self, task_type_id: int, room_type_id: int) -> Tuple:
+        """Compila las reglas de un par (tipo de tarea, tipo de habitación)."""
+        self._load_rules()
+        if task_type_id not in self._task_base_minutes or room_type_id not in self._room_types:
+            # Creados después de la carga: recargar una vez
+            self._load_rules(force=True)
 
-        # Obtener tiempo base
-        base_minutes = task_type.base_minutes
+        rules = self._rules_by_task_type.get(task_type_id, [])
+        room_type = self._room_types[room_type_id]
 
         # Buscar regla base específica para este tipo de habitación
-        rules = self._get_rules_for_task(task_type)
+        base_minutes = self._task_base_minutes[task_type_id]
         for rule in rules:
             if rule.condition == 'NONE':
-                if rule.room_type and rule.room_type == room_type:
+                if rule.room_type_id and rule.room_type_id == room_type_id:
                     if rule.base_minutes:
                         base_minutes = rule.base_minutes
                     break
-                elif not rule.room_type and rule.base_minutes:
+                elif not rule.room_type_id and rule.base_minutes:
                     base_minutes = rule.base_minutes
                     break
 
-        # Aplicar multiplicador por tipo de habitación
+        # Multiplicador por tipo de habitación
         multiplier = Decimal('1.0')
         if room_type.time_multiplier:
             multiplier *= room_type.time_multiplier
 
-        # Aplicar reglas condicionales
-        conditions_met = self._evaluate_conditions(room_state, room_task)
+        # Reglas condicionales aplicables a este tipo de habitación
+        conditional = [
+            (CONDITION_BITS[rule.condition], rule.time_multiplier)
+            for rule in rules
+            if rule.condition in CONDITION_BITS
+            and (not rule.room_type_id or rule.room_type_id == room_type_id)
+        ]
 
-        for rule in rules:
-            if rule.condition != 'NONE' and rule.condition in conditions_met:
-                # Verificar si la regla aplica a este tipo de habitación
-                if rule.room_type and rule.room_type != room_type:
-                    continue
-                multiplier *= rule.time_multiplier
+        compiled = (base_minutes, multiplier, conditional)
+        self._compiled[(task_type_id, room_type_id)] = compiled
+        return compiled
 
-        # Calcular tiempo final
-        final_minutes = int(base_minutes * multiplier)
+    def _condition_mask(self, room_state: RoomDailyState, room_type_id: int) -> int:
+        """Máscara de bits con las condiciones que cumple el estado."""
+        return self._mask(
+            room_type_id,
+            room_state.is_vip,
+            room_state.day_cleaning_status,
+            room_state.stay_day_number,
+            room_state.expected_checkout_time,
+            room_state.expected_checkin_time,
+        )
+
+    def _mask(
+        self,
+        room_type_id: int,
+        is_vip: bool,
+        day_cleaning_status: str,
+        stay_day_number: int,
+        checkout_time: Optional[time],
+        checkin_time: Optional[time]
+    ) -> int:
+        mask = 0
+        if room_type_id in self._suite_room_type_ids:
+            mask |= CONDITION_BITS['SUITE']
+        if is_vip:
+            mask |= CONDITION_BITS['VIP']
+        if day_cleaning_status == 'DECLINED':
+            mask |= CONDITION_BITS['RECOUCH_DECLINED']
+        if stay_day_number > 5:
+            mask |= CONDITION_BITS['STAY_LONG']
+        if stay_day_number == 1:
+            mask |= CONDITION_BITS['FIRST_DAY']
+        if checkout_time and checkout_time > LATE_CHECKOUT_AFTER:
+            mask |= CONDITION_BITS['LATE_CHECKOUT']
+        if checkin_time and checkin_time < EARLY_CHECKIN_BEFORE:
+            mask |= CONDITION_BITS['EARLY_CHECKIN']
+        return mask
 
-        return final_minutes
+    def _lookup(self, task_type_id: int, room_type_id: int, mask: int) -> int:
+        """Minutos para una clave de la tabla, compilándola si hace falta."""
+        key = (task_type_id, room_type_id, mask)
+        minutes = self._table.get(key)
+        if minutes is None:
+            compiled = self._compiled.get((task_type_id, room_type_id))
+            if compiled is None:
+                compiled = self._compile(task_type_id, room_type_id)
+            base_minutes, multiplier, conditional = compiled
+            for bit, rule_multiplier in conditional:
+                if mask & bit:
+                    multiplier *= rule_multiplier
+            minutes = int(base_minutes * multiplier)
+            self._table[key] = minutes
+        return minutes
 
-    def _evaluate_conditions(
+    def calculate_task_time(
         self,
-        room_state: RoomDailyState,
-        room_task: RoomDailyTask
-    ) -> set:
+        room_task: RoomDailyTask,
+        room_state: Optional[RoomDailyState] = None
+    ) -> int:
         """
-        Evalúa qué condiciones se cumplen para aplicar reglas.
+        Calcula el tiempo estimado para una tarea específica.
+
+        Args:
+            room_task: Tarea de habitación
+            room_state: Estado diario de la habitación (opcional)
 
         Returns:
-            Set de códigos de condiciones cumplidas
+            Tiempo estimado en minutos
         """
-        conditions = set()
-
-        # Suite
-        if room_state.room.room_type.code.upper() in ('SUITE', 'JUNIOR_SUITE', 'PRESIDENTIAL'):
-            conditions.add('SUITE')
-
-        # VIP
-        if room_state.is_vip:
-            conditions.add('VIP')
-
-        # Recouch rechazado
-        if room_state.day_cleaning_status == 'DECLINED':
-            conditions.add('RECOUCH_DECLINED')
-
-        # Estancia larga
-        if room_state.stay_day_number > 5:
-            conditions.add('STAY_LONG')
+        if room_state is None:
+            room_state = room_task.room_daily_state
 
-        # Primer día
-        if room_state.stay_day_number == 1:
-            conditions.add('FIRST_DAY')
+        self._load_rules()
+        room_type_id = room_task.room_daily_state.room.room_type_id
+        mask = self._condition_mask(room_state, room_type_id)
+        return self._lookup(room_task.task_type_id, room_type_id, mask)
 
-        # Checkout tardío (después de 12:00)
-        if room_state.expected_checkout_time:
-            from datetime import time
-            if room_state.expected_checkout_time > time(12, 0):
-                conditions.add('LATE_CHECKOUT')
+    def calculate_many(self, tasks: Iterable[RoomDailyTask]) -> List[int]:
+        """
+        Calcula el tiempo de muchas tareas en una pasada.
+        Solo usa ids y campos del estado: no provoca queries por tarea
+        si las tareas vienen con room_daily_state__room cargado.
 
-        # Checkin temprano (antes de 14:00)
-        if room_state.expected_checkin_time:
-            from datetime import time
-            if room_state.expected_checkin_time < time(14, 0):
-                conditions.add('EARLY_CHECKIN')
+        Returns:
+            Lista de minutos, en el mismo orden que tasks
+        """
+        self._load_rules()
+        table = self._table
+        minutes = []
+        for task in tasks:
+            room_state = task.room_daily_state
+            room_type_id = room_state.room.room_type_id
+            mask = self._condition_mask(room_state, room_type_id)
+            value = table.get((task.task_type_id, room_type_id, mask))
+            if value is None:
+                value = self._lookup(task.task_type_id, room_type_id, mask)
+            minutes.append(value)
+        return minutes
 
-        return conditions
+    def calculate_rows(self, rows: Iterable[Dict]) -> List[int]:
+        """
+        Como calculate_many, pero sobre filas de RoomDailyTask.values()
+        con los campos de TASK_ROW_FIELDS (sin instanciar modelos).
+        """
+        self._load_rules()
+        table = self._table
+        minutes = []
+        for row in rows:
+            task_type_id = row['task_type_id']
+            room_type_id = row['room_daily_state__room__room_type_id']
+            mask = self._mask(
+                room_type_id,
+                row['room_daily_state__is_vip'],
+                row['room_daily_state__day_cleaning_status'],
+                row['room_daily_state__stay_day_number'],
+                row['room_daily_state__expected_checkout_time'],
+                row['room_daily_state__expected_checkin_time'],
+            )
+            value = table.get((task_type_id, room_type_id, mask))
+            if value is None:
+                value = self._lookup(task_type_id, room_type_id, mask)
+            minutes.append(value)
+        return minutes
 
     def calculate_tasks_total_time(self, tasks: list) -> int:
         """
@@ -144,10 +253,7 @@ class TimeCalculator:
         Returns:
             Tiempo total en minutos
         """
-        total = 0
-        for task in tasks:
-            total += self.calculate_task_time(task)
-        return total
+        return sum(self.calculate_many(tasks))
 
     def update_task_estimated_time(self, room_task: RoomDailyTask) -> int:
         """
@@ -0,0 +1,173 @@
+"""
+Week Grid Service.
+Rejilla empleado × día de un WeekPlan en formato columnar para el
+frontend: una fila por empleado (o equipo), una columna por día y tablas
+de consulta para turnos y equipos en lugar de repetirlos en cada celda.
+
+Las asignaciones salen de una sola query values_list; turnos y equipos,
+del snapshot de configuración (sin queries).
+"""
+from datetime import timedelta
+from typing import Any, Dict, List, Optional
+
+from apps.planning.models import ShiftAssignment, WeekPlan
+from .config_snapshot import get_planning_config
+
+
+# Valor de la matriz shift para los días libres
+DAY_OFF = -1
+
+# Orden de las filas sin pareja (como by_employee)
+TEAM_ROWS_ORDER = 998
+INDIVIDUAL_ROWS_ORDER = 999
+
+
+def build_week_grid(week_plan: WeekPlan) -> Dict[str, Any]:
+    """
+    Construye la rejilla de la semana.
+
+    Returns:
+        {
+            'week_plan': {'id', 'week_start_date', 'status'},
+            'days': [fecha ISO × 7],
+            'rows': {'employee_id', 'team_id', 'name', 'role', 'team'}: columnas,
+                una posición por fila (team = índice en teams o None),
+            'shift': [[índice en templates | -1 (libre) | None] × 7] por fila,
+            'hours': [[horas asignadas] × 7] por fila,
+            'extra': [[fila, día, shift, hours], ...] asignaciones adicionales
+                en una celda ya ocupada,
+            'templates': {'id', 'code', 'name', 'time_block', 'start_time',
+                          'end_time', 'break_minutes'}: columnas,
+            'teams': {'id', 'name', 'type', 'member_ids'}: columnas,
+        }
+    """
+    config = get_planning_config()
+    days = [week_plan.week_start_date + timedelta(days=offset) for offset in range(7)]
+    day_index = {day: index for index, day in enumerate(days)}
+
+    assignments = ShiftAssignment.objects.filter(week_plan=week_plan).order_by(
+        'date', 'id'
+    ).values_list(
+        'employee_id', 'employee__first_name', 'employee__last_name', 'employee__role__code',
+        'team_id', 'date', 'shift_template_id', 'assigned_hours', 'is_day_off',
+    )
+
+    teams_by_id = {team.id: team for team in config.teams}
+
+    # Orden de parejas: employee_id -> (equipo, miembro), como by_employee
+    team_order = {}
+    member_team = {}
+    for team_position, team in enumerate(config.get_teams()):
+        for member_position, member in enumerate(team.members.all()):
+            team_order.setdefault(member.id, (team_position, member_position))
+            member_team.setdefault(member.id, team.id)
+
+    rows: Dict[Any, Dict[str, Any]] = {}
+    cells = []
+    for emp_id, first_name, last_name, role, team_id, day, template_id, hours, is_day_off in assignments:
+        if emp_id is not None:
+            key = ('employee', emp_id)
+            if key not in rows:
+                rows[key] = {
+                    'employee_id': emp_id,
+                    'team_id': None,
+                    'name': f'{first_name} {last_name}',
+                    'role': role,
+                    'team_ref': member_team.get(emp_id),
+                    'sort_key': team_order.get(emp_id, (INDIVIDUAL_ROWS_ORDER, emp_id)),
+                }
+        else:
+            key = ('team', team_id)
+            if key not in rows:
+                team = teams_by_id.get(team_id)
+                rows[key] = {
+                    'employee_id': None,
+                    'team_id': team_id,
+                    'name': str(team) if team else f'Equipo {team_id}',
+                    'role': None,
+                    'team_ref': team_id,
+                    'sort_key': (TEAM_ROWS_ORDER, team_id),
+                }
+
+        if day not in day_index:
+            continue
+        cells.append((key, day_index[day], None if is_day_off else template_id, float(hours)))
+
+    ordered = sorted(rows, key=lambda key: rows[key]['sort_key'])
+    row_index = {key: index for index, key in enumerate(ordered)}
+
+    # Equipos referenciados por alguna fila, en orden de aparición
+    grid_teams = []
+    team_index = {}
+    for key in ordered:
+        team_id = rows[key]['team_ref']
+        if team_id is not None and team_id not in team_index:
+            team_index[team_id] = len(grid_teams)
+            grid_teams.append((team_id, teams_by_id.get(team_id)))
+
+    # Plantillas usadas en la semana, en orden de configuración
+    used_templates = {template_id for _, _, template_id, _ in cells}
+    templates = [
+        template for template in config.shift_templates if template.id in used_templates
+    ]
+    template_index = {template.id: index for index, template in enumerate(templates)}
+
+    shift_matrix: List[List[Optional[int]]] = [[None] * 7 for _ in ordered]
+    hours_matrix: List[List[float]] = [[0.0] * 7 for _ in ordered]
+    filled = set()
+    extra = []
+    for key, day, template_id, hours in cells:
+        row = row_index[key]
+        if template_id is None:
+            shift = DAY_OFF
+        else:
+            shift = template_index.get(template_id)
+        if (row, day) in filled:
+            extra.append([row, day, shift, hours])
+            continue
+        filled.add((row, day))
+        shift_matrix[row][day] = shift
+        hours_matrix[row][day] = hours
+
+    return {
+        'week_plan': {
+            'id': week_plan.id,
+            'week_start_date': week_plan.week_start_date.isoformat(),
+            'status': week_plan.status,
+        },
+        'days': [day.isoformat() for day in days],
+        'rows': {
+            'employee_id': [rows[key]['employee_id'] for key in ordered],
+            'team_id': [rows[key]['team_id'] for key in ordered],
+            'name': [rows[key]['name'] for key in ordered],
+            'role': [rows[key]['role'] for key in ordered],
+            'team': [team_index.get(rows[key]['team_ref']) for key in ordered],
+        },
+        'shift': shift_matrix,
+        'hours': hours_matrix,
+        'extra': extra,
+        'templates': {
+            'id': [template.id for template in templates],
+            'code': [template.code for template in templates],
+            'name': [template.name for template in templates],
+            'time_block': [
+                template.time_block.code if template.time_block else None for template in templates
+            ],
+            'start_time': [_time(template.start_time) for template in templates],
+            'end_time': [_time(template.end_time) for template in templates],
+            'break_minutes': [template.break_minutes for template in templates],
+        },
+        'teams': {
+            'id': [team_id for team_id, _ in grid_teams],
+            'name': [team.name if team else None for _, team in grid_teams],
+            'type': [team.team_type if team else None for _, team in grid_teams],
+            'member_ids': [
+                [member.id for member in team.members.all()] if team else []
+                for _, team in grid_teams
+            ],
+        },
+    }
+
+
+def _time(value) -> Optional[str]:
+    return value.strftime('%H:%M') if value else None
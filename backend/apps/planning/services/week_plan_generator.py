@@ -8,13 +8,13 @@ from collections import defaultdict
 from decimal import Decimal
 from django.db import transaction
 
-from apps.core.models import TimeBlock, DayOfWeek
+from apps.core.models import DayOfWeek
 from apps.staff.models import Employee, Team
 from apps.shifts.models import ShiftTemplate
 from apps.planning.models import WeekPlan, ShiftAssignment, PlanningAlert
-from apps.rules.models import ElasticityRule
 from .load import LoadCalculator
 from .capacity import CapacityCalculator
+from .config_snapshot import get_planning_config
 
 
 class WeekPlanGenerator:
@@ -26,6 +26,7 @@ class WeekPlanGenerator:
     def __init__(self):
         self.load_calculator = LoadCalculator()
         self.capacity_calculator = CapacityCalculator()
+        self.config = get_planning_config()
         self.alerts: List[Dict] = []
 
     def _get_week_days(self, week_start: date) -> List[date]:
@@ -34,10 +35,7 @@ class WeekPlanGenerator:
 
     def _get_day_of_week_map(self) -> Dict[int, DayOfWeek]:
         """Mapea iso_weekday a DayOfWeek."""
-        return {
-            dow.iso_weekday: dow
-            for dow in DayOfWeek.objects.all()
-        }
+        return dict(self.config.days_of_week)
 
     def _calculate_optimal_days_off(
         self,
@@ -112,32 +110,19 @@ class WeekPlanGenerator:
         """Obtiene la plantilla de turno principal del empleado."""
         # Preferir DAY, luego EVENING
         for block_code in ['DAY', 'EVENING', 'NIGHT']:
-            try:
-                block = TimeBlock.objects.get(code=block_code)
-                if employee.allowed_blocks.filter(id=block.id).exists():
-                    template = ShiftTemplate.objects.filter(
-                        role=employee.role,
-                        time_block=block,
-                        is_active=True
-                    ).first()
-                    if template:
-                        return template
-            except TimeBlock.DoesNotExist:
-                continue
+            template = self._get_shift_template_for_block(employee, block_code)
+            if template:
+                return template
         return None
 
     def _get_shift_template_for_block(self, employee: Employee, block_code: str) -> Optional[ShiftTemplate]:
         """Obtiene la plantilla de turno para un bloque específico."""
-        try:
-            block = TimeBlock.objects.get(code=block_code)
-            if employee.allowed_blocks.filter(id=block.id).exists():
-                return ShiftTemplate.objects.filter(
-                    role=employee.role,
-                    time_block=block,
-                    is_active=True
-                ).first()
-        except TimeBlock.DoesNotExist:
-            pass
+        block = self.config.get_time_block(block_code)
+        if block and employee.allowed_blocks.filter(id=block.id).exists():
+            return self.config.first_shift_template(
+                role_id=employee.role_id,
+                time_block_id=block.id
+            )
         return None
 
     def _get_employees_by_shift_capability(self) -> Dict[str, List[Employee]]:
@@ -173,13 +158,11 @@ class WeekPlanGenerator:
 
         Returns: Dict con fecha ISO como clave y {'day': n, 'evening': n} como valor
         """
-        from apps.core.models import TimeBlock
-
         result = {}
 
-        # Obtener configuración desde BD
-        day_block = TimeBlock.objects.filter(code='DAY').first()
-        evening_block = TimeBlock.objects.filter(code='EVENING').first()
+        # Obtener configuración
+        day_block = self.config.get_time_block('DAY')
+        evening_block = self.config.get_time_block('EVENING')
 
         # Horas de trabajo por turno
         day_shift_hours = 8.0
@@ -450,11 +433,10 @@ class WeekPlanGenerator:
                     break
 
                 # Verificar elasticidad del empleado
-                from apps.rules.models import ElasticityRule
-                try:
-                    rule = ElasticityRule.objects.get(elasticity_level=employee.elasticity)
+                rule = self.config.elasticity_rules.get(employee.elasticity)
+                if rule:
                     max_extra_hours = Decimal(str(rule.max_extra_hours_week))
-                except ElasticityRule.DoesNotExist:
+                else:
                     max_extra_hours = Decimal('0')
 
                 if max_extra_hours <= 0:
@@ -612,10 +594,7 @@ class WeekPlanGenerator:
 
         # Procesar equipos primero
         processed_employees = set()
-        teams = Team.objects.filter(
-            is_active=True,
-            team_type__in=['FIXED', 'PREFERRED']
-        ).prefetch_related('members')
+        teams = self.config.get_teams(['FIXED', 'PREFERRED'])
 
         for team in teams:
             assignments = self._assign_shifts_to_team(
@@ -734,9 +713,8 @@ class WeekPlanGenerator:
                 load_minutes = block_data['total_minutes']
 
                 # Calcular capacidad asignada para este día/bloque
-                try:
-                    time_block = TimeBlock.objects.get(code=block_code)
-                except TimeBlock.DoesNotExist:
+                time_block = self.config.get_time_block(block_code)
+                if not time_block:
                     continue
 
                 capacity_minutes = 0
@@ -744,7 +722,7 @@ class WeekPlanGenerator:
                     date=day,
                     shift_template__time_block=time_block,
                     is_day_off=False
-                )
+                ).order_by()
                 for assignment in assignments:
                     capacity_minutes += int(assignment.assigned_hours * 60)
 
@@ -0,0 +1,407 @@
+"""
+Zone Router.
+Reparto de zonas entre unidades (empleados o equipos) y orden de
+recorrido de las habitaciones, minimizando el tiempo andando sin pasar
+la capacidad de cada unidad.
+
+1. Modelo de distancias (DistanceModel): minutos andando entre dos
+   habitaciones según edificio y piso de la zona, order_in_zone y
+   corridor_side. Cambiar de piso o de edificio pesa mucho más que
+   recorrer un pasillo.
+2. Bin packing: las zonas, en orden de prioridad, van a la unidad
+   elegible con hueco cuyo coste (recorrido y minutos sin asignar)
+   menos aumenta.
+3. Búsqueda local durante time_budget segundos: mover una zona a otra
+   unidad (o dejarla sin asignar) e intercambiar zonas entre dos
+   unidades. Solo acepta mejoras: nunca devuelve un reparto peor que el
+   del paso 2.
+
+Qué tareas hace cada unidad se decide en orden de prioridad de zona
+(como antes); el recorrido solo cambia el orden de visita: zonas en la
+permutación más corta y cada zona por el pasillo en el sentido que
+menos anda (ida y vuelta por lados A/B si cruzar sale caro).
+
+No consulta la base de datos: ver DailyPlanGenerator._route_block.
+"""
+import random
+import time
+from dataclasses import dataclass, field
+from itertools import permutations
+from typing import Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+
+# Minutos andando
+ROOM_STEP_MIN = 0.25        # a la habitación contigua del pasillo
+CORRIDOR_CROSS_MIN = 0.25   # al otro lado del pasillo
+FLOOR_CHANGE_MIN = 2.0      # por piso (escalera o ascensor)
+BUILDING_CHANGE_MIN = 6.0   # de un edificio a otro (por planta baja)
+
+# Pesos del objetivo
+W_UNASSIGNED = 100          # por minuto de tarea sin asignar
+W_WALK = 1                  # por minuto andando
+
+# Hasta este número de zonas por unidad se prueban todas las permutaciones
+MAX_EXACT_ZONES = 5
+
+# Sin mejora en STALL_ROUNDS veces el tamaño del vecindario se para antes
+STALL_ROUNDS = 20
+
+# El bin packing solo ofrece una zona a unidades con hueco para este
+# porcentaje de su carga (la regla del generador anterior)
+MIN_ZONE_FIT = 0.3
+
+
+@dataclass(frozen=True)
+class RouteTask:
+    id: int
+    room_id: int
+    order: int          # Room.order_in_zone
+    side: str           # Room.corridor_side (A, B o N)
+    code: str           # TaskType.code
+    minutes: int
+
+
+@dataclass(frozen=True)
+class RouteZone:
+    code: str
+    building_id: Optional[int]
+    floor: Optional[int]
+    tasks: Tuple[RouteTask, ...]    # orden del generador (order_in_zone, prioridad)
+
+    @property
+    def load(self) -> int:
+        return sum(task.minutes for task in self.tasks)
+
+
+@dataclass(frozen=True)
+class RouteUnit:
+    capacity: int                   # minutos disponibles
+    eligible: FrozenSet[str]        # códigos de tarea
+    max_zones: int
+
+
+@dataclass
+class UnitRoute:
+    zones: List[str]                            # zonas asignadas (orden de prioridad)
+    stops: List[Tuple[str, List[RouteTask]]]    # (zona, tareas) en orden de visita
+    minutes: int
+    walk_min: float
+    unassigned_min: int
+    cost: float
+
+
+@dataclass
+class RoutePlan:
+    routes: List[UnitRoute]         # una por unidad, en el orden recibido
+    unassigned_zones: List[str]
+    cost: float
+    seed_cost: float
+    walk_min: float
+    unassigned_min: int
+    iterations: int
+    elapsed: float
+    improved: bool = field(init=False)
+
+    def __post_init__(self):
+        self.improved = self.cost < self.seed_cost
+
+
+# === DISTANCIAS ===
+
+class DistanceModel:
+    """
+    Minutos andando entre habitaciones. Cada zona es un pasillo que
+    empieza en la escalera (order 0): dentro de la zona se anda a lo largo
+    del pasillo; para ir a otra zona se vuelve a la escalera, se cambia
+    de piso (o de edificio, pasando por planta baja) y se entra en la
+    otra zona.
+    """
+
+    def between(self, zone_a: RouteZone, task_a: RouteTask, zone_b: RouteZone, task_b: RouteTask) -> float:
+        if zone_a.code == zone_b.code:
+            return self.in_corridor(task_a, task_b)
+        return (
+            ROOM_STEP_MIN * (task_a.order + task_b.order)
+            + self.zone_transfer(zone_a, zone_b)
+        )
+
+    @staticmethod
+    def in_corridor(task_a: RouteTask, task_b: RouteTask) -> float:
+        if task_a.room_id == task_b.room_id:
+            return 0.0
+        walk = ROOM_STEP_MIN * abs(task_a.order - task_b.order)
+        if task_a.side != task_b.side and 'N' not in (task_a.side, task_b.side):
+            walk += CORRIDOR_CROSS_MIN
+        return walk
+
+    @staticmethod
+    def zone_transfer(zone_a: RouteZone, zone_b: RouteZone) -> float:
+        """Escalera a escalera."""
+        floor_a = zone_a.floor or 0
+        floor_b = zone_b.floor or 0
+        if zone_a.building_id == zone_b.building_id:
+            return FLOOR_CHANGE_MIN * abs(floor_a - floor_b)
+        return FLOOR_CHANGE_MIN * (floor_a + floor_b) + BUILDING_CHANGE_MIN
+
+
+# === ROUTER ===
+
+class ZoneRouter:
+    """
+    Reparte zonas (en orden de prioridad) entre unidades y ordena el
+    recorrido de cada unidad. Ver el docstring del módulo.
+    """
+
+    def __init__(
+        self,
+        zones: Sequence[RouteZone],
+        units: Sequence[RouteUnit],
+        distances: DistanceModel = None,
+        walk_weight: float = W_WALK,
+        seed: int = 0
+    ):
+        self.zones = list(zones)
+        self.zones_by_code = {zone.code: zone for zone in self.zones}
+        self.zone_rank = {zone.code: index for index, zone in enumerate(self.zones)}
+        self.units = list(units)
+        self.distances = distances or DistanceModel()
+        self.walk_weight = walk_weight
+        self.random = random.Random(seed)
+        self._routes: Dict[Tuple[int, Tuple[str, ...]], UnitRoute] = {}
+
+        # Unidades que pueden hacer alguna tarea de cada zona
+        self.candidates: Dict[str, List[int]] = {
+            zone.code: [
+                index for index, unit in enumerate(self.units)
+                if unit.eligible.intersection(task.code for task in zone.tasks)
+            ]
+            for zone in self.zones
+        }
+
+    def solve(self, time_budget: float = 0.5, max_iterations: Optional[int] = None) -> RoutePlan:
+        began = time.perf_counter()
+        assignment = self._pack()
+        seed_cost = self._total_cost(assignment)
+        cost, iterations = self._improve(assignment, seed_cost, began + max(0.0, time_budget), max_iterations)
+
+        routes = [self.route(index, assignment[index]) for index in range(len(self.units))]
+        unassigned = sorted(
+            (code for code in self.zones_by_code if not any(code in zones for zones in assignment)),
+            key=self.zone_rank.get,
+        )
+        return RoutePlan(
+            routes=routes,
+            unassigned_zones=unassigned,
+            cost=cost,
+            seed_cost=seed_cost,
+            walk_min=round(sum(route.walk_min for route in routes), 2),
+            unassigned_min=(
+                sum(route.unassigned_min for route in routes)
+                + sum(self.zones_by_code[code].load for code in unassigned)
+            ),
+            iterations=iterations,
+            elapsed=time.perf_counter() - began,
+        )
+
+    # === BIN PACKING ===
+
+    def _pack(self) -> List[List[str]]:
+        """Cada zona a la unidad elegible donde menos sube el coste."""
+        assignment: List[List[str]] = [[] for _ in self.units]
+        for zone in self.zones:
+            best = None
+            for index in self.candidates[zone.code]:
+                zones = assignment[index]
+                if len(zones) >= self.units[index].max_zones:
+                    continue
+                current = self.route(index, zones)
+                if self.units[index].capacity - current.minutes < zone.load * MIN_ZONE_FIT:
+                    continue
+                delta = self.route(index, zones + [zone.code]).cost - current.cost
+                key = (delta, -(self.units[index].capacity - current.minutes), index)
+                if best is None or key < best[0]:
+                    best = (key, index)
+            if best is not None:
+                assignment[best[1]].append(zone.code)
+        return assignment
+
+    # === BÚSQUEDA LOCAL ===
+
+    def _improve(self, assignment, cost, deadline, max_iterations) -> Tuple[float, int]:
+        """
+        Movimientos aleatorios; se aplican solo si bajan el coste. Para al
+        acabar el tiempo, con max_iterations o si deja de mejorar.
+        """
+        iterations = 0
+        movable = [code for code, units in self.candidates.items() if units]
+        if not movable:
+            return cost, iterations
+        stall_limit = STALL_ROUNDS * len(movable) * (len(self.units) + 1)
+        stalled = 0
+
+        while True:
+            if max_iterations is not None and iterations >= max_iterations:
+                break
+            if stalled >= stall_limit:
+                break
+            if iterations % 64 == 0 and time.perf_counter() >= deadline:
+                break
+            iterations += 1
+            stalled += 1
+
+            code = self.random.choice(movable)
+            source = self._owner(assignment, code)
+            target = self.random.choice(self.candidates[code] + [None])
+            if target == source:
+                continue
+
+            changed = {source, target} - {None}
+            new = {index: [c for c in assignment[index] if c != code] for index in changed}
+            if target is not None:
+                if len(new[target]) < self.units[target].max_zones:
+                    new[target].append(code)
+                else:
+                    # Unidad llena: intercambiar con una de sus zonas
+                    other = self.random.choice(new[target])
+                    if source is not None and source not in self.candidates[other]:
+                        continue
+                    new[target] = [c for c in new[target] if c != other] + [code]
+                    if source is not None:
+                        new[source].append(other)
+            for index in changed:
+                new[index].sort(key=self.zone_rank.get)
+
+            delta = (
+                sum(self.route(index, new[index]).cost - self.route(index, assignment[index]).cost for index in changed)
+                + self._pool_cost(assignment, new, changed)
+            )
+            if delta < -1e-9:
+                for index in changed:
+                    assignment[index] = new[index]
+                cost += delta
+                stalled = 0
+        return cost, iterations
+
+    def _owner(self, assignment, code: str) -> Optional[int]:
+        for index, zones in enumerate(assignment):
+            if code in zones:
+                return index
+        return None
+
+    def _pool_cost(self, assignment, new, changed) -> float:
+        """Variación del coste de las zonas sin unidad."""
+        before = {c for index in changed for c in assignment[index]}
+        after = {c for index in changed for c in new[index]}
+        return W_UNASSIGNED * (
+            sum(self.zones_by_code[c].load for c in before - after)
+            - sum(self.zones_by_code[c].load for c in after - before)
+        )
+
+    def _total_cost(self, assignment) -> float:
+        assigned = {code for zones in assignment for code in zones}
+        return (
+            sum(self.route(index, zones).cost for index, zones in enumerate(assignment))
+            + W_UNASSIGNED * sum(zone.load for zone in self.zones if zone.code not in assigned)
+        )
+
+    # === RECORRIDO DE UNA UNIDAD ===
+
+    def route(self, index: int, zones: List[str]) -> UnitRoute:
+        """Tareas que caben (en orden de prioridad) y su recorrido más corto."""
+        key = (index, tuple(zones))
+        cached = self._routes.get(key)
+        if cached is not None:
+            return cached
+
+        unit = self.units[index]
+        minutes = 0
+        unassigned = 0
+        taken: Dict[str, List[RouteTask]] = {}
+        for code in zones:
+            for task in self.zones_by_code[code].tasks:
+                if task.code in unit.eligible and unit.capacity - minutes >= task.minutes:
+                    taken.setdefault(code, []).append(task)
+                    minutes += task.minutes
+                else:
+                    unassigned += task.minutes
+
+        stops, walk = self._shortest_tour(taken)
+        route = UnitRoute(
+            zones=list(zones),
+            stops=stops,
+            minutes=minutes,
+            walk_min=round(walk, 2),
+            unassigned_min=unassigned,
+            cost=self.walk_weight * walk + W_UNASSIGNED * unassigned,
+        )
+        self._routes[key] = route
+        return route
+
+    def _shortest_tour(self, taken: Dict[str, List[RouteTask]]) -> Tuple[List[Tuple[str, List[RouteTask]]], float]:
+        codes = sorted(taken, key=self.zone_rank.get)
+        if len(codes) <= MAX_EXACT_ZONES:
+            orders = permutations(codes)
+        else:
+            orders = [self._nearest_neighbour(codes)]
+
+        best = None
+        for order in orders:
+            stops, walk = self._walk_zones(order, taken)
+            if best is None or walk < best[1] - 1e-9:
+                best = (stops, walk)
+        return best if best else ([], 0.0)
+
+    def _nearest_neighbour(self, codes: List[str]) -> List[str]:
+        order = [codes[0]]
+        left = codes[1:]
+        while left:
+            last = self.zones_by_code[order[-1]]
+            nearest = min(left, key=lambda c: self.distances.zone_transfer(last, self.zones_by_code[c]))
+            order.append(nearest)
+            left.remove(nearest)
+        return order
+
+    def _walk_zones(self, order, taken) -> Tuple[List[Tuple[str, List[RouteTask]]], float]:
+        """Recorre las zonas en este orden eligiendo el sentido de cada pasillo."""
+        stops = []
+        walk = 0.0
+        position = None     # (zona, tarea) actual
+        for code in order:
+            zone = self.zones_by_code[code]
+            best = None
+            for sequence in self._corridor_orders(taken[code]):
+                cost = self._sequence_walk(sequence)
+                if position is not None:
+                    cost += self.distances.between(position[0], position[1], zone, sequence[0])
+                if best is None or cost < best[1] - 1e-9:
+                    best = (sequence, cost)
+            stops.append((code, best[0]))
+            walk += best[1]
+            position = (zone, best[0][-1])
+        return stops, walk
+
+    def _sequence_walk(self, sequence: List[RouteTask]) -> float:
+        return sum(
+            self.distances.in_corridor(a, b)
+            for a, b in zip(sequence, sequence[1:])
+        )
+
+    @staticmethod
+    def _corridor_orders(tasks: List[RouteTask]) -> List[List[RouteTask]]:
+        """
+        Órdenes candidatos de un pasillo: order_in_zone de ida o de vuelta,
+        o ida por el lado A y vuelta por el B (y al revés). Las tareas de
+        una misma habitación siguen juntas y en su orden.
+        """
+        rooms: Dict[int, List[RouteTask]] = {}
+        for task in tasks:
+            rooms.setdefault(task.room_id, []).append(task)
+        by_order = sorted(rooms.values(), key=lambda room: room[0].order)
+
+        candidates = [by_order, by_order[::-1]]
+        side_a = [room for room in by_order if room[0].side != 'B']
+        side_b = [room for room in by_order if room[0].side == 'B']
+        if side_a and side_b:
+            candidates.append(side_a + side_b[::-1])
+            candidates.append(side_b + side_a[::-1])
+        return [[task for room in rooms_order for task in room] for rooms_order in candidates]
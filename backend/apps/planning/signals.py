@@ -0,0 +1,122 @@
+"""
+Señales de Planning.
+Invalidan la foto de configuración cuando se edita la configuración
+(desde Admin, API o comandos), mantienen DailyLoadSummary al día
+(ver services/load_summary.py) y cambian la versión de datos que usan
+las respuestas cacheadas de la API (ver services/data_version.py).
+"""
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete, m2m_changed
+
+from apps.core.models import TimeBlock, TaskType, RoomType, DayOfWeek
+from apps.staff.models import Role, Employee, Team, EmployeeUnavailability
+from apps.shifts.models import ShiftTemplate
+from apps.rules.models import ElasticityRule, TaskTimeRule
+from apps.rooms.models import RoomDailyState, RoomDailyTask
+from .models import WeekPlan, ShiftAssignment, PlanningAlert
+from .services.config_snapshot import invalidate_planning_config, get_planning_config
+from .services import load_summary
+from .services.data_version import mark_data_changed
+
+
+# Employee y Role: la foto guarda los miembros de cada equipo con su rol
+CONFIG_MODELS = [
+    TimeBlock, TaskType, RoomType, DayOfWeek,
+    Role, Employee, ShiftTemplate, Team,
+    ElasticityRule, TaskTimeRule,
+]
+
+CONFIG_M2M_THROUGH = [
+    TaskType.allowed_blocks.through,
+    Team.members.through,
+]
+
+
+# Datos que cambian las respuestas cacheadas (además de la configuración)
+DATA_MODELS = [
+    WeekPlan, ShiftAssignment,
+    RoomDailyState, RoomDailyTask,
+    EmployeeUnavailability,
+    # El dashboard incluye las alertas sin resolver
+    PlanningAlert,
+]
+
+# Cambian la capacidad de todas las fechas sin ser parte de la foto
+STALE_M2M_THROUGH = [
+    Employee.allowed_blocks.through,
+    Employee.fixed_days_off.through,
+]
+
+
+def _invalidate_config(**kwargs):
+    invalidate_planning_config()
+    # Otra vez al confirmar: otro proceso pudo reconstruir antes del commit
+    transaction.on_commit(invalidate_planning_config)
+    load_summary.mark_all_stale()
+    mark_data_changed()
+
+
+def _mark_summaries_stale(**kwargs):
+    load_summary.mark_all_stale()
+    mark_data_changed()
+
+
+# === RESÚMENES DE CARGA ===
+
+def _room_task_changed(sender, instance, created=False, update_fields=None, **kwargs):
+    # Si pudo cambiar el bloque, recalcular todos los del día
+    if created or (update_fields is not None and 'time_block' not in update_fields):
+        load_summary.mark_task_dirty(instance.room_daily_state_id, instance.time_block_id)
+    else:
+        load_summary.mark_task_dirty(instance.room_daily_state_id)
+
+
+def _room_state_changed(sender, instance, **kwargs):
+    load_summary.mark_dates_dirty([instance.date])
+
+
+def _shift_assignment_changed(sender, instance, **kwargs):
+    time_block_id = None
+    for template in get_planning_config().shift_templates:
+        if template.id == instance.shift_template_id:
+            time_block_id = template.time_block_id
+            break
+    load_summary.mark_dirty([(instance.date, time_block_id)])
+
+
+def _unavailability_pre_save(sender, instance, **kwargs):
+    # El rango anterior también cambia de capacidad
+    if instance.pk:
+        previous = sender.objects.filter(pk=instance.pk).values_list('date_start', 'date_end').first()
+        if previous:
+            load_summary.mark_range_dirty(*previous)
+
+
+def _unavailability_changed(sender, instance, **kwargs):
+    load_summary.mark_range_dirty(instance.date_start, instance.date_end)
+
+
+for model in CONFIG_MODELS:
+    post_save.connect(_invalidate_config, sender=model, dispatch_uid=f'planning_config_save_{model.__name__}')
+    post_delete.connect(_invalidate_config, sender=model, dispatch_uid=f'planning_config_delete_{model.__name__}')
+
+for through in CONFIG_M2M_THROUGH:
+    m2m_changed.connect(_invalidate_config, sender=through, dispatch_uid=f'planning_config_m2m_{through.__name__}')
+
+for through in STALE_M2M_THROUGH:
+    m2m_changed.connect(_mark_summaries_stale, sender=through, dispatch_uid=f'load_summary_stale_m2m_{through.__name__}')
+
+for model, handler in (
+    (RoomDailyTask, _room_task_changed),
+    (RoomDailyState, _room_state_changed),
+    (ShiftAssignment, _shift_assignment_changed),
+    (EmployeeUnavailability, _unavailability_changed),
+):
+    post_save.connect(handler, sender=model, dispatch_uid=f'load_summary_save_{model.__name__}')
+    post_delete.connect(handler, sender=model, dispatch_uid=f'load_summary_delete_{model.__name__}')
+
+pre_save.connect(_unavailability_pre_save, sender=EmployeeUnavailability, dispatch_uid='load_summary_pre_save_EmployeeUnavailability')
+
+for model in DATA_MODELS:
+    post_save.connect(mark_data_changed, sender=model, dispatch_uid=f'data_version_save_{model.__name__}')
+    post_delete.connect(mark_data_changed, sender=model, dispatch_uid=f'data_version_delete_{model.__name__}')
@@ -81,7 +81,8 @@ class ProtelImportLogAdmin(admin.ModelAdmin):
     list_filter = ['status', 'imported_at']
     readonly_fields = [
         'filename', 'imported_at', 'rows_processed', 'rows_success',
-        'rows_error', 'date_from', 'date_to', 'errors', 'status'
+        'rows_error', 'rows_committed', 'batches_committed',
+        'date_from', 'date_to', 'errors', 'status'
     ]
     date_hierarchy = 'imported_at'
 
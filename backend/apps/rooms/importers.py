@@ -5,10 +5,13 @@ Parsea archivos CSV de Protel y genera RoomDailyState y RoomDailyTask.
 import csv
 import io
 from datetime import datetime
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, Iterable, Iterator, List, Tuple, Optional
 from django.db import transaction
+from django.utils import timezone
 from apps.core.models import Room, TaskType, TimeBlock
 from apps.rooms.models import RoomDailyState, RoomDailyTask, ProtelImportLog
+from apps.planning.services.load_summary import mark_dates_dirty
+from apps.planning.services.data_version import mark_data_changed
 
 
 class ProtelCSVImporter:
@@ -58,6 +61,26 @@ class ProtelCSVImporter:
         'OUT_OF_ORDER': 'OOO',
     }
 
+    # Tamaño de lote para bulk_create/bulk_update y cláusulas IN
+    BULK_BATCH_SIZE = 500
+
+    # Filas por lote en la importación streaming (se corta al cambiar de fecha)
+    STREAM_BATCH_ROWS = 5000
+
+    # Máximo de errores/avisos guardados en memoria y en el log
+    MAX_ERRORS = 100
+
+    # Campos de RoomDailyState que la importación sobrescribe
+    STATE_UPDATE_FIELDS = [
+        'occupancy_status',
+        'stay_day_number',
+        'expected_checkout_time',
+        'expected_checkin_time',
+        'is_vip',
+        'night_expected_difficulty',
+        'updated_at',
+    ]
+
     def __init__(self):
         self.errors: List[str] = []
         self.warnings: List[str] = []
@@ -71,7 +94,21 @@ class ProtelCSVImporter:
         # Cache de objetos para evitar queries repetidas
         self._room_cache: Dict[str, Room] = {}
         self._task_type_cache: Dict[str, TaskType] = {}
-        self._time_block_cache: Dict[str, TimeBlock] = {}
+        self._time_block_cache: Dict[int, Optional[TimeBlock]] = {}
+        self._caches_loaded = False
+
+    def _preload_caches(self):
+        """Carga habitaciones, tipos de tarea y sus bloques en pocas queries."""
+        if self._caches_loaded:
+            return
+        for room in Room.objects.all():
+            self._room_cache[room.number] = room
+        for task_type in TaskType.objects.prefetch_related('allowed_blocks'):
+            self._task_type_cache[task_type.code] = task_type
+            # allowed_blocks viene ordenado por TimeBlock.order (igual que .first())
+            blocks = list(task_type.allowed_blocks.all())
+            self._time_block_cache[task_type.id] = blocks[0] if blocks else None
+        self._caches_loaded = True
 
     def _get_room(self, room_number: str) -> Optional[Room]:
         """Obtiene habitación del cache o DB."""
@@ -95,8 +132,9 @@ class ProtelCSVImporter:
     def _get_time_block_for_task(self, task_type: TaskType) -> Optional[TimeBlock]:
         """Obtiene el bloque temporal apropiado para una tarea."""
         # Usar el primer bloque permitido de la tarea
-        block = task_type.allowed_blocks.first()
-        return block
+        if task_type.id not in self._time_block_cache:
+            self._time_block_cache[task_type.id] = task_type.allowed_blocks.first()
+        return self._time_block_cache[task_type.id]
 
     def _parse_date(self, date_str: str) -> Optional[datetime]:
         """Parsea fecha en varios formatos."""
@@ -239,6 +277,8 @@ class ProtelCSVImporter:
         import_log.save()
 
         try:
+            self._preload_caches()
+
             # Parsear CSV
             reader = csv.DictReader(io.StringIO(file_content))
 
@@ -253,41 +293,8 @@ class ProtelCSVImporter:
                 else:
                     self.stats['rows_error'] += 1
 
-            # Guardar todos los estados
-            dates = set()
-            for state in states_by_room_date.values():
-                # Verificar si ya existe
-                existing = RoomDailyState.objects.filter(
-                    date=state.date,
-                    room=state.room
-                ).first()
-
-                if existing:
-                    # Actualizar existente
-                    existing.occupancy_status = state.occupancy_status
-                    existing.stay_day_number = state.stay_day_number
-                    existing.expected_checkout_time = state.expected_checkout_time
-                    existing.expected_checkin_time = state.expected_checkin_time
-                    existing.is_vip = state.is_vip
-                    existing.save()
-                    state_to_use = existing
-                else:
-                    state.save()
-                    state_to_use = state
-
-                dates.add(state.date)
-
-                # Crear tareas pendientes
-                if hasattr(state, '_pending_tasks'):
-                    for task in state._pending_tasks:
-                        task.room_daily_state = state_to_use
-                        # Verificar si ya existe
-                        if not RoomDailyTask.objects.filter(
-                            room_daily_state=state_to_use,
-                            task_type=task.task_type,
-                            time_block=task.time_block
-                        ).exists():
-                            task.save()
+            # Guardar todos los estados y tareas en bloque
+            dates = self._persist_states(states_by_room_date)
 
             # Actualizar log
             import_log.rows_processed = self.stats['rows_processed']
@@ -310,6 +317,237 @@ class ProtelCSVImporter:
             import_log.save()
             raise
 
+    def import_stream(
+        self,
+        lines: Iterable,
+        filename: str = 'import.csv',
+        imported_by: str = '',
+        resume_log: Optional[ProtelImportLog] = None,
+        batch_rows: Optional[int] = None
+    ) -> Tuple[bool, ProtelImportLog]:
+        """
+        Importa un CSV de Protel leyendo línea a línea.
+
+        Confirma en lotes de ~batch_rows filas, cortando siempre en un
+        cambio de fecha (el export de Protel viene ordenado por fecha), y
+        guarda el progreso en el log. La memoria no crece con el tamaño
+        del archivo.
+
+        Args:
+            lines: Iterable de líneas (bytes o str), p.ej. el archivo subido
+            filename: Nombre del archivo
+            imported_by: Usuario que realiza la importación
+            resume_log: Log de una importación interrumpida a reanudar;
+                se saltan sus rows_committed primeras filas
+            batch_rows: Filas por lote (default STREAM_BATCH_ROWS)
+
+        Returns:
+            Tuple de (success, ProtelImportLog)
+        """
+        batch_rows = batch_rows or self.STREAM_BATCH_ROWS
+
+        if resume_log:
+            if resume_log.status == 'COMPLETED':
+                raise ValueError('La importación ya está completada')
+            import_log = resume_log
+            self.stats['rows_processed'] = import_log.rows_processed
+            self.stats['rows_success'] = import_log.rows_success
+            self.stats['rows_error'] = import_log.rows_error
+            if import_log.errors:
+                self.errors = import_log.errors.split('\n')[:self.MAX_ERRORS]
+        else:
+            import_log = ProtelImportLog(filename=filename, imported_by=imported_by)
+        import_log.status = 'PROCESSING'
+        import_log.save()
+
+        skip_rows = import_log.rows_committed
+        data_rows = skip_rows
+        rows_in_batch = 0
+        last_date_str = None
+        states_by_room_date: Dict[Tuple, RoomDailyState] = {}
+
+        try:
+            self._preload_caches()
+            reader = csv.DictReader(self.decode_lines(lines))
+
+            for row_number, row in enumerate(reader, start=2):
+                if row_number - 1 <= skip_rows:
+                    continue
+
+                date_str = (row.get('date') or '').strip()
+                if rows_in_batch >= batch_rows and date_str != last_date_str:
+                    self._commit_batch(import_log, states_by_room_date, data_rows)
+                    states_by_room_date = {}
+                    rows_in_batch = 0
+                last_date_str = date_str
+                data_rows = row_number - 1
+
+                self.stats['rows_processed'] += 1
+                if self._process_row(row, row_number, states_by_room_date):
+                    self.stats['rows_success'] += 1
+                else:
+                    self.stats['rows_error'] += 1
+                rows_in_batch += 1
+
+            if rows_in_batch or not import_log.batches_committed:
+                self._commit_batch(import_log, states_by_room_date, data_rows)
+
+            import_log.status = 'COMPLETED'
+            import_log.save(update_fields=['status'])
+
+            return True, import_log
+
+        except Exception as e:
+            # Lo confirmado queda en la BD; el log permite reanudar
+            import_log.status = 'FAILED'
+            import_log.errors = '\n'.join(self.errors[:self.MAX_ERRORS] + [str(e)])
+            import_log.save(update_fields=['status', 'errors'])
+            raise
+
+    @transaction.atomic
+    def _commit_batch(
+        self,
+        import_log: ProtelImportLog,
+        states_by_room_date: Dict[Tuple, RoomDailyState],
+        rows_committed: int
+    ):
+        """Persiste un lote y el progreso del log en la misma transacción."""
+        dates = self._persist_states(states_by_room_date)
+
+        if dates:
+            if import_log.date_from:
+                dates |= {import_log.date_from, import_log.date_to}
+            import_log.date_from = min(dates)
+            import_log.date_to = max(dates)
+
+        self.errors = self.errors[:self.MAX_ERRORS]
+        self.warnings = self.warnings[:self.MAX_ERRORS]
+
+        import_log.rows_processed = self.stats['rows_processed']
+        import_log.rows_success = self.stats['rows_success']
+        import_log.rows_error = self.stats['rows_error']
+        import_log.errors = '\n'.join(self.errors)
+        import_log.rows_committed = rows_committed
+        import_log.batches_committed += 1
+        import_log.save()
+
+    @staticmethod
+    def decode_lines(lines: Iterable) -> Iterator[str]:
+        """
+        Decodifica líneas a medida que se leen.
+        Intenta UTF-8 y cae a latin-1 línea por línea.
+        """
+        for line in lines:
+            if isinstance(line, bytes):
+                try:
+                    line = line.decode('utf-8')
+                except UnicodeDecodeError:
+                    line = line.decode('latin-1')
+            yield line
+
+    def _persist_states(self, states_by_room_date: Dict[Tuple, RoomDailyState]) -> set:
+        """
+        Persiste estados y tareas pendientes con operaciones en bloque.
+
+        Precarga los estados y tareas existentes del rango de fechas y
+        escribe con bulk_update/bulk_create, de modo que el número de
+        queries no crece con el número de filas del CSV.
+
+        Returns:
+            Set de fechas importadas
+        """
+        if not states_by_room_date:
+            return set()
+
+        dates = {date for date, _ in states_by_room_date}
+        room_ids = list({room_id for _, room_id in states_by_room_date})
+        batch_size = self.BULK_BATCH_SIZE
+
+        # Estados existentes para (rango de fechas, habitaciones)
+        existing_states = self._fetch_states(min(dates), max(dates), room_ids)
+
+        now = timezone.now()
+        to_update = []
+        to_create = []
+        for key, state in states_by_room_date.items():
+            existing = existing_states.get(key)
+            if existing:
+                existing.occupancy_status = state.occupancy_status
+                existing.stay_day_number = state.stay_day_number
+                existing.expected_checkout_time = state.expected_checkout_time
+                existing.expected_checkin_time = state.expected_checkin_time
+                existing.is_vip = state.is_vip
+                # bulk_update no llama a save(): replicar su lógica
+                existing.update_night_difficulty()
+                existing.updated_at = now
+                to_update.append(existing)
+            else:
+                state.update_night_difficulty()
+                to_create.append(state)
+
+        if to_update:
+            RoomDailyState.objects.bulk_update(
+                to_update, self.STATE_UPDATE_FIELDS, batch_size=batch_size
+            )
+        if to_create:
+            RoomDailyState.objects.bulk_create(to_create, batch_size=batch_size)
+            # MySQL no devuelve los ids de bulk_create: releer solo si hace falta
+            if any(state.pk is None for state in to_create):
+                existing_states = self._fetch_states(min(dates), max(dates), room_ids)
+            else:
+                existing_states.update(
+                    {(state.date, state.room_id): state for state in to_create}
+                )
+
+        # Tareas existentes de esos estados, como claves (estado, tipo, bloque)
+        state_ids = [
+            existing_states[key].pk
+            for key in states_by_room_date
+            if key in existing_states
+        ]
+        existing_task_keys = set()
+        for i in range(0, len(state_ids), batch_size):
+            existing_task_keys.update(
+                RoomDailyTask.objects.filter(
+                    room_daily_state_id__in=state_ids[i:i + batch_size]
+                ).order_by().values_list(
+                    'room_daily_state_id', 'task_type_id', 'time_block_id'
+                )
+            )
+
+        # Crear tareas pendientes que no existan aún
+        tasks_to_create = []
+        for key, state in states_by_room_date.items():
+            state_to_use = existing_states[key]
+            for task in getattr(state, '_pending_tasks', []):
+                task_key = (state_to_use.pk, task.task_type_id, task.time_block_id)
+                if task_key in existing_task_keys:
+                    continue
+                task.room_daily_state = state_to_use
+                tasks_to_create.append(task)
+                existing_task_keys.add(task_key)
+
+        if tasks_to_create:
+            RoomDailyTask.objects.bulk_create(tasks_to_create, batch_size=batch_size)
+
+        # Las operaciones en bloque no emiten señales
+        mark_dates_dirty(dates)
+        mark_data_changed()
+
+        return dates
+
+    def _fetch_states(self, date_from, date_to, room_ids: List[int]) -> Dict[Tuple, RoomDailyState]:
+        """Estados existentes indexados por (date, room_id)."""
+        states = {}
+        for i in range(0, len(room_ids), self.BULK_BATCH_SIZE):
+            queryset = RoomDailyState.objects.filter(
+                date__range=(date_from, date_to),
+                room_id__in=room_ids[i:i + self.BULK_BATCH_SIZE]
+            ).order_by()
+            for state in queryset:
+                states[(state.date, state.room_id)] = state
+        return states
+
     def get_summary(self) -> Dict:
         """Retorna resumen de la importación."""
         return {
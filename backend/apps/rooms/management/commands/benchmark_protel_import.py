@@ -0,0 +1,81 @@
+"""
+Management command para medir la importación de CSV Protel.
+Genera CSVs sintéticos de distinto tamaño con las habitaciones existentes
+y cuenta las queries de cada importación. Todo se revierte al terminar.
+"""
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from apps.core.models import Room
+from apps.rooms.importers import ProtelCSVImporter
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Benchmark de ProtelCSVImporter: queries y tiempo según número de filas'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            nargs='+',
+            default=[1, 7, 30],
+            help='Días a generar en cada ejecución (una fila por habitación/día/tarea)'
+        )
+        parser.add_argument(
+            '--start',
+            type=str,
+            default='2030-01-01',
+            help='Fecha inicial de los datos sintéticos (YYYY-MM-DD)'
+        )
+
+    def handle(self, *args, **options):
+        rooms = list(Room.objects.filter(is_active=True).values_list('number', flat=True))
+        if not rooms:
+            raise CommandError('No hay habitaciones. Ejecutar setup_initial_data primero.')
+
+        start = date.fromisoformat(options['start'])
+
+        self.stdout.write(f"{'días':>6} {'filas':>8} {'queries':>8} {'2ª pasada':>10} {'seg':>8}")
+        for days in options['days']:
+            content = self._build_csv(rooms, start, days)
+            rows = content.count('\n') - 1
+
+            try:
+                with transaction.atomic():
+                    began = time.perf_counter()
+                    with CaptureQueriesContext(connection) as first:
+                        ProtelCSVImporter().import_csv(content, filename='benchmark.csv')
+                    elapsed = time.perf_counter() - began
+
+                    # Segunda pasada: todos los estados y tareas ya existen
+                    with CaptureQueriesContext(connection) as second:
+                        ProtelCSVImporter().import_csv(content, filename='benchmark.csv')
+                    raise _Rollback()
+            except _Rollback:
+                pass
+
+            self.stdout.write(
+                f"{days:>6} {rows:>8} {len(first):>8} {len(second):>10} {elapsed:>8.2f}"
+            )
+
+    def _build_csv(self, rooms, start, days):
+        """CSV con salida, llegada y couverture alternadas por habitación."""
+        lines = ['date,room,housekeeping_type,arrival_time,departure_time,status,guest_name,stay_day,vip']
+        for offset in range(days):
+            day = (start + timedelta(days=offset)).isoformat()
+            for i, number in enumerate(rooms):
+                if (i + offset) % 3 == 0:
+                    lines.append(f'{day},{number},DEPART,,11:00,CHECKOUT,,1,0')
+                    lines.append(f'{day},{number},ARRIVAL,15:00,,CHECKIN,,1,0')
+                else:
+                    lines.append(f'{day},{number},RECOUCH,,,OCCUPIED,,{offset + 1},0')
+                lines.append(f'{day},{number},COUVERTURE,,,OCCUPIED,,{offset + 1},{i % 7 == 0:d}')
+        return '\n'.join(lines) + '\n'
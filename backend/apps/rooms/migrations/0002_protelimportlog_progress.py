@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-17 01:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rooms', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='protelimportlog',
+            name='batches_committed',
+            field=models.PositiveIntegerField(default=0, help_text='Lotes confirmados'),
+        ),
+        migrations.AddField(
+            model_name='protelimportlog',
+            name='rows_committed',
+            field=models.PositiveIntegerField(default=0, help_text='Filas de datos ya confirmadas en la base de datos'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-17 02:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rooms', '0002_protelimportlog_progress'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='roomdailytask',
+            index=models.Index(fields=['room_daily_state', 'time_block', 'status'], name='rdt_state_block_status_idx'),
+        ),
+    ]
@@ -179,6 +179,10 @@ class RoomDailyTask(models.Model):
 
     class Meta:
         ordering = ['priority', 'task_type__priority']
+        indexes = [
+            # Tareas del día por bloque y estado (LoadCalculator, DailyPlanGenerator)
+            models.Index(fields=['room_daily_state', 'time_block', 'status'], name='rdt_state_block_status_idx'),
+        ]
         verbose_name = 'Tarea de Habitación'
         verbose_name_plural = 'Tareas de Habitaciones'
 
@@ -222,6 +226,16 @@ class ProtelImportLog(models.Model):
         help_text="Lista de errores encontrados durante la importación"
     )
 
+    # Progreso de importación por lotes (permite reanudar)
+    rows_committed = models.PositiveIntegerField(
+        default=0,
+        help_text="Filas de datos ya confirmadas en la base de datos"
+    )
+    batches_committed = models.PositiveIntegerField(
+        default=0,
+        help_text="Lotes confirmados"
+    )
+
     # Estado
     STATUS_CHOICES = [
         ('PENDING', 'Pendiente'),
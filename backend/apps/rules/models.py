@@ -130,16 +130,28 @@ class ZoneAssignmentRule(models.Model):
         """Obtiene el valor de una regla por su código."""
         try:
             rule = cls.objects.get(code=code, is_active=True)
-            if rule.value_boolean is not None:
-                return rule.value_boolean
-            if rule.value_integer is not None:
-                return rule.value_integer
-            if rule.value_text:
-                return rule.value_text
-            return default
+            return rule.value_or(default)
         except cls.DoesNotExist:
             return default
 
+    @classmethod
+    def get_values(cls, defaults):
+        """Como get_value para varios códigos ({código: default}) en una query."""
+        rules = {rule.code: rule for rule in cls.objects.filter(code__in=list(defaults), is_active=True)}
+        return {
+            code: rules[code].value_or(default) if code in rules else default
+            for code, default in defaults.items()
+        }
+
+    def value_or(self, default=None):
+        if self.value_boolean is not None:
+            return self.value_boolean
+        if self.value_integer is not None:
+            return self.value_integer
+        if self.value_text:
+            return self.value_text
+        return default
+
 
 class ElasticityRule(models.Model):
     """
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-17 02:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('staff', '0002_role_can_clean_rooms'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='employeeunavailability',
+            index=models.Index(fields=['date_end', 'date_start'], name='unavail_end_start_idx'),
+        ),
+    ]
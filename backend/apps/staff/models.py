@@ -258,6 +258,11 @@ class EmployeeUnavailability(models.Model):
         verbose_name = 'Indisponibilidad'
         verbose_name_plural = 'Indisponibilidades'
         ordering = ['date_start']
+        indexes = [
+            # Solapes con un rango (date_start <= fin, date_end >= inicio):
+            # date_end descarta primero las ausencias ya pasadas
+            models.Index(fields=['date_end', 'date_start'], name='unavail_end_start_idx'),
+        ]
 
     def __str__(self):
         return f"{self.employee} - {self.date_start} a {self.date_end}"
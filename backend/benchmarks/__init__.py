@@ -0,0 +1,14 @@
+"""
+Benchmarks del pipeline de planificación.
+
+Genera hoteles sintéticos en una BD SQLite propia (benchmarks.settings),
+mide tiempo y queries de cada paso y escribe un JSON comparable entre
+versiones:
+
+    DJANGO_SETTINGS_MODULE=benchmarks.settings python manage.py benchmark_planning --rooms 200
+
+Los módulos hotel y runner usan modelos: importarlos después de django.setup()
+(benchmarks.settings se importa antes). benchmarks.kernel no usa Django:
+
+    python -m benchmarks.kernel --days 20000 --workers 4
+"""
@@ -0,0 +1,199 @@
+"""
+Hotel sintético para benchmarks.
+Parte de setup_initial_data + setup_kaila_team (bloques, tareas, reglas,
+roles y turnos) y reemplaza zonas, habitaciones y FDC/VDC por los del
+tamaño pedido. Todo es determinista para una misma semilla.
+"""
+import random
+from dataclasses import dataclass
+from datetime import date, time, timedelta
+from io import StringIO
+from typing import Dict, List
+
+from django.core.management import call_command
+from django.db import transaction
+
+from apps.core.models import Building, Zone, RoomType, Room, TaskType, TimeBlock, DayOfWeek
+from apps.staff.models import Role, Employee, Team
+from apps.shifts.models import ShiftTemplate
+from apps.planning.services.config_snapshot import invalidate_planning_config
+
+
+@dataclass
+class HotelConfig:
+    rooms: int = 120
+    floors: int = 6
+    zones_per_floor: int = 2
+    employees: int = 16          # FDC + VDC
+    fixed_teams: int = 2         # parejas FIXED
+    weeks: int = 2               # semanas de forecast / Protel
+    start: date = date(2030, 1, 7)  # lunes
+    seed: int = 42
+
+
+def build_hotel(config: HotelConfig) -> Dict[str, int]:
+    """Crea el hotel en la BD actual (que debe estar vacía y migrada)."""
+    rng = random.Random(config.seed)
+    silent = StringIO()
+    call_command('setup_initial_data', stdout=silent)
+    call_command('setup_kaila_team', stdout=silent)
+
+    with transaction.atomic():
+        _create_short_templates()
+        zones = _create_zones_and_rooms(config, rng)
+        employees = _create_housekeepers(config, rng)
+
+    invalidate_planning_config()
+    return {
+        'zones': zones,
+        'rooms': Room.objects.filter(is_active=True).count(),
+        'employees': employees,
+        'teams': Team.objects.filter(team_type='FIXED').count(),
+    }
+
+
+def _create_short_templates():
+    """Turnos cortos (7h) que usa AssignmentOptimizer para cerrar 39h."""
+    for code in ('FDC_MANANA', 'FDC_TARDE', 'VDC_MANANA', 'VDC_TARDE'):
+        template = ShiftTemplate.objects.get(code=code)
+        end = (template.start_time.hour + 7) % 24
+        ShiftTemplate.objects.get_or_create(
+            code=f'{code}_CORTO',
+            defaults={
+                'name': f'{template.name} corto',
+                'role': template.role,
+                'time_block': template.time_block,
+                'start_time': template.start_time,
+                'end_time': time(end, template.start_time.minute),
+                'weekly_hours_target': template.weekly_hours_target,
+                'max_daily_hours': 7,
+            }
+        )
+
+
+def _create_zones_and_rooms(config: HotelConfig, rng: random.Random) -> int:
+    Room.objects.all().delete()
+    Zone.objects.all().delete()
+    building, _ = Building.objects.get_or_create(code='MAIN', defaults={'name': 'Edificio Principal'})
+
+    room_types = list(RoomType.objects.order_by('time_multiplier'))
+    weights = [70, 20, 7, 3][:len(room_types)]
+
+    zone_count = config.floors * config.zones_per_floor
+    zones = []
+    for floor in range(1, config.floors + 1):
+        for part in range(config.zones_per_floor):
+            zones.append(Zone(
+                code=f'P{floor}{chr(65 + part)}',
+                name=f'Piso {floor} {chr(65 + part)}',
+                building=building,
+                floor_number=floor,
+                priority_order=len(zones) + 1,
+            ))
+    Zone.objects.bulk_create(zones)
+    zones = list(Zone.objects.order_by('priority_order'))
+
+    rooms = []
+    per_zone = {}
+    for i in range(config.rooms):
+        zone = zones[i * zone_count // config.rooms]
+        order = per_zone[zone.id] = per_zone.get(zone.id, 0) + 1
+        rooms.append(Room(
+            number=f'{zone.floor_number:02d}{i:04d}',
+            zone=zone,
+            room_type=rng.choices(room_types, weights)[0],
+            order_in_zone=order,
+            corridor_side='A' if order % 2 else 'B',
+        ))
+    Room.objects.bulk_create(rooms)
+    return len(zones)
+
+
+def _create_housekeepers(config: HotelConfig, rng: random.Random) -> int:
+    Employee.objects.filter(role__code__in=['FDC', 'VDC']).delete()
+
+    roles = {role.code: role for role in Role.objects.filter(code__in=['FDC', 'VDC'])}
+    day_block = TimeBlock.objects.get(code='DAY')
+    evening_block = TimeBlock.objects.get(code='EVENING')
+    room_tasks = list(TaskType.objects.filter(
+        code__in=['DEPART', 'RECOUCH', 'ARRIVAL', 'ARRIVAL_VIP', 'COUVERTURE', 'TOUCHUP']
+    ))
+    days = list(DayOfWeek.objects.order_by('iso_weekday'))
+
+    employees = []
+    for i in range(config.employees):
+        role_code = 'FDC' if i % 2 == 0 else 'VDC'
+        emp = Employee.objects.create(
+            employee_code=f'BENCH{i:04d}',
+            first_name=f'{role_code.title()}{i}',
+            last_name=f'BENCH{i:04d}',
+            role=roles[role_code],
+            weekly_hours_target=39 if i % 5 else 35,
+            elasticity=('LOW', 'MEDIUM', 'HIGH')[i % 3],
+            is_active=True,
+        )
+        # 70% ambos bloques, 20% solo mañana, 10% solo tarde
+        draw = rng.random()
+        if draw < 0.7:
+            emp.allowed_blocks.set([day_block, evening_block])
+        elif draw < 0.9:
+            emp.allowed_blocks.set([day_block])
+        else:
+            emp.allowed_blocks.set([evening_block])
+        emp.eligible_tasks.set(room_tasks)
+        if i % 4 == 3 and days:
+            first = rng.randrange(len(days) - 1)
+            emp.fixed_days_off.set(days[first:first + 2])
+        employees.append(emp)
+
+    # Parejas FIXED entre empleados sin días libres fijos
+    candidates = [emp for i, emp in enumerate(employees) if i % 4 != 3]
+    for n in range(min(config.fixed_teams, len(candidates) // 2)):
+        pair = candidates[2 * n:2 * n + 2]
+        pair[1].allowed_blocks.set(pair[0].allowed_blocks.all())
+        team = Team.objects.create(name=f'Pareja {n + 1}', team_type='FIXED')
+        team.members.set(pair)
+
+    return len(employees)
+
+
+def synthetic_forecast(config: HotelConfig) -> List[Dict]:
+    """Forecast diario (formato WeekPlan.forecast_data) con picos de fin de semana."""
+    rng = random.Random(config.seed + 1)
+    forecast = []
+    for offset in range(config.weeks * 7):
+        day = config.start + timedelta(days=offset)
+        rate = 0.70 + (0.15 if day.weekday() >= 4 else 0) + rng.uniform(-0.08, 0.08)
+        occupied = max(0, min(config.rooms, round(config.rooms * rate)))
+        departures = round(occupied * rng.uniform(0.2, 0.4))
+        arrivals = min(config.rooms - occupied + departures, round(departures * rng.uniform(0.8, 1.2)))
+        forecast.append({
+            'date': day.isoformat(),
+            'departures': departures,
+            'arrivals': max(0, arrivals),
+            'occupied': occupied,
+        })
+    return forecast
+
+
+def build_protel_csv(forecast: List[Dict], room_numbers: List[str]) -> str:
+    """CSV Protel coherente con el forecast: salidas, llegadas, recouch y couverture."""
+    lines = ['date,room,housekeeping_type,arrival_time,departure_time,status,guest_name,stay_day,vip']
+    for day_index, day in enumerate(forecast):
+        # Rotar habitaciones para que cada día afecte a otras
+        shift = (day_index * 7) % max(1, len(room_numbers))
+        rooms = room_numbers[shift:] + room_numbers[:shift]
+        departures = rooms[:day['departures']]
+        arrivals = rooms[:day['arrivals']]
+        occupied = rooms[:day['occupied']]
+
+        for number in departures:
+            lines.append(f"{day['date']},{number},DEPART,,11:00,CHECKOUT,,1,0")
+        for i, number in enumerate(arrivals):
+            lines.append(f"{day['date']},{number},ARRIVAL,15:00,,CHECKIN,,1,{int(i % 10 == 0)}")
+        departed = set(departures)
+        for number in occupied:
+            if number not in departed:
+                lines.append(f"{day['date']},{number},RECOUCH,,,OCCUPIED,,{day_index % 6 + 2},0")
+            lines.append(f"{day['date']},{number},COUVERTURE,,,OCCUPIED,,{day_index % 6 + 2},0")
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,157 @@
+"""
+Benchmark del kernel de distribución (apps.planning.services.distribution_kernel)
+sin Django ni BD: días sintéticos aleatorios, en serie y en un pool de
+procesos. Además de medir días/segundo comprueba invariantes de cada
+resultado (habitaciones conservadas, spare dentro del período, cada
+empleado en una sola unidad) y sale con error si alguno falla:
+
+    cd backend
+    python -m benchmarks.kernel --days 20000 --workers 4
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Tuple
+
+from apps.planning.services.distribution_kernel import (
+    KernelConfig, PeriodConfig, TaskTimes, TeamInfo, calculate_day_distribution,
+)
+
+
+# Turnos por defecto de DailyDistributionCalculator
+DEFAULT_PERIODS = PeriodConfig.from_shifts(
+    day_start='09:00', day_end='17:30', day_break_start='12:30', day_break_end='13:30',
+    evening_start='13:30', evening_end='22:00', evening_break_start='18:30', evening_break_end='19:00',
+)
+
+WORK_PERIODS = ('p1', 'p2', 'p3')
+
+
+def synthetic_kernel(employees: int, fixed_teams: int, seed: int) -> KernelConfig:
+    rng = random.Random(seed)
+    staff = tuple(
+        {'id': emp_id, 'name': f'E{emp_id}', 'role': 'FDC' if emp_id % 2 else 'VDC', 'weekly_target': 39.0}
+        for emp_id in range(1, employees + 1)
+    )
+    teams = tuple(
+        TeamInfo(index + 1, f'Pareja {index + 1}', 'FIXED', (2 * index + 1, 2 * index + 2))
+        for index in range(min(fixed_teams, employees // 2))
+    )
+    return KernelConfig(
+        task_times=TaskTimes(),
+        periods=DEFAULT_PERIODS,
+        teams=teams,
+        housekeeping_staff=staff,
+        employee_elasticity={emp['id']: rng.choice(['BAJA', 'MEDIA', 'ALTA']) for emp in staff},
+        elasticity_max_day={'BAJA': 0.0, 'MEDIA': 60.0, 'ALTA': 120.0},
+    )
+
+
+def synthetic_days(config: KernelConfig, days: int, seed: int) -> List[Tuple[Dict, List[Dict], List[Dict]]]:
+    """(forecast, assigned_day, assigned_evening) aleatorios."""
+    rng = random.Random(seed)
+    staff = [emp['id'] for emp in config.housekeeping_staff]
+    result = []
+    for _ in range(days):
+        occupied = rng.randint(0, 120)
+        forecast = {
+            'departures': rng.randint(0, 60),
+            'arrivals': rng.randint(0, occupied),
+            'occupied': occupied,
+        }
+        working = rng.sample(staff, rng.randint(0, len(staff)))
+        split = rng.randint(0, len(working))
+        assigned_day = [{'employee_id': emp_id, 'employee_short': f'E{emp_id}'} for emp_id in working[:split]]
+        assigned_evening = [
+            {'employee_id': emp_id, 'employee_short': f'E{emp_id}', 'end_time': rng.choice(['21:30', '22:00'])}
+            for emp_id in working[split:]
+        ]
+        result.append((forecast, assigned_day, assigned_evening))
+    return result
+
+
+def check_day(config: KernelConfig, day, distribution: Dict[str, Any]) -> List[str]:
+    """Invariantes de un resultado; devuelve los que fallan."""
+    _, assigned_day, assigned_evening = day
+    errors = []
+    summary = distribution['summary']
+    periods = distribution['periods']
+
+    done = sum(periods[p]['rooms_done'] for p in WORK_PERIODS)
+    if done + summary['rooms_deficit'] != summary['total_rooms']:
+        errors.append('habitaciones no conservadas')
+
+    period_minutes = {'p1': config.periods.p1_min, 'p2': config.periods.p2_min, 'p3': config.periods.p3_min}
+    for name in WORK_PERIODS:
+        seen = set()
+        for unit in periods[name]['units_work']:
+            if not 0 <= unit['spare_min'] <= period_minutes[name]:
+                errors.append(f'{name}: spare fuera del período')
+            for emp_id in unit.get('ids', []):
+                if emp_id in seen:
+                    errors.append(f'{name}: empleado {emp_id} en dos unidades')
+                seen.add(emp_id)
+
+    if distribution['workers']['total_count'] != len(assigned_day) + len(assigned_evening):
+        errors.append('recuento de trabajadores')
+    return errors
+
+
+def run_chunk(config: KernelConfig, days) -> Tuple[int, List[str]]:
+    errors = []
+    for day in days:
+        errors.extend(check_day(config, day, calculate_day_distribution(config, *day)))
+    return len(days), errors
+
+
+def run(config: KernelConfig, days, workers: int) -> Tuple[float, List[str]]:
+    began = time.perf_counter()
+    if workers == 1:
+        _, errors = run_chunk(config, days)
+    else:
+        size = max(1, len(days) // (workers * 4))
+        chunks = [days[i:i + size] for i in range(0, len(days), size)]
+        errors = []
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for _, chunk_errors in pool.map(run_chunk, [config] * len(chunks), chunks):
+                errors.extend(chunk_errors)
+    return time.perf_counter() - began, errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--days', type=int, default=10000)
+    parser.add_argument('--employees', type=int, default=16)
+    parser.add_argument('--fixed-teams', type=int, default=2)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--seed', type=int, default=42)
+    options = parser.parse_args(argv)
+
+    config = synthetic_kernel(options.employees, options.fixed_teams, options.seed)
+    days = synthetic_days(config, options.days, options.seed)
+
+    result = {'days': options.days, 'employees': options.employees, 'runs': {}}
+    failures = []
+    for workers in sorted({1, max(1, options.workers)}):
+        seconds, errors = run(config, days, workers)
+        result['runs'][f'workers_{workers}'] = {
+            'seconds': round(seconds, 4),
+            'days_per_second': round(options.days / seconds) if seconds else None,
+        }
+        failures.extend(errors)
+
+    result['invariant_failures'] = len(failures)
+    print(json.dumps(result, indent=2))
+    if failures:
+        for error in sorted(set(failures)):
+            print(f'ERROR: {error}', file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,145 @@
+"""
+Runner de benchmarks: ejecuta el pipeline de planificación sobre el hotel
+sintético y mide tiempo y queries de cada paso.
+"""
+import platform
+import subprocess
+import time
+from dataclasses import asdict
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict
+
+import django
+from django.conf import settings
+from django.db import connection
+from django.test import Client
+
+from apps.core.models import Room
+from apps.rooms.importers import ProtelCSVImporter
+from apps.planning.services.load import LoadCalculator
+from apps.planning.services.capacity import CapacityCalculator
+from apps.planning.services.week_plan_generator import WeekPlanGenerator
+from apps.planning.services.assignment_optimizer import AssignmentOptimizer
+from apps.planning.services.daily_plan_generator import DailyPlanGenerator
+from apps.planning.services.query_count import count_queries
+
+from .hotel import HotelConfig, build_hotel, synthetic_forecast, build_protel_csv
+
+
+# Versión del formato JSON (cambiar si cambian las claves)
+RESULT_FORMAT = 1
+
+
+class StepTimer:
+    """Acumula tiempo y queries por paso (uno o varios llamados)."""
+
+    def __init__(self):
+        self.steps: Dict[str, Dict[str, Any]] = {}
+
+    def measure(self, name: str, func: Callable, *args, **kwargs):
+        began = time.perf_counter()
+        with count_queries() as counter:
+            result = func(*args, **kwargs)
+        elapsed = time.perf_counter() - began
+
+        step = self.steps.setdefault(name, {'calls': 0, 'runs': []})
+        step['calls'] += 1
+        step['runs'].append({'seconds': round(elapsed, 4), 'queries': counter.count})
+        return result
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        result = {}
+        for name, step in self.steps.items():
+            seconds = [run['seconds'] for run in step['runs']]
+            queries = [run['queries'] for run in step['runs']]
+            result[name] = {
+                'calls': step['calls'],
+                'seconds_total': round(sum(seconds), 4),
+                'seconds_mean': round(sum(seconds) / len(seconds), 4),
+                'seconds_max': max(seconds),
+                'queries_total': sum(queries),
+                'queries_mean': round(sum(queries) / len(queries), 1),
+                'queries_max': max(queries),
+                'runs': step['runs'],
+            }
+        return result
+
+
+def run_planning_benchmark(config: HotelConfig, log: Callable[[str], None] = None) -> Dict[str, Any]:
+    """
+    Genera el hotel y mide, por semana de forecast:
+    import Protel (todas las semanas de una vez), carga y capacidad semanal,
+    WeekPlan, optimize_assignments, DailyPlan del lunes y los endpoints
+    dashboard / by_employee.
+    """
+    log = log or (lambda message: None)
+    timer = StepTimer()
+
+    log('Generando hotel sintético...')
+    hotel = timer.measure('build_hotel', build_hotel, config)
+
+    forecast = synthetic_forecast(config)
+    room_numbers = list(Room.objects.filter(is_active=True).order_by('zone__priority_order', 'order_in_zone')
+                        .values_list('number', flat=True))
+    csv_content = build_protel_csv(forecast, room_numbers)
+
+    log(f'Importando CSV Protel ({csv_content.count(chr(10)) - 1} filas)...')
+    success, import_log = timer.measure(
+        'protel_import', ProtelCSVImporter().import_csv, csv_content, filename='benchmark.csv'
+    )
+    if not success:
+        raise RuntimeError(f'Importación fallida: {import_log.errors}')
+
+    client = Client()
+    for week in range(config.weeks):
+        week_start = config.start + timedelta(weeks=week)
+        week_forecast = forecast[week * 7:(week + 1) * 7]
+        log(f'Semana {week_start}...')
+
+        timer.measure('compute_week_load', LoadCalculator().compute_week_load, week_start)
+        timer.measure('compute_week_capacity', CapacityCalculator().compute_week_capacity, week_start)
+
+        week_plan = timer.measure(
+            'generate_week_plan', WeekPlanGenerator().generate_week_plan, week_start, created_by='benchmark'
+        )
+        week_plan.forecast_data = week_forecast
+        week_plan.save(update_fields=['forecast_data'])
+
+        timer.measure('optimize_assignments', AssignmentOptimizer().optimize_assignments, week_plan)
+        timer.measure('generate_daily_plan', DailyPlanGenerator().generate_daily_plan, week_start, week_plan)
+
+        for name, url, params in (
+            ('api_dashboard', '/api/dashboard/', {'week_start': week_start.isoformat()}),
+            ('api_dashboard_materialized', '/api/dashboard/',
+             {'week_start': week_start.isoformat(), 'source': 'materialized'}),
+            ('api_by_employee', f'/api/week-plans/{week_plan.id}/by_employee/', {}),
+        ):
+            response = timer.measure(name, client.get, url, params)
+            if response.status_code != 200:
+                raise RuntimeError(f'{url} respondió {response.status_code}')
+
+    hotel_config = asdict(config)
+    hotel_config['start'] = config.start.isoformat()
+    return {
+        'format': RESULT_FORMAT,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'environment': {
+            'git_revision': _git_revision(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'debug': settings.DEBUG,
+        },
+        'hotel': {**hotel_config, **{f'created_{key}': value for key, value in hotel.items()}},
+        'steps': timer.summary(),
+    }
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True, cwd=settings.BASE_DIR
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
@@ -0,0 +1,18 @@
+"""
+Settings para benchmarks: misma configuración que config.settings pero
+con una BD SQLite descartable. benchmark_planning se niega a correr sin
+BENCHMARK_DATABASE porque vacía la BD antes de generar el hotel.
+"""
+import os
+
+from config.settings import *  # noqa: F401,F403
+from config.settings import BASE_DIR
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ.get('BENCHMARK_DB_PATH', str(BASE_DIR / 'benchmarks' / 'benchmark.sqlite3')),
+    }
+}
+
+BENCHMARK_DATABASE = True
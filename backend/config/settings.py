@@ -34,6 +34,7 @@ INSTALLED_APPS = [
     'apps.rooms',
     'apps.rules',
     'apps.planning',
+    'apps.jobs',
     'apps.api',
 ]
 
@@ -101,8 +102,63 @@ USE_TZ = True
 STATIC_URL = 'static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
+# Media (archivos subidos para trabajos en segundo plano)
+MEDIA_URL = 'media/'
+MEDIA_ROOT = Path(os.environ.get('DJANGO_MEDIA_ROOT', BASE_DIR / 'media'))
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Cache: file (default) o db, compartidas entre procesos (db requiere
+# `python manage.py createcachetable`). locmem solo sirve para un proceso y
+# no pasa el system check planning.E001: la versión de la foto de
+# configuración se comparte a través de la cache.
+CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', 'housekeeping'),
+    'file': ('django.core.cache.backends.filebased.FileBasedCache', str(BASE_DIR / '.cache')),
+    'db': ('django.core.cache.backends.db.DatabaseCache', 'django_cache'),
+}
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'file')
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND][0],
+        'LOCATION': os.environ.get('CACHE_LOCATION', CACHE_BACKENDS[CACHE_BACKEND][1]),
+    }
+}
+
+# Respuestas cacheadas de la API (dashboard, by_employee, load_explanation).
+# Las claves llevan la versión de datos: el timeout solo limita el tamaño.
+# Activas por defecto solo con una cache compartida (system check planning.E002).
+API_RESPONSE_CACHE = os.environ.get(
+    'API_RESPONSE_CACHE', str(CACHE_BACKEND != 'locmem'),
+).lower() == 'true'
+API_RESPONSE_CACHE_TIMEOUT = int(os.environ.get('API_RESPONSE_CACHE_TIMEOUT', '86400'))
+
+# Planning config snapshot: compartir la foto entre procesos vía CACHES
+PLANNING_CONFIG_SHARED_CACHE = os.environ.get('PLANNING_CONFIG_SHARED_CACHE', 'False').lower() == 'true'
+
+# Simulador de escenarios en la API: procesos del pool. Por defecto 1 (en el
+# proceso de la petición, sin pool); 0 = número de CPUs. El comando
+# simulate_scenario usa su propio --workers (default: CPUs).
+SCENARIO_SIMULATOR_WORKERS = int(os.environ.get('SCENARIO_SIMULATOR_WORKERS', '1')) or None
+
+# Optimizador de asignaciones: segundos de búsqueda local por defecto (engine=local_search)
+ASSIGNMENT_SOLVER_TIME_BUDGET = float(os.environ.get('ASSIGNMENT_SOLVER_TIME_BUDGET', '2.0'))
+
+# Reparación incremental (week-plans/{id}/repair): tope de segundos de búsqueda
+ASSIGNMENT_REPAIR_TIME_BUDGET = float(os.environ.get('ASSIGNMENT_REPAIR_TIME_BUDGET', '0.5'))
+
+# Plan diario: segundos de búsqueda local del router de zonas por bloque
+ZONE_ROUTING_TIME_BUDGET = float(os.environ.get('ZONE_ROUTING_TIME_BUDGET', '0.5'))
+
+# Planes diarios por lotes: procesos del pool (0 = número de CPUs)
+DAILY_PLAN_BATCH_WORKERS = int(os.environ.get('DAILY_PLAN_BATCH_WORKERS', '0')) or None
+
+# Planificación por horizonte: máximo de días seguidos de trabajo (también entre semanas)
+HORIZON_MAX_CONSECUTIVE_DAYS = int(os.environ.get('HORIZON_MAX_CONSECUTIVE_DAYS', '6'))
+
+# Dashboard: 'live' (recalcula la semana) o 'materialized' (lee DailyLoadSummary)
+DASHBOARD_LOAD_SOURCE = os.environ.get('DASHBOARD_LOAD_SOURCE', 'live')
+
 # CORS settings
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOWED_ORIGINS = [